@@ -34,6 +34,12 @@ class UserRole(str, enum.Enum):
     VENDOR = "vendor"
 
 
+class OrderIntakeStatus(str, enum.Enum):
+    QUEUED = "queued"
+    CONFIRMED = "confirmed"
+    FAILED = "failed"
+
+
 class PaymentStatus(str, enum.Enum):
     PENDING = "pending"
     SUCCESS = "success"
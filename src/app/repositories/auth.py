@@ -2,7 +2,18 @@ from fastapi import HTTPException, status
 from supabase import AsyncClient
 
 from app import schemas
-from app.security import create_access_token, get_password_hash, verify_password
+from app.repositories.sessions import session_access_token, start_session
+from app.security import get_password_hash, verify_password
+from db.postgres import direct_pool, fetch
+
+_EMAIL_EXISTS_SQL = {
+    "users": "SELECT 1 FROM users WHERE email = $1 LIMIT 1",
+    "vendors": "SELECT 1 FROM vendors WHERE email = $1 LIMIT 1",
+}
+_LOGIN_SQL = {
+    "users": "SELECT id, email, password_hash FROM users WHERE email = $1",
+    "vendors": "SELECT id, email, password_hash FROM vendors WHERE email = $1",
+}
 
 
 async def register(
@@ -19,14 +30,21 @@ async def register(
             detail="Invalid role. Must be 'student' or 'vendor'",
         )
 
-    response = await (
-        client.table(table_name)
-        .select("email", "name")
-        .eq("email", request.email)
-        .execute()
-    )
+    pool = direct_pool(client)
+    if pool is not None:
+        existing = await fetch(
+            pool, table_name, _EMAIL_EXISTS_SQL[table_name], request.email
+        )
+    else:
+        response = await (
+            client.table(table_name)
+            .select("email", "name")
+            .eq("email", request.email)
+            .execute()
+        )
+        existing = response.data
 
-    if response.data:
+    if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
@@ -56,41 +74,44 @@ async def login(
     request: schemas.LoginRequest, client: AsyncClient
 ) -> schemas.LoginResponse:
     table_name = ""
-    id_field = ""
     if request.role == "student":
         table_name = "users"
-        id_field = "user_id"
     elif request.role == "vendor":
         table_name = "vendors"
-        id_field = "vendor_id"
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid role. Must be 'student' or 'vendor'",
         )
 
-    response = (
-        await client.table(table_name)
-        .select("id", "email", "password_hash")
-        .eq("email", request.email)
-        .execute()
-    )
-    if not response.data:
+    pool = direct_pool(client)
+    if pool is not None:
+        rows = await fetch(pool, table_name, _LOGIN_SQL[table_name], request.email)
+    else:
+        response = (
+            await client.table(table_name)
+            .select("id", "email", "password_hash")
+            .eq("email", request.email)
+            .execute()
+        )
+        rows = response.data
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    user = response.data[0]
+    user = rows[0]
 
     if not verify_password(request.password, user.get("password_hash")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect password"
         )
 
-    token = create_access_token(
-        data={id_field: str(user.get("id")), "role": request.role}
-    )
+    account_id = str(user.get("id"))
+    role = request.role.value
+    refresh_token, family_id = await start_session(client, account_id, role)
+    token = session_access_token(account_id, role, family_id)
 
-    return schemas.LoginResponse(success=True, token=token)
+    return schemas.LoginResponse(success=True, token=token, refresh_token=refresh_token)
 
 
 
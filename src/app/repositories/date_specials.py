@@ -6,7 +6,10 @@ from fastapi import HTTPException, status
 from supabase import AsyncClient  # Use supabase_async
 
 from app import schemas
-from utils.logger import logger  # Assuming logger is available
+from app.repositories import inventory, prices
+from utils.logger import get_logger  # Assuming logger is available
+
+logger = get_logger(__name__)
 
 # --- Security Helper ---
 
@@ -83,6 +86,8 @@ async def create_special(
             )
 
         new_item_id = insert_response.data[0].get("id")
+        inventory.INVENTORY.forget(request.menu_item_id)
+        prices.invalidate(request.menu_item_id)
 
         # Step 3b: Fetch the newly created item with its join
         response = (
@@ -106,7 +111,7 @@ async def create_special(
     except HTTPException as e:
         raise e  # Re-throw known HTTP exceptions
     except Exception as e:
-        logger.error(f"Error creating special: {e}")
+        logger.error("Error creating special: %s", e)
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
 
 
@@ -139,7 +144,7 @@ async def get_vendor_specials(
         return validated_list
 
     except Exception as e:
-        logger.error(f"Error getting vendor specials: {e}")
+        logger.error("Error getting vendor specials: %s", e)
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
 
 
@@ -171,7 +176,7 @@ async def get_specials_for_date(
         return validated_list
 
     except Exception as e:
-        logger.error(f"Error getting specials for date {query_date}: {e}")
+        logger.error("Error getting specials for date %s: %s", query_date, e)
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
 
 
@@ -225,6 +230,8 @@ async def update_special(
             raise HTTPException(
                 status.HTTP_404_NOT_FOUND, "Special not found or update failed."
             )
+        inventory.INVENTORY.forget(update_response.data[0].get("menu_item_id"))
+        prices.invalidate(update_response.data[0].get("menu_item_id"))
 
         # Step 3: Fetch the updated item with its join
         response = (
@@ -245,7 +252,7 @@ async def update_special(
             )
 
     except Exception as e:
-        logger.error(f"Error updating special {special_id}: {e}")
+        logger.error("Error updating special %s: %s", special_id, e)
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
 
 
@@ -286,9 +293,11 @@ async def delete_special(
             raise HTTPException(
                 status.HTTP_404_NOT_FOUND, "Special not found or delete failed."
             )
+        inventory.INVENTORY.forget(response.data[0].get("menu_item_id"))
+        prices.invalidate(response.data[0].get("menu_item_id"))
 
         return None
 
     except Exception as e:
-        logger.error(f"Error deleting special {special_id}: {e}")
+        logger.error("Error deleting special %s: %s", special_id, e)
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
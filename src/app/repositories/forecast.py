@@ -0,0 +1,195 @@
+import asyncio
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from supabase import AsyncClient
+
+from app import schemas
+from app.settings import settings
+from utils.logger import get_logger
+from utils.metrics import REGISTRY
+from utils.serialization import validate_list
+
+logger = get_logger(__name__)
+
+FORECAST_CACHE = REGISTRY.counter(
+    "forecast_cache_total",
+    "Vendor forecast lookups, by whether they were served from the cache.",
+    labelnames=("result",),
+)
+
+
+class ForecastCache:
+    """
+    Forecasts per (vendor, first day, days). Each vendor has a generation
+    that new orders and subscriptions bump; a forecast computed while the
+    generation moved is not stored, so a racing write is never hidden.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, date, int], Tuple[float, int, list]] = {}
+        self._generations: Dict[str, int] = {}
+
+    def generation(self, vendor_id: str) -> int:
+        return self._generations.get(vendor_id, 0)
+
+    def get(self, vendor_id: str, start: date, days: int) -> Optional[list]:
+        entry = self._entries.get((vendor_id, start, days))
+        if entry is None:
+            return None
+        stored_at, generation, forecast = entry
+        if (
+            generation != self.generation(vendor_id)
+            or time.monotonic() - stored_at >= settings.FORECAST_CACHE_SECONDS
+        ):
+            del self._entries[(vendor_id, start, days)]
+            return None
+        return forecast
+
+    def put(
+        self, vendor_id: str, start: date, days: int, generation: int, forecast: list
+    ) -> None:
+        if generation != self.generation(vendor_id):
+            return
+        # Forecasts for earlier days are never asked for again.
+        for key in [k for k in self._entries if k[1] < start]:
+            del self._entries[key]
+        self._entries[(vendor_id, start, days)] = (
+            time.monotonic(),
+            generation,
+            forecast,
+        )
+
+    def invalidate(self, vendor_id: str) -> None:
+        self._generations[vendor_id] = self.generation(vendor_id) + 1
+
+
+FORECASTS = ForecastCache()
+
+
+def invalidate(vendor_id: UUID) -> None:
+    """Called after a write that changes what the vendor has to prepare."""
+    FORECASTS.invalidate(str(vendor_id))
+
+
+async def get_vendor_forecast(
+    vendor_id: UUID,
+    client: AsyncClient,
+    days: int = 7,
+    start: Optional[date] = None,
+) -> List[schemas.ForecastDay]:
+    """
+    Per-day, per-item quantities for the vendor's next `days` days: orders
+    already placed (summed per item and day in the database), date special
+    stock caps and the number of active subscriptions (counted per start and
+    end date in the database). The vendor's full order and subscription
+    history never leaves Supabase.
+    """
+    vendor = str(vendor_id)
+    start = start or date.today()
+    cached = FORECASTS.get(vendor, start, days)
+    if cached is not None:
+        FORECAST_CACHE.inc(result="hit")
+        return cached
+    FORECAST_CACHE.inc(result="miss")
+    generation = FORECASTS.generation(vendor)
+    end = start + timedelta(days=days)
+
+    try:
+        items = (
+            await client.table("menu_items")
+            .select("id, name")
+            .eq("vendor_id", vendor)
+            .execute()
+        )
+        names = {row["id"]: row["name"] for row in items.data}
+        item_ids = list(names)
+        weekly, specials, orders, subscriptions = await asyncio.gather(
+            client.table("weekly_availability")
+            .select("menu_item_id, day_of_week")
+            .in_("menu_item_id", item_ids)
+            .eq("is_available", True)
+            .execute(),
+            client.table("date_specials")
+            .select("menu_item_id, available_date, available_stock")
+            .in_("menu_item_id", item_ids)
+            .gte("available_date", start.isoformat())
+            .lt("available_date", end.isoformat())
+            .execute(),
+            client.table("orders")
+            .select("menu, day:order_date::date, ordered:quantity.sum()")
+            .eq("vendor_id", vendor)
+            .gte("order_date", start.isoformat())
+            .lt("order_date", end.isoformat())
+            .execute(),
+            client.table("subscription")
+            .select("starts:starts_from::date, ends:ends_at::date, subscribers:count()")
+            .eq("vendor_id", vendor)
+            .gt("ends_at", start.isoformat())
+            .lt("starts_from", end.isoformat())
+            .execute(),
+        )
+    except Exception as e:
+        logger.error("Failed to build forecast for vendor %s: %s", vendor, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to build forecast: {str(e)}",
+        )
+
+    # day_of_week follows enums.DayOfWeek (0 = Sunday), as in the menu feed.
+    weekly_items = defaultdict(set)
+    for row in weekly.data:
+        weekly_items[int(row["day_of_week"])].add(row["menu_item_id"])
+    caps = {
+        (row["available_date"], row["menu_item_id"]): row.get("available_stock")
+        for row in specials.data
+    }
+    ordered = defaultdict(dict)
+    for row in orders.data:
+        ordered[row["day"]][row["menu"]] = int(row["ordered"] or 0)
+
+    forecast = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        key = day.isoformat()
+        item_ids = (
+            weekly_items[(day.weekday() + 1) % 7]
+            | {item_id for (d, item_id) in caps if d == key}
+            | set(ordered[key])
+        )
+        rows = []
+        for item_id in sorted(item_ids, key=lambda i: (names.get(i) or "", i)):
+            quantity = ordered[key].get(item_id, 0)
+            # available_stock is what is left: orders claim their stock
+            # (app.repositories.inventory), so they never exceed the special.
+            remaining = caps.get((key, item_id))
+            rows.append(
+                {
+                    "menu_item_id": item_id,
+                    "name": names.get(item_id),
+                    "ordered": quantity,
+                    "stock_cap": None if remaining is None else quantity + remaining,
+                    "expected": quantity,
+                }
+            )
+        subscribers = sum(
+            row["subscribers"]
+            for row in subscriptions.data
+            if row["starts"] <= key < row["ends"]
+        )
+        forecast.append(
+            {
+                "day": key,
+                "subscriptions": subscribers,
+                "items": rows,
+                "total_expected": subscribers + sum(r["expected"] for r in rows),
+            }
+        )
+
+    result = validate_list(schemas.ForecastDay, forecast)
+    FORECASTS.put(vendor, start, days, generation, result)
+    return result
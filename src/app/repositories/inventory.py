@@ -0,0 +1,207 @@
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from supabase import AsyncClient
+
+from app.settings import settings
+from utils.logger import get_logger
+from utils.metrics import REGISTRY
+
+logger = get_logger(__name__)
+
+STOCK_CLAIMS = REGISTRY.counter(
+    "special_stock_claims_total",
+    "Date-special stock claims, by outcome.",
+    labelnames=("outcome",),
+)
+
+
+@dataclass
+class Reservation:
+    """Stock claimed for one order, held until the order is written."""
+
+    id: str
+    menu_item_id: str
+    day: str
+    quantity: int
+    expires_at: float
+
+    def claim(self) -> Dict[str, Any]:
+        """The claimed stock, as release_special_stock takes it."""
+        return {"item": self.menu_item_id, "day": self.day, "quantity": self.quantity}
+
+
+class Inventory:
+    """
+    Date-special stock. The database is the source of truth: a claim is a
+    conditional decrement (claim_special_stock, migration 004) that only
+    succeeds while enough stock is left, so workers cannot oversell between
+    them. Claims arriving within INVENTORY_BATCH_WINDOW_SECONDS are sent as
+    one RPC, and an item seen sold out is refused without a round trip for
+    INVENTORY_SOLD_OUT_SECONDS.
+
+    Claimed stock is held for its order: `confirm` keeps it once the order is
+    written (or durably queued), `release` gives it back, and `expire` gives
+    back holds nobody confirmed within INVENTORY_HOLD_SECONDS. `give_back`
+    returns confirmed stock of queued orders that failed to be written.
+    """
+
+    def __init__(self):
+        self._holds: Dict[str, Reservation] = {}
+        # (menu item, day) -> (remaining stock, monotonic time seen); sold out only
+        self._sold_out: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._claims: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._releases: List[Dict[str, Any]] = []
+        self._flush: Optional[asyncio.Task] = None
+
+    async def reserve(
+        self, client: AsyncClient, menu_item_id: UUID, quantity: int, day: date
+    ) -> Reservation:
+        """Claims `quantity` of the item's special on `day`; 409 if not enough is left."""
+        key = (str(menu_item_id), day.isoformat())
+        seen = self._sold_out.get(key)
+        if seen is not None:
+            remaining, seen_at = seen
+            if time.monotonic() - seen_at >= settings.INVENTORY_SOLD_OUT_SECONDS:
+                del self._sold_out[key]
+            elif remaining < quantity:
+                STOCK_CLAIMS.inc(outcome="sold_out_cached")
+                raise _not_enough(remaining)
+
+        claim = {
+            "id": uuid.uuid4().hex,
+            "item": key[0],
+            "day": key[1],
+            "quantity": quantity,
+        }
+        future = asyncio.get_running_loop().create_future()
+        self._claims.append((claim, future))
+        self._schedule(client)
+        granted, remaining = await future
+
+        if not granted:
+            STOCK_CLAIMS.inc(outcome="sold_out")
+            self._sold_out[key] = (remaining or 0, time.monotonic())
+            raise _not_enough(remaining or 0)
+        STOCK_CLAIMS.inc(outcome="granted")
+        reservation = Reservation(
+            id=claim["id"],
+            menu_item_id=key[0],
+            day=key[1],
+            quantity=quantity,
+            expires_at=time.monotonic() + settings.INVENTORY_HOLD_SECONDS,
+        )
+        self._holds[reservation.id] = reservation
+        return reservation
+
+    def confirm(self, reservation: Reservation) -> None:
+        """The order was written; the stock stays claimed."""
+        self._holds.pop(reservation.id, None)
+
+    async def release(self, client: AsyncClient, reservation: Reservation) -> None:
+        """Gives the stock back (batched with other releases and claims)."""
+        if self._holds.pop(reservation.id, None) is None:
+            return
+        await self.give_back(client, [reservation.claim()])
+
+    async def give_back(
+        self, client: AsyncClient, claims: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Gives back confirmed stock whose orders were never written (failed in
+        the intake queue), as `Reservation.claim()` dicts.
+        """
+        for claim in claims:
+            self._sold_out.pop((claim["item"], claim["day"]), None)
+        self._releases.extend(claims)
+        self._schedule(client)
+
+    async def expire(self, client: AsyncClient) -> int:
+        """Releases holds past their deadline; returns how many."""
+        now = time.monotonic()
+        expired = [r for r in self._holds.values() if r.expires_at <= now]
+        for reservation in expired:
+            await self.release(client, reservation)
+        if expired:
+            logger.warning("Released %s abandoned stock reservations", len(expired))
+        return len(expired)
+
+    def forget(self, menu_item_id: UUID) -> None:
+        """Called when a vendor changes the item's specials."""
+        for key in [k for k in self._sold_out if k[0] == str(menu_item_id)]:
+            del self._sold_out[key]
+
+    # --- Batching ---
+
+    def _schedule(self, client: AsyncClient) -> None:
+        loop = asyncio.get_running_loop()
+        if (
+            self._flush is None
+            or self._flush.done()
+            or self._flush.get_loop() is not loop
+        ):
+            self._flush = loop.create_task(self._run_flush(client))
+
+    async def _run_flush(self, client: AsyncClient) -> None:
+        await asyncio.sleep(settings.INVENTORY_BATCH_WINDOW_SECONDS)
+        while self._claims or self._releases:
+            claims, self._claims = self._claims, []
+            releases, self._releases = self._releases, []
+            # Released stock first, so claims in the same batch can use it.
+            if releases:
+                try:
+                    await client.rpc(
+                        "release_special_stock", {"releases": releases}
+                    ).execute()
+                except Exception as e:
+                    logger.error(
+                        "Failed to release stock for %s orders: %s", len(releases), e
+                    )
+            if claims:
+                await self._send_claims(client, claims)
+
+    async def _send_claims(
+        self, client: AsyncClient, claims: List[Tuple[Dict[str, Any], asyncio.Future]]
+    ) -> None:
+        try:
+            response = await client.rpc(
+                "claim_special_stock", {"claims": [c for c, _ in claims]}
+            ).execute()
+        except Exception as e:
+            logger.error("Failed to claim stock for %s orders: %s", len(claims), e)
+            error = HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to reserve stock: {str(e)}",
+            )
+            for _, future in claims:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        results = {r["claim_id"]: r for r in response.data or []}
+        for claim, future in claims:
+            result = results.get(claim["id"], {})
+            granted = bool(result.get("granted"))
+            if not future.done():
+                future.set_result((granted, result.get("remaining")))
+            elif granted:
+                # The request went away while waiting: give its stock back.
+                self._releases.append(
+                    {k: claim[k] for k in ("item", "day", "quantity")}
+                )
+
+
+def _not_enough(remaining: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Not enough stock left for this special ({remaining} remaining)",
+    )
+
+
+INVENTORY = Inventory()
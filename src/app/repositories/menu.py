@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 from datetime import date
 from typing import Dict, List
@@ -6,7 +7,48 @@ from fastapi import HTTPException, UploadFile, status
 from supabase import AsyncClient
 
 from app import schemas
-from utils.logger import logger
+from app.repositories import prices
+from db.postgres import direct_pool, fetch
+from utils.logger import get_logger
+from utils.serialization import validate_list
+
+logger = get_logger(__name__)
+
+_SPECIALS_SQL = (
+    "SELECT ds.special_price AS ds_special_price, "
+    "ds.available_date AS ds_available_date, v.name AS v_name, mi.* "
+    "FROM date_specials ds "
+    "JOIN menu_items mi ON mi.id = ds.menu_item_id "
+    "JOIN vendors v ON v.id = mi.vendor_id "
+    "WHERE ds.available_date = $1"
+)
+_WEEKLY_SQL = (
+    "SELECT v.name AS v_name, mi.* "
+    "FROM weekly_availability wa "
+    "JOIN menu_items mi ON mi.id = wa.menu_item_id "
+    "JOIN vendors v ON v.id = mi.vendor_id "
+    "WHERE wa.day_of_week = $1 AND wa.is_available"
+)
+
+
+def _embedded(row: dict) -> dict:
+    """Reshapes a joined row like `*, menu_items!inner(*, vendors!inner(name))`."""
+    shaped = {"menu_items": {}}
+    for key, value in row.items():
+        if key.startswith("ds_"):
+            shaped[key[3:]] = value
+        elif key != "v_name":
+            shaped["menu_items"][key] = value
+    shaped["menu_items"]["vendors"] = {"name": row["v_name"]}
+    return shaped
+
+
+async def _fetch_today_rows(pool, today: date, weekday: int):
+    specials, weekly = await asyncio.gather(
+        fetch(pool, "date_specials", _SPECIALS_SQL, today),
+        fetch(pool, "weekly_availability", _WEEKLY_SQL, weekday),
+    )
+    return [_embedded(r) for r in specials], [_embedded(r) for r in weekly]
 
 
 async def get_all_menus(client: AsyncClient) -> List[schemas.MenuResponse]:
@@ -16,28 +58,36 @@ async def get_all_menus(client: AsyncClient) -> List[schemas.MenuResponse]:
     This function now queries the `date_specials` table and joins
     with `menu_items` and `vendors` to get all necessary details.
     """
+    generation = prices.PRICES.generation()
     try:
         today_date = date.today()
         today_iso = today_date.isoformat()
         today_weekday = (today_date.weekday() + 1) % 7
 
-        specials_resp = (
-            await client.table("date_specials")
-            .select("*, menu_items!inner(*, vendors!inner(name))")
-            .eq("available_date", today_iso)
-            .execute()
-        )
+        pool = direct_pool(client)
+        if pool is not None:
+            specials_rows, weekly_rows = await _fetch_today_rows(
+                pool, today_date, today_weekday
+            )
+        else:
+            specials_resp = (
+                await client.table("date_specials")
+                .select("*, menu_items!inner(*, vendors!inner(name))")
+                .eq("available_date", today_iso)
+                .execute()
+            )
 
-        weekly_resp = (
-            await client.table("weekly_availability")
-            .select("*, menu_items!inner(*, vendors!inner(name))")
-            .eq("day_of_week", today_weekday)
-            .eq("is_available", True)
-            .execute()
-        )
+            weekly_resp = (
+                await client.table("weekly_availability")
+                .select("*, menu_items!inner(*, vendors!inner(name))")
+                .eq("day_of_week", today_weekday)
+                .eq("is_available", True)
+                .execute()
+            )
+            specials_rows, weekly_rows = specials_resp.data, weekly_resp.data
 
     except Exception as e:
-        logger.error(f"Database query failed: {str(e)}")
+        logger.error("Database query failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database query failed: {str(e)}",
@@ -45,7 +95,7 @@ async def get_all_menus(client: AsyncClient) -> List[schemas.MenuResponse]:
 
     merged_items: Dict[str, dict] = {}
 
-    for item in weekly_resp.data:
+    for item in weekly_rows:
         m_item = item.get("menu_items")
         if m_item:
             merged_items[m_item["id"]] = {
@@ -54,7 +104,7 @@ async def get_all_menus(client: AsyncClient) -> List[schemas.MenuResponse]:
                 "date_source": today_iso,
             }
 
-    for special in specials_resp.data:
+    for special in specials_rows:
         m_item = special.get("menu_items")
         if m_item:
             merged_items[m_item["id"]] = {
@@ -66,6 +116,23 @@ async def get_all_menus(client: AsyncClient) -> List[schemas.MenuResponse]:
     if not merged_items:
         return []
 
+    # The feed is today's price list; orders are priced from it. Direct
+    # Postgres rows carry UUIDs and Decimals, the book is keyed by strings.
+    price_list = {}
+    for item_id, data in merged_items.items():
+        try:
+            price_list[str(item_id)] = (
+                float(
+                    data["special_price"]
+                    if data["special_price"] is not None
+                    else data["menu_data"].get("price")
+                ),
+                str(data["menu_data"].get("vendor_id")),
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning("Unusable price for %s: %s", item_id, e)
+    prices.PRICES.put_many(today_iso, price_list, generation)
+
     final_menus = []
 
     for item_id, data in merged_items.items():
@@ -93,7 +160,7 @@ async def get_all_menus(client: AsyncClient) -> List[schemas.MenuResponse]:
                 )
                 img_url = url_resp.get("signedURL")
             except Exception as e:
-                logger.warning(f"Signed URL failed for {item_id}: {e}")
+                logger.warning("Signed URL failed for %s: %s", item_id, e)
 
         try:
             final_menus.append(
@@ -111,7 +178,7 @@ async def get_all_menus(client: AsyncClient) -> List[schemas.MenuResponse]:
                 )
             )
         except Exception as e:
-            logger.error(f"Schema mapping failed for {item_id}: {e}")
+            logger.error("Schema mapping failed for %s: %s", item_id, e)
 
     return final_menus
 
@@ -128,12 +195,12 @@ async def add_menu_item(
             item_data["img_bucket"] = "menus"
             item_data["img_path"] = "menus/default-menu.jpg"
 
-        logger.info(f"Inserting new menu item: {item_data}")
+        logger.info("Inserting new menu item: %s", item_data)
         response = await client.table("menu_items").insert(item_data).execute()
 
         if response.data and len(response.data) > 0:
             new_item = response.data[0]
-            logger.info(f"successfully inserted item with id: {new_item.get("id")}")
+            logger.info("successfully inserted item with id: %s", new_item.get("id"))
             return schemas.MenuItemResponse.model_validate(new_item)
         else:
             logger.error("Item was not inserted or data was not returned")
@@ -143,7 +210,7 @@ async def add_menu_item(
             )
 
     except Exception as e:
-        logger.error(f"An unexpected error occured: {e}")
+        logger.error("An unexpected error occured: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occured: {e}",
@@ -164,7 +231,7 @@ async def get_all_menus_by_vendor(
         if not response.data:
             return []
 
-        items = []
+        rows = []
         for item in response.data:
             # Generate signed URL for image
             img_url = None
@@ -179,17 +246,15 @@ async def get_all_menus_by_vendor(
                     img_url = url_response.get("signedURL")
                 except Exception as e:
                     logger.warning(
-                        f"Failed to create signed URL for {item.get('id')}: {e}"
+                        "Failed to create signed URL for %s: %s", item.get("id"), e
                     )
 
-            # Create a new dict with img_url
-            item_with_url = {**item, "img_url": img_url}
-            items.append(schemas.MenuItemResponse.model_validate(item_with_url))
+            rows.append({**item, "img_url": img_url})
 
-        return items
+        return validate_list(schemas.MenuItemResponse, rows)
 
     except Exception as e:
-        logger.error(f"Error fetching menus for vendor {vendor_id}: {e}")
+        logger.error("Error fetching menus for vendor %s: %s", vendor_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch menu items: {str(e)}",
@@ -215,7 +280,7 @@ async def get_menu_item_by_id(
             status_code=status.HTTP_404_NOT_FOUND, detail="Menu item not found"
         )
     except Exception as e:
-        logger.warning(f"Failed to get item {item_id}: {e}")
+        logger.warning("Failed to get item %s: %s", item_id, e)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Menu Item not found"
         )
@@ -242,21 +307,22 @@ async def update_menu_item(
             .eq("vendor_id", str(vendor_id))
             .execute()
         )
+        prices.invalidate(item_id)
 
         if response.data and len(response.data) > 0:
             updated_item = response.data[0]
-            logger.info(f"Successfully updated item {item_id}")
+            logger.info("Successfully updated item %s", item_id)
             return schemas.MenuItemResponse.model_validate(updated_item)
         else:
             logger.warning(
-                f"Failed update attempt for item {item_id} by vendor_id {vendor_id}"
+                "Failed update attempt for item %s by vendor_id %s", item_id, vendor_id
             )
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Menu item not found or you do not have permission to update it.",
             )
     except Exception as e:
-        logger.error(f"Error updating item {item_id}: {e}")
+        logger.error("Error updating item %s: %s", item_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update menu item: {str(e)}",
@@ -274,20 +340,21 @@ async def delete_menu_item(
             .eq("vendor_id", str(vendor_id))
             .execute()
         )
+        prices.invalidate(item_id)
 
         if response.data and len(response.data) > 0:
-            logger.info(f"Successfully deleted item {item_id} by vendor {vendor_id}")
+            logger.info("Successfully deleted item %s by vendor %s", item_id, vendor_id)
             return None
         else:
             logger.warning(
-                f"Failed delete attempt for item {item_id} by vendor {vendor_id}"
+                "Failed delete attempt for item %s by vendor %s", item_id, vendor_id
             )
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Menu item not found or you do not have permission to delete it.",
             )
     except Exception as e:
-        logger.error(f"Error deleting item {item_id}: {e}")
+        logger.error("Error deleting item %s: %s", item_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete menu item: {str(e)}",
@@ -324,7 +391,7 @@ async def upload_menu_image(
                 detail="Menu item not found or unauthorized",
             )
     except Exception as e:
-        logger.error(f"Error verifying item: {e}")
+        logger.error("Error verifying item: %s", e)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Menu item not found"
         )
@@ -347,9 +414,9 @@ async def upload_menu_image(
         if old_path and old_path.startswith("menus/"):
             try:
                 await client.storage.from_(bucket_name).remove([old_path])
-                logger.info(f"Deleted old image: {old_path}")
+                logger.info("Deleted old image: %s", old_path)
             except Exception as e:
-                logger.warning(f"Could not delete old image: {e}")
+                logger.warning("Could not delete old image: %s", e)
 
         # Upload new image
         upload_response = await client.storage.from_(bucket_name).upload(
@@ -358,7 +425,7 @@ async def upload_menu_image(
             file_options={"content-type": file.content_type, "upsert": "true"},
         )
 
-        logger.info(f"Uploaded image to: {img_path}")
+        logger.info("Uploaded image to: %s", img_path)
 
         # Update database
         update_response = (
@@ -368,7 +435,7 @@ async def upload_menu_image(
             .execute()
         )
 
-        logger.info(f"Updated database for item {item_id}")
+        logger.info("Updated database for item %s", item_id)
 
         return {
             "message": "Image uploaded successfully",
@@ -377,7 +444,7 @@ async def upload_menu_image(
         }
 
     except Exception as e:
-        logger.error(f"Failed to upload image: {str(e)}")
+        logger.error("Failed to upload image: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload image: {str(e)}",
@@ -421,10 +488,8 @@ async def get_vendor_menu_with_availability(
     available_ids = special_ids | weekly_ids
 
     # Add availability
-    result = []
-    for item in all_items:
-        item_dict = item.model_dump()
-        item_dict["available_today"] = str(item_dict["id"]) in available_ids
-        result.append(schemas.MenuItemResponse(**item_dict))
-
-    return result
+    # Already validated; copying with the flag set avoids a second validation.
+    return [
+        item.model_copy(update={"available_today": str(item.id) in available_ids})
+        for item in all_items
+    ]
@@ -1,40 +1,99 @@
-from datetime import datetime
-from typing import List
-from uuid import UUID
+from datetime import date, datetime
+from typing import List, Optional
+from uuid import UUID, uuid4
 
-from fastapi import BackgroundTasks, HTTPException, status
+from fastapi import HTTPException, status
+from postgrest import APIError
 from supabase import AsyncClient
 
-from app import schemas
-from utils.email import send_delivery_email_resend
-from utils.logger import logger
+from app import enums, schemas
+from app.repositories import forecast, inventory, prices
+
+from db.postgres import direct_pool, fetch
+from utils.email import build_delivery_email
+from utils.email_queue import EmailQueue
+from utils.logger import get_logger
+from utils.order_queue import OrderQueue, OrderWriteError
+from utils.serialization import validate_list
+
+logger = get_logger(__name__)
+
+_VENDOR_ORDERS_SQL = (
+    "SELECT * FROM orders WHERE vendor_id = $1 ORDER BY order_date DESC"
+)
+_VENDOR_ORDERS_BY_STATUS_SQL = (
+    "SELECT * FROM orders WHERE vendor_id = $1 AND is_delivered = $2 "
+    "ORDER BY order_date DESC"
+)
+
+
+def _order_fields(order: dict) -> dict:
+    """Maps an `orders` row to OrderResponse fields."""
+    return {
+        "id": order.get("order_id"),
+        "user_id": order.get("user_id"),
+        "vendor_id": order.get("vendor_id"),
+        "menu_id": order.get("menu"),
+        "order_date": order.get("order_date"),
+        "quantity": order.get("quantity"),
+        "unit_price": order.get("unit_price"),
+        "total_price": order.get("total_price"),
+        "pickup": order.get("pickup"),
+        "is_delivered": order.get("is_delivered", False),
+    }
 
 
-async def create_order(
+async def _priced_order_row(
     client: AsyncClient,
     order_data: schemas.OrderRequest,
     user_id: UUID,
     vendor_id: UUID,
     menu_id: UUID,
-) -> schemas.OrderCreateResponse:
-    """Create a new order in the database"""
+) -> dict:
+    # The server's price for today, not the one the client sent
+    unit_price = await prices.get_unit_price(client, menu_id, vendor_id, date.today())
+    if abs(unit_price - order_data.unit_price) > 0.005:
+        logger.info(
+            "Order for %s sent unit price %s, charging %s",
+            menu_id,
+            order_data.unit_price,
+            unit_price,
+        )
 
     # Calculate total price
-    total_price = order_data.unit_price * order_data.quantity
+    total_price = unit_price * order_data.quantity
 
     # Prepare order data - match exact column names from your schema
-    order_dict = {
+    return {
         "user_id": str(user_id),
         "vendor_id": str(vendor_id),
         "menu": str(menu_id),
         "order_date": datetime.now().isoformat(),
         "quantity": order_data.quantity,
-        "unit_price": order_data.unit_price,
+        "unit_price": unit_price,
         "total_price": total_price,
         "pickup": order_data.pickup,
         "is_delivered": False,  # Add this - new orders are not delivered
     }
 
+
+async def create_order(
+    client: AsyncClient,
+    order_data: schemas.OrderRequest,
+    user_id: UUID,
+    vendor_id: UUID,
+    menu_id: UUID,
+) -> schemas.OrderCreateResponse:
+    """Create a new order in the database"""
+
+    order_dict = await _priced_order_row(
+        client, order_data, user_id, vendor_id, menu_id
+    )
+    # Holds the special's stock (if it has one) until the order is written
+    reservation = await inventory.INVENTORY.reserve(
+        client, menu_id, order_data.quantity, date.today()
+    )
+
     try:
         # Insert order into database
         response = await client.table("orders").insert(order_dict).execute()
@@ -47,8 +106,10 @@ async def create_order(
             )
 
         created_order = response.data[0]
+        inventory.INVENTORY.confirm(reservation)
+        forecast.invalidate(vendor_id)
 
-        logger.info(f"Order created successfully: {created_order.get('order_id')}")
+        logger.info("Order created successfully: %s", created_order.get("order_id"))
 
         return schemas.OrderCreateResponse(
             success=True,
@@ -57,15 +118,131 @@ async def create_order(
         )
 
     except HTTPException:
+        await inventory.INVENTORY.release(client, reservation)
         raise
     except Exception as e:
-        logger.error(f"Failed to create order: {str(e)}")
+        logger.error("Failed to create order: %s", e)
+        await inventory.INVENTORY.release(client, reservation)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create order: {str(e)}",
         )
 
 
+async def queue_order(
+    client: AsyncClient,
+    order_queue: OrderQueue,
+    order_data: schemas.OrderRequest,
+    user_id: UUID,
+    vendor_id: UUID,
+    menu_id: UUID,
+) -> schemas.OrderCreateResponse:
+    """
+    Price an order (which also checks the vendor sells the item), claim its
+    stock and put it on the intake queue; the writer task inserts it later
+    (see write_order_batch). The order id is assigned here, so it is final
+    from the start.
+    """
+
+    priced = await _priced_order_row(client, order_data, user_id, vendor_id, menu_id)
+    reservation = await inventory.INVENTORY.reserve(
+        client, menu_id, order_data.quantity, date.today()
+    )
+    order_id = str(uuid4())
+    order_dict = {"order_id": order_id, **priced}
+    try:
+        await order_queue.submit(
+            order_id, str(user_id), order_dict, reservation.claim()
+        )
+    except Exception:
+        await inventory.INVENTORY.release(client, reservation)
+        raise
+    # The queue holds the claim from here on and gives it back if the
+    # order fails to be written.
+    inventory.INVENTORY.confirm(reservation)
+
+    logger.info("Order queued: %s", order_id)
+
+    return schemas.OrderCreateResponse(
+        success=True,
+        message="Order received, confirmation pending",
+        order_id=order_id,
+        status=enums.OrderIntakeStatus.QUEUED,
+    )
+
+
+async def write_order_batch(client: AsyncClient, rows: List[dict]) -> None:
+    """
+    Insert queued orders in one request. Orders already present are skipped,
+    so a batch written twice (lost ack) does not duplicate them.
+    """
+    try:
+        await (
+            client.table("orders")
+            .upsert(rows, on_conflict="order_id", ignore_duplicates=True)
+            .execute()
+        )
+    except APIError as e:
+        # Class 23: integrity violations (unknown user or menu item, ...)
+        permanent = str(e.code or "").startswith("23")
+        raise OrderWriteError(e.message or str(e), permanent=permanent) from e
+
+    for vendor_id in {row["vendor_id"] for row in rows}:
+        forecast.invalidate(vendor_id)
+
+
+async def get_order_intake_status(
+    client: AsyncClient,
+    order_queue: Optional[OrderQueue],
+    order_id: UUID,
+    user_id: UUID,
+    wait: float = 0,
+) -> schemas.OrderIntakeResponse:
+    """
+    Status of an order placed through the intake queue, waiting up to `wait`
+    seconds for it to be written. Orders no longer tracked by the queue are
+    looked up in the database.
+    """
+
+    record = None
+    if order_queue is not None:
+        record = await order_queue.wait(str(order_id), wait)
+
+    if record is not None:
+        if record["user_id"] != str(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
+            )
+        return schemas.OrderIntakeResponse(
+            order_id=order_id,
+            status=record["status"],
+            detail=record["last_error"],
+        )
+
+    try:
+        response = (
+            await client.table("orders")
+            .select("order_id", count="exact", head=True)
+            .eq("order_id", str(order_id))
+            .eq("user_id", str(user_id))
+            .execute()
+        )
+    except Exception as e:
+        logger.error("Failed to fetch order status: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch order status: {str(e)}",
+        )
+
+    if not response.count:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
+        )
+    return schemas.OrderIntakeResponse(
+        order_id=order_id, status=enums.OrderIntakeStatus.CONFIRMED
+    )
+
+
 async def get_user_orders(
     client: AsyncClient, user_id: UUID
 ) -> List[schemas.OrderResponse]:
@@ -80,39 +257,34 @@ async def get_user_orders(
             .execute()
         )
 
-        orders = []
-        for order in response.data:
-            orders.append(
-                schemas.OrderResponse(
-                    id=order.get("order_id"),
-                    user_id=order.get("user_id"),
-                    vendor_id=order.get("vendor_id"),
-                    menu_id=order.get("menu"),
-                    order_date=order.get("order_date"),
-                    quantity=order.get("quantity"),
-                    unit_price=order.get("unit_price"),
-                    total_price=order.get("total_price"),
-                    pickup=order.get("pickup"),
-                    is_delivered=order.get("is_delivered", False),  # Add this
-                )
-            )
-
-        return orders
+        return validate_list(
+            schemas.OrderResponse, [_order_fields(order) for order in response.data]
+        )
 
     except Exception as e:
-        logger.error(f"Failed to fetch user orders: {str(e)}")
+        logger.error("Failed to fetch user orders: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch orders: {str(e)}",
         )
 
 
+def _delivery_email(order: dict, user: dict) -> dict:
+    return build_delivery_email(
+        email_to=user["email"],
+        user_name=user.get("name") or "Valued Customer",
+        order_id=str(order.get("order_id")),
+        pickup=order.get("pickup") or "Pickup Point",
+        total_price=float(order.get("total_price") or 0),
+    )
+
+
 # Add new function to update order delivery status
 async def update_order_status(
     client: AsyncClient,
     order_id: UUID,
     status_update: schemas.OrderStatusUpdate,
-    background_tasks: BackgroundTasks,
+    email_queue: EmailQueue,
 ) -> schemas.BaseResponse:
     """Update the delivery status of an order"""
 
@@ -126,7 +298,7 @@ async def update_order_status(
         )
 
         if not response.data:
-            logger.error(f"Order not found: {order_id}")
+            logger.error("Order not found: %s", order_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
             )
@@ -134,7 +306,9 @@ async def update_order_status(
         updated_order = response.data[0]
 
         logger.info(
-            f"Order status updated: {order_id} - delivered: {status_update.is_delivered}"
+            "Order status updated: %s - delivered: %s",
+            order_id,
+            status_update.is_delivered,
         )
 
         if status_update.is_delivered is True:
@@ -153,22 +327,17 @@ async def update_order_status(
                     user_data = user_res.data
 
                     if user_data and user_data.get("email"):
-                        background_tasks.add_task(
-                            send_delivery_email_resend,
-                            email_to=user_data["email"],
-                            user_name=user_data.get("name", "Valued Customer"),
-                            order_id=str(updated_order.get("order_id", order_id)),
-                            pickup=updated_order.get("pickup", "Pickup Point"),
-                            total_price=float(updated_order.get("total_price", 0)),
+                        await email_queue.enqueue(
+                            _delivery_email(updated_order, user_data)
                         )
                     else:
-                        logger.warning(f"User {user_id} found but has no email")
+                        logger.warning("User %s found but has no email", user_id)
                 except Exception as fetch_error:
                     logger.error(
-                        f"Failed to fetch user for email notification: {fetch_error}"
+                        "Failed to fetch user for email notification: %s", fetch_error
                     )
             else:
-                logger.warning(f"Order {order_id} updated but has no user_id")
+                logger.warning("Order %s updated but has no user_id", order_id)
 
         return schemas.BaseResponse(
             message=f"Order status updated to {'delivered' if status_update.is_delivered else 'pending'}"
@@ -177,13 +346,104 @@ async def update_order_status(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to update order status: {str(e)}")
+        logger.error("Failed to update order status: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update order status: {str(e)}",
         )
 
 
+async def update_orders_status_bulk(
+    client: AsyncClient,
+    vendor_id: UUID,
+    status_update: schemas.OrderBulkStatusUpdate,
+    email_queue: EmailQueue,
+) -> schemas.OrderBulkStatusResponse:
+    """
+    Update the delivery status of many orders owned by one vendor.
+
+    Uses one UPDATE ... IN statement, one IN query for the recipients and
+    one enqueue for all notifications, regardless of how many orders.
+    """
+
+    order_ids = list(dict.fromkeys(str(oid) for oid in status_update.order_ids))
+
+    try:
+        response = (
+            await client.table("orders")
+            .update({"is_delivered": status_update.is_delivered})
+            .in_("order_id", order_ids)
+            .eq("vendor_id", str(vendor_id))
+            .execute()
+        )
+    except Exception as e:
+        logger.error("Failed to bulk update order status: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update order status: {str(e)}",
+        )
+
+    updated = {str(row.get("order_id")): row for row in response.data or []}
+    notified = set()
+
+    logger.info(
+        "Bulk order status update by vendor %s: %s/%s updated - delivered: %s",
+        vendor_id,
+        len(updated),
+        len(order_ids),
+        status_update.is_delivered,
+    )
+
+    if status_update.is_delivered and updated:
+        user_ids = {row["user_id"] for row in updated.values() if row.get("user_id")}
+
+        try:
+            users_res = (
+                await client.table("users")
+                .select("id, email, name")
+                .in_("id", list(user_ids))
+                .execute()
+            )
+            users = {str(user.get("id")): user for user in users_res.data or []}
+
+            messages = []
+            for order_id, row in updated.items():
+                user = users.get(str(row.get("user_id")))
+                if user and user.get("email"):
+                    messages.append(_delivery_email(row, user))
+                    notified.add(order_id)
+                else:
+                    logger.warning("No email recipient for order %s", order_id)
+
+            await email_queue.enqueue_many(messages)
+        except Exception as e:
+            logger.error("Failed to queue delivery notifications: %s", e)
+            notified.clear()
+
+    results = []
+    for order_id in order_ids:
+        if order_id in updated:
+            results.append(
+                schemas.OrderStatusResult(
+                    order_id=order_id, updated=True, notified=order_id in notified
+                )
+            )
+        else:
+            results.append(
+                schemas.OrderStatusResult(
+                    order_id=order_id,
+                    updated=False,
+                    detail="Order not found or not owned by this vendor",
+                )
+            )
+
+    return schemas.OrderBulkStatusResponse(
+        message=f"{len(updated)} of {len(order_ids)} orders updated to "
+        f"{'delivered' if status_update.is_delivered else 'pending'}",
+        results=results,
+    )
+
+
 # Add function to get vendor orders (for vendors to see their orders)
 async def get_vendor_orders(
     client: AsyncClient, vendor_id: UUID, delivered: bool | None = None
@@ -191,35 +451,33 @@ async def get_vendor_orders(
     """Get all orders for a specific vendor, optionally filter by delivery status"""
 
     try:
-        query = client.table("orders").select("*").eq("vendor_id", str(vendor_id))
-
-        # Filter by delivery status if specified
-        if delivered is not None:
-            query = query.eq("is_delivered", delivered)
-
-        response = await query.order("order_date", desc=True).execute()
-
-        orders = []
-        for order in response.data:
-            orders.append(
-                schemas.OrderResponse(
-                    id=order.get("order_id"),
-                    user_id=order.get("user_id"),
-                    vendor_id=order.get("vendor_id"),
-                    menu_id=order.get("menu"),
-                    order_date=order.get("order_date"),
-                    quantity=order.get("quantity"),
-                    unit_price=order.get("unit_price"),
-                    total_price=order.get("total_price"),
-                    pickup=order.get("pickup"),
-                    is_delivered=order.get("is_delivered", False),
+        pool = direct_pool(client)
+        if pool is not None:
+            if delivered is None:
+                rows = await fetch(pool, "orders", _VENDOR_ORDERS_SQL, str(vendor_id))
+            else:
+                rows = await fetch(
+                    pool,
+                    "orders",
+                    _VENDOR_ORDERS_BY_STATUS_SQL,
+                    str(vendor_id),
+                    delivered,
                 )
-            )
+        else:
+            query = client.table("orders").select("*").eq("vendor_id", str(vendor_id))
 
-        return orders
+            # Filter by delivery status if specified
+            if delivered is not None:
+                query = query.eq("is_delivered", delivered)
+
+            rows = (await query.order("order_date", desc=True).execute()).data
+
+        return validate_list(
+            schemas.OrderResponse, [_order_fields(order) for order in rows]
+        )
 
     except Exception as e:
-        logger.error(f"Failed to fetch vendor orders: {str(e)}")
+        logger.error("Failed to fetch vendor orders: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch vendor orders: {str(e)}",
@@ -1,11 +1,106 @@
+import asyncio
+import uuid
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Union
+
 from sslcommerz_lib import SSLCOMMERZ
 from supabase import AsyncClient
 
 from app import enums, schemas
 from app.settings import settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FakeSSLCommerz:
+    """
+    Local stand-in for SSLCommerz (PAYMENT_GATEWAY="fake"). Sessions live in
+    memory and answers have the shape of the real API; `complete` plays the
+    customer finishing the checkout and returns the IPN the gateway would
+    send. Counts calls per method in `calls`.
+    """
+
+    def __init__(self):
+        self.transactions: Dict[str, Dict[str, Any]] = {}
+        self.calls: Counter = Counter()
+
+    def createSession(self, post_body: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls["createSession"] += 1
+        sessionkey = uuid.uuid4().hex
+        self.transactions[post_body["tran_id"]] = {
+            "tran_id": post_body["tran_id"],
+            "sessionkey": sessionkey,
+            "amount": str(post_body["total_amount"]),
+            "currency": post_body.get("currency", "BDT"),
+            "status": "PENDING",
+            "val_id": None,
+            "validated": False,
+        }
+        return {
+            "status": "SUCCESS",
+            "sessionkey": sessionkey,
+            "GatewayPageURL": f"https://sandbox.invalid/gwprocess/{sessionkey}",
+        }
+
+    def complete(self, tran_id: str, status: str = "VALID") -> Dict[str, Any]:
+        """Settles the session as VALID, FAILED or CANCELLED."""
+        transaction = self.transactions[tran_id]
+        transaction["status"] = status
+        if status == "VALID":
+            transaction["val_id"] = uuid.uuid4().hex
+        return {
+            "tran_id": tran_id,
+            "val_id": transaction["val_id"],
+            "amount": transaction["amount"],
+            "status": status,
+            "verify_sign": "fake",
+        }
+
+    def hash_validate_ipn(self, payload: Dict[str, Any]) -> bool:
+        self.calls["hash_validate_ipn"] += 1
+        return payload.get("verify_sign") == "fake"
+
+    def validationTransactionOrder(self, val_id: str) -> Dict[str, Any]:
+        self.calls["validationTransactionOrder"] += 1
+        for transaction in self.transactions.values():
+            if val_id and transaction["val_id"] == val_id:
+                status = "VALIDATED" if transaction["validated"] else "VALID"
+                transaction["validated"] = True
+                return {**self._element(transaction), "status": status}
+        return {"status": "INVALID_TRANSACTION"}
+
+    def transaction_query_session(self, sessionkey: str) -> Dict[str, Any]:
+        self.calls["transaction_query_session"] += 1
+        for transaction in self.transactions.values():
+            if transaction["sessionkey"] == sessionkey:
+                return {"APIConnect": "DONE", **self._element(transaction)}
+        return {"APIConnect": "DONE", "status": "INVALID_REQUEST"}
+
+    def transaction_query_tranid(self, tran_id: str) -> Dict[str, Any]:
+        self.calls["transaction_query_tranid"] += 1
+        transaction = self.transactions.get(tran_id)
+        elements = [self._element(transaction)] if transaction else []
+        return {
+            "APIConnect": "DONE",
+            "no_of_trans_found": len(elements),
+            "element": elements,
+        }
+
+    @staticmethod
+    def _element(transaction: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: transaction[key]
+            for key in ("tran_id", "val_id", "amount", "currency", "status")
+        }
+
+
+FAKE_SSLCOMMERZ = FakeSSLCommerz()
 
 
 def get_sslcommerz() -> SSLCOMMERZ:
+    if settings.PAYMENT_GATEWAY == "fake":
+        return FAKE_SSLCOMMERZ
     sslcommerz_settings = {
         "store_id": settings.SSLCOMMERZ_STORE_ID,
         "store_pass": settings.SSLCOMMERZ_STORE_PASS,
@@ -24,18 +119,90 @@ async def create_payment(
     return response.data[0]
 
 
+# A payment is settled once: only pending payments move, except that a
+# validated success also overrides an earlier fail or cancel callback.
+SETTLES_FROM = {
+    enums.PaymentStatus.SUCCESS: [
+        enums.PaymentStatus.PENDING.value,
+        enums.PaymentStatus.FAILED.value,
+        enums.PaymentStatus.CANCELLED.value,
+    ],
+    enums.PaymentStatus.FAILED: [enums.PaymentStatus.PENDING.value],
+    enums.PaymentStatus.CANCELLED: [enums.PaymentStatus.PENDING.value],
+}
+
+
 async def update_payment_status(
     db: AsyncClient,
     transaction_id: str,
     status: enums.PaymentStatus,
 ):
+    """Returns the updated payment, or None if it was already settled."""
+    rows = await settle_payments(db, [transaction_id], status)
+    return rows[0] if rows else None
+
+
+async def settle_payments(
+    db: AsyncClient,
+    transaction_ids: List[str],
+    status: enums.PaymentStatus,
+) -> List[Dict[str, Any]]:
     response = (
         await db.from_("payments")
         .update({"status": status})
-        .eq("transaction_id", transaction_id)
+        .in_("transaction_id", transaction_ids)
+        .in_("status", SETTLES_FROM[status])
         .execute()
     )
-    return response.data[0]
+    return response.data or []
+
+
+async def process_ipn_batch(
+    db: AsyncClient,
+    sslcz: SSLCOMMERZ,
+    notifications: List[Dict[str, Any]],
+) -> List[Union[str, Exception]]:
+    """
+    Validates hash-checked IPNs with the gateway, at most
+    IPN_VALIDATION_CONCURRENCY at a time and off the event loop, then
+    settles their payments with one update per resulting status. Returns
+    the status per notification, or the exception to retry it for.
+    """
+    semaphore = asyncio.Semaphore(settings.IPN_VALIDATION_CONCURRENCY)
+
+    async def check(notification: Dict[str, Any]) -> enums.PaymentStatus:
+        if not notification.get("val_id"):
+            return enums.PaymentStatus.FAILED
+        async with semaphore:
+            response = await asyncio.to_thread(
+                validate_transaction, sslcz, notification["val_id"]
+            )
+        if response.get("status") in VALID_STATUSES and response.get(
+            "tran_id"
+        ) == notification.get("tran_id"):
+            return enums.PaymentStatus.SUCCESS
+        return enums.PaymentStatus.FAILED
+
+    results = await asyncio.gather(
+        *(check(n) for n in notifications), return_exceptions=True
+    )
+
+    by_status: Dict[enums.PaymentStatus, List[str]] = defaultdict(list)
+    for notification, result in zip(notifications, results):
+        if not isinstance(result, Exception):
+            by_status[result].append(notification["tran_id"])
+    for payment_status, transaction_ids in by_status.items():
+        try:
+            await settle_payments(db, transaction_ids, payment_status)
+        except Exception as e:
+            logger.error(
+                "Failed to settle %s payments as %s: %s",
+                len(transaction_ids),
+                payment_status.value,
+                e,
+            )
+            results = [e if r == payment_status else r for r in results]
+    return [r if isinstance(r, Exception) else r.value for r in results]
 
 
 def create_payment_session(sslcz: SSLCOMMERZ, post_body: dict):
@@ -43,6 +210,36 @@ def create_payment_session(sslcz: SSLCOMMERZ, post_body: dict):
     return response
 
 
+# "VALIDATED" is the gateway's answer when the val_id was validated before.
+VALID_STATUSES = ("VALID", "VALIDATED")
+
+
+# Final gateway statuses; anything else means the customer may still pay.
+GATEWAY_STATUSES = {
+    **{s: enums.PaymentStatus.SUCCESS for s in VALID_STATUSES},
+    "FAILED": enums.PaymentStatus.FAILED,
+    "EXPIRED": enums.PaymentStatus.FAILED,
+    "CANCELLED": enums.PaymentStatus.CANCELLED,
+}
+
+
+def gateway_status(response: Dict[str, Any]) -> Optional[enums.PaymentStatus]:
+    """
+    The final status in a transaction_query_tranid answer, or None while the
+    transaction is still open. A tran_id can have several attempts; any
+    valid one means the payment succeeded.
+    """
+    if response.get("APIConnect") != "DONE":
+        raise RuntimeError(f"Gateway query failed: {response.get('APIConnect')}")
+    statuses = [
+        GATEWAY_STATUSES.get(element.get("status"))
+        for element in response.get("element") or []
+    ]
+    if enums.PaymentStatus.SUCCESS in statuses:
+        return enums.PaymentStatus.SUCCESS
+    return statuses[-1] if statuses else None
+
+
 def validate_transaction(sslcz: SSLCOMMERZ, val_id: str):
     response = sslcz.validationTransactionOrder(val_id)
     return response
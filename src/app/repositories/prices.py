@@ -0,0 +1,145 @@
+import asyncio
+import time
+from datetime import date
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from supabase import AsyncClient
+
+from app.settings import settings
+from utils.logger import get_logger
+from utils.metrics import REGISTRY
+
+logger = get_logger(__name__)
+
+PRICE_BOOK = REGISTRY.counter(
+    "price_book_total",
+    "Order price lookups, by whether they were served from the price book.",
+    labelnames=("result",),
+)
+
+
+class PriceBook:
+    """
+    Server-side unit prices per (menu item, day): the day's special price if
+    the item has one, else its regular price, with the item's vendor. Filled
+    from the menu feed and by lookups on a miss. Menu and special writes
+    invalidate the item and bump the generation, so a feed built while one
+    raced it is not stored; entries expire after PRICE_BOOK_SECONDS to pick
+    up writes handled by other workers.
+    """
+
+    def __init__(self):
+        # (item id, day) -> (price, vendor id, monotonic time stored)
+        self._entries: Dict[Tuple[str, str], Tuple[float, str, float]] = {}
+        self._generation = 0
+        # Lookups in flight, shared by concurrent misses for the same key
+        self.loading: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, item_id: str, day: str) -> Optional[Tuple[float, str]]:
+        entry = self._entries.get((item_id, day))
+        if entry is None:
+            return None
+        price, vendor_id, stored_at = entry
+        if time.monotonic() - stored_at >= settings.PRICE_BOOK_SECONDS:
+            del self._entries[(item_id, day)]
+            return None
+        return price, vendor_id
+
+    def put_many(
+        self, day: str, prices: Dict[str, Tuple[float, str]], generation: int
+    ) -> None:
+        if generation != self._generation:
+            return
+        # Prices for earlier days are never asked for again.
+        for key in [k for k in self._entries if k[1] < day]:
+            del self._entries[key]
+        now = time.monotonic()
+        for item_id, (price, vendor_id) in prices.items():
+            self._entries[(item_id, day)] = (price, vendor_id, now)
+
+    def invalidate(self, item_id: str) -> None:
+        for key in [k for k in self._entries if k[0] == item_id]:
+            del self._entries[key]
+        self._generation += 1
+
+
+PRICES = PriceBook()
+
+
+def invalidate(menu_item_id: UUID) -> None:
+    """Called after a write that can change the item's price."""
+    PRICES.invalidate(str(menu_item_id))
+
+
+async def get_unit_price(
+    client: AsyncClient, menu_item_id: UUID, vendor_id: UUID, day: date
+) -> float:
+    """
+    The price an order for the item is charged on `day`. Served from the
+    price book; on a miss the item and its special for the day are read in
+    one query (shared by concurrent misses) and remembered. 404 if the
+    vendor has no such item.
+    """
+    key = (str(menu_item_id), day.isoformat())
+    entry = PRICES.get(*key)
+    PRICE_BOOK.inc(result="hit" if entry is not None else "miss")
+
+    if entry is None:
+        loading = PRICES.loading.get(key)
+        if loading is None:
+            loading = asyncio.ensure_future(_load_price(client, *key))
+            PRICES.loading[key] = loading
+            loading.add_done_callback(lambda _: PRICES.loading.pop(key, None))
+        entry = await asyncio.shield(loading)
+
+    price, item_vendor = entry
+    if item_vendor != str(vendor_id):
+        raise _not_found()
+    return price
+
+
+async def _load_price(client: AsyncClient, item_id: str, day: str) -> Tuple[float, str]:
+    generation = PRICES.generation()
+    try:
+        response = (
+            await client.table("menu_items")
+            .select("vendor_id, price, date_specials(special_price)")
+            .eq("id", item_id)
+            .eq("date_specials.available_date", day)
+            .maybe_single()
+            .execute()
+        )
+    except Exception as e:
+        logger.error("Failed to look up price of %s: %s", item_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to look up price: {str(e)}",
+        )
+    if response is None or not response.data:
+        raise _not_found()
+    item = response.data
+    specials = [
+        s["special_price"]
+        for s in item.get("date_specials") or []
+        if s.get("special_price") is not None
+    ]
+    # Direct Postgres rows carry Decimals and UUIDs; the book holds floats
+    # and strings, as the menu feed stores them.
+    entry = (
+        float(specials[0] if specials else item["price"]),
+        str(item["vendor_id"]),
+    )
+    PRICES.put_many(day, {item_id: entry}, generation)
+    return entry
+
+
+def _not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Menu item not found for this vendor",
+    )
@@ -3,7 +3,15 @@ from typing import Optional
 from fastapi import HTTPException, status
 from supabase import AsyncClient
 from app import schemas
-from utils.logger import logger
+from db.postgres import direct_pool, fetch
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_VENDOR_STATS_SQL = (
+    "SELECT count(*) AS total, coalesce(sum(rating_val), 0) AS score "
+    "FROM rating WHERE vendor_id = $1"
+)
 
 async def upsert_rating(
     client: AsyncClient, user_id: UUID, rating_data: schemas.RatingCreate
@@ -29,7 +37,7 @@ async def upsert_rating(
         )
 
     except Exception as e:
-        logger.error(f"Failed to upsert rating: {str(e)}")
+        logger.error("Failed to upsert rating: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to submit rating: {str(e)}",
@@ -39,14 +47,21 @@ async def get_vendor_stats(
     client: AsyncClient, vendor_id: UUID
 ) -> schemas.RatingResponse:
     try:
-        # Fetch only the rating_val column
-        response = await client.table("rating")\
-            .select("rating_val")\
-            .eq("vendor_id", str(vendor_id))\
-            .execute()
-        
-        ratings = response.data
-        total_count = len(ratings)
+        pool = direct_pool(client)
+        if pool is not None:
+            # Counted and summed in Postgres; no rows are transferred.
+            (stats,) = await fetch(pool, "rating", _VENDOR_STATS_SQL, str(vendor_id))
+            total_count, total_score = stats["total"], float(stats["score"])
+        else:
+            # Fetch only the rating_val column
+            response = await client.table("rating")\
+                .select("rating_val")\
+                .eq("vendor_id", str(vendor_id))\
+                .execute()
+
+            ratings = response.data
+            total_count = len(ratings)
+            total_score = sum(r["rating_val"] for r in ratings)
         
         if total_count == 0:
             return schemas.RatingResponse(
@@ -56,7 +71,6 @@ async def get_vendor_stats(
             )
 
         # Calculate average using the correct key
-        total_score = sum(r["rating_val"] for r in ratings)
         average = total_score / total_count
 
         return schemas.RatingResponse(
@@ -66,7 +80,7 @@ async def get_vendor_stats(
         )
 
     except Exception as e:
-        logger.error(f"Failed to fetch rating stats: {str(e)}")
+        logger.error("Failed to fetch rating stats: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve vendor ratings"
@@ -91,5 +105,5 @@ async def get_user_rating(
         )
 
     except Exception as e:
-        logger.error(f"Failed to fetch user rating: {str(e)}")
+        logger.error("Failed to fetch user rating: %s", e)
         return None
\ No newline at end of file
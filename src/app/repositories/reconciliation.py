@@ -0,0 +1,195 @@
+import asyncio
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sslcommerz_lib import SSLCOMMERZ
+from supabase import AsyncClient
+
+from app import enums
+from app.repositories.payment import (
+    gateway_status,
+    get_transaction_status_by_tranid,
+    settle_payments,
+)
+from app.settings import settings
+from utils.logger import get_logger
+from utils.metrics import REGISTRY
+
+logger = get_logger(__name__)
+
+RECONCILED = REGISTRY.counter(
+    "payment_reconciliation_total",
+    "Stale pending payments checked with the gateway, by result.",
+    labelnames=("result",),
+)
+RECONCILED_LINKS = REGISTRY.counter(
+    "payment_reconciliation_linked_total",
+    "Orders and subscriptions of reconciled payments, by kind and new status.",
+    labelnames=("kind", "status"),
+)
+
+MAX_RECHECK_SECONDS = 6 * 3600.0
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class PaymentReconciler:
+    """
+    Rechecks payments left pending past PAYMENT_RECONCILE_AFTER_SECONDS, for
+    example when the customer closed the browser before /payment/success.
+
+    Stale payments are read in pages, queried with the gateway at most
+    PAYMENT_RECONCILE_CONCURRENCY at a time and off the event loop, and
+    settled with one conditional update per resulting status. A payment the
+    gateway still has open is not asked about again for a while (doubling
+    up to MAX_RECHECK_SECONDS), and is failed once it is older than
+    PAYMENT_ABANDON_AFTER_SECONDS.
+    """
+
+    def __init__(self):
+        # transaction id -> (monotonic time of the next check, last delay)
+        self._recheck: Dict[str, Tuple[float, float]] = {}
+
+    async def run(self, db: AsyncClient, sslcz: SSLCOMMERZ) -> Dict[str, int]:
+        """Reconciles every stale pending payment; returns counts by result."""
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=settings.PAYMENT_RECONCILE_AFTER_SECONDS)
+        abandoned = now - timedelta(seconds=settings.PAYMENT_ABANDON_AFTER_SECONDS)
+        semaphore = asyncio.Semaphore(settings.PAYMENT_RECONCILE_CONCURRENCY)
+        summary: Counter = Counter()
+        linked: Counter = Counter()
+        pending = set()
+
+        async for page in self._stale_payments(db, cutoff):
+            pending.update(p["transaction_id"] for p in page)
+            due = [p for p in page if self._due(p["transaction_id"])]
+            if len(due) < len(page):
+                summary["skipped"] += len(page) - len(due)
+            results = await asyncio.gather(
+                *(self._check(sslcz, semaphore, p, abandoned) for p in due),
+                return_exceptions=True,
+            )
+
+            settled: Dict[enums.PaymentStatus, List[str]] = defaultdict(list)
+            for payment, result in zip(due, results):
+                if isinstance(result, Exception):
+                    logger.warning(
+                        "Could not reconcile payment %s: %s",
+                        payment["transaction_id"],
+                        result,
+                    )
+                    summary["error"] += 1
+                elif result is None:
+                    self._backoff(payment["transaction_id"])
+                    summary["pending"] += 1
+                else:
+                    settled[result].append(payment["transaction_id"])
+            for payment_status, transaction_ids in settled.items():
+                rows = await settle_payments(db, transaction_ids, payment_status)
+                for transaction_id in transaction_ids:
+                    self._recheck.pop(transaction_id, None)
+                summary[payment_status.value] += len(rows)
+                await self._count_links(db, rows, payment_status, linked)
+
+        # Payments settled elsewhere (IPN, /payment/success) are forgotten.
+        self._recheck = {t: r for t, r in self._recheck.items() if t in pending}
+        for result, count in summary.items():
+            RECONCILED.inc(count, result=result)
+        if summary:
+            logger.info(
+                "Reconciled stale payments: %s, linked: %s", dict(summary), dict(linked)
+            )
+        return {**summary, **linked}
+
+    async def _stale_payments(self, db: AsyncClient, cutoff: datetime):
+        """Pages of pending payments created before `cutoff`, oldest first."""
+        seen = set()
+        after = None
+        while True:
+            query = (
+                db.from_("payments")
+                .select("id, transaction_id, created_at")
+                .eq("status", enums.PaymentStatus.PENDING.value)
+                .lt("created_at", cutoff.isoformat())
+            )
+            if after is not None:
+                # Rows sharing the last timestamp are read again and skipped.
+                query = query.gte("created_at", after)
+            response = await (
+                query.order("created_at")
+                .limit(settings.PAYMENT_RECONCILE_PAGE_SIZE)
+                .execute()
+            )
+            rows = response.data or []
+            page = [r for r in rows if r["id"] not in seen]
+            if not page:
+                return
+            seen.update(r["id"] for r in page)
+            yield page
+            if len(rows) < settings.PAYMENT_RECONCILE_PAGE_SIZE:
+                return
+            after = rows[-1]["created_at"]
+
+    async def _check(
+        self,
+        sslcz: SSLCOMMERZ,
+        semaphore: asyncio.Semaphore,
+        payment: Dict[str, Any],
+        abandoned: datetime,
+    ) -> Optional[enums.PaymentStatus]:
+        async with semaphore:
+            response = await asyncio.to_thread(
+                get_transaction_status_by_tranid, sslcz, payment["transaction_id"]
+            )
+        result = gateway_status(response)
+        if result is None and _parse_time(payment["created_at"]) < abandoned:
+            return enums.PaymentStatus.FAILED
+        return result
+
+    def _due(self, transaction_id: str) -> bool:
+        recheck = self._recheck.get(transaction_id)
+        return recheck is None or recheck[0] <= time.monotonic()
+
+    def _backoff(self, transaction_id: str) -> None:
+        _, delay = self._recheck.get(transaction_id, (0.0, 0.0))
+        delay = min(
+            max(delay * 2, settings.PAYMENT_RECONCILE_INTERVAL_SECONDS),
+            MAX_RECHECK_SECONDS,
+        )
+        self._recheck[transaction_id] = (time.monotonic() + delay, delay)
+
+    async def _count_links(
+        self,
+        db: AsyncClient,
+        rows: List[Dict[str, Any]],
+        payment_status: enums.PaymentStatus,
+        linked: Counter,
+    ) -> None:
+        """Counts the orders and subscriptions paid for by the settled payments."""
+        payment_ids = [row["id"] for row in rows]
+        if not payment_ids:
+            return
+        for kind, table in (("orders", "orders"), ("subscriptions", "subscription")):
+            response = await (
+                db.from_(table)
+                .select("payment_id", count="exact", head=True)
+                .in_("payment_id", payment_ids)
+                .execute()
+            )
+            count = response.count or 0
+            linked[f"{kind}_{payment_status.value}"] += count
+            RECONCILED_LINKS.inc(count, kind=kind, status=payment_status.value)
+
+
+RECONCILER = PaymentReconciler()
+
+
+async def reconcile_pending_payments(
+    db: AsyncClient, sslcz: SSLCOMMERZ
+) -> Dict[str, int]:
+    return await RECONCILER.run(db, sslcz)
@@ -3,6 +3,26 @@ from typing import List
 from supabase import AsyncClient
 from app import schemas
 from fastapi import HTTPException, status
+from db.postgres import direct_pool, fetch
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_VENDOR_REVIEWS_SQL = (
+    "SELECT r.*, u.id IS NOT NULL AS has_user, u.name AS user_name "
+    "FROM review r LEFT JOIN users u ON u.id = r.user_id "
+    "WHERE r.vendor_id = $1 ORDER BY r.review_id DESC"
+)
+
+
+async def _fetch_vendor_reviews(pool, vendor_id: UUID) -> List[dict]:
+    """Rows shaped like PostgREST's `*, users(name)` embed."""
+    rows = await fetch(pool, "review", _VENDOR_REVIEWS_SQL, str(vendor_id))
+    for row in rows:
+        has_user, name = row.pop("has_user"), row.pop("user_name")
+        row["users"] = {"name": name} if has_user else None
+    return rows
+
 
 async def create_review(
     client: AsyncClient, user_id: UUID, review_data: schemas.ReviewCreate
@@ -32,7 +52,7 @@ async def create_review(
         )
 
     except Exception as e:
-        print(f"Error creating review: {e}") # Simple print for debugging
+        logger.error("Error creating review: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to submit review: {str(e)}"
@@ -42,19 +62,24 @@ async def get_reviews_by_vendor(
     client: AsyncClient, vendor_id: UUID
 ) -> List[schemas.ReviewResponse]:
     try:
-        # 1. Fetch reviews + join users table
-        # We order by review_id desc (highest ID = newest)
-        response = await client.table("review")\
-            .select("*, users(name)")\
-            .eq("vendor_id", str(vendor_id))\
-            .order("review_id", desc=True)\
-            .execute()
+        pool = direct_pool(client)
+        if pool is not None:
+            rows = await _fetch_vendor_reviews(pool, vendor_id)
+        else:
+            # 1. Fetch reviews + join users table
+            # We order by review_id desc (highest ID = newest)
+            response = await client.table("review")\
+                .select("*, users(name)")\
+                .eq("vendor_id", str(vendor_id))\
+                .order("review_id", desc=True)\
+                .execute()
+            rows = response.data
 
-        if not response.data:
+        if not rows:
             return []
 
         cleaned_reviews = []
-        for item in response.data:
+        for item in rows:
             # 2. Flatten the user object
             user_info = item.pop("users", None)
             username = user_info.get("name") if user_info else "Anonymous"
@@ -69,7 +94,7 @@ async def get_reviews_by_vendor(
         return cleaned_reviews
 
     except Exception as e:
-        print(f"Error fetching reviews: {e}")
+        logger.error("Error fetching reviews: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve reviews"
@@ -93,7 +118,7 @@ async def reply_to_review(
         return False
 
     except Exception as e:
-        print(f"Error replying to review: {e}")
+        logger.error("Error replying to review: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to post reply"
@@ -0,0 +1,215 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from supabase import AsyncClient
+
+from app import schemas
+from app.security import create_access_token, create_refresh_token, hash_refresh_token
+from app.settings import settings
+from utils.logger import get_logger
+from utils.metrics import REGISTRY
+
+logger = get_logger(__name__)
+
+SESSION_REFRESHES = REGISTRY.counter(
+    "auth_session_refreshes_total",
+    "Refresh token exchanges, by result.",
+    labelnames=("result",),
+)
+
+# Access token claim naming the account, by role
+ID_FIELDS = {"student": "user_id", "vendor": "vendor_id"}
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class RevokedSessions:
+    """
+    Session families revoked in the last ACCESS_TOKEN_MINUTES, so access
+    tokens issued to them (their `sid` claim) are refused without a database
+    read per request. Revocations made by this worker count at once; other
+    workers' once `sync` has pulled them from auth_sessions.
+    """
+
+    def __init__(self):
+        # family id -> monotonic time after which its access tokens expired
+        self._revoked: Dict[str, float] = {}
+        self._synced_at: Optional[datetime] = None
+
+    def __contains__(self, family_id: Optional[str]) -> bool:
+        forget_at = self._revoked.get(family_id)
+        if forget_at is None:
+            return False
+        if forget_at <= time.monotonic():
+            del self._revoked[family_id]
+            return False
+        return True
+
+    def add(self, family_id: str, revoked_at: Optional[datetime] = None) -> None:
+        lifetime = settings.ACCESS_TOKEN_MINUTES * 60
+        if revoked_at is not None:
+            lifetime -= (datetime.now(timezone.utc) - revoked_at).total_seconds()
+        if lifetime > 0:
+            self._revoked[family_id] = time.monotonic() + lifetime
+
+    async def sync(self, db: AsyncClient) -> int:
+        """Pulls revocations made since the last sync; returns how many."""
+        now = datetime.now(timezone.utc)
+        since = self._synced_at or now - timedelta(
+            minutes=settings.ACCESS_TOKEN_MINUTES
+        )
+        # Overlap the previous window for revocations committed late.
+        since -= timedelta(seconds=settings.SESSION_REVOCATION_SYNC_SECONDS)
+        response = await (
+            db.table("auth_sessions")
+            .select("family_id, revoked_at")
+            .gte("revoked_at", since.isoformat())
+            .execute()
+        )
+        families = {}
+        for row in response.data or []:
+            families[row["family_id"]] = _parse_time(row["revoked_at"])
+        for family_id, revoked_at in families.items():
+            self.add(family_id, revoked_at)
+        self._synced_at = now
+        self._revoked = {f: t for f, t in self._revoked.items() if t > time.monotonic()}
+        return len(families)
+
+
+REVOKED_SESSIONS = RevokedSessions()
+
+
+async def start_session(
+    client: AsyncClient, account_id: str, role: str, family_id: Optional[str] = None
+) -> Tuple[str, str]:
+    """Stores a new refresh token (hashed); returns it and its family id."""
+    family_id = family_id or str(uuid.uuid4())
+    refresh_token = create_refresh_token()
+    expires_at = datetime.now(timezone.utc) + timedelta(
+        days=settings.REFRESH_TOKEN_DAYS
+    )
+    await (
+        client.table("auth_sessions")
+        .insert(
+            {
+                "family_id": family_id,
+                "account_id": account_id,
+                "role": role,
+                "token_hash": hash_refresh_token(refresh_token),
+                "expires_at": expires_at.isoformat(),
+            }
+        )
+        .execute()
+    )
+    return refresh_token, family_id
+
+
+def session_access_token(account_id: str, role: str, family_id: str) -> str:
+    return create_access_token(
+        data={ID_FIELDS[role]: account_id, "role": role, "sid": family_id}
+    )
+
+
+async def refresh(
+    request: schemas.RefreshRequest, client: AsyncClient
+) -> schemas.LoginResponse:
+    """
+    Trades a refresh token for a new access token and refresh token. The
+    session is found by its token hash (unique index) and rotated with one
+    conditional update, so each refresh token works once. A token presented
+    again within REFRESH_TOKEN_RETRY_SECONDS of its rotation is a client
+    retrying after a lost response and gets another pair; after that it
+    means the token was copied, and the whole family is revoked.
+    """
+    token_hash = hash_refresh_token(request.refresh_token)
+    now = datetime.now(timezone.utc).isoformat()
+    response = await (
+        client.table("auth_sessions")
+        .update({"rotated_at": now})
+        .eq("token_hash", token_hash)
+        .is_("rotated_at", "null")
+        .is_("revoked_at", "null")
+        .gt("expires_at", now)
+        .execute()
+    )
+    if response.data:
+        session = response.data[0]
+        SESSION_REFRESHES.inc(result="rotated")
+    else:
+        session = await _find(client, token_hash)
+        if not _is_retry(session):
+            await _refuse(client, session)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired refresh token",
+            )
+        SESSION_REFRESHES.inc(result="retried")
+
+    refresh_token, family_id = await start_session(
+        client, session["account_id"], session["role"], session["family_id"]
+    )
+    token = session_access_token(session["account_id"], session["role"], family_id)
+    return schemas.LoginResponse(success=True, token=token, refresh_token=refresh_token)
+
+
+async def logout(
+    request: schemas.RefreshRequest, client: AsyncClient
+) -> schemas.BaseResponse:
+    """Revokes the session family of the refresh token, if there is one."""
+    session = await _find(client, hash_refresh_token(request.refresh_token))
+    if session is not None and session["revoked_at"] is None:
+        await _revoke_family(client, session["family_id"])
+    return schemas.BaseResponse(message="Logged out")
+
+
+def _is_retry(session: Optional[Dict]) -> bool:
+    """Whether a refused token was rotated moments ago and is otherwise live."""
+    if session is None or session["revoked_at"] or not session["rotated_at"]:
+        return False
+    now = datetime.now(timezone.utc)
+    retry_until = _parse_time(session["rotated_at"]) + timedelta(
+        seconds=settings.REFRESH_TOKEN_RETRY_SECONDS
+    )
+    return now < retry_until and now < _parse_time(session["expires_at"])
+
+
+async def _refuse(client: AsyncClient, session: Optional[Dict]) -> None:
+    if session is None:
+        SESSION_REFRESHES.inc(result="unknown")
+    elif session["revoked_at"] is not None:
+        SESSION_REFRESHES.inc(result="revoked")
+    elif session["rotated_at"] is not None:
+        logger.warning(
+            "Refresh token reused, revoking session %s", session["family_id"]
+        )
+        SESSION_REFRESHES.inc(result="reused")
+        await _revoke_family(client, session["family_id"])
+    else:
+        SESSION_REFRESHES.inc(result="expired")
+
+
+async def _find(client: AsyncClient, token_hash: str) -> Optional[Dict]:
+    response = await (
+        client.table("auth_sessions")
+        .select("family_id, account_id, role, expires_at, rotated_at, revoked_at")
+        .eq("token_hash", token_hash)
+        .execute()
+    )
+    return response.data[0] if response.data else None
+
+
+async def _revoke_family(client: AsyncClient, family_id: str) -> None:
+    await (
+        client.table("auth_sessions")
+        .update({"revoked_at": datetime.now(timezone.utc).isoformat()})
+        .eq("family_id", family_id)
+        .is_("revoked_at", "null")
+        .execute()
+    )
+    REVOKED_SESSIONS.add(family_id)
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import List
 from uuid import UUID
@@ -6,7 +7,22 @@ from fastapi import HTTPException, status
 from supabase import AsyncClient
 
 from app import schemas
-from utils.logger import logger
+from app.repositories import forecast
+from utils.logger import get_logger
+from utils.serialization import validate_list
+
+logger = get_logger(__name__)
+
+
+async def _exists(client: AsyncClient, table: str, row_id: UUID) -> bool:
+    """Count-only lookup by primary key; no row data is transferred."""
+    response = (
+        await client.table(table)
+        .select("id", count="exact", head=True)
+        .eq("id", str(row_id))
+        .execute()
+    )
+    return bool(response.count)
 
 
 async def subscribe(
@@ -16,42 +32,28 @@ async def subscribe(
     vendor_id: UUID,
 ):
     try:
-        response = await client.table("users").select("*").eq("id", user_id).execute()
+        user_exists, vendor_exists = await asyncio.gather(
+            _exists(client, "users", user_id), _exists(client, "vendors", vendor_id)
+        )
     except Exception as e:
-        logger.error(f"Database query failed: {str(e)}")
+        logger.error("Database query failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database query failed: {str(e)}",
         )
 
-    _user = response.data
-    if not _user:
-        logger.error(f"User with id: {user_id} not found")
+    if not user_exists:
+        logger.error("User with id: %s not found", user_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with id: {user_id} not found",
         )
-    _user = _user[0]
-
-    try:
-        response = (
-            await client.table("vendors").select("*").eq("id", vendor_id).execute()
-        )
-    except Exception as e:
-        logger.error(f"Database query failed: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Database query failed: {str(e)}",
-        )
-
-    _vendor = response.data
-    if not _vendor:
-        logger.error(f"Vendor with id: {request.vendor_id} not found")
+    if not vendor_exists:
+        logger.error("Vendor with id: %s not found", vendor_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Vendor with id: {request.vendor_id} not found",
+            detail=f"Vendor with id: {vendor_id} not found",
         )
-    _vendor = _vendor[0]
 
     _now = datetime.now(timezone.utc)
     _ed = request.type_timedelta
@@ -63,12 +65,13 @@ async def subscribe(
             {
                 "user_id": str(user_id),
                 "vendor_id": str(vendor_id),
-                "starts_from": str(_now),
-                "ends_at": str(_end),
+                "starts_from": _now.isoformat(),
+                "ends_at": _end.isoformat(),
             }
         )
         .execute()
     )
+    forecast.invalidate(vendor_id)
 
     return schemas.SubscriptionCreateResponse(
         message="Subscription successful", id=subscription.data[0].get("id")
@@ -76,38 +79,84 @@ async def subscribe(
 
 
 async def get_subscriptions_by_vendor(
-    vendor_id: UUID, client: AsyncClient
+    vendor_id: UUID, client: AsyncClient, limit: int = 50, offset: int = 0
 ) -> List[schemas.VendorSubscriptionResponse]:
+    """
+    A page of the vendor's active subscriptions, soonest to end first.
+    Expiry is filtered and dates are cast in the database, which serves it
+    from the (vendor_id, ends_at) index.
+    """
+    now = datetime.now(timezone.utc).isoformat()
     try:
         response = (
             await client.table("subscription")
-            .select("id, users(id, name), starts_from, ends_at")
-            .eq("vendor_id", vendor_id)
+            .select(
+                "id, start_date:starts_from::date, end_date:ends_at::date, users(name)"
+            )
+            .eq("vendor_id", str(vendor_id))
+            .gt("ends_at", now)
+            .order("ends_at")
+            .range(offset, offset + limit - 1)
             .execute()
         )
     except Exception as e:
-        logger.error(f"Database query failed: {str(e)}")
+        logger.error("Database query failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database query failed: {str(e)}",
         )
 
-    _subscriptions = response.data
-    subscriptions = []
-
-    for subscription in _subscriptions:
-        start_date = datetime.fromisoformat(subscription.get("starts_from")).date()
-        end_date = datetime.fromisoformat(subscription.get("ends_at")).date()
-
-        _subscription = schemas.VendorSubscriptionResponse(
-            id=subscription.get("id"),
-            name=subscription.get("users").get("name"),
-            start_date=start_date,
-            end_date=end_date,
+    for row in response.data:
+        row["name"] = (row.pop("users") or {}).get("name")
+    return validate_list(schemas.VendorSubscriptionResponse, response.data)
+
+
+async def archive_expired_subscriptions(
+    client: AsyncClient, older_than: timedelta, batch_size: int = 500
+) -> int:
+    """
+    Moves subscriptions that ended more than `older_than` ago into
+    `subscription_archive`, in batches, so the live table only holds
+    current history. Safe to run concurrently: archiving ignores rows that
+    are already archived and deleting an already deleted row is a no-op.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = (now - older_than).isoformat()
+    archived = 0
+    while True:
+        response = (
+            await client.table("subscription")
+            .select("*")
+            .lt("ends_at", cutoff)
+            .order("ends_at")
+            .limit(batch_size)
+            .execute()
+        )
+        rows = response.data
+        if not rows:
+            break
+        await (
+            client.table("subscription_archive")
+            .upsert(
+                [{**row, "archived_at": now.isoformat()} for row in rows],
+                on_conflict="id",
+                ignore_duplicates=True,
+            )
+            .execute()
+        )
+        await (
+            client.table("subscription")
+            .delete()
+            .in_("id", [row["id"] for row in rows])
+            .execute()
         )
-        subscriptions.append(_subscription)
+        archived += len(rows)
+        if len(rows) < batch_size:
+            break
 
-    return subscriptions
+    if archived:
+        logger.info("Archived %s subscriptions that ended before %s", archived, cutoff)
+    return archived
 
 
 async def cancel_subscription(subscription_id: UUID, client: AsyncClient) -> None:
@@ -119,7 +168,7 @@ async def cancel_subscription(subscription_id: UUID, client: AsyncClient) -> Non
             .execute()
         )
     except Exception as e:
-        logger.error(f"Database query failed: {str(e)}")
+        logger.error("Database query failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database query failed: {str(e)}",
@@ -127,12 +176,13 @@ async def cancel_subscription(subscription_id: UUID, client: AsyncClient) -> Non
 
     _subscription = response.data
     if not _subscription:
-        logger.error(f"Subscription not found")
+        logger.error("Subscription not found")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Subscription not found"
         )
 
     await client.table("subscription").delete().eq("id", subscription_id).execute()
+    forecast.invalidate(_subscription[0]["vendor_id"])
 
 
 async def link_subscription_to_payment(
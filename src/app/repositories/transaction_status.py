@@ -0,0 +1,165 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sslcommerz_lib import SSLCOMMERZ
+from supabase import AsyncClient
+
+from app import enums
+from app.repositories.payment import (
+    GATEWAY_STATUSES,
+    gateway_status,
+    get_transaction_status_by_session,
+    get_transaction_status_by_tranid,
+)
+from app.settings import settings
+from utils.logger import get_logger
+from utils.metrics import REGISTRY
+
+logger = get_logger(__name__)
+
+STATUS_LOOKUPS = REGISTRY.counter(
+    "payment_status_lookups_total",
+    "Transaction status lookups, by query kind and where the answer came from.",
+    labelnames=("kind", "source"),
+)
+
+# The gateway's status for a payment already settled here.
+LOCAL_STATUSES = {
+    enums.PaymentStatus.SUCCESS.value: "VALID",
+    enums.PaymentStatus.FAILED.value: "FAILED",
+    enums.PaymentStatus.CANCELLED.value: "CANCELLED",
+}
+
+Key = Tuple[str, str]
+
+
+class TransactionStatusCache:
+    """
+    Gateway transaction-status answers, per (query kind, session key or
+    tran_id). Final answers are kept until evicted by newer ones (oldest
+    first past `max_entries`); the rest for PAYMENT_STATUS_CACHE_SECONDS,
+    the staleness a polling checkout page already has. Only a success is
+    final: a validated IPN can still turn a failed or cancelled payment
+    into one. Concurrent lookups of the same key share one gateway call.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        # key -> (answer, monotonic expiry or None when final)
+        self._entries: Dict[Key, Tuple[Dict[str, Any], Optional[float]]] = {}
+        self._loading: Dict[Key, asyncio.Future] = {}
+
+    def get(self, key: Key) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """The cached answer and whether it is final, unless it has expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        answer, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return answer, expires_at is None
+
+    def put(self, key: Key, answer: Dict[str, Any], final: bool) -> None:
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            del self._entries[next(iter(self._entries))]
+        self._entries.pop(key, None)
+        expires_at = (
+            None if final else time.monotonic() + settings.PAYMENT_STATUS_CACHE_SECONDS
+        )
+        self._entries[key] = (answer, expires_at)
+
+    async def fetch(
+        self,
+        key: Key,
+        query: Callable[[], Dict[str, Any]],
+        is_final: Callable[[Dict[str, Any]], bool],
+    ) -> Dict[str, Any]:
+        """The cached answer, else the gateway's (one call per key at a time)."""
+        cached = self.get(key)
+        if cached is not None:
+            STATUS_LOOKUPS.inc(kind=key[0], source="cache")
+            return cached[0]
+        loading = self._loading.get(key)
+        if loading is None:
+            STATUS_LOOKUPS.inc(kind=key[0], source="gateway")
+            loading = asyncio.ensure_future(self._load(key, query, is_final))
+            self._loading[key] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(key, None))
+        else:
+            STATUS_LOOKUPS.inc(kind=key[0], source="coalesced")
+        return await asyncio.shield(loading)
+
+    async def _load(self, key, query, is_final) -> Dict[str, Any]:
+        answer = await asyncio.to_thread(query)
+        # Failed queries are not cached; the next poll asks again.
+        if answer.get("APIConnect") == "DONE":
+            self.put(key, answer, is_final(answer))
+        return answer
+
+
+TRANSACTION_STATUS = TransactionStatusCache()
+
+
+async def get_status_by_tranid(
+    db: AsyncClient, sslcz: SSLCOMMERZ, tran_id: str
+) -> Dict[str, Any]:
+    """
+    The gateway's answer for `tran_id`. A payment already settled here is
+    answered from the payments table, in the gateway's format.
+    """
+    key = ("tranid", tran_id)
+    cached = TRANSACTION_STATUS.get(key)
+    if cached is not None and cached[1]:
+        STATUS_LOOKUPS.inc(kind="tranid", source="cache")
+        return cached[0]
+
+    local = await _settled_payment(db, tran_id)
+    if local is not None:
+        STATUS_LOOKUPS.inc(kind="tranid", source="local")
+        if local["element"][0]["status"] == "VALID":
+            TRANSACTION_STATUS.put(key, local, final=True)
+        return local
+
+    return await TRANSACTION_STATUS.fetch(
+        key,
+        lambda: get_transaction_status_by_tranid(sslcz, tran_id),
+        lambda answer: gateway_status(answer) == enums.PaymentStatus.SUCCESS,
+    )
+
+
+async def get_status_by_session(sslcz: SSLCOMMERZ, sessionkey: str) -> Dict[str, Any]:
+    return await TRANSACTION_STATUS.fetch(
+        ("session", sessionkey),
+        lambda: get_transaction_status_by_session(sslcz, sessionkey),
+        lambda answer: (
+            GATEWAY_STATUSES.get(answer.get("status")) == enums.PaymentStatus.SUCCESS
+        ),
+    )
+
+
+async def _settled_payment(db: AsyncClient, tran_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        response = (
+            await db.from_("payments")
+            .select("status, amount")
+            .eq("transaction_id", tran_id)
+            .maybe_single()
+            .execute()
+        )
+    except Exception as e:
+        # The gateway can still answer.
+        logger.warning("Failed to read payment %s: %s", tran_id, e)
+        return None
+    if response is None or not response.data:
+        return None
+    status = LOCAL_STATUSES.get(response.data["status"])
+    if status is None:
+        return None
+    element = {
+        "tran_id": tran_id,
+        "status": status,
+        "amount": str(response.data["amount"]),
+    }
+    return {"APIConnect": "DONE", "no_of_trans_found": 1, "element": [element]}
@@ -5,7 +5,9 @@ from fastapi import HTTPException, status
 from supabase import AsyncClient
 
 from app import schemas
-from utils.logger import logger
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 async def get_user_details(user_id: UUID, client: AsyncClient):
@@ -17,7 +19,7 @@ async def get_user_details(user_id: UUID, client: AsyncClient):
             .execute()
         )
     except Exception as e:
-        logger.error(f"Database query failed: {str(e)}")
+        logger.error("Database query failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database query failed: {str(e)}",
@@ -49,14 +51,14 @@ async def get_user_details(user_id: UUID, client: AsyncClient):
             .execute()
         )
     except Exception as e:
-        logger.error(f"Database query failed: {str(e)}")
+        logger.error("Database query failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database query failed: {str(e)}",
         )
 
     if not response.data:
-        logger.error(f"User not found")
+        logger.error("User not found")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User not found",
@@ -5,7 +5,9 @@ from fastapi import HTTPException, status
 from supabase import AsyncClient
 
 from app import schemas
-from utils.logger import logger
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 IMG_WIDTH: int = 300
 IMG_HEIGHT: int = 200
@@ -15,7 +17,7 @@ async def get_all_vendors(client: AsyncClient) -> List[schemas.VendorsResponse]:
     try:
         response = await client.table("vendors").select("*").execute()
     except Exception as e:
-        logger.error(f"Database query failed: {str(e)}")
+        logger.error("Database query failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database query failed: {str(e)}",
@@ -31,7 +33,9 @@ async def get_all_vendors(client: AsyncClient) -> List[schemas.VendorsResponse]:
         _path = vendor.get("img_path")
 
         if not _bucket or not _path:
-            logger.error(f"Path or bucket for vendor {vendor.get("id")} does not exist")
+            logger.error(
+                "Path or bucket for vendor %s does not exist", vendor.get("id")
+            )
             continue
 
         try:
@@ -52,7 +56,7 @@ async def get_all_vendors(client: AsyncClient) -> List[schemas.VendorsResponse]:
             vendors.append(_vendor)
 
         except Exception as e:
-            logger.error(f"Path or bucket does not exist")
+            logger.error("Path or bucket does not exist")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Path or bucket does not exist",
@@ -69,7 +73,7 @@ async def get_vendor_by_id(
             await client.table("vendors").select("*").eq("id", vendor_id).execute()
         )
     except Exception as e:
-        logger.error(f"Database query failed: {str(e)}")
+        logger.error("Database query failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database query failed: {str(e)}",
@@ -87,7 +91,7 @@ async def get_vendor_by_id(
     _path = _vendor.get("img_path")
 
     if not _bucket or not _path:
-        logger.error(f"Path or bucket does not exist")
+        logger.error("Path or bucket does not exist")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Path or bucket does not exist",
@@ -108,7 +112,7 @@ async def get_vendor_by_id(
             delivery_time=_vendor.get("deliveryTime"),
         )
     except Exception as e:
-        logger.error(f"Path or bucket does not exist")
+        logger.error("Path or bucket does not exist")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Path or bucket does not exist",
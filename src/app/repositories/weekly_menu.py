@@ -5,7 +5,9 @@ from fastapi import HTTPException, status
 from supabase import AsyncClient
 
 from app import schemas
-from utils.logger import logger
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 # --- Security Helper ---
 # (Copied from date_specials repo for use here)
@@ -66,7 +68,7 @@ async def get_vendor_weekly_menu(
         return result_list
 
     except Exception as e:
-        logger.error(f"Error getting weekly menu for vendor {vendor_id}: {e}")
+        logger.error("Error getting weekly menu for vendor %s: %s", vendor_id, e)
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
 
 
@@ -146,5 +148,5 @@ async def set_weekly_availability(
     except HTTPException as e:
         raise e  # Re-throw known HTTP exceptions
     except Exception as e:
-        logger.error(f"Error setting weekly availability: {e}")
+        logger.error("Error setting weekly availability: %s", e)
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
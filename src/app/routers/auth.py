@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, status
 from supabase import AsyncClient
 
 from app import schemas
-from app.repositories import auth
+from app.repositories import auth, sessions
 from db.supabase import get_db
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -24,3 +24,17 @@ async def register(
 @router.post("/login/", response_model=schemas.LoginResponse)
 async def login(request: schemas.LoginRequest, client: AsyncClient = Depends(get_db)):
     return await auth.login(request=request, client=client)
+
+
+@router.post("/refresh/", response_model=schemas.LoginResponse)
+async def refresh(
+    request: schemas.RefreshRequest, client: AsyncClient = Depends(get_db)
+):
+    return await sessions.refresh(request=request, client=client)
+
+
+@router.post("/logout/", response_model=schemas.BaseResponse)
+async def logout(
+    request: schemas.RefreshRequest, client: AsyncClient = Depends(get_db)
+):
+    return await sessions.logout(request=request, client=client)
@@ -2,13 +2,14 @@ import uuid
 from datetime import date
 from typing import List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 from supabase import AsyncClient
 
 from app import schemas
 from app.repositories import date_specials as repo
-from db.supabase import get_db
+from db.supabase import get_db, get_read_db
 from utils.auth import get_vendor
+from utils.http_cache import IMMUTABLE
 
 router = APIRouter(prefix="/specials", tags=["Date Specials"])
 
@@ -55,7 +56,7 @@ async def get_my_specials(
     summary="Get all specials for today (Public)",
 )
 async def get_today_specials(
-    client: AsyncClient = Depends(get_db),
+    client: AsyncClient = Depends(get_read_db),
 ) -> List[schemas.DateSpecialDetailResponse]:
     """
     Retrieves all specials from all vendors for the current date.
@@ -70,11 +71,16 @@ async def get_today_specials(
     summary="Get all specials for a specific date (Public)",
 )
 async def get_specials_by_date(
-    query_date: date, client: AsyncClient = Depends(get_db)
+    query_date: date,
+    response: Response,
+    client: AsyncClient = Depends(get_read_db),
 ) -> List[schemas.DateSpecialDetailResponse]:
     """
     Retrieves all specials from all vendors for a specific date (YYYY-MM-DD).
+    Specials for past dates no longer change and are cached as immutable.
     """
+    if query_date < date.today():
+        response.headers["Cache-Control"] = IMMUTABLE
     return await repo.get_specials_for_date(query_date, client)
 
 
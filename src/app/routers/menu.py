@@ -9,8 +9,9 @@ from supabase import AsyncClient
 
 from app import schemas
 from app.repositories import menu
-from db.supabase import get_db
+from db.supabase import get_db, get_read_db
 from utils.auth import get_vendor
+from utils.serialization import list_response
 
 router = APIRouter(prefix="/menu", tags=["menu"])
 
@@ -20,8 +21,9 @@ router = APIRouter(prefix="/menu", tags=["menu"])
     response_model=List[schemas.MenuResponse],
     status_code=status.HTTP_200_OK,
 )
-async def get_all_menus(client: AsyncClient = Depends(get_db)):
-    return await menu.get_all_menus(client=client)
+async def get_all_menus(client: AsyncClient = Depends(get_read_db)):
+    menus = await menu.get_all_menus(client=client)
+    return list_response(schemas.MenuResponse, menus)
 
 
 @router.post(
@@ -45,8 +47,9 @@ async def add_menu_item(
 async def get_my_menu(
     vendor: schemas.UserBase = Depends(get_vendor),
     client: AsyncClient = Depends(get_db),
-) -> List[schemas.MenuItemResponse]:
-    return await menu.get_all_menus_by_vendor(vendor_id=vendor.id, client=client)
+):
+    items = await menu.get_all_menus_by_vendor(vendor_id=vendor.id, client=client)
+    return list_response(schemas.MenuItemResponse, items)
 
 
 @router.get(
@@ -56,7 +59,7 @@ async def get_my_menu(
     summary="Get a specific menu item by its ID (Public)",
 )
 async def get_menu_item(
-    item_id: UUID, client: AsyncClient = Depends(get_db)
+    item_id: UUID, client: AsyncClient = Depends(get_read_db)
 ) -> schemas.MenuItemResponse:
     """
     Retrieves a single menu item by its unique ID. This endpoint is public.
@@ -111,12 +114,13 @@ async def delete_menu_item(
 )
 async def get_vendor_menu(
     vendor_id: UUID,
-    client: AsyncClient = Depends(get_db),
-) -> List[schemas.MenuItemResponse]:
+    client: AsyncClient = Depends(get_read_db),
+):
     """
     Retrieves all menu items for a specific vendor. This endpoint is public.
     """
-    return await menu.get_all_menus_by_vendor(vendor_id=vendor_id, client=client)
+    items = await menu.get_all_menus_by_vendor(vendor_id=vendor_id, client=client)
+    return list_response(schemas.MenuItemResponse, items)
 
 
 @router.post(
@@ -145,6 +149,9 @@ async def upload_menu_image(
 )
 async def get_vendor_menu_with_availability(
     vendor_id: UUID,
-    client: AsyncClient = Depends(get_db),
+    client: AsyncClient = Depends(get_read_db),
 ):
-    return await menu.get_vendor_menu_with_availability(vendor_id=vendor_id, client=client)
\ No newline at end of file
+    items = await menu.get_vendor_menu_with_availability(
+        vendor_id=vendor_id, client=client
+    )
+    return list_response(schemas.MenuItemResponse, items)
\ No newline at end of file
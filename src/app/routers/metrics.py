@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import PlainTextResponse
+
+from utils.auth import admin_auth
+from utils.metrics import REGISTRY
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(admin_auth)],
+    status_code=status.HTTP_200_OK,
+    include_in_schema=False,
+)
+async def get_metrics():
+    """Prometheus scrape endpoint. Authenticate with the admin API key."""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4"
+    )
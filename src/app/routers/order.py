@@ -1,13 +1,16 @@
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from supabase import AsyncClient
 
 from app import schemas
-from app.repositories import order
+from app.repositories import forecast, order
 from db.supabase import get_db
-from utils.auth import get_current_user
+from utils.auth import get_current_user, get_vendor
+from utils.email_queue import EmailQueue, get_email_queue
+from utils.order_queue import OrderQueue, get_order_queue
+from utils.serialization import list_response
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
@@ -16,15 +19,31 @@ router = APIRouter(prefix="/orders", tags=["orders"])
     "/{vendor_id}/{menu_id}",
     response_model=schemas.OrderCreateResponse,
     status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": schemas.OrderCreateResponse}},
 )
 async def create_order(
     order_data: schemas.OrderRequest,
     vendor_id: UUID,
     menu_id: UUID,
+    response: Response,
     client: AsyncClient = Depends(get_db),
     user: schemas.UserID = Depends(get_current_user),
+    order_queue: Optional[OrderQueue] = Depends(get_order_queue),
 ):
-    """Create a new order"""
+    """
+    Create a new order. With queued intake the order is accepted (202) and
+    written shortly after; follow it at /orders/intake/{order_id}.
+    """
+    if order_queue is not None:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await order.queue_order(
+            client=client,
+            order_queue=order_queue,
+            order_data=order_data,
+            user_id=user.id,
+            vendor_id=vendor_id,
+            menu_id=menu_id,
+        )
     return await order.create_order(
         client=client,
         order_data=order_data,
@@ -34,6 +53,47 @@ async def create_order(
     )
 
 
+@router.get(
+    "/intake/{order_id}",
+    response_model=schemas.OrderIntakeResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_order_intake_status(
+    order_id: UUID,
+    wait: float = Query(
+        0, ge=0, le=20, description="Seconds to wait for the order to be written"
+    ),
+    client: AsyncClient = Depends(get_db),
+    user: schemas.UserID = Depends(get_current_user),
+    order_queue: Optional[OrderQueue] = Depends(get_order_queue),
+):
+    """Whether a queued order has been written yet"""
+    return await order.get_order_intake_status(
+        client=client,
+        order_queue=order_queue,
+        order_id=order_id,
+        user_id=user.id,
+        wait=wait,
+    )
+
+
+@router.get(
+    "/forecast",
+    response_model=List[schemas.ForecastDay],
+    status_code=status.HTTP_200_OK,
+)
+async def get_forecast(
+    days: int = Query(7, ge=1, le=14, description="Number of days from today"),
+    vendor: schemas.UserBase = Depends(get_vendor),
+    client: AsyncClient = Depends(get_db),
+):
+    """Expected quantities per day and menu item (Vendor only)"""
+    days_forecast = await forecast.get_vendor_forecast(
+        vendor_id=vendor.id, client=client, days=days
+    )
+    return list_response(schemas.ForecastDay, days_forecast)
+
+
 @router.get(
     "/user/{user_id}",
     response_model=List[schemas.OrderResponse],
@@ -41,7 +101,8 @@ async def create_order(
 )
 async def get_user_orders(user_id: UUID, client: AsyncClient = Depends(get_db)):
     """Get all orders for a specific user"""
-    return await order.get_user_orders(client=client, user_id=user_id)
+    orders = await order.get_user_orders(client=client, user_id=user_id)
+    return list_response(schemas.OrderResponse, orders)
 
 
 @router.get(
@@ -55,9 +116,30 @@ async def get_vendor_orders(
     client: AsyncClient = Depends(get_db),
 ):
     """Get all orders for a specific vendor, optionally filter by delivery status"""
-    return await order.get_vendor_orders(
+    orders = await order.get_vendor_orders(
         client=client, vendor_id=vendor_id, delivered=delivered
     )
+    return list_response(schemas.OrderResponse, orders)
+
+
+@router.patch(
+    "/status",
+    response_model=schemas.OrderBulkStatusResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def update_orders_status_bulk(
+    status_update: schemas.OrderBulkStatusUpdate,
+    vendor: schemas.UserBase = Depends(get_vendor),
+    client: AsyncClient = Depends(get_db),
+    email_queue: EmailQueue = Depends(get_email_queue),
+):
+    """Update the delivery status of many of your orders at once (Vendor only)"""
+    return await order.update_orders_status_bulk(
+        client=client,
+        vendor_id=vendor.id,
+        status_update=status_update,
+        email_queue=email_queue,
+    )
 
 
 @router.patch(
@@ -68,13 +150,13 @@ async def get_vendor_orders(
 async def update_order_status(
     order_id: UUID,
     status_update: schemas.OrderStatusUpdate,
-    background_tasks: BackgroundTasks,
     client: AsyncClient = Depends(get_db),
+    email_queue: EmailQueue = Depends(get_email_queue),
 ):
     """Update the delivery status of an order (for vendors)"""
     return await order.update_order_status(
         client=client,
         order_id=order_id,
         status_update=status_update,
-        background_tasks=background_tasks,
+        email_queue=email_queue,
     )
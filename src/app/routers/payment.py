@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, Form, Request, status
 from fastapi.responses import RedirectResponse
 from sslcommerz_lib import SSLCOMMERZ
@@ -6,19 +8,23 @@ from supabase import AsyncClient
 from app import enums, schemas
 from app.repositories.order import link_orders_to_payment
 from app.repositories.payment import (
+    VALID_STATUSES,
     create_payment,
     create_payment_session,
     get_sslcommerz,
-    get_transaction_status_by_session,
-    get_transaction_status_by_tranid,
     update_payment_status,
     validate_transaction,
 )
 from app.repositories.subscription import link_subscription_to_payment
+from app.repositories.transaction_status import (
+    get_status_by_session,
+    get_status_by_tranid,
+)
 from app.repositories.user_details import get_user_details
 from app.settings import settings
 from db.supabase import get_db
 from utils.auth import get_current_user
+from utils.ipn_queue import IPNQueue, get_ipn_queue
 
 router = APIRouter(prefix="/payment", tags=["payment"])
 
@@ -79,6 +85,7 @@ async def payment_success(
     request: Request,
     sslcz: SSLCOMMERZ = Depends(get_sslcommerz),
     db: AsyncClient = Depends(get_db),
+    ipn_queue: IPNQueue = Depends(get_ipn_queue),
 ):
     """
     Handle successful payment and update the payment status in the database.
@@ -92,8 +99,20 @@ async def payment_success(
             status_code=status.HTTP_303_SEE_OTHER,
         )
 
-    response = validate_transaction(sslcz, val_id)
-    if response["status"] == "VALID":
+    # The IPN for this transaction is usually handled first.
+    tran_id = form_data.get("tran_id")
+    if (
+        tran_id
+        and await asyncio.to_thread(ipn_queue.outcome, tran_id, val_id)
+        == enums.PaymentStatus.SUCCESS
+    ):
+        return RedirectResponse(
+            url=f"{settings.CLIENT_ORIGIN_URL}/payment/status?status=success&tran_id={tran_id}",
+            status_code=status.HTTP_303_SEE_OTHER,
+        )
+
+    response = await asyncio.to_thread(validate_transaction, sslcz, val_id)
+    if response["status"] in VALID_STATUSES:
         tran_id = response["tran_id"]
         await update_payment_status(db, tran_id, enums.PaymentStatus.SUCCESS)
 
@@ -147,19 +166,16 @@ async def payment_cancel(
 async def payment_ipn(
     request: dict,
     sslcz: SSLCOMMERZ = Depends(get_sslcommerz),
-    db: AsyncClient = Depends(get_db),
+    ipn_queue: IPNQueue = Depends(get_ipn_queue),
 ):
     """
-    Handle Instant Payment Notification (IPN) and update the payment status.
+    Handle Instant Payment Notification (IPN). The notification is queued
+    once its hash checks out and validated with the gateway in the background.
     """
-    if sslcz.hash_validate_ipn(request):
-        response = validate_transaction(sslcz, request["val_id"])
-        if response["status"] == "VALID":
-            tran_id = response["tran_id"]
-            await update_payment_status(db, tran_id, enums.PaymentStatus.SUCCESS)
-            return response
-    await update_payment_status(db, request.get("tran_id"), enums.PaymentStatus.FAILED)
-    return {"message": "IPN validation failed"}
+    if not sslcz.hash_validate_ipn(request):
+        return {"message": "IPN validation failed"}
+    await ipn_queue.submit(request)
+    return {"message": "IPN received"}
 
 
 @router.get("/transaction-status-session/{sessionkey}", status_code=status.HTTP_200_OK)
@@ -167,14 +183,13 @@ async def transaction_status_session(
     sessionkey: str,
     sslcz: SSLCOMMERZ = Depends(get_sslcommerz),
 ):
-    response = get_transaction_status_by_session(sslcz, sessionkey)
-    return response
+    return await get_status_by_session(sslcz, sessionkey)
 
 
 @router.get("/transaction-status-tranid/{tranid}", status_code=status.HTTP_200_OK)
 async def transaction_status_tranid(
     tranid: str,
     sslcz: SSLCOMMERZ = Depends(get_sslcommerz),
+    db: AsyncClient = Depends(get_db),
 ):
-    response = get_transaction_status_by_tranid(sslcz, tranid)
-    return response
+    return await get_status_by_tranid(db, sslcz, tranid)
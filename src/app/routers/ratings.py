@@ -4,7 +4,7 @@ from supabase import AsyncClient
 
 from app import schemas
 from app.repositories import ratings as rating_repo
-from db.supabase import get_db
+from db.supabase import get_db, get_read_db
 from utils.auth import get_current_user
 
 router = APIRouter(prefix="/ratings", tags=["ratings"])
@@ -31,7 +31,7 @@ async def rate_vendor(
 )
 async def get_vendor_rating_stats(
     vendor_id: UUID,
-    client: AsyncClient = Depends(get_db),
+    client: AsyncClient = Depends(get_read_db),
 ):
     return await rating_repo.get_vendor_stats(client=client, vendor_id=vendor_id)
 
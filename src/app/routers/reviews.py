@@ -6,7 +6,7 @@ from supabase import AsyncClient
 
 from app import schemas
 from app.repositories import reviews as review_repo
-from db.supabase import get_db
+from db.supabase import get_db, get_read_db
 from utils.auth import get_current_user
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
@@ -33,7 +33,7 @@ async def create_review(
 )
 async def get_vendor_reviews(
     vendor_id: UUID,
-    client: AsyncClient = Depends(get_db),
+    client: AsyncClient = Depends(get_read_db),
     # Removed auth dependency here so frontend can load reviews freely
 ):
     return await review_repo.get_reviews_by_vendor(
@@ -1,7 +1,7 @@
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from supabase import AsyncClient
 
 from app import schemas
@@ -34,12 +34,14 @@ async def subscribe(
     status_code=status.HTTP_200_OK,
 )
 async def get_subscription_by_vendor(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
     vendor: schemas.VendorID = Depends(get_current_user),
     client: AsyncClient = Depends(get_db),
 ):
     vendor_id = vendor.id
     return await subscription.get_subscriptions_by_vendor(
-        vendor_id=vendor_id, client=client
+        vendor_id=vendor_id, client=client, limit=limit, offset=offset
     )
 
 
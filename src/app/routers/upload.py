@@ -2,12 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from supabase import AsyncClient
 from uuid import uuid4
 import os
-from utils.logger import logger
+from utils.logger import get_logger
 
 from app import schemas
 from db.supabase import get_db
 from utils.auth import get_vendor
 
+logger = get_logger(__name__)
+
 router = APIRouter(prefix="/upload", tags=["upload"])
 
 # Default bucket names
@@ -53,7 +55,7 @@ async def upload_menu_image(
         )
 
         if response:
-            logger.info(f"Successfully uploaded menu image: {file_path}")
+            logger.info("Successfully uploaded menu image: %s", file_path)
             return {
                 "bucket": MENU_IMAGE_BUCKET,
                 "path": file_path,
@@ -68,7 +70,7 @@ async def upload_menu_image(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error uploading menu image: {str(e)}")
+        logger.error("Error uploading menu image: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload image: {str(e)}"
@@ -109,7 +111,7 @@ async def upload_vendor_image(
         )
 
         if response:
-            logger.info(f"Successfully uploaded vendor image: {file_path}")
+            logger.info("Successfully uploaded vendor image: %s", file_path)
             return {
                 "bucket": VENDOR_IMAGE_BUCKET,
                 "path": file_path,
@@ -124,7 +126,7 @@ async def upload_vendor_image(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error uploading vendor image: {str(e)}")
+        logger.error("Error uploading vendor image: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload image: {str(e)}"
@@ -6,7 +6,7 @@ from supabase import AsyncClient
 
 from app import schemas
 from app.repositories import vendors
-from db.supabase import get_db
+from db.supabase import get_db, get_read_db
 from utils.auth import get_current_user, user_or_admin_auth
 
 router = APIRouter(prefix="/vendors", tags=["vendors"])
@@ -18,7 +18,7 @@ router = APIRouter(prefix="/vendors", tags=["vendors"])
     dependencies=[Depends(user_or_admin_auth)],
     status_code=status.HTTP_200_OK,
 )
-async def get_all_vendors(client: AsyncClient = Depends(get_db)):
+async def get_all_vendors(client: AsyncClient = Depends(get_read_db)):
     return await vendors.get_all_vendors(client=client)
 
 
@@ -41,5 +41,7 @@ async def get_vendor_by_token(
     dependencies=[Depends(user_or_admin_auth)],
     status_code=status.HTTP_200_OK,
 )
-async def get_vendor_by_id(vendor_id: UUID, client: AsyncClient = Depends(get_db)):
+async def get_vendor_by_id(
+    vendor_id: UUID, client: AsyncClient = Depends(get_read_db)
+):
     return await vendors.get_vendor_by_id(vendor_id=vendor_id, client=client)
\ No newline at end of file
@@ -195,6 +195,11 @@ class LoginRequest(BaseModel):
 class LoginResponse(BaseModel):
     success: bool
     token: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
 class VendorDeliveryTime(BaseModel):
@@ -293,6 +298,13 @@ class OrderCreateResponse(BaseModel):
     success: bool
     message: str
     order_id: UUID
+    status: enums.OrderIntakeStatus = enums.OrderIntakeStatus.CONFIRMED
+
+
+class OrderIntakeResponse(BaseModel):
+    order_id: UUID
+    status: enums.OrderIntakeStatus
+    detail: Optional[str] = None
 
 
 # Add new schema for updating order status
@@ -300,6 +312,37 @@ class OrderStatusUpdate(BaseModel):
     is_delivered: bool
 
 
+class OrderBulkStatusUpdate(BaseModel):
+    order_ids: List[UUID] = Field(..., min_length=1, max_length=500)
+    is_delivered: bool
+
+
+class OrderStatusResult(BaseModel):
+    order_id: UUID
+    updated: bool
+    notified: bool = False
+    detail: Optional[str] = None
+
+
+class OrderBulkStatusResponse(BaseResponse):
+    results: List[OrderStatusResult]
+
+
+class ForecastItem(BaseModel):
+    menu_item_id: UUID
+    name: Optional[str] = None
+    ordered: int
+    stock_cap: Optional[int] = None  # the special's stock: ordered + remaining
+    expected: int  # ordered; orders cannot exceed the stock
+
+
+class ForecastDay(BaseModel):
+    day: date
+    subscriptions: int  # active subscriptions, one meal each
+    items: List[ForecastItem]
+    total_expected: int
+
+
 class VendorDetailsResponse(BaseModel):
     id: UUID
     name: str
@@ -1,3 +1,5 @@
+from typing import Dict, List
+
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 
@@ -10,6 +12,17 @@ class Settings(BaseSettings):
     SUPABASE_SERVICE_ROLE: str
 
     JWT_SECRET: str
+    # Access tokens last ACCESS_TOKEN_MINUTES. Login also starts a session
+    # whose refresh token (single use, valid REFRESH_TOKEN_DAYS) POST
+    # /auth/refresh/ trades for a new pair without the password. Sessions
+    # revoked on other workers are pulled into memory this often. A refresh
+    # token presented again within REFRESH_TOKEN_RETRY_SECONDS of its rotation
+    # (a client retrying after a lost response) gets another new pair; later
+    # reuse revokes the session.
+    ACCESS_TOKEN_MINUTES: int = 60
+    REFRESH_TOKEN_DAYS: int = 30
+    REFRESH_TOKEN_RETRY_SECONDS: float = 60
+    SESSION_REVOCATION_SYNC_SECONDS: float = 30
 
     API_KEY: str
 
@@ -23,6 +36,152 @@ class Settings(BaseSettings):
 
     RESEND_API_KEY: str
 
+    # Shared HTTP pool for PostgREST, storage and auth calls
+    SUPABASE_HTTP2: bool = True
+    SUPABASE_MAX_CONNECTIONS: int = 100
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    SUPABASE_KEEPALIVE_EXPIRY: float = 30.0
+    # Timeouts in seconds; storage transfers get a longer read/write budget
+    SUPABASE_CONNECT_TIMEOUT: float = 5.0
+    SUPABASE_POOL_TIMEOUT: float = 5.0
+    SUPABASE_QUERY_TIMEOUT: float = 10.0
+    SUPABASE_STORAGE_TIMEOUT: float = 30.0
+
+    # Optional read replica (or separate PostgREST) for public read routes.
+    # Empty URL sends reads to the primary; empty key reuses the service role.
+    SUPABASE_READ_URL: str = ""
+    SUPABASE_READ_KEY: str = ""
+    # After a write, the caller reads from the primary for this many seconds
+    SUPABASE_READ_AFTER_WRITE_SECONDS: float = 5.0
+
+    # "supabase" (PostgREST only) or "postgres": the hot reads (today's menu,
+    # vendor orders, rating stats, reviews, auth lookups) query DATABASE_URL
+    # directly through an asyncpg pool. Behind a transaction-mode pooler set
+    # DATABASE_STATEMENT_CACHE_SIZE to 0, as prepared statements cannot be kept.
+    DATABASE_BACKEND: str = "supabase"
+    DATABASE_URL: str = ""
+    DATABASE_POOL_MIN_SIZE: int = 2
+    DATABASE_POOL_MAX_SIZE: int = 10
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100
+    DATABASE_QUERY_TIMEOUT: float = 10.0
+
+    EMAIL_PROVIDER: str = "resend"
+    EMAIL_QUEUE_PATH: str = "email_queue.db"
+    EMAIL_BATCH_SIZE: int = 100
+    EMAIL_RATE_PER_SECOND: float = 2.0
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_BASE_SECONDS: float = 2.0
+
+    # "direct" inserts each order within its request. "queued" validates the
+    # order, stores it in a local SQLite queue and answers 202 with its id; a
+    # writer task inserts queued orders in batches of up to
+    # ORDER_QUEUE_BATCH_SIZE. Clients poll GET /orders/intake/{order_id}.
+    ORDER_INTAKE_MODE: str = "direct"
+    ORDER_QUEUE_PATH: str = "order_queue.db"
+    ORDER_QUEUE_BATCH_SIZE: int = 200
+    ORDER_QUEUE_LINGER_SECONDS: float = 0.05
+    ORDER_QUEUE_MAX_ATTEMPTS: int = 5
+
+    # Payment notifications (IPNs) are acknowledged once their hash checks out
+    # and stored in a local SQLite queue; a validator task checks them with the
+    # gateway, at most IPN_VALIDATION_CONCURRENCY calls at a time, and settles
+    # each payment once. Retried notifications are recognised by tran_id/val_id.
+    IPN_QUEUE_PATH: str = "ipn_queue.db"
+    IPN_BATCH_SIZE: int = 50
+    IPN_VALIDATION_CONCURRENCY: int = 8
+    IPN_MAX_ATTEMPTS: int = 8
+
+    # "sslcommerz", or "fake" for an in-memory gateway to run locally
+    # (app.repositories.payment.FakeSSLCommerz)
+    PAYMENT_GATEWAY: str = "sslcommerz"
+    # Transaction-status answers still open at the gateway are reused for this
+    # long by the status routes the checkout page polls; final ones are kept
+    PAYMENT_STATUS_CACHE_SECONDS: float = 5.0
+    # Payments still pending this long after creation are rechecked with the
+    # gateway every PAYMENT_RECONCILE_INTERVAL_SECONDS, a page of
+    # PAYMENT_RECONCILE_PAGE_SIZE at a time with at most
+    # PAYMENT_RECONCILE_CONCURRENCY gateway calls in flight. Ones the gateway
+    # still has open are failed after PAYMENT_ABANDON_AFTER_SECONDS.
+    PAYMENT_RECONCILE_AFTER_SECONDS: float = 15 * 60
+    PAYMENT_RECONCILE_INTERVAL_SECONDS: float = 5 * 60
+    PAYMENT_RECONCILE_PAGE_SIZE: int = 200
+    PAYMENT_RECONCILE_CONCURRENCY: int = 8
+    PAYMENT_ABANDON_AFTER_SECONDS: float = 24 * 60 * 60
+
+    # Orders claim date-special stock with a conditional decrement in the
+    # database, batching the claims that arrive within the window into one
+    # call. A claim is held until its order is written and given back if the
+    # order fails or is not confirmed within INVENTORY_HOLD_SECONDS; an item
+    # seen sold out is refused locally for INVENTORY_SOLD_OUT_SECONDS.
+    INVENTORY_BATCH_WINDOW_SECONDS: float = 0.005
+    INVENTORY_HOLD_SECONDS: float = 120.0
+    INVENTORY_SOLD_OUT_SECONDS: float = 5.0
+
+    # Orders are priced from an in-memory price book (menu item, day) filled
+    # by the menu feed; menu and special writes invalidate it, writes through
+    # other workers are seen after this long
+    PRICE_BOOK_SECONDS: float = 60.0
+
+    LOG_LEVEL: str = "INFO"
+    # Per-module overrides, e.g. {"app.repositories.menu": "DEBUG"}
+    LOG_LEVELS: Dict[str, str] = {}
+    LOG_FORMAT: str = "text"
+    LOG_FILE: str = "app.log"
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
+    LOG_ROTATE_INTERVAL_SECONDS: int = 24 * 60 * 60
+
+    # N+1 detection: "off", "log" or "raise" (development only)
+    QUERY_BUDGET_MODE: str = "off"
+    QUERY_BUDGET_MAX_CALLS: int = 15
+    QUERY_BUDGET_MAX_REPEATS: int = 3
+
+    # Token buckets per "METHOD /route/template", as "<requests>/<period>"
+    # (second, minute or hour); "default" covers every other route. Callers
+    # are keyed by user or vendor id from their token, else by IP.
+    RATE_LIMIT_ENABLED: bool = True
+    # "memory" (per worker) or "sqlite" (shared by the workers on a host)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_SQLITE_PATH: str = "rate_limit.db"
+    RATE_LIMITS: Dict[str, str] = {
+        "POST /auth/login/": "10/minute",
+        "POST /auth/register/": "5/minute",
+        "POST /auth/refresh/": "30/minute",
+        "GET /menu/": "120/minute",
+        "GET /reviews/{vendor_id}": "120/minute",
+        "default": "600/minute",
+    }
+    # Write routes honouring an Idempotency-Key header: the first response per
+    # caller and key is replayed to retries for IDEMPOTENCY_TTL_SECONDS.
+    # "memory" (per worker) or "sqlite" (shared by the workers on a host)
+    IDEMPOTENCY_ROUTES: List[str] = [
+        "POST /orders/{vendor_id}/{menu_id}",
+        "POST /payment/init",
+        "POST /subscribe/{vendor_id}",
+    ]
+    IDEMPOTENCY_TTL_SECONDS: float = 24 * 60 * 60
+    IDEMPOTENCY_BACKEND: str = "memory"
+    IDEMPOTENCY_SQLITE_PATH: str = "idempotency.db"
+    # Load shedding: answer 503 past either threshold (0 disables it)
+    SHED_MAX_IN_FLIGHT: int = 256
+    SHED_MAX_LOOP_LAG_MS: float = 500.0
+
+    # gzip/brotli for text and JSON responses of at least this many bytes
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    # Bodies this large are compressed in a worker thread, off the event loop
+    COMPRESSION_THREAD_MIN_SIZE: int = 64 * 1024
+
+    # Subscriptions that ended more than this many days ago are moved to
+    # subscription_archive by a sweep every SUBSCRIPTION_SWEEP_INTERVAL_SECONDS
+    SUBSCRIPTION_ARCHIVE_AFTER_DAYS: int = 30
+    SUBSCRIPTION_SWEEP_INTERVAL_SECONDS: float = 60 * 60
+
+    # Vendor forecasts are cached per vendor per day; orders and subscriptions
+    # handled by this worker invalidate them, other workers' after this long
+    FORECAST_CACHE_SECONDS: float = 5 * 60
+
     @property
     def docs_url(self):
         return None if self.APP_MODE == "production" else "/docs"
@@ -0,0 +1,285 @@
+"""
+Seeded generators for a realistic TiffinTime dataset.
+
+Every run with the same preset and seed produces the same rows, so two
+benchmark runs differ only in the code under test.
+"""
+
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List
+
+from db.fake import TableStore
+
+# bcrypt hash of "password"; the benchmarks authenticate with minted tokens,
+# so the hash only needs to look real.
+PASSWORD_HASH = "$2b$12$KIXQJ0q6mQ3E1y0bJ0m1UOXnT1yYxqXq8u6V5j8nP5o6T8zQH3cWa"
+
+CATEGORIES = ["Rice", "Curry", "Snacks", "Drinks", "Desserts"]
+DISHES = [
+    "Chicken Biryani",
+    "Beef Tehari",
+    "Khichuri",
+    "Dal Bhaat",
+    "Fish Curry",
+    "Mutton Rezala",
+    "Vegetable Bhaji",
+    "Singara",
+    "Samosa",
+    "Chotpoti",
+    "Fuchka",
+    "Lassi",
+    "Borhani",
+    "Mango Juice",
+    "Rasmalai",
+    "Mishti Doi",
+    "Firni",
+    "Egg Curry",
+    "Chicken Roast",
+    "Polao",
+]
+FIRST_NAMES = [
+    "Arif",
+    "Nusrat",
+    "Tanvir",
+    "Farhana",
+    "Rafi",
+    "Sadia",
+    "Imran",
+    "Mehjabin",
+    "Rakib",
+    "Tasnim",
+    "Shuvo",
+    "Anika",
+]
+LAST_NAMES = ["Hossain", "Rahman", "Ahmed", "Islam", "Chowdhury", "Karim", "Das"]
+PICKUPS = ["Main Gate", "Library", "Hall 1", "Hall 2", "Cafeteria", "Lab Building"]
+
+
+@dataclass(frozen=True)
+class DatasetSize:
+    vendors: int
+    items_per_vendor: int
+    users: int
+    orders: int
+    ratings: int
+    reviews: int
+    subscriptions: int
+    special_days: int = 7
+
+
+PRESETS: Dict[str, DatasetSize] = {
+    "small": DatasetSize(
+        vendors=10,
+        items_per_vendor=8,
+        users=200,
+        orders=2_000,
+        ratings=400,
+        reviews=200,
+        subscriptions=100,
+    ),
+    "medium": DatasetSize(
+        vendors=40,
+        items_per_vendor=15,
+        users=2_000,
+        orders=20_000,
+        ratings=4_000,
+        reviews=2_000,
+        subscriptions=1_000,
+    ),
+    "large": DatasetSize(
+        vendors=120,
+        items_per_vendor=25,
+        users=10_000,
+        orders=100_000,
+        ratings=20_000,
+        reviews=10_000,
+        subscriptions=5_000,
+    ),
+}
+
+
+@dataclass
+class Dataset:
+    store: TableStore
+    vendor_ids: List[str] = field(default_factory=list)
+    user_ids: List[str] = field(default_factory=list)
+    # vendor id -> menu item ids
+    menu_items: Dict[str, List[str]] = field(default_factory=dict)
+    # menu item id -> effective price
+    prices: Dict[str, float] = field(default_factory=dict)
+    order_ids: Dict[str, List[str]] = field(default_factory=dict)  # per vendor
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _phone(rng: random.Random) -> str:
+    return "01" + "".join(str(rng.randint(0, 9)) for _ in range(9))
+
+
+def generate(size: DatasetSize, seed: int = 42, today: date | None = None) -> Dataset:
+    rng = random.Random(seed)
+    today = today or date.today()
+    now = datetime.now(timezone.utc)
+    dataset = Dataset(store=TableStore())
+    tables: Dict[str, List[dict]] = {
+        name: []
+        for name in (
+            "vendors",
+            "users",
+            "menu_items",
+            "weekly_availability",
+            "date_specials",
+            "orders",
+            "rating",
+            "review",
+            "subscription",
+            "payments",
+        )
+    }
+
+    for i in range(size.vendors):
+        vendor_id = _uuid(rng)
+        dataset.vendor_ids.append(vendor_id)
+        low = rng.randint(10, 30)
+        tables["vendors"].append(
+            {
+                "id": vendor_id,
+                "name": f"{rng.choice(LAST_NAMES)} Kitchen {i + 1}",
+                "email": f"vendor{i}@tiffintime.app",
+                "phone_number": _phone(rng),
+                "password_hash": PASSWORD_HASH,
+                "description": "Home-style meals cooked fresh every day.",
+                "isOpen": rng.random() > 0.1,
+                "deliveryTime": {"min": low, "max": low + rng.randint(5, 20)},
+                "img_bucket": "vendors",
+                "img_path": f"{vendor_id}/cover.jpg",
+            }
+        )
+        dataset.store.put_object("vendors", f"{vendor_id}/cover.jpg", b"jpeg")
+
+        items = dataset.menu_items.setdefault(vendor_id, [])
+        for j in range(size.items_per_vendor):
+            item_id = _uuid(rng)
+            items.append(item_id)
+            price = float(rng.randrange(40, 400, 10))
+            dataset.prices[item_id] = price
+            tables["menu_items"].append(
+                {
+                    "id": item_id,
+                    "vendor_id": vendor_id,
+                    "name": rng.choice(DISHES),
+                    "price": price,
+                    "category": rng.choice(CATEGORIES),
+                    "description": "Served with salad.",
+                    "preparation_time": rng.choice([10, 15, 20, 30]),
+                    "img_bucket": "menus",
+                    "img_path": f"{vendor_id}/{item_id}.jpg",
+                }
+            )
+            dataset.store.put_object("menus", f"{vendor_id}/{item_id}.jpg", b"jpeg")
+
+            for day in range(7):
+                tables["weekly_availability"].append(
+                    {
+                        "id": _uuid(rng),
+                        "menu_item_id": item_id,
+                        "day_of_week": day,
+                        "is_available": rng.random() < 0.6,
+                    }
+                )
+
+            for offset in range(-1, size.special_days):
+                if rng.random() < 0.25:
+                    tables["date_specials"].append(
+                        {
+                            "id": _uuid(rng),
+                            "menu_item_id": item_id,
+                            "available_date": (
+                                today + timedelta(days=offset)
+                            ).isoformat(),
+                            "special_price": round(price * rng.uniform(0.7, 0.95)),
+                            "available_stock": rng.randint(10, 80),
+                        }
+                    )
+
+    for i in range(size.users):
+        dataset.user_ids.append(_uuid(rng))
+        tables["users"].append(
+            {
+                "id": dataset.user_ids[-1],
+                "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "email": f"student{i}@tiffintime.app",
+                "phone_number": _phone(rng),
+                "password_hash": PASSWORD_HASH,
+            }
+        )
+
+    for _ in range(size.orders):
+        vendor_id = rng.choice(dataset.vendor_ids)
+        item_id = rng.choice(dataset.menu_items[vendor_id])
+        quantity = rng.randint(1, 3)
+        order_id = _uuid(rng)
+        dataset.order_ids.setdefault(vendor_id, []).append(order_id)
+        placed = now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        tables["orders"].append(
+            {
+                "order_id": order_id,
+                "user_id": rng.choice(dataset.user_ids),
+                "vendor_id": vendor_id,
+                "menu": item_id,
+                "order_date": placed.replace(tzinfo=None).isoformat(),
+                "quantity": quantity,
+                "unit_price": dataset.prices[item_id],
+                "total_price": dataset.prices[item_id] * quantity,
+                "pickup": rng.choice(PICKUPS),
+                "is_delivered": placed < now - timedelta(hours=2),
+                "payment_id": None,
+            }
+        )
+
+    rated = set()
+    for _ in range(size.ratings):
+        pair = (rng.choice(dataset.user_ids), rng.choice(dataset.vendor_ids))
+        if pair in rated:
+            continue
+        rated.add(pair)
+        tables["rating"].append(
+            {"user_id": pair[0], "vendor_id": pair[1], "rating_val": rng.randint(1, 5)}
+        )
+
+    for i in range(size.reviews):
+        tables["review"].append(
+            {
+                "review_id": i + 1,
+                "user_id": rng.choice(dataset.user_ids),
+                "vendor_id": rng.choice(dataset.vendor_ids),
+                "food_quality": rng.choice(["Good", "Average", "Bad"]),
+                "delivery_experience": rng.choice(["Fast", "On time", "Slow"]),
+                "comment": "Would order again.",
+                "is_replied": False,
+                "reply": None,
+            }
+        )
+
+    for _ in range(size.subscriptions):
+        starts = now - timedelta(days=rng.randint(0, 60))
+        ends = starts + timedelta(days=rng.choice([7, 30]))
+        tables["subscription"].append(
+            {
+                "id": _uuid(rng),
+                "user_id": rng.choice(dataset.user_ids),
+                "vendor_id": rng.choice(dataset.vendor_ids),
+                "starts_from": str(starts),
+                "ends_at": str(ends),
+                "payment_id": None,
+            }
+        )
+
+    for name, rows in tables.items():
+        dataset.store.insert(name, rows)
+    return dataset
@@ -0,0 +1,334 @@
+"""
+Local stand-in for the Supabase REST (PostgREST) and storage APIs.
+
+Serves a `TableStore` over HTTP with the same wire format supabase-py
+speaks, so the real client, the instrumented wrapper and every repository
+run unchanged. A configurable delay is injected into each request to
+approximate the round trip to a hosted project.
+
+    python -m benchmarks.fake_postgrest --port 54321 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from db.fake import Filter, Order, QueryError, TableStore
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+# --- Query string parsing ---
+
+
+def _split_list(text: str) -> List[str]:
+    """Splits the body of `in.(a,"b,c")` honouring double quotes."""
+    values, current, quoted, escaped = [], "", False, False
+    for char in text:
+        if escaped:
+            current += char
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif char == "," and not quoted:
+            values.append(current)
+            current = ""
+        else:
+            current += char
+    values.append(current)
+    return values
+
+
+def parse_filter(column: str, expression: str) -> Filter:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, arg = expression.partition(".")
+    if op == "in":
+        if not (arg.startswith("(") and arg.endswith(")")):
+            raise QueryError(f"Malformed in filter on {column}")
+        value: Any = _split_list(arg[1:-1])
+    elif op == "is":
+        value = None if arg == "null" else arg
+    else:
+        value = arg
+    return Filter(column, op, value, negate)
+
+
+def parse_order(text: str) -> List[Order]:
+    orders = []
+    for part in text.split(","):
+        column, *modifiers = part.split(".")
+        nulls_first = None
+        if "nullsfirst" in modifiers:
+            nulls_first = True
+        elif "nullslast" in modifiers:
+            nulls_first = False
+        orders.append(Order(column, "desc" in modifiers, nulls_first))
+    return orders
+
+
+def parse_query(request: Request) -> Dict[str, Any]:
+    filters, params = [], {}
+    for key, value in request.query_params.multi_items():
+        if key in RESERVED_PARAMS:
+            params[key] = value
+        elif "." in key and key.rsplit(".", 1)[1] in RESERVED_PARAMS:
+            # Ordering/limits on embedded resources are not modelled.
+            continue
+        elif key in ("or", "and"):
+            raise QueryError(f"Logical filter '{key}' is not supported")
+        else:
+            filters.append(parse_filter(key, value))
+    return {
+        "filters": filters,
+        "select": params.get("select", "*"),
+        "order": parse_order(params["order"]) if "order" in params else [],
+        "limit": int(params["limit"]) if "limit" in params else None,
+        "offset": int(params.get("offset", 0)),
+        "on_conflict": params.get("on_conflict"),
+    }
+
+
+def _prefer(request: Request) -> Dict[str, str]:
+    prefs = {}
+    for part in request.headers.get("prefer", "").split(","):
+        key, _, value = part.strip().partition("=")
+        if key:
+            prefs[key] = value
+    return prefs
+
+
+def _error(exc: QueryError, status_code: int = 400) -> JSONResponse:
+    return JSONResponse(exc.to_dict(), status_code=status_code)
+
+
+# --- Application ---
+
+
+class FakeSupabase:
+    def __init__(self, store: TableStore, latency: float = 0.0, jitter: float = 0.0):
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+
+    async def delay(self) -> None:
+        self.requests += 1
+        if self.latency or self.jitter:
+            wait = self.latency + random.uniform(-self.jitter, self.jitter)
+            await asyncio.sleep(max(0.0, wait))
+
+    def _respond(
+        self,
+        request: Request,
+        rows: List[Dict[str, Any]],
+        total: Optional[int] = None,
+        status_code: int = 200,
+    ) -> Response:
+        prefs = _prefer(request)
+        headers = {}
+        if prefs.get("count") and total is not None:
+            end = len(rows) - 1
+            headers["content-range"] = f"0-{end}/{total}" if rows else f"*/{total}"
+
+        if request.method == "HEAD" or prefs.get("return") == "minimal":
+            return Response(status_code=status_code, headers=headers)
+
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            if len(rows) != 1:
+                return JSONResponse(
+                    {
+                        "code": "PGRST116",
+                        "message": "JSON object requested, multiple (or no) rows returned",
+                        "details": f"The result contains {len(rows)} rows",
+                        "hint": None,
+                    },
+                    status_code=406,
+                    headers=headers,
+                )
+            return JSONResponse(rows[0], status_code=status_code, headers=headers)
+
+        return JSONResponse(rows, status_code=status_code, headers=headers)
+
+    async def table(self, request: Request) -> Response:
+        await self.delay()
+        table = request.path_params["table"]
+        try:
+            query = parse_query(request)
+            if request.method in ("GET", "HEAD"):
+                rows, total = self.store.select(
+                    table,
+                    query["select"],
+                    query["filters"],
+                    query["order"],
+                    query["limit"],
+                    query["offset"],
+                )
+                return self._respond(request, rows, total)
+
+            if request.method == "POST":
+                prefs = _prefer(request)
+                resolution = prefs.get("resolution")
+                rows = self.store.insert(
+                    table,
+                    await request.json(),
+                    upsert=resolution is not None,
+                    on_conflict=query["on_conflict"],
+                    ignore_duplicates=resolution == "ignore-duplicates",
+                )
+                return self._respond(request, rows, len(rows), status_code=201)
+
+            if request.method == "PATCH":
+                rows = self.store.update(table, await request.json(), query["filters"])
+                return self._respond(request, rows, len(rows))
+
+            if request.method == "DELETE":
+                rows = self.store.delete(table, query["filters"])
+                return self._respond(request, rows, len(rows))
+        except QueryError as e:
+            status_code = 409 if e.code == "23505" else 400
+            return _error(e, status_code)
+        return Response(status_code=405)
+
+    async def rpc(self, request: Request) -> Response:
+        await self.delay()
+        try:
+            body = await request.body()
+            params = json.loads(body) if body else dict(request.query_params)
+            result = self.store.call(request.path_params["function"], params)
+        except QueryError as e:
+            return _error(e, 404 if e.code == "PGRST202" else 400)
+        return JSONResponse(result)
+
+    # --- Storage ---
+
+    async def sign(self, request: Request) -> Response:
+        await self.delay()
+        bucket, path = request.path_params["bucket"], request.path_params["path"]
+        if not self.store.has_object(bucket, path):
+            return JSONResponse(
+                {
+                    "statusCode": "404",
+                    "error": "not_found",
+                    "message": "Object not found",
+                },
+                status_code=400,
+            )
+        token = uuid.uuid4().hex
+        return JSONResponse(
+            {"signedURL": f"/object/sign/{bucket}/{path}?token={token}"}
+        )
+
+    async def sign_many(self, request: Request) -> Response:
+        await self.delay()
+        bucket = request.path_params["bucket"]
+        body = await request.json()
+        results = []
+        for path in body.get("paths", []):
+            if self.store.has_object(bucket, path):
+                token = uuid.uuid4().hex
+                results.append(
+                    {
+                        "path": path,
+                        "signedURL": f"/object/sign/{bucket}/{path}?token={token}",
+                        "error": None,
+                    }
+                )
+            else:
+                results.append({"path": path, "signedURL": None, "error": "Not found"})
+        return JSONResponse(results)
+
+    async def upload(self, request: Request) -> Response:
+        await self.delay()
+        bucket, path = request.path_params["bucket"], request.path_params["path"]
+        self.store.put_object(bucket, path, await request.body())
+        return JSONResponse({"Key": f"{bucket}/{path}", "Id": str(uuid.uuid4())})
+
+    async def remove(self, request: Request) -> Response:
+        await self.delay()
+        bucket = request.path_params["bucket"]
+        body = await request.json()
+        removed = self.store.remove_objects(bucket, body.get("prefixes", []))
+        return JSONResponse([{"name": p, "bucket_id": bucket} for p in removed])
+
+    def app(self) -> Starlette:
+        return Starlette(
+            routes=[
+                Route("/rest/v1/rpc/{function}", self.rpc, methods=["GET", "POST"]),
+                Route(
+                    "/rest/v1/{table}",
+                    self.table,
+                    methods=["GET", "HEAD", "POST", "PATCH", "DELETE"],
+                ),
+                Route(
+                    "/storage/v1/object/sign/{bucket}/{path:path}",
+                    self.sign,
+                    methods=["POST"],
+                ),
+                Route(
+                    "/storage/v1/object/sign/{bucket}", self.sign_many, methods=["POST"]
+                ),
+                Route(
+                    "/storage/v1/object/{bucket}/{path:path}",
+                    self.upload,
+                    methods=["POST", "PUT"],
+                ),
+                Route("/storage/v1/object/{bucket}", self.remove, methods=["DELETE"]),
+            ]
+        )
+
+
+def serve_in_thread(
+    app: Starlette, host: str = "127.0.0.1", port: int = 0
+) -> Tuple[uvicorn.Server, threading.Thread, str]:
+    """Starts the server on a background thread; returns (server, thread, base url)."""
+    config = uvicorn.Config(
+        app, host=host, port=port, log_level="warning", lifespan="off"
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("Fake Supabase server failed to start")
+        time.sleep(0.01)
+
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    return server, thread, f"http://{host}:{bound_port}"
+
+
+def main() -> None:
+    from benchmarks.datagen import PRESETS, generate
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--size", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    dataset = generate(PRESETS[args.size], seed=args.seed)
+    fake = FakeSupabase(dataset.store, args.latency_ms / 1000, args.jitter_ms / 1000)
+    uvicorn.run(fake.app(), host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
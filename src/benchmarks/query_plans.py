@@ -0,0 +1,267 @@
+"""
+EXPLAIN regression check: every repository query must be served by an index
+on a production-sized dataset.
+
+Applies db/migrations to a scratch schema, seeds it from benchmarks.datagen,
+runs EXPLAIN for each query in _cases() and reports sequential scans of any
+table with at least SEQ_SCAN_MIN_ROWS rows (scanning a small lookup table
+can legitimately be the cheapest plan).
+
+    python -m benchmarks.query_plans --dsn postgresql://postgres@localhost/scratch
+
+tests/test_query_plans.py runs the same check when TEST_DATABASE_URL is set.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from benchmarks.datagen import PRESETS, Dataset, generate
+
+SEQ_SCAN_MIN_ROWS = 5_000
+SCHEMA = "query_plans"
+
+# Parents before children, for the foreign keys.
+TABLES = [
+    "vendors",
+    "users",
+    "menu_items",
+    "date_specials",
+    "weekly_availability",
+    "payments",
+    "orders",
+    "subscription",
+    "review",
+    "rating",
+]
+
+
+@dataclass(frozen=True)
+class PlanCase:
+    """A repository query and how to pick its parameters from the dataset."""
+
+    name: str
+    sql: str
+    params: Callable[[Dataset], Sequence[Any]]
+
+
+def _vendor(dataset: Dataset) -> str:
+    # The vendor with the most orders: the worst case for its queries.
+    return max(dataset.order_ids, key=lambda v: len(dataset.order_ids[v]))
+
+
+def _cases() -> List[PlanCase]:
+    # The direct (asyncpg) SQL is checked as is; PostgREST queries are
+    # written out as the SQL PostgREST generates for them.
+    from app.repositories import auth, menu, order, ratings, reviews
+    from utils.auth import _ID_LOOKUP_SQL
+
+    today = date.today()
+    now = datetime.now()
+    return [
+        PlanCase(
+            "menu.get_all_menus (specials)",
+            menu._SPECIALS_SQL,
+            lambda d: [today],
+        ),
+        PlanCase(
+            "menu.get_all_menus (weekly)",
+            menu._WEEKLY_SQL,
+            lambda d: [(today.weekday() + 1) % 7],
+        ),
+        PlanCase(
+            "order.get_vendor_orders",
+            order._VENDOR_ORDERS_SQL,
+            lambda d: [_vendor(d)],
+        ),
+        PlanCase(
+            "order.get_vendor_orders (delivered)",
+            order._VENDOR_ORDERS_BY_STATUS_SQL,
+            lambda d: [_vendor(d), False],
+        ),
+        PlanCase(
+            "order.get_user_orders",
+            "SELECT * FROM orders WHERE user_id = $1 ORDER BY order_date DESC",
+            lambda d: [d.user_ids[0]],
+        ),
+        PlanCase(
+            "ratings.get_vendor_stats",
+            ratings._VENDOR_STATS_SQL,
+            lambda d: [_vendor(d)],
+        ),
+        PlanCase(
+            "ratings.get_user_rating",
+            "SELECT rating_val FROM rating WHERE user_id = $1 AND vendor_id = $2",
+            lambda d: [d.user_ids[0], _vendor(d)],
+        ),
+        PlanCase(
+            "reviews.get_reviews_by_vendor",
+            reviews._VENDOR_REVIEWS_SQL,
+            lambda d: [_vendor(d)],
+        ),
+        PlanCase(
+            "auth.register (email check)",
+            auth._EMAIL_EXISTS_SQL["users"],
+            lambda d: ["student1@tiffintime.app"],
+        ),
+        PlanCase(
+            "auth.login (vendor)",
+            auth._LOGIN_SQL["vendors"],
+            lambda d: ["vendor1@tiffintime.app"],
+        ),
+        PlanCase(
+            "utils.auth.get_student_by_id",
+            _ID_LOOKUP_SQL["users"],
+            lambda d: [d.user_ids[0]],
+        ),
+        PlanCase(
+            "date_specials.get_vendor_specials",
+            "SELECT ds.*, mi.* FROM date_specials ds "
+            "JOIN menu_items mi ON mi.id = ds.menu_item_id "
+            "WHERE mi.vendor_id = $1 AND ds.available_date >= $2",
+            lambda d: [_vendor(d), today],
+        ),
+        PlanCase(
+            "inventory.reserve (claim_special_stock)",
+            "UPDATE date_specials SET available_stock = available_stock - $3 "
+            "WHERE menu_item_id = $1 AND available_date = $2 "
+            "AND available_stock >= $3",
+            lambda d: [d.menu_items[_vendor(d)][0], today, 1],
+        ),
+        PlanCase(
+            "forecast.get_vendor_forecast (orders)",
+            "SELECT menu, order_date::date AS day, sum(quantity) AS ordered "
+            "FROM orders WHERE vendor_id = $1 "
+            "AND order_date >= $2 AND order_date < $3 GROUP BY 1, 2",
+            lambda d: [
+                _vendor(d),
+                datetime.combine(today, datetime.min.time()),
+                datetime.combine(today + timedelta(days=7), datetime.min.time()),
+            ],
+        ),
+        PlanCase(
+            "subscription.get_subscriptions_by_vendor",
+            "SELECT s.id, s.starts_from::date, s.ends_at::date, u.name "
+            "FROM subscription s LEFT JOIN users u ON u.id = s.user_id "
+            "WHERE s.vendor_id = $1 AND s.ends_at > $2 "
+            "ORDER BY s.ends_at LIMIT 50",
+            lambda d: [_vendor(d), now.astimezone()],
+        ),
+        PlanCase(
+            "reconciliation.reconcile_pending_payments",
+            "SELECT id, transaction_id, created_at FROM payments "
+            "WHERE status = 'pending' AND created_at < $1 "
+            "ORDER BY created_at LIMIT 200",
+            lambda d: [(now - timedelta(minutes=15)).astimezone()],
+        ),
+        PlanCase(
+            "subscription.archive_expired_subscriptions",
+            "SELECT * FROM subscription WHERE ends_at < $1 ORDER BY ends_at LIMIT 500",
+            lambda d: [(now - timedelta(days=30)).astimezone()],
+        ),
+    ]
+
+
+async def insert_rows(conn: Any, table: str, rows: List[dict], chunk: int = 10_000):
+    """Inserts dicts in bulk; columns missing from the rows keep their defaults."""
+    if not rows:
+        return
+    columns = ", ".join(f'"{c}"' for c in sorted({k for row in rows for k in row}))
+    sql = (
+        f"INSERT INTO {table} ({columns}) SELECT {columns} "
+        f"FROM jsonb_populate_recordset(NULL::{table}, $1::jsonb)"
+    )
+    for start in range(0, len(rows), chunk):
+        await conn.execute(sql, json.dumps(rows[start : start + chunk]))
+
+
+async def prepare_schema(conn: Any, schema: str = SCHEMA) -> None:
+    """Recreates `schema` and migrates it; the connection's search_path points at it."""
+    from db.migrate import apply_migrations
+
+    await conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {schema}")
+    await conn.execute(f"SET search_path TO {schema}, public")
+    await apply_migrations(conn)
+
+
+async def seed(conn: Any, dataset: Dataset) -> None:
+    for table in TABLES:
+        await insert_rows(conn, table, dataset.store.tables.get(table, []))
+    await conn.execute("VACUUM ANALYZE")
+
+
+def _scans(plan: Dict[str, Any]):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _scans(child)
+
+
+async def sequential_scans(
+    conn: Any, sql: str, params: Sequence[Any]
+) -> List[Tuple[str, int]]:
+    """(table, estimated rows) for each large table the plan scans sequentially."""
+    (row,) = await conn.fetch(f"EXPLAIN (FORMAT JSON) {sql}", *params)
+    plan = json.loads(row[0])[0]["Plan"]
+    found = []
+    for node in _scans(plan):
+        if node["Node Type"] != "Seq Scan":
+            continue
+        rows = await conn.fetchval(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass($1)",
+            node["Relation Name"],
+        )
+        if rows is not None and rows >= SEQ_SCAN_MIN_ROWS:
+            found.append((node["Relation Name"], rows))
+    return found
+
+
+async def check_plans(conn: Any, dataset: Dataset) -> Dict[str, List[Tuple[str, int]]]:
+    """Query name -> offending sequential scans, for the queries that have any."""
+    failures = {}
+    for case in _cases():
+        scans = await sequential_scans(conn, case.sql, case.params(dataset))
+        if scans:
+            failures[case.name] = scans
+    return failures
+
+
+async def run(dsn: str, size: str, seed_value: int) -> int:
+    import asyncpg
+
+    dataset = generate(PRESETS[size], seed=seed_value)
+    conn = await asyncpg.connect(dsn)
+    try:
+        await prepare_schema(conn)
+        await seed(conn, dataset)
+        failures = await check_plans(conn, dataset)
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+    for name in (case.name for case in _cases()):
+        scans = failures.get(name)
+        detail = ", ".join(f"{t} (~{n} rows)" for t, n in scans) if scans else ""
+        print(f"{'SEQ SCAN' if scans else 'ok':<10}{name}  {detail}")
+    return 1 if failures else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dsn", required=True)
+    parser.add_argument("--size", choices=sorted(PRESETS), default="large")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    return asyncio.run(run(args.dsn, args.size, args.seed))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
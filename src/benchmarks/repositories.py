@@ -0,0 +1,177 @@
+"""
+Micro-benchmarks of the repository layer over the in-memory Supabase fake.
+
+Each case calls one repository function repeatedly against
+`db.fake.FakeAsyncClient` with a fixed per-call latency, so the numbers
+reflect how many round trips a function makes and how much Python work it
+does, without HTTP or server noise.
+
+    python -m benchmarks.repositories --iterations 200 --latency-ms 5
+    python -m benchmarks.repositories --baseline benchmarks/repositories.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from benchmarks.datagen import PRESETS, Dataset, generate
+from benchmarks.run import compare, configure_environment, print_report, summarise
+from benchmarks.scenarios import Recorder
+from db.fake import FakeAsyncClient
+
+Case = Callable[[FakeAsyncClient, Dataset, random.Random], Awaitable[object]]
+
+
+def build_cases() -> Dict[str, Case]:
+    from app import schemas
+    from app.repositories import (
+        date_specials,
+        menu,
+        order,
+        ratings,
+        reviews,
+        user_details,
+        vendors,
+        weekly_menu,
+    )
+
+    def vendor(rng, dataset):
+        return rng.choice(dataset.vendor_ids)
+
+    async def create_order(client, dataset, rng):
+        vendor_id = vendor(rng, dataset)
+        menu_id = rng.choice(dataset.menu_items[vendor_id])
+        return await order.create_order(
+            client,
+            schemas.OrderRequest(
+                quantity=1, unit_price=dataset.prices[menu_id], pickup="Library"
+            ),
+            user_id=rng.choice(dataset.user_ids),
+            vendor_id=vendor_id,
+            menu_id=menu_id,
+        )
+
+    return {
+        "menu.get_all_menus": lambda c, d, r: menu.get_all_menus(c),
+        "menu.get_all_menus_by_vendor": lambda c, d, r: menu.get_all_menus_by_vendor(
+            vendor(r, d), c
+        ),
+        "vendors.get_all_vendors": lambda c, d, r: vendors.get_all_vendors(c),
+        "vendors.get_vendor_by_id": lambda c, d, r: vendors.get_vendor_by_id(
+            vendor(r, d), c
+        ),
+        "date_specials.get_vendor_specials": (
+            lambda c, d, r: date_specials.get_vendor_specials(vendor(r, d), c)
+        ),
+        "weekly_menu.get_vendor_weekly_menu": (
+            lambda c, d, r: weekly_menu.get_vendor_weekly_menu(vendor(r, d), c)
+        ),
+        "order.get_vendor_orders": lambda c, d, r: order.get_vendor_orders(
+            c, vendor(r, d), delivered=False
+        ),
+        "order.create_order": create_order,
+        "ratings.get_vendor_stats": lambda c, d, r: ratings.get_vendor_stats(
+            c, vendor(r, d)
+        ),
+        "reviews.get_reviews_by_vendor": lambda c, d, r: reviews.get_reviews_by_vendor(
+            c, vendor(r, d)
+        ),
+        "user_details.get_user_details": lambda c, d, r: user_details.get_user_details(
+            r.choice(d.user_ids), c
+        ),
+    }
+
+
+async def run_case(
+    case: Case, client: FakeAsyncClient, dataset: Dataset, iterations: int, seed: int
+) -> Tuple[Recorder, float, float]:
+    """Returns (samples, elapsed seconds, round trips per call)."""
+    rng = random.Random(seed)
+    recorder = Recorder()
+    calls_before = client.calls
+    started = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await case(client, dataset, rng)
+        recorder.add("call", 200, time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+    return recorder, elapsed, (client.calls - calls_before) / iterations
+
+
+async def run(args) -> Dict[str, dict]:
+    cases = build_cases()
+    selected = args.case or list(cases)
+    dataset = generate(PRESETS[args.size], seed=args.seed)
+    client = FakeAsyncClient(dataset.store, latency=args.latency_ms / 1000)
+
+    endpoints = {}
+    for name in selected:
+        recorder, elapsed, round_trips = await run_case(
+            cases[name], client, dataset, args.iterations, args.seed
+        )
+        summary = summarise(recorder, elapsed)["call"]
+        summary["db_calls_per_request"] = round(round_trips, 2)
+        endpoints[name] = summary
+    return {
+        "repositories": {
+            "description": f"{args.iterations} sequential calls per function",
+            "endpoints": endpoints,
+            "errors": {},
+        }
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--case", action="append", help="Repeat to pick several")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--size", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment("http://supabase.local", workdir)
+        scenarios = asyncio.run(run(args))
+
+    results = {
+        "config": {
+            "size": args.size,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "latency_ms": args.latency_ms,
+        },
+        "scenarios": scenarios,
+    }
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nwrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions: List[str] = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nno regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
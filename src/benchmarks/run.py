@@ -0,0 +1,325 @@
+"""
+Runs the benchmark scenarios against the API backed by the local Supabase
+stand-in and reports latency percentiles and throughput per endpoint.
+
+    python -m benchmarks.run --duration 20 --concurrency 20 --latency-ms 20
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+
+With `--baseline` the run exits non-zero when any endpoint's p95 grows or
+its throughput drops by more than `--threshold`.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.datagen import PRESETS, Dataset, generate
+from benchmarks.fake_postgrest import FakeSupabase, serve_in_thread
+from benchmarks.scenarios import SCENARIOS, FakeGateway, Recorder, VirtualUser
+
+# A syntactically valid JWT; the stand-in server does not check it.
+FAKE_SERVICE_KEY = (
+    "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9."
+    "eyJyb2xlIjoic2VydmljZV9yb2xlIiwiaXNzIjoic3VwYWJhc2UifQ."
+    "c2lnbmF0dXJlLW5vdC1jaGVja2Vk"
+)
+
+
+def configure_environment(supabase_url: str, workdir: str) -> None:
+    """Points the app at the stand-in; must run before the app is imported."""
+    os.environ.update(
+        {
+            "SUPABASE_URL": supabase_url,
+            "SUPABASE_KEY": FAKE_SERVICE_KEY,
+            "SUPABASE_SERVICE_ROLE": FAKE_SERVICE_KEY,
+            "EMAIL_PROVIDER": "fake",
+            "EMAIL_QUEUE_PATH": os.path.join(workdir, "email_queue.db"),
+            "LOG_FILE": "",
+            "LOG_LEVEL": "WARNING",
+            "QUERY_BUDGET_MODE": "off",
+            # Virtual users are far faster than people; measure the API itself.
+            "RATE_LIMIT_ENABLED": "false",
+        }
+    )
+    for key, value in {
+        "JWT_SECRET": "benchmark-secret",
+        "API_KEY": "benchmark-admin-key",
+        "APP_MODE": "benchmark",
+        "CLIENT_ORIGIN_URL": "http://localhost:3000",
+        "API_URL": "http://localhost:8000",
+        "SSLCOMMERZ_STORE_ID": "benchmark",
+        "SSLCOMMERZ_STORE_PASS": "benchmark",
+        "RESEND_API_KEY": "benchmark",
+    }.items():
+        os.environ.setdefault(key, value)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def summarise(recorder: Recorder, elapsed: float) -> Dict[str, Dict[str, Any]]:
+    by_label: Dict[str, List] = defaultdict(list)
+    for sample in recorder.samples:
+        by_label[sample.label].append(sample)
+
+    endpoints = {}
+    for label, samples in sorted(by_label.items()):
+        durations = sorted(s.duration * 1000 for s in samples)
+        errors = sum(1 for s in samples if s.status >= 500)
+        endpoints[label] = {
+            "requests": len(samples),
+            "errors": errors,
+            "client_errors": sum(1 for s in samples if 400 <= s.status < 500),
+            "rps": round(len(samples) / elapsed, 2),
+            "mean_ms": round(sum(durations) / len(durations), 2),
+            "p50_ms": round(percentile(durations, 50), 2),
+            "p95_ms": round(percentile(durations, 95), 2),
+            "p99_ms": round(percentile(durations, 99), 2),
+        }
+    return endpoints
+
+
+async def run_scenario(
+    app,
+    dataset: Dataset,
+    name: str,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int,
+) -> Dict[str, Any]:
+    from utils.metrics import record_requests
+    from utils.token import create_access_token
+
+    scenario = SCENARIOS[name]
+    recorder = Recorder(recording=False)
+    rng = random.Random(seed)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://benchmark", timeout=30
+    ) as http:
+        users = []
+        for i in range(concurrency):
+            if scenario.role == "vendor":
+                account_id = dataset.vendor_ids[i % len(dataset.vendor_ids)]
+                token = create_access_token({"vendor_id": account_id})
+            else:
+                account_id = rng.choice(dataset.user_ids)
+                token = create_access_token({"user_id": account_id})
+            users.append(
+                VirtualUser(
+                    http=http,
+                    dataset=dataset,
+                    recorder=recorder,
+                    rng=random.Random(rng.random()),
+                    token=token,
+                    account_id=account_id,
+                )
+            )
+
+        deadline = time.perf_counter() + warmup + duration
+
+        async def loop(vu: VirtualUser) -> None:
+            while time.perf_counter() < deadline:
+                await scenario.journey(vu)
+
+        async def start_recording() -> None:
+            await asyncio.sleep(warmup)
+            recorder.recording = True
+
+        with record_requests() as completed:
+            started = time.perf_counter()
+            await asyncio.gather(start_recording(), *(loop(vu) for vu in users))
+            elapsed = time.perf_counter() - started - warmup
+
+    db_calls: Dict[str, List[int]] = defaultdict(list)
+    for route, stats in completed:
+        db_calls[f"{stats.method} {route}"].append(len(stats.calls))
+
+    endpoints = summarise(recorder, elapsed)
+    for label, summary in endpoints.items():
+        calls = db_calls.get(label)
+        if calls:
+            summary["db_calls_per_request"] = round(sum(calls) / len(calls), 2)
+
+    return {
+        "description": scenario.description,
+        "duration_s": round(elapsed, 2),
+        "endpoints": endpoints,
+        "errors": {k: v[:5] for k, v in recorder.errors.items()},
+    }
+
+
+async def run(args, dataset: Dataset) -> Dict[str, Any]:
+    from app.repositories.payment import get_sslcommerz
+    from main import app
+
+    gateway = FakeGateway()
+    app.dependency_overrides[get_sslcommerz] = lambda: gateway
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        for name in args.scenario:
+            print(f"running {name} ({args.concurrency} users, {args.duration}s)...")
+            results[name] = await run_scenario(
+                app,
+                dataset,
+                name,
+                args.concurrency,
+                args.duration,
+                args.warmup,
+                args.seed,
+            )
+    app.dependency_overrides.pop(get_sslcommerz, None)
+    return results
+
+
+# --- Reporting ---
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    header = (
+        f"{'endpoint':<40} {'reqs':>7} {'rps':>8} {'p50':>8} {'p95':>8} "
+        f"{'p99':>8} {'err':>5} {'db':>5}"
+    )
+    for name, scenario in results["scenarios"].items():
+        print(f"\n== {name}: {scenario['description']}")
+        print(header)
+        for label, s in scenario["endpoints"].items():
+            print(
+                f"{label:<40} {s['requests']:>7} {s['rps']:>8.1f} "
+                f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} "
+                f"{s['errors']:>5} {s.get('db_calls_per_request', 0):>5}"
+            )
+        for label, messages in scenario["errors"].items():
+            print(f"  ! {label}: {messages[0]}")
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Returns a description of every endpoint that regressed past `threshold`."""
+    regressions = []
+    if baseline.get("config") != results.get("config"):
+        print(
+            "warning: baseline was recorded with a different configuration; "
+            "comparisons may not be meaningful"
+        )
+
+    for name, scenario in results["scenarios"].items():
+        base_scenario = baseline.get("scenarios", {}).get(name)
+        if not base_scenario:
+            continue
+        for label, current in scenario["endpoints"].items():
+            base = base_scenario["endpoints"].get(label)
+            if not base:
+                continue
+            if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{name} {label}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms"
+                )
+            if base["rps"] and current["rps"] < base["rps"] * (1 - threshold):
+                regressions.append(
+                    f"{name} {label}: rps {base['rps']} -> {current['rps']}"
+                )
+            if current["errors"] > base["errors"]:
+                regressions.append(
+                    f"{name} {label}: 5xx {base['errors']} -> {current['errors']}"
+                )
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Scenario to run; repeat for several (default: all)",
+    )
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Seconds")
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--size", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--save-baseline", help="Write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args(argv)
+    args.scenario = args.scenario or list(SCENARIOS)
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    dataset = generate(PRESETS[args.size], seed=args.seed)
+    fake = FakeSupabase(dataset.store, args.latency_ms / 1000, args.jitter_ms / 1000)
+    server, thread, url = serve_in_thread(fake.app())
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            configure_environment(url, workdir)
+            scenarios = asyncio.run(run(args, dataset))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+    results = {
+        "config": {
+            "size": args.size,
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "backend_requests": fake.requests,
+        "scenarios": scenarios,
+    }
+    print_report(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"\nwrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\nno regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
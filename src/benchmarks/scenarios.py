@@ -0,0 +1,223 @@
+"""
+Scripted traffic patterns for the benchmark runner.
+
+Each scenario is a coroutine performing one iteration of a user's journey
+through the API. The runner starts a number of closed-loop virtual users
+per scenario that repeat their journey until the time budget is spent.
+"""
+
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.datagen import PICKUPS, Dataset
+
+
+@dataclass
+class Sample:
+    label: str
+    status: int
+    duration: float
+
+
+@dataclass
+class Recorder:
+    samples: List[Sample] = field(default_factory=list)
+    errors: Dict[str, List[str]] = field(default_factory=dict)
+    recording: bool = True
+
+    def add(self, label: str, status: int, duration: float) -> None:
+        if self.recording:
+            self.samples.append(Sample(label, status, duration))
+
+    def error(self, label: str, message: str) -> None:
+        if self.recording:
+            self.errors.setdefault(label, []).append(message)
+
+
+@dataclass
+class VirtualUser:
+    http: httpx.AsyncClient
+    dataset: Dataset
+    recorder: Recorder
+    rng: random.Random
+    token: str
+    account_id: str
+    state: Dict[str, object] = field(default_factory=dict)
+
+    async def call(
+        self, label: str, method: str, url: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        """Sends one request and records it under `label` (e.g. "GET /menu/")."""
+        headers = {"Authorization": f"Bearer {self.token}", **kwargs.pop("headers", {})}
+        start = time.perf_counter()
+        try:
+            response = await self.http.request(method, url, headers=headers, **kwargs)
+        except Exception as e:
+            self.recorder.add(label, 599, time.perf_counter() - start)
+            self.recorder.error(label, repr(e))
+            return None
+        self.recorder.add(label, response.status_code, time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.recorder.error(label, f"{response.status_code}: {response.text[:200]}")
+        return response
+
+
+class FakeGateway:
+    """Stands in for SSLCOMMERZ so checkout can run without the sandbox."""
+
+    def __init__(self):
+        self.sessions: Dict[str, dict] = {}
+
+    def createSession(self, post_body: dict) -> dict:
+        session_key = uuid.uuid4().hex
+        self.sessions[post_body["tran_id"]] = post_body
+        return {
+            "status": "SUCCESS",
+            "sessionkey": session_key,
+            "GatewayPageURL": f"https://gateway.test/pay/{session_key}",
+        }
+
+    def validationTransactionOrder(self, val_id: str) -> dict:
+        tran_id = val_id.removeprefix("val-")
+        if tran_id not in self.sessions:
+            return {"status": "INVALID_TRANSACTION"}
+        return {
+            "status": "VALID",
+            "tran_id": tran_id,
+            "amount": self.sessions[tran_id]["total_amount"],
+        }
+
+    def transaction_query_session(self, sessionkey: str) -> dict:
+        return {"status": "VALID", "sessionkey": sessionkey}
+
+    def transaction_query_tranid(self, tranid: str) -> dict:
+        return {"status": "VALID", "tran_id": tranid}
+
+
+# --- Journeys ---
+
+
+async def lunch_rush_browsing(vu: VirtualUser) -> None:
+    """A student opens the app at lunch: today's feed, vendors, one vendor page."""
+    await vu.call("GET /menu/", "GET", "/menu/")
+    await vu.call("GET /vendors/", "GET", "/vendors/")
+
+    vendor_id = vu.rng.choice(vu.dataset.vendor_ids)
+    await vu.call("GET /vendors/{vendor_id}", "GET", f"/vendors/{vendor_id}")
+    await vu.call("GET /menu/vendor/{vendor_id}", "GET", f"/menu/vendor/{vendor_id}")
+    await vu.call(
+        "GET /ratings/{vendor_id}/stats", "GET", f"/ratings/{vendor_id}/stats"
+    )
+    await vu.call("GET /reviews/{vendor_id}", "GET", f"/reviews/{vendor_id}")
+
+
+async def _place_order(vu: VirtualUser) -> Optional[str]:
+    vendor_id = vu.rng.choice(vu.dataset.vendor_ids)
+    menu_id = vu.rng.choice(vu.dataset.menu_items[vendor_id])
+    response = await vu.call(
+        "POST /orders/{vendor_id}/{menu_id}",
+        "POST",
+        f"/orders/{vendor_id}/{menu_id}",
+        json={
+            "quantity": vu.rng.randint(1, 3),
+            "unit_price": vu.dataset.prices[menu_id],
+            "pickup": vu.rng.choice(PICKUPS),
+        },
+    )
+    if response is None or response.status_code != 201:
+        return None
+    return response.json()["order_id"]
+
+
+async def order_burst(vu: VirtualUser) -> None:
+    """Everyone orders at once when the lunch window opens."""
+    await _place_order(vu)
+
+
+async def vendor_dashboard(vu: VirtualUser) -> None:
+    """A vendor's dashboard polling for new orders and marking some delivered."""
+    vendor_id = vu.account_id
+    response = await vu.call(
+        "GET /orders/vendor/{vendor_id}",
+        "GET",
+        f"/orders/vendor/{vendor_id}",
+        params={"delivered": "false"},
+    )
+    await vu.call("GET /weekly-menu/my-menu", "GET", "/weekly-menu/my-menu")
+    await vu.call("GET /specials/my-specials", "GET", "/specials/my-specials")
+
+    if response is not None and response.status_code == 200:
+        pending = [o["id"] for o in response.json()][:5]
+        if pending:
+            await vu.call(
+                "PATCH /orders/status",
+                "PATCH",
+                "/orders/status",
+                json={"order_ids": pending, "is_delivered": True},
+            )
+
+
+async def checkout(vu: VirtualUser) -> None:
+    """Order, start a payment session and come back from the gateway."""
+    order_id = await _place_order(vu)
+    if order_id is None:
+        return
+
+    tran_id = uuid.uuid4().hex
+    await vu.call(
+        "POST /payment/init",
+        "POST",
+        "/payment/init",
+        json={
+            "order_ids": [order_id],
+            "total_amount": 250.0,
+            "tran_id": tran_id,
+            "cus_add1": "Hall 1",
+            "cus_city": "Dhaka",
+            "num_of_item": 1,
+            "product_name": "Lunch",
+            "product_category": "Food",
+        },
+    )
+    await vu.call(
+        "POST /payment/success",
+        "POST",
+        "/payment/success",
+        data={"val_id": f"val-{tran_id}"},
+    )
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    journey: Callable[[VirtualUser], Awaitable[None]]
+    role: str  # "student" or "vendor"
+    description: str
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    s.name: s
+    for s in (
+        Scenario(
+            "lunch_rush_browsing",
+            lunch_rush_browsing,
+            "student",
+            "Feed, vendor list and vendor detail pages",
+        ),
+        Scenario("order_burst", order_burst, "student", "Concurrent order creation"),
+        Scenario(
+            "vendor_dashboard",
+            vendor_dashboard,
+            "vendor",
+            "Order polling, menus and bulk status updates",
+        ),
+        Scenario(
+            "checkout", checkout, "student", "Order, payment init and gateway return"
+        ),
+    )
+}
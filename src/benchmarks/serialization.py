@@ -0,0 +1,165 @@
+"""
+CPU cost of large list responses: per-row models + response_model
+validation + FastAPI's encoder, against one TypeAdapter validation and a
+direct JSON dump (utils.serialization).
+
+Both variants run in the same FastAPI app through the ASGI interface, so
+the difference is only the model and serialisation work.
+
+    python -m benchmarks.serialization --rows 1000 --iterations 50
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.run import configure_environment
+
+
+def order_rows(count: int, rng: random.Random) -> List[dict]:
+    start = datetime(2025, 1, 1, 12, 0)
+    return [
+        {
+            "order_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "vendor_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "menu": str(uuid.UUID(int=rng.getrandbits(128))),
+            "order_date": (start + timedelta(minutes=i)).isoformat(),
+            "quantity": rng.randint(1, 3),
+            "unit_price": 120.0,
+            "total_price": 240.0,
+            "pickup": "Library",
+            "is_delivered": bool(i % 2),
+            "payment_id": None,
+        }
+        for i in range(count)
+    ]
+
+
+def menu_rows(count: int, rng: random.Random) -> List[dict]:
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "vendor_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": f"Item {i}",
+            "price": 100.0 + i % 50,
+            "category": "Rice",
+            "description": "Slow-cooked with spices",
+            "preparation_time": 15,
+            "img_bucket": "menus",
+            "img_path": f"{i}.jpg",
+            "img_url": f"/object/sign/menus/{i}.jpg?token=abc",
+            "created_at": "2025-01-01T00:00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def build_app(rows: int, seed: int) -> Tuple[FastAPI, List[str]]:
+    from app import schemas
+    from app.repositories.order import _order_fields
+    from utils.serialization import list_response, validate_list
+
+    rng = random.Random(seed)
+    orders, menus = order_rows(rows, rng), menu_rows(rows, rng)
+    app = FastAPI()
+
+    # The shape the repositories had before the fast path.
+    @app.get("/standard/orders", response_model=List[schemas.OrderResponse])
+    async def standard_orders():
+        return [schemas.OrderResponse(**_order_fields(o)) for o in orders]
+
+    @app.get("/fast/orders", response_model=List[schemas.OrderResponse])
+    async def fast_orders():
+        items = validate_list(schemas.OrderResponse, [_order_fields(o) for o in orders])
+        return list_response(schemas.OrderResponse, items)
+
+    @app.get("/standard/menu", response_model=List[schemas.MenuItemResponse])
+    async def standard_menu():
+        return [schemas.MenuItemResponse.model_validate(m) for m in menus]
+
+    @app.get("/fast/menu", response_model=List[schemas.MenuItemResponse])
+    async def fast_menu():
+        items = validate_list(schemas.MenuItemResponse, menus)
+        return list_response(schemas.MenuItemResponse, items)
+
+    return app, ["orders", "menu"]
+
+
+async def measure(
+    client: httpx.AsyncClient, path: str, iterations: int
+) -> Tuple[float, float, int]:
+    """Returns (CPU ms per request, wall ms per request, body bytes)."""
+    await client.get(path)  # warm-up: adapters, schema caches
+    cpu, wall = time.process_time(), time.perf_counter()
+    for _ in range(iterations):
+        response = await client.get(path)
+    cpu = (time.process_time() - cpu) / iterations * 1000
+    wall = (time.perf_counter() - wall) / iterations * 1000
+    return cpu, wall, len(response.content)
+
+
+async def run(rows: int, iterations: int, seed: int) -> Dict[str, dict]:
+    app, payloads = build_app(rows, seed)
+    results = {}
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+        for payload in payloads:
+            standard = await client.get(f"/standard/{payload}")
+            fast = await client.get(f"/fast/{payload}")
+            if standard.json() != fast.json():
+                raise AssertionError(f"{payload}: fast path output differs")
+            results[payload] = {
+                variant: dict(
+                    zip(
+                        ("cpu_ms", "wall_ms", "bytes"),
+                        await measure(client, f"/{variant}/{payload}", iterations),
+                    )
+                )
+                for variant in ("standard", "fast")
+            }
+    return results
+
+
+def print_report(results: Dict[str, dict], rows: int) -> None:
+    print(f"\n== list responses, {rows} rows")
+    print(f"{'payload':<10}{'standard':>12}{'fast':>12}{'saved':>10}{'bytes':>10}")
+    for payload, variants in results.items():
+        standard, fast = variants["standard"]["cpu_ms"], variants["fast"]["cpu_ms"]
+        saved = 1 - fast / standard if standard else 0.0
+        print(
+            f"{payload:<10}{standard:>10.2f}ms{fast:>10.2f}ms{saved:>10.0%}"
+            f"{variants['fast']['bytes']:>10}"
+        )
+    print("(CPU time per request)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment("http://supabase.local", workdir)
+        results = asyncio.run(run(args.rows, args.iterations, args.seed))
+    print_report(results, args.rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
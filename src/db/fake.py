@@ -0,0 +1,982 @@
+"""
+In-memory stand-in for the Supabase client.
+
+`TableStore` holds Python tables and executes the subset of PostgREST the
+repositories use: column selection with aliases and casts, embedded resources
+(`menu_items!inner(*, vendors(name))`) including filters on embedded
+columns, aggregate functions grouped by the other selected columns
+(`menu, quantity.sum()`), the usual comparison filters, ordering, limit/offset,
+insert/upsert/update/delete, rpc functions and storage objects.
+
+`FakeAsyncClient` exposes the supabase-py query builder surface on top of
+a store, so repositories and routers run unchanged in tests and
+micro-benchmarks without a network round trip.
+"""
+
+import asyncio
+import copy
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from postgrest import APIError, APIResponse
+from postgrest.base_request_builder import SingleAPIResponse
+from storage3.exceptions import StorageApiError
+from storage3.types import UploadResponse
+
+PRIMARY_KEYS: Dict[str, Tuple[str, ...]] = {
+    "orders": ("order_id",),
+    "review": ("review_id",),
+    "rating": ("user_id", "vendor_id"),
+}
+SERIAL_KEYS: Dict[str, str] = {"review": "review_id"}
+
+# (table, embedded resource) -> (local column, foreign table, foreign column, many)
+RELATIONSHIPS: Dict[Tuple[str, str], Tuple[str, str, str, bool]] = {
+    ("menu_items", "vendors"): ("vendor_id", "vendors", "id", False),
+    ("vendors", "menu_items"): ("id", "menu_items", "vendor_id", True),
+    ("date_specials", "menu_items"): ("menu_item_id", "menu_items", "id", False),
+    ("menu_items", "date_specials"): ("id", "date_specials", "menu_item_id", True),
+    ("weekly_availability", "menu_items"): ("menu_item_id", "menu_items", "id", False),
+    ("menu_items", "weekly_availability"): (
+        "id",
+        "weekly_availability",
+        "menu_item_id",
+        True,
+    ),
+    ("orders", "users"): ("user_id", "users", "id", False),
+    ("orders", "vendors"): ("vendor_id", "vendors", "id", False),
+    ("orders", "menu_items"): ("menu", "menu_items", "id", False),
+    ("orders", "payments"): ("payment_id", "payments", "id", False),
+    ("subscription", "users"): ("user_id", "users", "id", False),
+    ("subscription", "vendors"): ("vendor_id", "vendors", "id", False),
+    ("subscription", "payments"): ("payment_id", "payments", "id", False),
+    ("review", "users"): ("user_id", "users", "id", False),
+    ("review", "vendors"): ("vendor_id", "vendors", "id", False),
+    ("rating", "users"): ("user_id", "users", "id", False),
+    ("rating", "vendors"): ("vendor_id", "vendors", "id", False),
+    ("payments", "users"): ("user_id", "users", "id", False),
+}
+
+
+class QueryError(Exception):
+    """Mirrors a PostgREST error body: code, message, details, hint."""
+
+    def __init__(self, message: str, code: str = "PGRST100", details: str = ""):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.details = details
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "code": self.code,
+            "message": self.message,
+            "details": self.details,
+            "hint": None,
+        }
+
+
+# --- Select parsing ---
+
+
+@dataclass
+class Embed:
+    name: str
+    alias: str
+    inner: bool
+    select: "Select"
+
+
+@dataclass
+class Select:
+    star: bool = False
+    # (alias, column, cast), e.g. "start:starts_from::date"
+    columns: List[Tuple[str, str, Optional[str]]] = field(default_factory=list)
+    embeds: List[Embed] = field(default_factory=list)
+    # (alias, column or None for count(), function), e.g. "ordered:quantity.sum()"
+    aggregates: List[Tuple[str, Optional[str], str]] = field(default_factory=list)
+
+
+_EMBED = re.compile(r"^(?:(\w+):)?(\w+)(?:!(\w+))?\((.*)\)$")
+_AGGREGATE = re.compile(r"^(?:(\w+):)?(?:(\w+)\.)?(sum|avg|min|max|count)\(\)$")
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def parse_select(text: str) -> Select:
+    select = Select()
+    for item in _split_top_level(re.sub(r"\s+", "", text or "*")):
+        aggregate = _AGGREGATE.match(item)
+        if aggregate:
+            alias, column, fn = aggregate.groups()
+            select.aggregates.append((alias or fn, column, fn))
+            continue
+        match = _EMBED.match(item)
+        if match:
+            alias, name, hint, inner_text = match.groups()
+            select.embeds.append(
+                Embed(name, alias or name, hint == "inner", parse_select(inner_text))
+            )
+        elif item == "*":
+            select.star = True
+        else:
+            column, _, cast = item.partition("::")
+            alias, _, column = column.rpartition(":")
+            select.columns.append((alias or column, column, cast or None))
+    return select
+
+
+# --- Value comparison ---
+
+
+def _scalar(value: Any) -> Optional[str]:
+    if isinstance(value, Enum):
+        value = value.value
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str) and value.lower() in ("true", "false"):
+        return value.lower()
+    return str(value)
+
+
+def _cast(value: Any, cast: Optional[str]) -> Any:
+    """The PostgREST `::type` casts the repositories use."""
+    if value is None or cast is None:
+        return value
+    if cast == "date":
+        return str(value)[:10]
+    if cast == "text":
+        return _scalar(value)
+    if cast in ("int", "integer", "bigint"):
+        return int(float(value))
+    if cast in ("float", "float8", "numeric"):
+        return float(value)
+    raise QueryError(f"unsupported cast ::{cast}")
+
+
+def _aggregate(fn: str, values: List[Any]) -> Any:
+    if fn == "count":
+        return len(values)
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    if fn == "sum":
+        return sum(values)
+    if fn == "avg":
+        return sum(values) / len(values)
+    pick = min if fn == "min" else max
+    return pick(values, key=_sort_key)
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    text = _scalar(value)
+    try:
+        return (0, float(text))
+    except (TypeError, ValueError):
+        pass
+    try:
+        parsed = datetime.fromisoformat(text)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return (1, parsed.timestamp())
+    except (TypeError, ValueError):
+        return (2, text)
+
+
+def _equal(value: Any, arg: Any) -> bool:
+    if value is None or arg is None:
+        return False
+    if _scalar(value) == _scalar(arg):
+        return True
+    return _sort_key(value) == _sort_key(arg)
+
+
+def _compare(value: Any, arg: Any) -> Optional[int]:
+    if value is None or arg is None:
+        return None
+    left, right = _sort_key(value), _sort_key(arg)
+    if left[0] != right[0]:
+        left, right = (2, _scalar(value)), (2, _scalar(arg))
+    return (left[1] > right[1]) - (left[1] < right[1])
+
+
+def _like(value: Any, pattern: str, flags: int = 0) -> bool:
+    if value is None:
+        return False
+    regex = "".join(
+        ".*" if c in "%*" else "." if c == "_" else re.escape(c) for c in pattern
+    )
+    return re.fullmatch(regex, str(value), flags) is not None
+
+
+def matches(value: Any, op: str, arg: Any) -> bool:
+    if op == "eq":
+        return _equal(value, arg)
+    if op == "neq":
+        return value is not None and not _equal(value, arg)
+    if op in ("gt", "gte", "lt", "lte"):
+        result = _compare(value, arg)
+        if result is None:
+            return False
+        return {
+            "gt": result > 0,
+            "gte": result >= 0,
+            "lt": result < 0,
+            "lte": result <= 0,
+        }[op]
+    if op == "in":
+        return any(_equal(value, a) for a in arg)
+    if op == "is":
+        target = _scalar(arg)
+        if target in (None, "null"):
+            return value is None
+        return _scalar(value) == target
+    if op == "like":
+        return _like(value, arg)
+    if op == "ilike":
+        return _like(value, arg, re.IGNORECASE)
+    raise QueryError(f"Unsupported operator: {op}")
+
+
+@dataclass
+class Filter:
+    path: str  # "column" or "embed.column"
+    op: str
+    value: Any
+    negate: bool = False
+
+    def test(self, row: Dict[str, Any], column: str) -> bool:
+        result = matches(row.get(column), self.op, self.value)
+        return not result if self.negate else result
+
+
+@dataclass
+class Order:
+    column: str
+    desc: bool = False
+    nulls_first: Optional[bool] = None
+
+
+def _to_json(value: Any) -> Any:
+    """Normalises Python values the way a JSON round trip through PostgREST would."""
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, Enum):
+        return _to_json(value.value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+# --- Database functions (db/migrations), mirrored ---
+
+
+def _find_special(store: "TableStore", item: str, day: str) -> Optional[Dict]:
+    for row in store.tables.get("date_specials", []):
+        if row.get("menu_item_id") == item and str(row.get("available_date")) == day:
+            return row
+    return None
+
+
+def _claim_special_stock(store: "TableStore", params: Dict[str, Any]) -> List[Dict]:
+    results = []
+    for claim in params.get("claims", []):
+        special = _find_special(store, claim["item"], claim["day"])
+        stock = None if special is None else special.get("available_stock")
+        granted = stock is None or stock >= claim["quantity"]
+        if granted and stock is not None:
+            stock = special["available_stock"] = stock - claim["quantity"]
+        results.append(
+            {"claim_id": claim["id"], "granted": granted, "remaining": stock}
+        )
+    store._invalidate("date_specials")
+    return results
+
+
+def _release_special_stock(store: "TableStore", params: Dict[str, Any]) -> None:
+    for release in params.get("releases", []):
+        special = _find_special(store, release["item"], release["day"])
+        if special is not None and special.get("available_stock") is not None:
+            special["available_stock"] += release["quantity"]
+    store._invalidate("date_specials")
+
+
+FUNCTIONS: Dict[str, Callable[["TableStore", Dict[str, Any]], Any]] = {
+    "claim_special_stock": _claim_special_stock,
+    "release_special_stock": _release_special_stock,
+}
+
+
+# --- Store ---
+
+
+class TableStore:
+    def __init__(self, tables: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.functions: Dict[str, Callable[["TableStore", Dict[str, Any]], Any]] = dict(
+            FUNCTIONS
+        )
+        self.buckets: Dict[str, Dict[str, bytes]] = {}
+        self._serials: Dict[str, int] = {}
+        # (table, column) -> value -> rows; rebuilt lazily after writes.
+        self._indexes: Dict[Tuple[str, str], Dict[Optional[str], List[Dict]]] = {}
+        # (table, key columns) -> key -> row; kept current on insert.
+        self._keys: Dict[Tuple[str, Tuple[str, ...]], Dict[tuple, Dict]] = {}
+        for name, rows in (tables or {}).items():
+            self.insert(name, rows)
+
+    # --- Reads ---
+
+    def select(
+        self,
+        table: str,
+        columns: str = "*",
+        filters: Sequence[Filter] = (),
+        order: Sequence[Order] = (),
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Returns (rows, total count before limit/offset)."""
+        select = parse_select(columns)
+        rows = self._resolve(table, self.tables.get(table, []), select, list(filters))
+        if select.aggregates:
+            rows = [(row, row) for row in self._group(rows, select)]
+        for spec in reversed(order):
+            rows.sort(key=lambda r: self._order_key(r[0], spec), reverse=spec.desc)
+        total = len(rows)
+        rows = rows[offset:]
+        if limit is not None:
+            rows = rows[:limit]
+        return [projected for _, projected in rows], total
+
+    @staticmethod
+    def _order_key(row: Dict[str, Any], spec: Order):
+        value = row.get(spec.column)
+        nulls_first = spec.desc if spec.nulls_first is None else spec.nulls_first
+        # A reversed sort also flips where nulls land; compensate.
+        null_rank = 0 if nulls_first != spec.desc else 1
+        if value is None:
+            return (null_rank, (0, 0))
+        return (1 - null_rank, _sort_key(value))
+
+    def _resolve(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        select: Select,
+        filters: List[Filter],
+    ) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Returns (raw row, projected row) pairs for rows that pass all filters."""
+        own = [f for f in filters if "." not in f.path]
+        nested: Dict[str, List[Filter]] = {}
+        for f in filters:
+            if "." in f.path:
+                head, rest = f.path.split(".", 1)
+                nested.setdefault(head, []).append(
+                    Filter(rest, f.op, f.value, f.negate)
+                )
+
+        joins = []
+        for embed in select.embeds:
+            local, foreign, foreign_col, many = self._relationship(table, embed.name)
+            index = self._index(foreign, foreign_col)
+            joins.append((embed, local, foreign, many, index))
+
+        results = []
+        for row in rows:
+            if not all(f.test(row, f.path) for f in own):
+                continue
+
+            projected = self._project(row, select)
+            keep = True
+            for embed, local, foreign, many, index in joins:
+                candidates = index.get(_scalar(row.get(local)), [])
+                related = [
+                    child
+                    for _, child in self._resolve(
+                        foreign, candidates, embed.select, nested.get(embed.alias, [])
+                    )
+                ]
+                if many:
+                    projected[embed.alias] = related
+                else:
+                    projected[embed.alias] = related[0] if related else None
+                if embed.inner and not related:
+                    keep = False
+                    break
+            if keep:
+                results.append((row, projected))
+        return results
+
+    @staticmethod
+    def _group(
+        rows: List[Tuple[Dict[str, Any], Dict[str, Any]]], select: Select
+    ) -> List[Dict[str, Any]]:
+        """Aggregates rows grouped by their non-aggregate selected columns."""
+        groups: Dict[tuple, Tuple[Dict[str, Any], List[Dict[str, Any]]]] = {}
+        for raw, projected in rows:
+            key = tuple(_scalar(value) for value in projected.values())
+            groups.setdefault(key, (projected, []))[1].append(raw)
+        if not groups and not (select.star or select.columns or select.embeds):
+            groups[()] = ({}, [])  # e.g. count() over no rows is one row of 0
+        grouped = []
+        for projected, members in groups.values():
+            row = dict(projected)
+            for alias, column, fn in select.aggregates:
+                values = members if column is None else [m.get(column) for m in members]
+                row[alias] = _aggregate(fn, values)
+            grouped.append(row)
+        return grouped
+
+    def _relationship(self, table: str, name: str):
+        key = (table, name)
+        if key not in RELATIONSHIPS:
+            raise QueryError(
+                f"Could not find a relationship between '{table}' and '{name}'",
+                code="PGRST200",
+            )
+        return RELATIONSHIPS[key]
+
+    def _index(self, table: str, column: str) -> Dict[Optional[str], List[Dict]]:
+        index = self._indexes.get((table, column))
+        if index is None:
+            index = {}
+            for row in self.tables.get(table, []):
+                index.setdefault(_scalar(row.get(column)), []).append(row)
+            self._indexes[(table, column)] = index
+        return index
+
+    def _key_index(self, table: str, columns: Tuple[str, ...]) -> Dict[tuple, Dict]:
+        index = self._keys.get((table, columns))
+        if index is None:
+            index = {
+                tuple(_scalar(row.get(c)) for c in columns): row
+                for row in self.tables.get(table, [])
+            }
+            self._keys[(table, columns)] = index
+        return index
+
+    def _invalidate(self, table: str) -> None:
+        for key in [k for k in self._indexes if k[0] == table]:
+            del self._indexes[key]
+        for key in [k for k in self._keys if k[0] == table]:
+            del self._keys[key]
+
+    @staticmethod
+    def _project(row: Dict[str, Any], select: Select) -> Dict[str, Any]:
+        projected = copy.deepcopy(row) if select.star else {}
+        for alias, column, cast in select.columns:
+            projected[alias] = _cast(copy.deepcopy(row.get(column)), cast)
+        return projected
+
+    # --- Writes ---
+
+    def _with_defaults(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        if table in SERIAL_KEYS:
+            key = SERIAL_KEYS[table]
+            if row.get(key) is None:
+                row[key] = self._serials.get(table, 0) + 1
+            self._serials[table] = max(self._serials.get(table, 0), row[key])
+        else:
+            keys = PRIMARY_KEYS.get(table, ("id",))
+            if len(keys) == 1 and row.get(keys[0]) is None:
+                row[keys[0]] = str(uuid.uuid4())
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        return row
+
+    def _conflict_columns(self, table: str, on_conflict: Optional[str]):
+        if on_conflict:
+            return tuple(c.strip() for c in on_conflict.split(","))
+        return PRIMARY_KEYS.get(table, ("id",))
+
+    def insert(
+        self,
+        table: str,
+        rows: Iterable[Dict[str, Any]] | Dict[str, Any],
+        upsert: bool = False,
+        on_conflict: Optional[str] = None,
+        ignore_duplicates: bool = False,
+    ) -> List[Dict[str, Any]]:
+        if isinstance(rows, dict):
+            rows = [rows]
+        target = self.tables.setdefault(table, [])
+        conflict = self._conflict_columns(table, on_conflict)
+        written = []
+        for row in rows:
+            row = _to_json(dict(row))
+            existing = None
+            if all(row.get(c) is not None for c in conflict):
+                key = tuple(_scalar(row[c]) for c in conflict)
+                existing = self._key_index(table, conflict).get(key)
+            if existing is not None:
+                if not upsert:
+                    raise QueryError(
+                        f'duplicate key value violates unique constraint "{table}_pkey"',
+                        code="23505",
+                    )
+                if ignore_duplicates:
+                    continue
+                existing.update(row)
+                self._invalidate(table)
+                written.append(copy.deepcopy(existing))
+                continue
+
+            new_row = self._with_defaults(table, row)
+            target.append(new_row)
+            for (name, columns), index in self._keys.items():
+                if name == table:
+                    index[tuple(_scalar(new_row.get(c)) for c in columns)] = new_row
+            for (name, column), index in self._indexes.items():
+                if name == table:
+                    index.setdefault(_scalar(new_row.get(column)), []).append(new_row)
+            written.append(copy.deepcopy(new_row))
+        return written
+
+    def update(
+        self, table: str, values: Dict[str, Any], filters: Sequence[Filter] = ()
+    ) -> List[Dict[str, Any]]:
+        values = _to_json(dict(values))
+        updated = []
+        for row in self.tables.get(table, []):
+            if all(f.test(row, f.path) for f in filters):
+                row.update(values)
+                updated.append(copy.deepcopy(row))
+        if updated:
+            self._invalidate(table)
+        return updated
+
+    def delete(
+        self, table: str, filters: Sequence[Filter] = ()
+    ) -> List[Dict[str, Any]]:
+        kept, deleted = [], []
+        for row in self.tables.get(table, []):
+            if all(f.test(row, f.path) for f in filters):
+                deleted.append(row)
+            else:
+                kept.append(row)
+        self.tables[table] = kept
+        if deleted:
+            self._invalidate(table)
+        return deleted
+
+    # --- RPC ---
+
+    def register_function(
+        self, name: str, fn: Callable[["TableStore", Dict[str, Any]], Any]
+    ) -> None:
+        self.functions[name] = fn
+
+    def call(self, name: str, params: Dict[str, Any]) -> Any:
+        if name not in self.functions:
+            raise QueryError(
+                f"Could not find the function public.{name}", code="PGRST202"
+            )
+        return _to_json(self.functions[name](self, params or {}))
+
+    # --- Storage ---
+
+    def put_object(self, bucket: str, path: str, content: bytes = b"") -> None:
+        self.buckets.setdefault(bucket, {})[path] = content
+
+    def has_object(self, bucket: str, path: str) -> bool:
+        return path in self.buckets.get(bucket, {})
+
+    def remove_objects(self, bucket: str, paths: Iterable[str]) -> List[str]:
+        objects = self.buckets.get(bucket, {})
+        return [p for p in paths if objects.pop(p, None) is not None]
+
+
+# --- Client ---
+
+
+class FakeQueryBuilder:
+    """Mirrors the postgrest-py request builder; `execute()` runs against the store."""
+
+    def __init__(self, client: "FakeAsyncClient", table: str):
+        self._client = client
+        self._table = table
+        self._method = "select"
+        self._columns = "*"
+        self._values: Any = None
+        self._filters: List[Filter] = []
+        self._order: List[Order] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._count: Optional[str] = None
+        self._head = False
+        self._single: Optional[str] = None  # "single" or "maybe"
+        self._on_conflict: Optional[str] = None
+        self._ignore_duplicates = False
+        self._negate_next = False
+
+    # --- Operations ---
+
+    def select(self, *columns: str, count: Optional[str] = None, head: bool = False):
+        self._method = "select"
+        self._columns = ",".join(columns) if columns else "*"
+        self._count = count
+        self._head = bool(head)
+        return self
+
+    def insert(
+        self, json: Any, *, count: Optional[str] = None, upsert: bool = False, **_
+    ):
+        self._method = "upsert" if upsert else "insert"
+        self._values = json
+        self._count = count
+        return self
+
+    def upsert(
+        self,
+        json: Any,
+        *,
+        count: Optional[str] = None,
+        on_conflict: str = "",
+        ignore_duplicates: bool = False,
+        **_,
+    ):
+        self._method = "upsert"
+        self._values = json
+        self._count = count
+        self._on_conflict = on_conflict or None
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, json: Dict[str, Any], *, count: Optional[str] = None, **_):
+        self._method = "update"
+        self._values = json
+        self._count = count
+        return self
+
+    def delete(self, *, count: Optional[str] = None, **_):
+        self._method = "delete"
+        self._count = count
+        return self
+
+    # --- Filters ---
+
+    @property
+    def not_(self):
+        self._negate_next = True
+        return self
+
+    def filter(self, column: str, operator: str, criteria: Any):
+        negate = self._negate_next
+        self._negate_next = False
+        if operator.startswith("not."):
+            negate, operator = not negate, operator[4:]
+        self._filters.append(Filter(column, operator, criteria, negate))
+        return self
+
+    def eq(self, column: str, value: Any):
+        return self.filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any):
+        return self.filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any):
+        return self.filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any):
+        return self.filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any):
+        return self.filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any):
+        return self.filter(column, "lte", value)
+
+    def like(self, column: str, pattern: str):
+        return self.filter(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str):
+        return self.filter(column, "ilike", pattern)
+
+    def is_(self, column: str, value: Any):
+        return self.filter(column, "is", value)
+
+    def in_(self, column: str, values: Iterable[Any]):
+        return self.filter(column, "in", list(values))
+
+    def match(self, query: Dict[str, Any]):
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    # --- Modifiers ---
+
+    def order(
+        self,
+        column: str,
+        *,
+        desc: bool = False,
+        nullsfirst: Optional[bool] = None,
+        foreign_table: Optional[str] = None,
+    ):
+        # Ordering of embedded resources is not modelled.
+        if foreign_table is None:
+            self._order.append(Order(column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, *, foreign_table: Optional[str] = None):
+        if foreign_table is None:
+            self._limit = size
+        return self
+
+    def offset(self, size: int):
+        self._offset = size
+        return self
+
+    def range(self, start: int, end: int, foreign_table: Optional[str] = None):
+        if foreign_table is None:
+            self._offset = start
+            self._limit = end - start + 1
+        return self
+
+    def single(self):
+        self._single = "single"
+        return self
+
+    def maybe_single(self):
+        self._single = "maybe"
+        return self
+
+    # --- Execution ---
+
+    def _run(self) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        store = self._client.store
+        if self._method == "select":
+            rows, total = store.select(
+                self._table,
+                self._columns,
+                self._filters,
+                self._order,
+                self._limit,
+                self._offset,
+            )
+            return rows, total
+        if self._method in ("insert", "upsert"):
+            rows = store.insert(
+                self._table,
+                self._values,
+                upsert=self._method == "upsert",
+                on_conflict=self._on_conflict,
+                ignore_duplicates=self._ignore_duplicates,
+            )
+        elif self._method == "update":
+            rows = store.update(self._table, self._values, self._filters)
+        else:
+            rows = store.delete(self._table, self._filters)
+        return rows, len(rows)
+
+    async def execute(self):
+        await self._client.round_trip()
+        try:
+            rows, total = self._run()
+        except QueryError as e:
+            raise APIError(e.to_dict()) from e
+
+        count = total if self._count else None
+        if self._head:
+            rows = []
+
+        if self._single == "single":
+            if len(rows) != 1:
+                raise APIError(
+                    {
+                        "code": "PGRST116",
+                        "message": "JSON object requested, multiple (or no) rows returned",
+                        "details": f"The result contains {len(rows)} rows",
+                        "hint": None,
+                    }
+                )
+            return SingleAPIResponse.model_construct(data=rows[0], count=count)
+        if self._single == "maybe":
+            if not rows:
+                return None
+            if len(rows) > 1:
+                raise APIError(
+                    {
+                        "code": "406",
+                        "message": "Cannot coerce the result to a single JSON object",
+                        "details": "The result contains more than one row.",
+                        "hint": None,
+                    }
+                )
+            return SingleAPIResponse.model_construct(data=rows[0], count=count)
+        return APIResponse.model_construct(data=rows, count=count)
+
+
+class FakeRPCBuilder:
+    def __init__(self, client: "FakeAsyncClient", fn: str, params: Dict[str, Any]):
+        self._client = client
+        self._fn = fn
+        self._params = params
+
+    async def execute(self):
+        await self._client.round_trip()
+        try:
+            data = self._client.store.call(self._fn, self._params)
+        except QueryError as e:
+            raise APIError(e.to_dict()) from e
+        return APIResponse.model_construct(data=data, count=None)
+
+
+class FakeBucket:
+    """Mirrors the storage3 async bucket API over `TableStore.buckets`."""
+
+    def __init__(self, client: "FakeAsyncClient", bucket: str):
+        self._client = client
+        self.id = bucket
+
+    def _signed_url(self, path: str) -> str:
+        return (
+            f"{self._client.url}/storage/v1/object/sign/{self.id}/{path}"
+            f"?token={uuid.uuid4().hex}"
+        )
+
+    def _require(self, path: str) -> None:
+        if not self._client.store.has_object(self.id, path):
+            raise StorageApiError("Object not found", "not_found", 400)
+
+    async def create_signed_url(
+        self, path: str, expires_in: int, options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, str]:
+        await self._client.round_trip()
+        self._require(path)
+        url = self._signed_url(path)
+        return {"signedURL": url, "signedUrl": url}
+
+    async def create_signed_urls(
+        self, paths: List[str], expires_in: int, options: Optional[Dict] = None
+    ) -> List[Dict[str, Any]]:
+        await self._client.round_trip()
+        results = []
+        for path in paths:
+            found = self._client.store.has_object(self.id, path)
+            url = self._signed_url(path) if found else None
+            results.append(
+                {
+                    "path": path,
+                    "signedURL": url,
+                    "signedUrl": url,
+                    "error": None
+                    if found
+                    else "Either the object does not exist or you do not have access to it",
+                }
+            )
+        return results
+
+    async def get_public_url(self, path: str, options: Optional[Dict] = None) -> str:
+        return f"{self._client.url}/storage/v1/object/public/{self.id}/{path}"
+
+    async def upload(
+        self, path: str, file: Any, file_options: Optional[Dict[str, Any]] = None
+    ) -> UploadResponse:
+        await self._client.round_trip()
+        options = file_options or {}
+        upsert = str(options.get("upsert", options.get("x-upsert", "false"))).lower()
+        if upsert != "true" and self._client.store.has_object(self.id, path):
+            raise StorageApiError("The resource already exists", "Duplicate", 409)
+        self._client.store.put_object(self.id, path, _read_file(file))
+        return UploadResponse(path=path, Key=f"{self.id}/{path}")
+
+    async def update(
+        self, path: str, file: Any, file_options: Optional[Dict[str, Any]] = None
+    ) -> UploadResponse:
+        await self._client.round_trip()
+        self._require(path)
+        self._client.store.put_object(self.id, path, _read_file(file))
+        return UploadResponse(path=path, Key=f"{self.id}/{path}")
+
+    async def download(self, path: str, options: Optional[Dict] = None, **_) -> bytes:
+        await self._client.round_trip()
+        self._require(path)
+        return self._client.store.buckets[self.id][path]
+
+    async def remove(self, paths: List[str]) -> List[Dict[str, Any]]:
+        await self._client.round_trip()
+        removed = self._client.store.remove_objects(self.id, paths)
+        return [{"name": p, "bucket_id": self.id} for p in removed]
+
+
+def _read_file(file: Any) -> bytes:
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            return f.read()
+    return file.read()
+
+
+class FakeStorage:
+    def __init__(self, client: "FakeAsyncClient"):
+        self._client = client
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self._client, bucket)
+
+
+class FakeAsyncClient:
+    """
+    Drop-in replacement for the supabase AsyncClient backed by a `TableStore`.
+
+    `latency` (seconds) is awaited before every call to approximate a network
+    round trip when the fake backs repository micro-benchmarks.
+    """
+
+    def __init__(
+        self,
+        store: Optional[TableStore] = None,
+        latency: float = 0.0,
+        url: str = "http://supabase.local",
+    ):
+        self.store = store if store is not None else TableStore()
+        self.latency = latency
+        self.url = url
+        self.calls = 0
+
+    async def round_trip(self) -> None:
+        self.calls += 1
+        # Always yield so concurrent callers interleave as they would on I/O.
+        await asyncio.sleep(self.latency)
+
+    def table(self, table_name: str) -> FakeQueryBuilder:
+        return FakeQueryBuilder(self, table_name)
+
+    def from_(self, table_name: str) -> FakeQueryBuilder:
+        return FakeQueryBuilder(self, table_name)
+
+    def rpc(
+        self, fn: str, params: Optional[Dict[str, Any]] = None, **_
+    ) -> FakeRPCBuilder:
+        return FakeRPCBuilder(self, fn, params or {})
+
+    @property
+    def storage(self) -> FakeStorage:
+        return FakeStorage(self)
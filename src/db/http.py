@@ -0,0 +1,136 @@
+from typing import Dict, Tuple
+
+import httpx
+
+from app.settings import settings
+from utils.logger import get_logger
+from utils.metrics import REGISTRY
+
+logger = get_logger(__name__)
+
+STORAGE_PATH = "/storage/v1/"
+
+
+class PoolTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the pooled transport to count in-flight requests and pool timeouts
+    so pool saturation can be exported as metrics.
+    """
+
+    def __init__(
+        self, name: str, transport: httpx.AsyncHTTPTransport, max_connections: int
+    ):
+        self.name = name
+        self.max_connections = max_connections
+        self.in_flight = 0
+        self.pool_timeouts = 0
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        try:
+            return await self._transport.handle_async_request(request)
+        except httpx.PoolTimeout:
+            self.pool_timeouts += 1
+            logger.warning(
+                "Supabase %s pool exhausted (%s in flight, %s max connections)",
+                self.name,
+                self.in_flight,
+                self.max_connections,
+            )
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def connections(self) -> Dict[str, int]:
+        """Open connections by state, read from the underlying httpcore pool."""
+        pool = getattr(self._transport, "_pool", None)
+        counts = {"active": 0, "idle": 0}
+        for connection in getattr(pool, "connections", []):
+            counts["idle" if connection.is_idle() else "active"] += 1
+        return counts
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+# Live transports by client name ("primary", ...), read at scrape time.
+_transports: Dict[str, PoolTransport] = {}
+
+
+def _connections() -> Dict[Tuple[str, ...], float]:
+    samples = {}
+    for name, transport in _transports.items():
+        for state, count in transport.connections().items():
+            samples[(name, state)] = count
+    return samples
+
+
+REGISTRY.gauge(
+    "supabase_pool_connections",
+    "Open connections in the Supabase HTTP pool.",
+    _connections,
+    labelnames=("client", "state"),
+)
+REGISTRY.gauge(
+    "supabase_pool_max_connections",
+    "Configured connection limit of the Supabase HTTP pool.",
+    lambda: {(n,): t.max_connections for n, t in _transports.items()},
+    labelnames=("client",),
+)
+REGISTRY.gauge(
+    "supabase_pool_in_flight_requests",
+    "Requests currently holding or waiting for a pooled connection.",
+    lambda: {(n,): t.in_flight for n, t in _transports.items()},
+    labelnames=("client",),
+)
+REGISTRY.gauge(
+    "supabase_pool_timeouts",
+    "Requests that gave up waiting for a pooled connection.",
+    lambda: {(n,): t.pool_timeouts for n, t in _transports.items()},
+    labelnames=("client",),
+)
+
+
+def _timeout(read_write: float) -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=settings.SUPABASE_CONNECT_TIMEOUT,
+        read=read_write,
+        write=read_write,
+        pool=settings.SUPABASE_POOL_TIMEOUT,
+    )
+
+
+async def _apply_operation_timeout(request: httpx.Request) -> None:
+    # PostgREST, storage and auth share one client; storage transfers get
+    # their own (longer) read/write budget.
+    if STORAGE_PATH in request.url.path:
+        request.extensions["timeout"] = _timeout(
+            settings.SUPABASE_STORAGE_TIMEOUT
+        ).as_dict()
+
+
+def create_http_client(name: str = "primary") -> httpx.AsyncClient:
+    """Builds the pooled, keep-alive (and by default HTTP/2) client for Supabase."""
+    limits = httpx.Limits(
+        max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+    )
+    transport = PoolTransport(
+        name,
+        httpx.AsyncHTTPTransport(http2=settings.SUPABASE_HTTP2, limits=limits),
+        settings.SUPABASE_MAX_CONNECTIONS,
+    )
+    _transports[name] = transport
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=_timeout(settings.SUPABASE_QUERY_TIMEOUT),
+        follow_redirects=True,
+        event_hooks={"request": [_apply_operation_timeout]},
+    )
+
+
+async def close_http_client(name: str, client: httpx.AsyncClient) -> None:
+    _transports.pop(name, None)
+    await client.aclose()
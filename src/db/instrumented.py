@@ -0,0 +1,141 @@
+import time
+from typing import Any, List
+
+from utils.metrics import record_db_call
+
+# Builder methods whose first argument is a column name; the column is part
+# of the query shape so `.eq("id", a)` and `.eq("id", b)` look identical.
+_FILTERS = {
+    "eq",
+    "neq",
+    "gt",
+    "gte",
+    "lt",
+    "lte",
+    "like",
+    "ilike",
+    "is_",
+    "in_",
+    "contains",
+    "contained_by",
+    "match",
+    "order",
+    "on_conflict",
+}
+_OPERATIONS = {"select", "insert", "update", "upsert", "delete"}
+
+
+class _QueryProxy:
+    """
+    Wraps a PostgREST request builder, remembering the chain of calls so
+    `execute()` can be timed and attributed to a table and query shape.
+    """
+
+    def __init__(self, builder: Any, kind: str, target: str, ops: List[str]):
+        self._builder = builder
+        self._kind = kind
+        self._target = target
+        self._ops = ops
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            op = f"{name}({args[0]})" if name in _FILTERS and args else name
+            return _QueryProxy(result, self._kind, self._target, self._ops + [op])
+
+        return call
+
+    @property
+    def operation(self) -> str:
+        for op in self._ops:
+            if op in _OPERATIONS:
+                return op
+        return self._kind
+
+    async def execute(self):
+        start = time.perf_counter()
+        try:
+            return await self._builder.execute()
+        finally:
+            record_db_call(
+                kind=self._kind,
+                target=self._target,
+                operation=self.operation,
+                shape=f"{self._target}:{'.'.join(self._ops)}",
+                duration=time.perf_counter() - start,
+            )
+
+
+class _BucketProxy:
+    """Wraps a storage bucket API so every async call is timed."""
+
+    def __init__(self, bucket_api: Any, bucket: str):
+        self._api = bucket_api
+        self._bucket = bucket
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._api, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await attr(*args, **kwargs)
+            finally:
+                record_db_call(
+                    kind="storage",
+                    target=self._bucket,
+                    operation=name,
+                    shape=f"{self._bucket}:{name}",
+                    duration=time.perf_counter() - start,
+                )
+
+        return call
+
+
+class _StorageProxy:
+    def __init__(self, storage: Any):
+        self._storage = storage
+
+    def from_(self, bucket: str) -> _BucketProxy:
+        return _BucketProxy(self._storage.from_(bucket), bucket)
+
+    def __getattr__(self, name: str):
+        return getattr(self._storage, name)
+
+
+class InstrumentedClient:
+    """
+    Thin wrapper around the Supabase AsyncClient that times every table,
+    rpc and storage call and attributes it to the current request.
+    Everything else is passed through to the wrapped client.
+    """
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    @property
+    def wrapped(self) -> Any:
+        return self._client
+
+    def table(self, table_name: str) -> _QueryProxy:
+        return _QueryProxy(self._client.table(table_name), "table", table_name, [])
+
+    def from_(self, table_name: str) -> _QueryProxy:
+        return _QueryProxy(self._client.from_(table_name), "table", table_name, [])
+
+    def rpc(self, fn: str, params: Any = None, *args, **kwargs) -> _QueryProxy:
+        builder = self._client.rpc(fn, params or {}, *args, **kwargs)
+        return _QueryProxy(builder, "rpc", fn, ["rpc"])
+
+    @property
+    def storage(self) -> _StorageProxy:
+        return _StorageProxy(self._client.storage)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
@@ -0,0 +1,125 @@
+"""
+Applies the versioned SQL files in db/migrations (`NNN_name.sql`) in order.
+
+Applied versions are recorded in `schema_migrations`; each file runs in its
+own transaction, under an advisory lock so two deploys cannot race.
+
+    python -m db.migrate --dsn postgresql://postgres@localhost/tiffintime
+    python -m db.migrate --pending     # list what would run
+
+The DSN defaults to DATABASE_URL.
+"""
+
+import argparse
+import asyncio
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional
+
+from app.settings import settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+_FILENAME = re.compile(r"^(\d{3})_(\w+)\.sql$")
+_LOCK_KEY = 7_340_113  # arbitrary, shared by every migrate run
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version text PRIMARY KEY,
+    name text NOT NULL,
+    applied_at timestamptz NOT NULL DEFAULT now()
+)
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    name: str
+    path: Path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text()
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    migrations = []
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILENAME.match(path.name)
+        if match is None:
+            raise ValueError(f"Migration file name must be NNN_name.sql: {path.name}")
+        migrations.append(Migration(match.group(1), match.group(2), path))
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+async def pending(conn: Any, migrations: Optional[List[Migration]] = None):
+    await conn.execute(_CREATE_TABLE)
+    applied = {
+        r["version"] for r in await conn.fetch("SELECT version FROM schema_migrations")
+    }
+    return [m for m in (migrations or discover()) if m.version not in applied]
+
+
+async def apply_migrations(
+    conn: Any, migrations: Optional[List[Migration]] = None
+) -> List[str]:
+    """Applies pending migrations on an asyncpg connection; returns their versions."""
+    await conn.execute("SELECT pg_advisory_lock($1)", _LOCK_KEY)
+    try:
+        applied = []
+        for migration in await pending(conn, migrations):
+            async with conn.transaction():
+                await conn.execute(migration.sql)
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)",
+                    migration.version,
+                    migration.name,
+                )
+            logger.info("Applied migration %s_%s", migration.version, migration.name)
+            applied.append(migration.version)
+        return applied
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", _LOCK_KEY)
+
+
+async def run(dsn: str, list_only: bool) -> int:
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        if list_only:
+            for migration in await pending(conn):
+                print(f"{migration.version}_{migration.name}")
+            return 0
+        applied = await apply_migrations(conn)
+        print(f"Applied {len(applied)} migration(s)")
+        return 0
+    finally:
+        await conn.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dsn", default=settings.DATABASE_URL)
+    parser.add_argument("--pending", action="store_true", help="list, do not apply")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if not args.dsn:
+        print("No database: pass --dsn or set DATABASE_URL", file=sys.stderr)
+        return 2
+    return asyncio.run(run(args.dsn, args.pending))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+-- Baseline schema, as deployed on Supabase before migrations were tracked.
+-- IF NOT EXISTS keeps it a no-op on the existing project.
+
+CREATE TABLE IF NOT EXISTS vendors (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    name text NOT NULL,
+    email text NOT NULL,
+    phone_number text,
+    password_hash text NOT NULL,
+    description text,
+    "isOpen" boolean DEFAULT true,
+    "deliveryTime" jsonb,
+    img_bucket text,
+    img_path text,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    name text NOT NULL,
+    email text NOT NULL,
+    phone_number text,
+    password_hash text NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS menu_items (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    vendor_id uuid NOT NULL REFERENCES vendors (id) ON DELETE CASCADE,
+    name text NOT NULL,
+    price float8 NOT NULL,
+    category text,
+    description text,
+    preparation_time int,
+    img_bucket text,
+    img_path text,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS date_specials (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    menu_item_id uuid NOT NULL REFERENCES menu_items (id) ON DELETE CASCADE,
+    available_date date NOT NULL,
+    special_price float8,
+    available_stock int,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    UNIQUE (menu_item_id, available_date)
+);
+
+-- day_of_week: 0 = Sunday ... 6 = Saturday (app.enums.DayOfWeek)
+CREATE TABLE IF NOT EXISTS weekly_availability (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    menu_item_id uuid NOT NULL REFERENCES menu_items (id) ON DELETE CASCADE,
+    day_of_week int NOT NULL CHECK (day_of_week BETWEEN 0 AND 6),
+    is_available boolean NOT NULL DEFAULT true,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    UNIQUE (menu_item_id, day_of_week)
+);
+
+CREATE TABLE IF NOT EXISTS payments (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id uuid NOT NULL REFERENCES users (id),
+    transaction_id text NOT NULL UNIQUE,
+    amount float8 NOT NULL,
+    status text NOT NULL DEFAULT 'pending',
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    order_id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id uuid NOT NULL REFERENCES users (id),
+    vendor_id uuid NOT NULL REFERENCES vendors (id),
+    menu uuid NOT NULL REFERENCES menu_items (id),
+    order_date timestamp NOT NULL DEFAULT now(),
+    quantity int NOT NULL CHECK (quantity > 0),
+    unit_price float8 NOT NULL,
+    total_price float8 NOT NULL,
+    pickup text,
+    is_delivered boolean NOT NULL DEFAULT false,
+    payment_id uuid REFERENCES payments (id),
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS subscription (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id uuid NOT NULL REFERENCES users (id),
+    vendor_id uuid NOT NULL REFERENCES vendors (id),
+    starts_from timestamptz NOT NULL,
+    ends_at timestamptz NOT NULL,
+    payment_id uuid REFERENCES payments (id),
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS review (
+    review_id bigserial PRIMARY KEY,
+    user_id uuid NOT NULL REFERENCES users (id),
+    vendor_id uuid NOT NULL REFERENCES vendors (id),
+    food_quality text NOT NULL,
+    delivery_experience text NOT NULL,
+    comment text,
+    is_replied boolean NOT NULL DEFAULT false,
+    reply text,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS rating (
+    user_id uuid NOT NULL REFERENCES users (id),
+    vendor_id uuid NOT NULL REFERENCES vendors (id),
+    rating_val float8 NOT NULL CHECK (rating_val BETWEEN 1 AND 5),
+    created_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, vendor_id)
+);
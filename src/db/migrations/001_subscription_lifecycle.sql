@@ -0,0 +1,24 @@
+-- Active-subscription lookups filter on vendor and end time
+-- (app.repositories.subscription.get_subscriptions_by_vendor).
+CREATE INDEX IF NOT EXISTS subscription_vendor_ends_at_idx
+    ON subscription (vendor_id, ends_at);
+
+-- The archive sweep scans for rows that ended before a cutoff.
+CREATE INDEX IF NOT EXISTS subscription_ends_at_idx
+    ON subscription (ends_at);
+
+-- Expired subscriptions, moved out of the live table by
+-- app.repositories.subscription.archive_expired_subscriptions.
+CREATE TABLE IF NOT EXISTS subscription_archive (
+    id uuid PRIMARY KEY,
+    user_id uuid NOT NULL,
+    vendor_id uuid NOT NULL,
+    starts_from timestamptz NOT NULL,
+    ends_at timestamptz NOT NULL,
+    payment_id uuid,
+    created_at timestamptz,
+    archived_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS subscription_archive_vendor_idx
+    ON subscription_archive (vendor_id, ends_at);
@@ -0,0 +1,19 @@
+-- The forecast sums orders per item and day with PostgREST aggregate
+-- functions (`quantity.sum()`, `count()`), which are off by default.
+-- Skipped on plain Postgres, which has no PostgREST role.
+DO $$
+BEGIN
+    IF EXISTS (SELECT FROM pg_roles WHERE rolname = 'authenticator') THEN
+        ALTER ROLE authenticator SET pgrst.db_aggregates_enabled = 'true';
+        NOTIFY pgrst, 'reload config';
+    END IF;
+END
+$$;
+
+-- Orders of a vendor over a date range
+-- (app.repositories.forecast.get_vendor_forecast).
+CREATE INDEX IF NOT EXISTS orders_vendor_order_date_idx
+    ON orders (vendor_id, order_date);
+
+CREATE INDEX IF NOT EXISTS date_specials_item_date_idx
+    ON date_specials (menu_item_id, available_date);
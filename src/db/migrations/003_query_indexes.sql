@@ -0,0 +1,41 @@
+-- Indexes for the access paths of the repositories. Each is checked by
+-- tests/test_query_plans.py, which fails when a query falls back to a
+-- sequential scan. Use CREATE INDEX CONCURRENTLY by hand on a busy project.
+
+-- get_user_orders: user's orders, newest first
+CREATE INDEX IF NOT EXISTS orders_user_order_date_idx
+    ON orders (user_id, order_date DESC);
+
+-- get_vendor_orders with and without the delivery filter
+-- (orders_vendor_order_date_idx from 002 serves the unfiltered case)
+CREATE INDEX IF NOT EXISTS orders_vendor_delivered_order_date_idx
+    ON orders (vendor_id, is_delivered, order_date DESC);
+
+-- get_all_menus, specials for a date; covers the special's own columns
+CREATE INDEX IF NOT EXISTS date_specials_available_date_idx
+    ON date_specials (available_date)
+    INCLUDE (menu_item_id, special_price, available_stock);
+
+-- get_all_menus, items available on a weekday
+CREATE INDEX IF NOT EXISTS weekly_availability_day_idx
+    ON weekly_availability (day_of_week, menu_item_id)
+    WHERE is_available;
+
+-- Joins from specials and weekly rules to their items' vendor
+CREATE INDEX IF NOT EXISTS menu_items_vendor_idx ON menu_items (vendor_id);
+
+-- get_vendor_stats: count and sum without touching the heap
+CREATE INDEX IF NOT EXISTS rating_vendor_idx
+    ON rating (vendor_id) INCLUDE (rating_val);
+
+-- get_reviews_by_vendor, newest first
+CREATE INDEX IF NOT EXISTS review_vendor_review_id_idx
+    ON review (vendor_id, review_id DESC);
+
+-- Registration and login look accounts up by email
+CREATE UNIQUE INDEX IF NOT EXISTS users_email_key ON users (email);
+CREATE UNIQUE INDEX IF NOT EXISTS vendors_email_key ON vendors (email);
+
+-- Orders linked to a payment (payment callbacks)
+CREATE INDEX IF NOT EXISTS orders_payment_idx
+    ON orders (payment_id) WHERE payment_id IS NOT NULL;
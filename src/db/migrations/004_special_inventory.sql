@@ -0,0 +1,67 @@
+-- Date-special stock is claimed per order with a conditional decrement
+-- (app.repositories.inventory). Each claim in the batch is applied on its
+-- own: it succeeds only while enough stock is left, and the row lock taken
+-- by UPDATE serialises concurrent claims, so stock never goes negative.
+-- Items without a special, or with no stock limit, are always granted.
+CREATE OR REPLACE FUNCTION claim_special_stock(claims jsonb)
+RETURNS TABLE (claim_id text, granted boolean, remaining int)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    c record;
+BEGIN
+    FOR c IN
+        SELECT * FROM jsonb_to_recordset(claims)
+            AS x(id text, item uuid, day date, quantity int)
+    LOOP
+        claim_id := c.id;
+        UPDATE date_specials ds
+           SET available_stock = ds.available_stock - c.quantity
+         WHERE ds.menu_item_id = c.item
+           AND ds.available_date = c.day
+           AND ds.available_stock >= c.quantity
+        RETURNING ds.available_stock INTO remaining;
+        IF FOUND THEN
+            granted := true;
+        ELSE
+            remaining := NULL;
+            SELECT ds.available_stock INTO remaining
+              FROM date_specials ds
+             WHERE ds.menu_item_id = c.item AND ds.available_date = c.day;
+            granted := remaining IS NULL;
+        END IF;
+        RETURN NEXT;
+    END LOOP;
+END
+$$;
+
+-- Stock of failed or abandoned orders goes back to the special.
+CREATE OR REPLACE FUNCTION release_special_stock(releases jsonb)
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE date_specials ds
+       SET available_stock = ds.available_stock + r.quantity
+      FROM (
+            SELECT item, day, sum(quantity)::int AS quantity
+              FROM jsonb_to_recordset(releases) AS x(item uuid, day date, quantity int)
+             GROUP BY item, day
+           ) r
+     WHERE ds.menu_item_id = r.item
+       AND ds.available_date = r.day
+       AND ds.available_stock IS NOT NULL;
+$$;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT FROM pg_constraint
+         WHERE conname = 'date_specials_stock_not_negative'
+           AND conrelid = 'date_specials'::regclass
+    ) THEN
+        ALTER TABLE date_specials
+            ADD CONSTRAINT date_specials_stock_not_negative
+            CHECK (available_stock >= 0);
+    END IF;
+END
+$$;
@@ -0,0 +1,4 @@
+-- The reconciliation job (app.repositories.reconciliation) pages through
+-- payments still pending past a cutoff, oldest first.
+CREATE INDEX IF NOT EXISTS payments_pending_created_at_idx
+    ON payments (created_at) WHERE status = 'pending';
@@ -0,0 +1,23 @@
+-- Refresh-token sessions (app.repositories.sessions). Only a SHA-256 of
+-- each refresh token is stored; /auth/refresh/ finds the session through
+-- the unique index on it. Rotation keeps every token of a login in one
+-- family, which is revoked as a whole on logout or when a rotated token
+-- is presented again.
+CREATE TABLE IF NOT EXISTS auth_sessions (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    family_id uuid NOT NULL,
+    account_id uuid NOT NULL,
+    role text NOT NULL CHECK (role IN ('student', 'vendor')),
+    token_hash text NOT NULL UNIQUE,
+    expires_at timestamptz NOT NULL,
+    rotated_at timestamptz,
+    revoked_at timestamptz,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS auth_sessions_family_id_idx
+    ON auth_sessions (family_id);
+
+-- Workers pull recent revocations into memory (RevokedSessions.sync).
+CREATE INDEX IF NOT EXISTS auth_sessions_revoked_at_idx
+    ON auth_sessions (revoked_at) WHERE revoked_at IS NOT NULL;
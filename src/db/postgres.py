@@ -0,0 +1,109 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from app.settings import settings
+from db.replica import ReplicaClient
+from utils.logger import get_logger
+from utils.metrics import REGISTRY, record_db_call
+
+try:  # Optional; only needed with DATABASE_BACKEND=postgres.
+    import asyncpg
+except ImportError:  # pragma: no cover - depends on the environment
+    asyncpg = None
+
+logger = get_logger(__name__)
+
+# Live pools, read at scrape time.
+_pools: Dict[str, Any] = {}
+
+
+class DirectClient:
+    """
+    The Supabase client plus an asyncpg pool. Repositories with a direct
+    path check `direct_pool(client)` and query Postgres; everything else
+    (other tables, storage, auth) goes through the wrapped client unchanged.
+    """
+
+    def __init__(self, client: Any, pool: Any):
+        self.client = client
+        self.pg_pool = pool
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+
+def direct_pool(client: Any) -> Optional[Any]:
+    """
+    The asyncpg pool behind `client`, or None to use PostgREST. Reads routed
+    to a replica client use the primary's pool; DATABASE_URL names one
+    database.
+    """
+    if isinstance(client, ReplicaClient):
+        client = client.primary
+    return client.pg_pool if isinstance(client, DirectClient) else None
+
+
+async def create_pg_pool() -> Optional[Any]:
+    """Pool for DATABASE_URL, or None unless DATABASE_BACKEND is "postgres"."""
+    if settings.DATABASE_BACKEND != "postgres":
+        return None
+    if asyncpg is None:
+        raise RuntimeError(
+            'DATABASE_BACKEND=postgres requires asyncpg ("postgres" extra)'
+        )
+    if not settings.DATABASE_URL:
+        raise RuntimeError("DATABASE_BACKEND=postgres requires DATABASE_URL")
+    pool = await asyncpg.create_pool(
+        settings.DATABASE_URL,
+        min_size=settings.DATABASE_POOL_MIN_SIZE,
+        max_size=settings.DATABASE_POOL_MAX_SIZE,
+        statement_cache_size=settings.DATABASE_STATEMENT_CACHE_SIZE,
+        command_timeout=settings.DATABASE_QUERY_TIMEOUT,
+    )
+    _pools["primary"] = pool
+    logger.info("Created Postgres pool (%s connections max)", pool.get_max_size())
+    return pool
+
+
+async def close_pg_pool(pool: Any) -> None:
+    _pools.pop("primary", None)
+    await pool.close()
+    logger.info("Closed Postgres pool")
+
+
+async def fetch(pool: Any, target: str, sql: str, *args: Any) -> List[Dict[str, Any]]:
+    """
+    Runs a read through the pool. asyncpg prepares each statement once per
+    connection and reuses it from its statement cache, so repeated calls skip
+    parsing and planning. Recorded like a PostgREST call for the metrics and
+    query budget.
+    """
+    start = time.perf_counter()
+    try:
+        records = await pool.fetch(sql, *args)
+    finally:
+        record_db_call(
+            kind="postgres",
+            target=target,
+            operation="select",
+            shape=f"{target}:{sql}",
+            duration=time.perf_counter() - start,
+        )
+    return [dict(record) for record in records]
+
+
+def _pool_connections() -> Dict[tuple, float]:
+    counts = {}
+    for name, pool in _pools.items():
+        idle = pool.get_idle_size()
+        counts[(name, "idle")] = idle
+        counts[(name, "active")] = pool.get_size() - idle
+    return counts
+
+
+REGISTRY.gauge(
+    "postgres_pool_connections",
+    "Open connections in the asyncpg pool.",
+    _pool_connections,
+    labelnames=("pool", "state"),
+)
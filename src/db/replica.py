@@ -0,0 +1,106 @@
+import hashlib
+import time
+from typing import Any, Dict
+
+from app.settings import settings
+from utils.metrics import REGISTRY
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+READ_ROUTING = REGISTRY.counter(
+    "supabase_read_routing_total",
+    "Reads served by get_read_db, by the client they were sent to.",
+    labelnames=("target",),
+)
+
+
+class ReplicaClient:
+    """
+    Sends PostgREST table and rpc reads to the replica. Storage (signed image
+    URLs) and auth stay on the primary, which a PostgREST-only replica may
+    not serve.
+    """
+
+    def __init__(self, replica: Any, primary: Any):
+        self.replica = replica
+        self.primary = primary
+
+    def table(self, table_name: str):
+        return self.replica.table(table_name)
+
+    def from_(self, table_name: str):
+        return self.replica.from_(table_name)
+
+    def rpc(self, fn: str, params: Any = None, *args, **kwargs):
+        return self.replica.rpc(fn, params, *args, **kwargs)
+
+    @property
+    def storage(self):
+        return self.primary.storage
+
+    def __getattr__(self, name: str):
+        return getattr(self.primary, name)
+
+
+def caller_key(scope) -> str:
+    """Identifies the caller by a hash of its Authorization header, else its IP."""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            return "auth:" + hashlib.sha256(value).hexdigest()[:32]
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RecentWrites:
+    """
+    Remembers callers that wrote within the last `window` seconds so their
+    reads go to the primary until the replica has caught up. Kept in process
+    memory: with several workers, a follow-up read that lands on another
+    worker can still hit the replica.
+    """
+
+    def __init__(self, window: float, max_entries: int = 10_000):
+        self.window = window
+        self.max_entries = max_entries
+        self._until: Dict[str, float] = {}
+
+    def mark(self, key: str) -> None:
+        now = time.monotonic()
+        if len(self._until) >= self.max_entries:
+            self._until = {k: t for k, t in self._until.items() if t > now}
+        self._until[key] = now + self.window
+
+    def wrote_recently(self, key: str) -> bool:
+        until = self._until.get(key)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._until[key]
+            return False
+        return True
+
+
+RECENT_WRITES = RecentWrites(settings.SUPABASE_READ_AFTER_WRITE_SECONDS)
+
+
+def use_primary(scope) -> bool:
+    return RECENT_WRITES.wrote_recently(caller_key(scope))
+
+
+class ReadYourWritesMiddleware:
+    """Marks callers whose unsafe (POST/PUT/PATCH/DELETE) request succeeded."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                RECENT_WRITES.mark(caller_key(scope))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
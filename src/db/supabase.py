@@ -1,17 +1,62 @@
-from fastapi import Request
-from supabase import AsyncClient, acreate_client
+from typing import Optional
+
+from fastapi import Depends, Request
+from supabase import AsyncClient, AsyncClientOptions, acreate_client
 
 from app.settings import settings
-from utils.logger import logger
+from db.http import close_http_client, create_http_client
+from db.instrumented import InstrumentedClient
+from db.replica import READ_ROUTING, ReplicaClient, use_primary
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+async def create_supabase(
+    url: Optional[str] = None, key: Optional[str] = None, name: str = "primary"
+) -> AsyncClient:
+    client = await acreate_client(
+        supabase_url=url or settings.SUPABASE_URL,
+        supabase_key=key or settings.SUPABASE_SERVICE_ROLE,
+        options=AsyncClientOptions(httpx_client=create_http_client(name)),
+    )
+    logger.info("Successfully created %s connection to Supabase", name)
+    # Duck-types AsyncClient; times every table, rpc and storage call.
+    return InstrumentedClient(client)
 
 
-async def create_supabase() -> AsyncClient:
-    logger.info("Successfully created connection to Supabase")
-    return await acreate_client(
-        supabase_url=settings.SUPABASE_URL,
-        supabase_key=settings.SUPABASE_SERVICE_ROLE,
+async def create_read_supabase(primary: AsyncClient) -> Optional[ReplicaClient]:
+    """Client for SUPABASE_READ_URL, or None when no replica is configured."""
+    if not settings.SUPABASE_READ_URL:
+        return None
+    replica = await create_supabase(
+        settings.SUPABASE_READ_URL, settings.SUPABASE_READ_KEY or None, "replica"
     )
+    return ReplicaClient(replica, primary)
+
+
+async def close_supabase(client: AsyncClient, name: str = "primary") -> None:
+    """Closes the pooled connections shared by the client's sub-clients."""
+    await close_http_client(name, client.options.httpx_client)
+    logger.info("Closed %s connection to Supabase", name)
 
 
 def get_db(request: Request) -> AsyncClient:
     return request.app.state.supabase_client
+
+
+def get_read_db(
+    request: Request, primary: AsyncClient = Depends(get_db)
+) -> AsyncClient:
+    """
+    Client for read-only routes: the replica, unless none is configured or
+    the caller wrote recently and must see its own writes.
+    """
+    replica = getattr(request.app.state, "read_client", None)
+    if replica is None:
+        return primary
+    if use_primary(request.scope):
+        READ_ROUTING.inc(target="primary")
+        return primary
+    READ_ROUTING.inc(target="replica")
+    return replica
@@ -1,4 +1,5 @@
 from contextlib import asynccontextmanager
+from datetime import timedelta
 
 from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,10 +7,17 @@ from fastapi.responses import JSONResponse
 from supabase import AsyncClient, create_client
 
 from app import test
+from app.repositories.inventory import INVENTORY
+from app.repositories.order import write_order_batch
+from app.repositories.payment import get_sslcommerz, process_ipn_batch
+from app.repositories.reconciliation import reconcile_pending_payments
+from app.repositories.sessions import REVOKED_SESSIONS
+from app.repositories.subscription import archive_expired_subscriptions
 from app.routers import (
     auth,
     date_specials,
     menu,
+    metrics,
     order,
     payment,
     ratings,
@@ -21,13 +29,91 @@ from app.routers import (
     weekly_menu,
 )
 from app.settings import settings
-from db.supabase import create_supabase
+from db.postgres import DirectClient, close_pg_pool, create_pg_pool
+from db.replica import ReadYourWritesMiddleware
+from db.supabase import close_supabase, create_read_supabase, create_supabase
+from utils.compression import CompressionMiddleware
+from utils.email_queue import create_email_queue
+from utils.http_cache import HTTPCacheMiddleware
+from utils.idempotency import IdempotencyMiddleware
+from utils.ipn_queue import create_ipn_queue
+from utils.logger import setup_logging, shutdown_logging
+from utils.metrics import MetricsMiddleware
+from utils.order_queue import create_order_queue
+from utils.periodic import PeriodicTask
+from utils.query_budget import QueryBudgetMiddleware
+from utils.rate_limit import LOAD, RateLimitMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Restarts the log writer stopped by a previous lifespan (tests)
+    setup_logging()
     app.state.supabase_client = await create_supabase()
+    app.state.pg_pool = await create_pg_pool()
+    if app.state.pg_pool is not None:
+        app.state.supabase_client = DirectClient(
+            app.state.supabase_client, app.state.pg_pool
+        )
+    app.state.read_client = await create_read_supabase(app.state.supabase_client)
+    app.state.email_queue = create_email_queue()
+    await app.state.email_queue.start()
+    app.state.order_queue = create_order_queue(
+        lambda rows: write_order_batch(app.state.supabase_client, rows),
+        lambda claims: INVENTORY.give_back(app.state.supabase_client, claims),
+    )
+    if app.state.order_queue is not None:
+        await app.state.order_queue.start()
+    app.state.ipn_queue = create_ipn_queue(
+        lambda batch: process_ipn_batch(
+            app.state.supabase_client, get_sslcommerz(), batch
+        )
+    )
+    await app.state.ipn_queue.start()
+    await LOAD.start()
+    app.state.subscription_sweep = PeriodicTask(
+        "subscription-archive",
+        settings.SUBSCRIPTION_SWEEP_INTERVAL_SECONDS,
+        lambda: archive_expired_subscriptions(
+            app.state.supabase_client,
+            timedelta(days=settings.SUBSCRIPTION_ARCHIVE_AFTER_DAYS),
+        ),
+    )
+    await app.state.subscription_sweep.start()
+    app.state.reservation_sweep = PeriodicTask(
+        "stock-reservations",
+        settings.INVENTORY_HOLD_SECONDS / 2,
+        lambda: INVENTORY.expire(app.state.supabase_client),
+    )
+    await app.state.reservation_sweep.start()
+    app.state.payment_reconciliation = PeriodicTask(
+        "payment-reconciliation",
+        settings.PAYMENT_RECONCILE_INTERVAL_SECONDS,
+        lambda: reconcile_pending_payments(app.state.supabase_client, get_sslcommerz()),
+    )
+    await app.state.payment_reconciliation.start()
+    app.state.session_revocations = PeriodicTask(
+        "session-revocations",
+        settings.SESSION_REVOCATION_SYNC_SECONDS,
+        lambda: REVOKED_SESSIONS.sync(app.state.supabase_client),
+    )
+    await app.state.session_revocations.start()
     yield
+    await app.state.session_revocations.stop()
+    await app.state.payment_reconciliation.stop()
+    await app.state.reservation_sweep.stop()
+    await app.state.subscription_sweep.stop()
+    await LOAD.stop()
+    await app.state.ipn_queue.stop()
+    if app.state.order_queue is not None:
+        await app.state.order_queue.stop()
+    await app.state.email_queue.stop()
+    if app.state.read_client is not None:
+        await close_supabase(app.state.read_client.replica, "replica")
+    await close_supabase(app.state.supabase_client)
+    if app.state.pg_pool is not None:
+        await close_pg_pool(app.state.pg_pool)
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -37,12 +123,22 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(HTTPCacheMiddleware)
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+# Outermost, so responses from the other middlewares (429/503, idempotent
+# replays) carry CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[settings.CLIENT_ORIGIN_URL],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag", "Retry-After"],
 )
 
 app.include_router(vendors.router)
@@ -58,6 +154,7 @@ app.include_router(payment.router)
 app.include_router(reviews.router)
 app.include_router(ratings.router)
 app.include_router(upload.router)
+app.include_router(metrics.router)
 
 
 @app.get("/")
@@ -0,0 +1,40 @@
+import pytest
+
+from app.settings import settings
+from db.fake import FakeAsyncClient, TableStore
+from db.supabase import get_db
+from main import app
+from utils.query_budget import assert_query_budget
+
+
+@pytest.fixture(autouse=True)
+def ipn_queue_path(monkeypatch, tmp_path):
+    """Keeps the IPN queue the app lifespan opens out of the working tree."""
+    monkeypatch.setattr(settings, "IPN_QUEUE_PATH", str(tmp_path / "ipn_queue.db"))
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Asserts the number of Supabase calls per request. The client under test
+    must be wrapped in db.instrumented.InstrumentedClient.
+
+        with query_budget(max_calls=2):
+            await client.get("/menu/")
+    """
+    return assert_query_budget
+
+
+@pytest.fixture
+def fake_store():
+    """Empty in-memory tables; seed with `fake_store.insert(table, rows)`."""
+    return TableStore()
+
+
+@pytest.fixture
+def fake_db(fake_store):
+    """Serves `get_db` from the in-memory store for the duration of a test."""
+    client = FakeAsyncClient(fake_store)
+    app.dependency_overrides[get_db] = lambda: client
+    yield client
+    app.dependency_overrides.pop(get_db, None)
@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from httpx import ASGITransport, AsyncClient
+
+from app.repositories import auth, sessions
+from app.repositories.sessions import RevokedSessions
+from app.security import get_password_hash
+from app.settings import settings
+from main import app
+from utils.auth import get_payload_from_token
+
+USER_ID = str(uuid4())
+
+
+@pytest.fixture
+def student(monkeypatch, fake_store):
+    monkeypatch.setattr(sessions, "REVOKED_SESSIONS", RevokedSessions())
+    monkeypatch.setattr("utils.auth.REVOKED_SESSIONS", sessions.REVOKED_SESSIONS)
+    fake_store.insert(
+        "users",
+        [
+            {
+                "id": USER_ID,
+                "email": "a@example.com",
+                "password_hash": get_password_hash("secret"),
+            }
+        ],
+    )
+
+
+@pytest.fixture
+async def client(fake_db, student):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def login(client):
+    response = await client.post(
+        "/auth/login/",
+        json={"email": "a@example.com", "password": "secret", "role": "student"},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+async def payload_of(token):
+    return await get_payload_from_token(
+        HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    )
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_without_the_password(
+    monkeypatch, client, fake_db, fake_store
+):
+    first = await login(client)
+
+    def no_bcrypt(*_):
+        raise AssertionError("refresh must not check the password")
+
+    monkeypatch.setattr(auth, "verify_password", no_bcrypt)
+    calls = fake_db.calls
+    response = await client.post(
+        "/auth/refresh/", json={"refresh_token": first["refresh_token"]}
+    )
+    second = response.json()
+
+    assert response.status_code == 200
+    # One conditional update rotates the session, one insert starts the next.
+    assert fake_db.calls - calls == 2
+    assert second["refresh_token"] != first["refresh_token"]
+    payload = await payload_of(second["token"])
+    assert payload["user_id"] == USER_ID
+    assert payload["sid"] == (await payload_of(first["token"]))["sid"]
+    stored = [s["token_hash"] for s in fake_store.tables["auth_sessions"]]
+    assert first["refresh_token"] not in stored
+
+
+@pytest.mark.asyncio
+async def test_retry_after_a_lost_response_gets_a_new_pair(client, fake_store):
+    first = await login(client)
+    refresh = {"refresh_token": first["refresh_token"]}
+    await client.post("/auth/refresh/", json=refresh)
+
+    retried = await client.post("/auth/refresh/", json=refresh)
+    again = await client.post(
+        "/auth/refresh/", json={"refresh_token": retried.json()["refresh_token"]}
+    )
+
+    assert retried.status_code == 200
+    assert again.status_code == 200
+    assert all(s.get("revoked_at") is None for s in fake_store.tables["auth_sessions"])
+    assert (await payload_of(again.json()["token"]))["user_id"] == USER_ID
+
+
+@pytest.mark.asyncio
+async def test_reused_refresh_token_revokes_the_session(monkeypatch, client):
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_RETRY_SECONDS", 0)
+    first = await login(client)
+    second = (
+        await client.post(
+            "/auth/refresh/", json={"refresh_token": first["refresh_token"]}
+        )
+    ).json()
+
+    reused = await client.post(
+        "/auth/refresh/", json={"refresh_token": first["refresh_token"]}
+    )
+    after = await client.post(
+        "/auth/refresh/", json={"refresh_token": second["refresh_token"]}
+    )
+
+    assert reused.status_code == 401
+    assert after.status_code == 401
+    with pytest.raises(HTTPException) as exc:
+        await payload_of(second["token"])
+    assert exc.value.detail == "Session has been revoked"
+
+
+@pytest.mark.asyncio
+async def test_logout_ends_the_session(client):
+    tokens = await login(client)
+
+    response = await client.post(
+        "/auth/logout/", json={"refresh_token": tokens["refresh_token"]}
+    )
+    refreshed = await client.post(
+        "/auth/refresh/", json={"refresh_token": tokens["refresh_token"]}
+    )
+
+    assert response.json() == {"message": "Logged out"}
+    assert refreshed.status_code == 401
+    with pytest.raises(HTTPException):
+        await payload_of(tokens["token"])
+
+
+@pytest.mark.asyncio
+async def test_revocations_from_other_workers_are_synced(fake_db, fake_store):
+    now = datetime.now(timezone.utc)
+    recent, old, live = str(uuid4()), str(uuid4()), str(uuid4())
+    fake_store.insert(
+        "auth_sessions",
+        [
+            {
+                "family_id": recent,
+                "revoked_at": (now - timedelta(minutes=5)).isoformat(),
+            },
+            {
+                "family_id": recent,
+                "revoked_at": (now - timedelta(minutes=5)).isoformat(),
+            },
+            {"family_id": old, "revoked_at": (now - timedelta(hours=2)).isoformat()},
+            {"family_id": live, "revoked_at": None},
+        ],
+    )
+    revoked = RevokedSessions()
+
+    assert await revoked.sync(fake_db) == 1
+    assert recent in revoked
+    assert old not in revoked
+    assert live not in revoked
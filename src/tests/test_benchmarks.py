@@ -0,0 +1,140 @@
+import httpx
+import pytest
+from postgrest import APIError, AsyncPostgrestClient
+from storage3 import AsyncStorageClient
+
+from benchmarks.datagen import DatasetSize, generate
+from benchmarks.fake_postgrest import FakeSupabase
+from benchmarks.run import compare, percentile
+
+TINY = DatasetSize(
+    vendors=3,
+    items_per_vendor=4,
+    users=10,
+    orders=50,
+    ratings=10,
+    reviews=5,
+    subscriptions=5,
+)
+
+
+@pytest.fixture
+def dataset():
+    return generate(TINY, seed=1)
+
+
+@pytest.fixture
+async def clients(dataset):
+    """The real supabase-py clients talking to the stand-in in-process."""
+    http = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=FakeSupabase(dataset.store).app())
+    )
+    rest = AsyncPostgrestClient("http://fake/rest/v1", http_client=http)
+    storage = AsyncStorageClient("http://fake/storage/v1/", {}, http_client=http)
+    yield rest, storage
+    await http.aclose()
+
+
+async def test_select_with_filters_order_and_count(clients, dataset):
+    rest, _ = clients
+    vendor_id = dataset.vendor_ids[0]
+    expected = len(dataset.order_ids[vendor_id])
+
+    response = (
+        await rest.table("orders")
+        .select("*", count="exact")
+        .eq("vendor_id", vendor_id)
+        .order("order_date", desc=True)
+        .limit(3)
+        .execute()
+    )
+
+    assert response.count == expected
+    assert len(response.data) == min(3, expected)
+    dates = [o["order_date"] for o in response.data]
+    assert dates == sorted(dates, reverse=True)
+
+
+async def test_inner_join_filters_on_embedded_column(clients, dataset):
+    rest, _ = clients
+    vendor_id = dataset.vendor_ids[1]
+
+    response = (
+        await rest.table("weekly_availability")
+        .select("*, menu_items!inner(*, vendors!inner(name))")
+        .eq("menu_items.vendor_id", vendor_id)
+        .execute()
+    )
+
+    assert len(response.data) == 7 * TINY.items_per_vendor
+    assert all(r["menu_items"]["vendor_id"] == vendor_id for r in response.data)
+    assert all(r["menu_items"]["vendors"]["name"] for r in response.data)
+
+
+async def test_insert_upsert_and_single(clients, dataset):
+    rest, _ = clients
+    user_id, vendor_id = dataset.user_ids[0], dataset.vendor_ids[0]
+    await rest.table("rating").delete().eq("user_id", user_id).execute()
+
+    await (
+        rest.table("rating")
+        .upsert({"user_id": user_id, "vendor_id": vendor_id, "rating_val": 2})
+        .execute()
+    )
+    await (
+        rest.table("rating")
+        .upsert({"user_id": user_id, "vendor_id": vendor_id, "rating_val": 5})
+        .execute()
+    )
+
+    response = (
+        await rest.table("rating")
+        .select("rating_val")
+        .eq("user_id", user_id)
+        .in_("vendor_id", [vendor_id])
+        .single()
+        .execute()
+    )
+    assert response.data == {"rating_val": 5}
+
+    with pytest.raises(APIError) as e:
+        await rest.table("users").select("id").eq("id", "missing").single().execute()
+    assert e.value.code == "PGRST116"
+
+
+async def test_storage_signed_url(clients, dataset):
+    _, storage = clients
+    vendor_id = dataset.vendor_ids[0]
+
+    url = await storage.from_("vendors").create_signed_url(
+        path=f"{vendor_id}/cover.jpg", expires_in=60
+    )
+
+    assert f"vendors/{vendor_id}/cover.jpg" in url["signedURL"]
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    def result(p95, rps):
+        return {
+            "config": {},
+            "scenarios": {
+                "order_burst": {
+                    "endpoints": {
+                        "POST /orders": {"p95_ms": p95, "rps": rps, "errors": 0}
+                    }
+                }
+            },
+        }
+
+    assert compare(result(105, 95), result(100, 100), threshold=0.15) == []
+    regressions = compare(result(130, 70), result(100, 100), threshold=0.15)
+    assert len(regressions) == 2
@@ -0,0 +1,134 @@
+import gzip
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.settings import settings
+from utils import compression, http_cache
+from utils.compression import CompressedBodies, negotiate
+from utils.http_cache import CacheVersions, ETagIndex
+from main import app
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(compression, "BODIES", CompressedBodies())
+    monkeypatch.setattr(http_cache, "INDEX", ETagIndex())
+    monkeypatch.setattr(http_cache, "VERSIONS", CacheVersions())
+
+
+@pytest.fixture
+def vendor_id(fake_store):
+    vendor_id = str(uuid4())
+    fake_store.insert(
+        "review",
+        [
+            {
+                "user_id": str(uuid4()),
+                "vendor_id": vendor_id,
+                "food_quality": "Good",
+                "delivery_experience": "Fast",
+                "comment": "Lovely khichuri " * 10,
+                "is_replied": False,
+                "created_at": "2025-01-01T12:00:00",
+            }
+            for _ in range(20)
+        ],
+    )
+    return vendor_id
+
+
+async def get(path, accept_encoding, **headers):
+    # httpx decodes gzip itself; read the raw bytes to check the encoding.
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        request = client.build_request(
+            "GET", path, headers={"Accept-Encoding": accept_encoding, **headers}
+        )
+        response = await client.send(request, stream=True)
+        raw = b"".join([chunk async for chunk in response.aiter_raw()])
+        return response, raw
+
+
+def test_negotiate():
+    assert negotiate(b"gzip, deflate") == "gzip"
+    assert negotiate(b"gzip;q=0, identity") is None
+    assert negotiate(b"*") in ("br", "gzip")
+    assert negotiate(None) is None
+
+
+async def test_large_json_is_gzipped(fake_db, vendor_id):
+    response, raw = await get(f"/reviews/{vendor_id}", "gzip")
+
+    assert response.headers["content-encoding"] == "gzip"
+    vary = [v.strip() for v in response.headers["vary"].split(",")]
+    assert "Accept-Encoding" in vary
+    assert int(response.headers["content-length"]) == len(raw)
+    assert len(gzip.decompress(raw)) > len(raw)
+    assert response.headers["etag"].startswith('W/"')
+
+
+async def test_small_and_unaccepted_responses_are_untouched(fake_db, vendor_id):
+    small, _ = await get("/", "gzip")
+    identity, raw = await get(f"/reviews/{vendor_id}", "identity")
+
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in identity.headers
+    assert raw.startswith(b"[")
+
+
+async def test_unchanged_body_is_compressed_once(fake_db, vendor_id, monkeypatch):
+    calls = []
+    real = compression.compress
+    monkeypatch.setattr(
+        compression, "compress", lambda body, enc: calls.append(enc) or real(body, enc)
+    )
+
+    first, first_raw = await get(f"/reviews/{vendor_id}", "gzip")
+    second, second_raw = await get(f"/reviews/{vendor_id}", "gzip")
+
+    assert calls == ["gzip"]
+    assert first_raw == second_raw
+
+
+async def test_large_bodies_are_compressed_off_the_loop(
+    fake_db, vendor_id, monkeypatch
+):
+    threaded = []
+    real = compression.asyncio.to_thread
+
+    async def to_thread(func, *args):
+        threaded.append(func)
+        return await real(func, *args)
+
+    monkeypatch.setattr(compression.asyncio, "to_thread", to_thread)
+    await get(f"/reviews/{vendor_id}", "gzip")
+    assert threaded == []
+
+    monkeypatch.setattr(settings, "COMPRESSION_THREAD_MIN_SIZE", 0)
+    monkeypatch.setattr(compression, "BODIES", CompressedBodies())
+    _, raw = await get(f"/reviews/{vendor_id}", "gzip")
+
+    assert threaded == [compression.compress]
+    assert gzip.decompress(raw).startswith(b"[")
+
+
+async def test_weak_etag_still_revalidates(fake_db, vendor_id):
+    first, _ = await get(f"/reviews/{vendor_id}", "gzip")
+
+    again, _ = await get(
+        f"/reviews/{vendor_id}", "gzip", **{"If-None-Match": first.headers["etag"]}
+    )
+
+    assert again.status_code == 304
+
+
+async def test_brotli_when_available(fake_db, vendor_id):
+    brotli = pytest.importorskip("brotli")
+
+    response, raw = await get(f"/reviews/{vendor_id}", "gzip, br")
+
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(raw).startswith(b"[")
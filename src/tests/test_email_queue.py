@@ -0,0 +1,194 @@
+import sqlite3
+
+import httpx
+import pytest
+
+from utils import email_queue
+from utils.email import (
+    EmailDeliveryError,
+    FakeEmailProvider,
+    ResendProvider,
+    build_delivery_email,
+)
+from utils.email_queue import EmailQueue
+
+
+def make_message(i: int) -> dict:
+    return build_delivery_email(
+        email_to=f"student{i}@example.com",
+        user_name=f"Student {i}",
+        order_id=f"{i:08d}-order",
+        pickup="Main Campus Cafeteria",
+        total_price=120.0,
+    )
+
+
+def make_queue(tmp_path, provider, **kwargs) -> EmailQueue:
+    options = {"rate_per_second": 0, "retry_base_seconds": 0}
+    options.update(kwargs)
+    return EmailQueue(path=str(tmp_path / "outbox.db"), provider=provider, **options)
+
+
+@pytest.mark.asyncio
+async def test_messages_are_sent_in_provider_sized_batches(tmp_path):
+    provider = FakeEmailProvider()
+    queue = make_queue(tmp_path, provider)
+
+    await queue.enqueue_many([make_message(i) for i in range(250)])
+    while await queue.run_once():
+        pass
+
+    assert [len(batch) for batch in provider.batches] == [100, 100, 50]
+    assert provider.sent[0]["to"] == ["student0@example.com"]
+    assert queue.pending_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_retried(tmp_path):
+    provider = FakeEmailProvider(fail_times=2)
+    queue = make_queue(tmp_path, provider, max_attempts=5)
+
+    await queue.enqueue(make_message(1))
+    for _ in range(3):
+        await queue.run_once()
+
+    assert len(provider.sent) == 1
+    assert queue.pending_count() == 0
+    assert queue.dead_letters() == []
+
+
+@pytest.mark.asyncio
+async def test_exhausted_messages_move_to_dead_letter(tmp_path):
+    provider = FakeEmailProvider(fail_times=10)
+    queue = make_queue(tmp_path, provider, max_attempts=2)
+
+    await queue.enqueue(make_message(1))
+    await queue.run_once()
+    await queue.run_once()
+
+    assert queue.pending_count() == 0
+    dead = queue.dead_letters()
+    assert len(dead) == 1
+    assert dead[0]["attempts"] == 2
+    assert dead[0]["payload"]["to"] == ["student1@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_permanent_failures_skip_retries(tmp_path):
+    provider = FakeEmailProvider(fail_times=1, permanent=True)
+    queue = make_queue(tmp_path, provider, max_attempts=5)
+
+    await queue.enqueue(make_message(1))
+    await queue.run_once()
+
+    assert len(queue.dead_letters()) == 1
+    assert provider.sent == []
+
+
+class RejectingProvider(FakeEmailProvider):
+    """Rejects any batch containing one of the `bad` recipients, as Resend does."""
+
+    def __init__(self, bad):
+        super().__init__()
+        self.bad = set(bad)
+
+    async def send_batch(self, messages):
+        if any(m["to"][0] in self.bad for m in messages):
+            raise EmailDeliveryError("Invalid `to` field", permanent=True)
+        await super().send_batch(messages)
+
+
+@pytest.mark.asyncio
+async def test_permanent_batch_failure_dead_letters_only_bad_messages(tmp_path):
+    provider = RejectingProvider(bad={"student2@example.com"})
+    queue = make_queue(tmp_path, provider)
+
+    await queue.enqueue_many([make_message(i) for i in range(5)])
+    await queue.run_once()
+
+    assert [m["to"][0] for m in provider.sent] == [
+        f"student{i}@example.com" for i in (0, 1, 3, 4)
+    ]
+    assert [d["payload"]["to"] for d in queue.dead_letters()] == [
+        ["student2@example.com"]
+    ]
+    assert queue.pending_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_transaction_is_rolled_back(tmp_path):
+    provider = FakeEmailProvider(fail_times=1, permanent=True)
+    queue = make_queue(tmp_path, provider)
+    queue._conn.execute(
+        "CREATE TRIGGER no_dead_letters BEFORE INSERT ON email_dead_letter "
+        "BEGIN SELECT RAISE(ABORT, 'disk full'); END"
+    )
+
+    await queue.enqueue(make_message(1))
+    with pytest.raises(sqlite3.IntegrityError):
+        await queue.run_once()
+    queue._conn.execute("DROP TRIGGER no_dead_letters")
+
+    # The connection is usable again and the message is still queued.
+    assert queue.pending_count() == 1
+    await queue.enqueue(make_message(2))
+    assert queue.pending_count() == 2
+
+
+@pytest.mark.asyncio
+async def test_refused_credentials_pause_without_using_attempts(tmp_path):
+    provider = FakeEmailProvider(fail_times=1, halt=True)
+    queue = make_queue(tmp_path, provider, max_attempts=1)
+
+    await queue.enqueue(make_message(1))
+    await queue.run_once()
+
+    assert queue.dead_letters() == []
+    assert await queue.run_once() == 0
+    row = queue._conn.execute("SELECT attempts FROM email_outbox").fetchone()
+    assert row["attempts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_messages_sent_singly_are_acked_one_by_one(tmp_path, monkeypatch):
+    pending = []
+
+    class CountingProvider(RejectingProvider):
+        async def send_batch(self, messages):
+            if len(messages) == 1:
+                pending.append(queue.pending_count())
+            await super().send_batch(messages)
+
+    renewed = []
+    monkeypatch.setattr(email_queue, "CLAIM_LEASE_SECONDS", 0)
+    provider = CountingProvider(bad={"student0@example.com"})
+    queue = make_queue(tmp_path, provider)
+    real_renew = queue._renew
+    monkeypatch.setattr(
+        queue, "_renew", lambda rows: renewed.append(len(rows)) or real_renew(rows)
+    )
+
+    await queue.enqueue_many([make_message(i) for i in range(3)])
+    await queue.run_once()
+
+    assert pending == [3, 2, 1]
+    assert renewed == [3, 2, 1]
+    assert queue.pending_count() == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "status, permanent, halt",
+    [(401, False, True), (403, False, True), (422, True, False), (404, False, False)],
+)
+async def test_resend_errors_are_classified(status, permanent, halt):
+    provider = ResendProvider(api_key="test")
+    provider._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(status))
+    )
+
+    with pytest.raises(EmailDeliveryError) as exc:
+        await provider.send_batch([make_message(1)])
+    await provider.aclose()
+
+    assert (exc.value.permanent, exc.value.halt) == (permanent, halt)
@@ -0,0 +1,331 @@
+from datetime import date
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+from postgrest import APIError
+from storage3.exceptions import StorageApiError
+
+from app import enums, schemas
+from app.repositories import date_specials, menu, order, ratings, reviews
+from db.fake import FakeAsyncClient, TableStore
+from main import app
+
+
+@pytest.fixture
+def store():
+    vendor_id, other_vendor = str(uuid4()), str(uuid4())
+    user_id = str(uuid4())
+    item_ids = [str(uuid4()) for _ in range(3)]
+    today = date.today().isoformat()
+    store = TableStore(
+        {
+            "vendors": [
+                {"id": vendor_id, "name": "Kitchen A"},
+                {"id": other_vendor, "name": "Kitchen B"},
+            ],
+            "users": [{"id": user_id, "name": "Nusrat", "email": "n@uni.edu"}],
+            "menu_items": [
+                {
+                    "id": item_ids[0],
+                    "vendor_id": vendor_id,
+                    "name": "Biryani",
+                    "price": 180.0,
+                    "category": "Rice",
+                    "preparation_time": 20,
+                    "img_bucket": "menus",
+                    "img_path": "a.jpg",
+                },
+                {
+                    "id": item_ids[1],
+                    "vendor_id": vendor_id,
+                    "name": "Lassi",
+                    "price": 60.0,
+                    "category": "Drinks",
+                    "preparation_time": 5,
+                },
+                {
+                    "id": item_ids[2],
+                    "vendor_id": other_vendor,
+                    "name": "Khichuri",
+                    "price": 120.0,
+                    "category": "Rice",
+                    "preparation_time": 15,
+                },
+            ],
+            "date_specials": [
+                {
+                    "id": str(uuid4()),
+                    "menu_item_id": item_ids[0],
+                    "available_date": today,
+                    "special_price": 150.0,
+                    "available_stock": 10,
+                },
+                {
+                    "id": str(uuid4()),
+                    "menu_item_id": item_ids[2],
+                    "available_date": "2001-01-01",
+                    "special_price": 100.0,
+                    "available_stock": 5,
+                },
+            ],
+        }
+    )
+    store.put_object("menus", "a.jpg", b"jpeg")
+    store.ids = {
+        "vendor": vendor_id,
+        "other_vendor": other_vendor,
+        "user": user_id,
+        "items": item_ids,
+    }
+    return store
+
+
+@pytest.fixture
+def client(store):
+    return FakeAsyncClient(store)
+
+
+async def test_filters_order_and_range(client, store):
+    response = (
+        await client.table("menu_items")
+        .select("id, name, price", count="exact")
+        .gte("price", 60)
+        .neq("category", enums.MenuCategory.DRINKS)
+        .order("price", desc=True)
+        .range(0, 0)
+        .execute()
+    )
+
+    assert response.count == 2
+    assert response.data == [
+        {"id": store.ids["items"][0], "name": "Biryani", "price": 180.0}
+    ]
+    data, count = response
+    assert data[1] == response.data and count[1] == 2
+
+
+async def test_in_not_and_is_filters(client, store):
+    items = store.ids["items"]
+
+    response = (
+        await client.table("menu_items")
+        .select("id")
+        .in_("id", items[:2])
+        .not_.is_("img_path", None)
+        .execute()
+    )
+
+    assert [r["id"] for r in response.data] == [items[0]]
+
+
+async def test_inner_join_with_embedded_filter(client, store):
+    response = (
+        await client.table("date_specials")
+        .select("id, menu_items!inner(vendor_id, vendors(name))")
+        .eq("menu_items.vendor_id", store.ids["vendor"])
+        .execute()
+    )
+
+    assert len(response.data) == 1
+    assert response.data[0]["menu_items"]["vendors"] == {"name": "Kitchen A"}
+
+
+async def test_count_head_returns_no_rows(client):
+    response = (
+        await client.table("menu_items")
+        .select("id", count="exact", head=True)
+        .execute()
+    )
+
+    assert response.data == [] and response.count == 3
+
+
+async def test_single_and_maybe_single(client, store):
+    response = (
+        await client.table("users")
+        .select("name")
+        .eq("id", store.ids["user"])
+        .single()
+        .execute()
+    )
+    assert response.data == {"name": "Nusrat"}
+
+    assert (
+        await client.table("users")
+        .select("*")
+        .eq("id", "missing")
+        .maybe_single()
+        .execute()
+        is None
+    )
+    with pytest.raises(APIError) as e:
+        await client.table("users").select("*").eq("id", "missing").single().execute()
+    assert e.value.code == "PGRST116"
+
+
+async def test_insert_conflict_and_upsert(client, store):
+    row = {
+        "user_id": store.ids["user"],
+        "vendor_id": store.ids["vendor"],
+        "rating_val": 2,
+    }
+    await client.table("rating").insert(row).execute()
+
+    with pytest.raises(APIError) as e:
+        await client.table("rating").insert(row).execute()
+    assert e.value.code == "23505"
+
+    await client.table("rating").upsert({**row, "rating_val": 4}).execute()
+    response = await client.table("rating").select("rating_val").execute()
+    assert response.data == [{"rating_val": 4}]
+
+
+async def test_update_and_delete_return_rows(client, store):
+    updated = (
+        await client.table("menu_items")
+        .update({"price": 70.0})
+        .eq("id", store.ids["items"][1])
+        .execute()
+    )
+    assert updated.data[0]["price"] == 70.0
+
+    deleted = (
+        await client.table("menu_items")
+        .delete()
+        .eq("vendor_id", store.ids["other_vendor"])
+        .execute()
+    )
+    assert len(deleted.data) == 1
+    assert len(store.tables["menu_items"]) == 2
+
+
+async def test_aggregates_group_by_selected_columns(client):
+    grouped = (
+        await client.table("menu_items")
+        .select("vendor_id, items:count(), top:price.max()")
+        .order("vendor_id")
+        .execute()
+    )
+    total = await client.table("menu_items").select("price.sum()").execute()
+
+    assert sorted((r["items"], r["top"]) for r in grouped.data) == [
+        (1, 120.0),
+        (2, 180.0),
+    ]
+    assert total.data == [{"sum": 360.0}]
+
+
+async def test_rpc_calls_registered_function(client, store):
+    store.register_function(
+        "menu_count", lambda s, p: len(s.tables["menu_items"]) * p["factor"]
+    )
+
+    response = await client.rpc("menu_count", {"factor": 2}).execute()
+
+    assert response.data == 6
+    with pytest.raises(APIError):
+        await client.rpc("missing").execute()
+
+
+async def test_storage_round_trip(client):
+    bucket = client.storage.from_("menus")
+
+    await bucket.upload("b.jpg", b"png")
+    assert await bucket.download("b.jpg") == b"png"
+    with pytest.raises(StorageApiError):
+        await bucket.upload("b.jpg", b"again")
+    await bucket.upload("b.jpg", b"again", file_options={"upsert": "true"})
+
+    signed = await bucket.create_signed_url("b.jpg", 60)
+    assert "/object/sign/menus/b.jpg?token=" in signed["signedURL"]
+
+    await bucket.remove(["b.jpg"])
+    with pytest.raises(StorageApiError):
+        await bucket.create_signed_url("b.jpg", 60)
+
+
+# --- Repositories against the fake ---
+
+
+async def test_get_all_menus_merges_specials_and_signs_images(client, store):
+    menus = await menu.get_all_menus(client)
+
+    biryani = next(m for m in menus if m.name == "Biryani")
+    assert biryani.price == 150.0
+    assert biryani.vendor_name == "Kitchen A"
+    assert "/object/sign/menus/a.jpg" in biryani.img_url
+    assert all(m.name != "Khichuri" for m in menus)
+
+
+async def test_get_specials_for_vendor(client, store):
+    specials = await date_specials.get_vendor_specials(store.ids["vendor"], client)
+
+    assert [s.special_price for s in specials] == [150.0]
+
+
+async def test_order_lifecycle(client, store):
+    created = await order.create_order(
+        client,
+        schemas.OrderRequest(quantity=2, unit_price=150.0, pickup="Library"),
+        user_id=store.ids["user"],
+        vendor_id=store.ids["vendor"],
+        menu_id=store.ids["items"][0],
+    )
+
+    pending = await order.get_vendor_orders(
+        client, store.ids["vendor"], delivered=False
+    )
+
+    assert [o.id for o in pending] == [created.order_id]
+    assert pending[0].total_price == 300.0
+
+
+async def test_ratings_and_reviews(client, store):
+    user, vendor = store.ids["user"], store.ids["vendor"]
+    await ratings.upsert_rating(
+        client, user, schemas.RatingCreate(vendor_id=vendor, rating_val=4)
+    )
+    await ratings.upsert_rating(
+        client, user, schemas.RatingCreate(vendor_id=vendor, rating_val=2)
+    )
+
+    stats = await ratings.get_vendor_stats(client, vendor)
+    assert (stats.average_rating, stats.total_ratings) == (2.0, 1)
+
+    await reviews.create_review(
+        client,
+        user,
+        schemas.ReviewCreate(
+            vendor_id=vendor, food_quality="Good", delivery_experience="Fast"
+        ),
+    )
+    listed = await reviews.get_reviews_by_vendor(client, vendor)
+    assert listed[0].username == "Nusrat"
+
+
+async def test_missing_row_surfaces_as_http_error(client):
+    with pytest.raises(HTTPException) as e:
+        await menu.get_menu_item_by_id(uuid4(), client)
+    assert e.value.status_code == 404
+
+
+async def test_router_served_from_fake_db(fake_db, fake_store):
+    vendor_id = str(uuid4())
+    fake_store.insert(
+        "rating",
+        [
+            {"user_id": str(uuid4()), "vendor_id": vendor_id, "rating_val": 5},
+            {"user_id": str(uuid4()), "vendor_id": vendor_id, "rating_val": 3},
+        ],
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(f"/ratings/{vendor_id}/stats")
+
+    assert response.status_code == 200
+    assert response.json()["average_rating"] == 4.0
+    assert fake_db.calls == 1
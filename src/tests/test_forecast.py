@@ -0,0 +1,181 @@
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import enums, schemas
+from app.repositories import forecast, order, subscription
+from db.fake import FakeAsyncClient
+from main import app
+from utils.auth import get_vendor
+
+TODAY = date.today()
+
+
+def at(day: date, hour: int = 12) -> str:
+    return datetime.combine(day, time(hour)).isoformat()
+
+
+@pytest.fixture
+def kitchen(fake_store, monkeypatch):
+    monkeypatch.setattr(forecast, "FORECASTS", forecast.ForecastCache())
+    vendor_id, user_id = str(uuid4()), str(uuid4())
+    rice, lassi, tea, other = (str(uuid4()) for _ in range(4))
+    tomorrow = TODAY + timedelta(days=1)
+    fake_store.insert("vendors", [{"id": vendor_id, "name": "Kitchen A"}])
+    fake_store.insert("users", [{"id": user_id, "name": "Nusrat"}])
+    fake_store.insert(
+        "menu_items",
+        [
+            {"id": rice, "vendor_id": vendor_id, "name": "Biryani", "price": 180.0},
+            {"id": lassi, "vendor_id": vendor_id, "name": "Lassi", "price": 60.0},
+            {"id": tea, "vendor_id": vendor_id, "name": "Tea", "price": 20.0},
+            {"id": other, "vendor_id": str(uuid4()), "name": "Elsewhere"},
+        ],
+    )
+    fake_store.insert(
+        "weekly_availability",
+        [
+            {
+                "menu_item_id": item,
+                # enums.DayOfWeek: 0 = Sunday
+                "day_of_week": (TODAY.weekday() + 1) % 7,
+                "is_available": True,
+            }
+            for item in (rice, tea)
+        ],
+    )
+    fake_store.insert(
+        "date_specials",
+        [
+            {
+                "menu_item_id": lassi,
+                "available_date": TODAY.isoformat(),
+                "available_stock": 4,
+            },
+            {
+                "menu_item_id": rice,
+                "available_date": tomorrow.isoformat(),
+                "available_stock": 10,
+            },
+        ],
+    )
+
+    def placed(menu, quantity, day=TODAY):
+        return {
+            "user_id": user_id,
+            "vendor_id": vendor_id,
+            "menu": menu,
+            "quantity": quantity,
+            "order_date": at(day),
+        }
+
+    fake_store.insert(
+        "orders",
+        [
+            placed(rice, 2),
+            placed(rice, 3),
+            placed(lassi, 6),
+            placed(rice, 9, TODAY - timedelta(days=1)),
+        ],
+    )
+    fake_store.insert(
+        "subscription",
+        [
+            {
+                "user_id": user_id,
+                "vendor_id": vendor_id,
+                "starts_from": at(TODAY - timedelta(days=3)),
+                "ends_at": at(TODAY + timedelta(days=1)),
+            },
+            {
+                "user_id": user_id,
+                "vendor_id": vendor_id,
+                "starts_from": at(TODAY - timedelta(days=40)),
+                "ends_at": at(TODAY - timedelta(days=10)),
+            },
+        ],
+    )
+    return SimpleNamespace(
+        store=fake_store,
+        vendor_id=vendor_id,
+        user_id=user_id,
+        rice=rice,
+        lassi=lassi,
+        tea=tea,
+    )
+
+
+async def test_forecast_aggregates_orders_caps_and_subscriptions(kitchen):
+    client = FakeAsyncClient(kitchen.store)
+
+    today, tomorrow = await forecast.get_vendor_forecast(
+        kitchen.vendor_id, client, days=2
+    )
+
+    assert client.calls == 5
+    assert today.day == TODAY and today.subscriptions == 1
+    by_item = {str(item.menu_item_id): item for item in today.items}
+    assert by_item[kitchen.rice].ordered == 5
+    assert by_item[kitchen.rice].expected == 5
+    assert by_item[kitchen.lassi].ordered == 6
+    assert by_item[kitchen.lassi].expected == 6
+    assert by_item[kitchen.lassi].stock_cap == 10
+    # On today's weekly menu, not ordered yet
+    assert by_item[kitchen.tea].ordered == 0
+    assert today.total_expected == 12
+    (item,) = tomorrow.items
+    assert (item.name, item.ordered, item.stock_cap) == ("Biryani", 0, 10)
+    assert tomorrow.subscriptions == 0
+
+
+async def test_forecast_is_cached_until_an_order_arrives(kitchen):
+    client = FakeAsyncClient(kitchen.store)
+    first = await forecast.get_vendor_forecast(kitchen.vendor_id, client)
+    calls = client.calls
+
+    assert await forecast.get_vendor_forecast(kitchen.vendor_id, client) is first
+    assert client.calls == calls
+
+    await order.create_order(
+        client,
+        schemas.OrderRequest(quantity=1, unit_price=180.0, pickup="Library"),
+        kitchen.user_id,
+        kitchen.vendor_id,
+        kitchen.rice,
+    )
+    refreshed = await forecast.get_vendor_forecast(kitchen.vendor_id, client)
+    rice = next(i for i in refreshed[0].items if str(i.menu_item_id) == kitchen.rice)
+    assert rice.ordered == 6
+
+    await subscription.subscribe(
+        schemas.SubscriptionRequest(type=enums.SubscriptionType.WEEKLY),
+        kitchen.user_id,
+        client,
+        kitchen.vendor_id,
+    )
+    assert (await forecast.get_vendor_forecast(kitchen.vendor_id, client))[
+        0
+    ].subscriptions == 2
+
+
+async def test_forecast_route_is_for_vendors(kitchen, fake_db):
+    app.dependency_overrides[get_vendor] = lambda: schemas.UserBase(
+        id=kitchen.vendor_id, role=enums.Role.VENDOR
+    )
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.get("/orders/forecast", params={"days": 3})
+            too_long = await client.get("/orders/forecast", params={"days": 30})
+    finally:
+        app.dependency_overrides.pop(get_vendor, None)
+
+    assert response.status_code == 200
+    assert [d["day"] for d in response.json()] == [
+        (TODAY + timedelta(days=i)).isoformat() for i in range(3)
+    ]
+    assert too_long.status_code == 422
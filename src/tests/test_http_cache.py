@@ -0,0 +1,126 @@
+from datetime import date, timedelta
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from utils import http_cache
+from utils.http_cache import IMMUTABLE, CacheVersions, ETagIndex, etag_matches
+from main import app
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(http_cache, "INDEX", ETagIndex())
+    monkeypatch.setattr(http_cache, "VERSIONS", CacheVersions())
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+@pytest.fixture
+def vendor_id(fake_store):
+    vendor_id = str(uuid4())
+    fake_store.insert(
+        "rating", [{"user_id": str(uuid4()), "vendor_id": vendor_id, "rating_val": 4}]
+    )
+    return vendor_id
+
+
+def test_etag_matching():
+    assert etag_matches(b'"a", W/"b"', '"b"')
+    assert etag_matches(b"*", '"a"')
+    assert not etag_matches(b'"a"', '"b"')
+    assert not etag_matches(None, '"a"')
+
+
+async def test_public_route_gets_etag_and_cache_control(fake_db, vendor_id, client):
+    response = await client.get(f"/ratings/{vendor_id}/stats")
+
+    assert response.headers["cache-control"] == (
+        "public, max-age=60, stale-while-revalidate=300"
+    )
+    assert response.headers["etag"].startswith('"')
+
+    again = await client.get(f"/ratings/{vendor_id}/stats")
+    assert again.headers["etag"] == response.headers["etag"]
+
+
+async def test_current_etag_is_answered_without_running_the_route(
+    fake_db, vendor_id, client
+):
+    etag = (await client.get(f"/ratings/{vendor_id}/stats")).headers["etag"]
+    calls = fake_db.calls
+
+    response = await client.get(
+        f"/ratings/{vendor_id}/stats", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert fake_db.calls == calls
+
+
+async def test_unchanged_body_is_304_after_the_index_is_lost(
+    fake_db, vendor_id, client, monkeypatch
+):
+    etag = (await client.get(f"/ratings/{vendor_id}/stats")).headers["etag"]
+    monkeypatch.setattr(http_cache, "INDEX", ETagIndex())
+
+    response = await client.get(
+        f"/ratings/{vendor_id}/stats", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+    assert fake_db.calls == 2
+
+
+async def test_writes_invalidate_remembered_etags(
+    fake_db, fake_store, vendor_id, client
+):
+    etag = (await client.get(f"/ratings/{vendor_id}/stats")).headers["etag"]
+    fake_store.insert(
+        "rating", [{"user_id": str(uuid4()), "vendor_id": vendor_id, "rating_val": 2}]
+    )
+    # Any request under /ratings that is not a GET bumps the "ratings" tag.
+    await client.post("/ratings/", json={})
+
+    response = await client.get(
+        f"/ratings/{vendor_id}/stats", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["total_ratings"] == 2
+    assert response.headers["etag"] != etag
+
+
+async def test_past_specials_are_immutable(fake_db, client):
+    past = (date.today() - timedelta(days=1)).isoformat()
+    today = date.today().isoformat()
+
+    old = await client.get(f"/specials/by-date/{past}")
+    current = await client.get(f"/specials/by-date/{today}")
+
+    assert old.headers["cache-control"] == IMMUTABLE
+    assert "max-age=60" in current.headers["cache-control"]
+
+    revalidated = await client.get(
+        f"/specials/by-date/{past}", headers={"If-None-Match": old.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["cache-control"] == IMMUTABLE
+
+
+async def test_errors_and_other_routes_are_not_cached(fake_db, client):
+    missing = await client.get(f"/menu/{uuid4()}")
+    root = await client.get("/")
+
+    assert missing.status_code == 404
+    assert "etag" not in missing.headers
+    assert "cache-control" not in root.headers
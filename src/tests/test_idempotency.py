@@ -0,0 +1,107 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.repositories import inventory, prices
+from app.repositories.inventory import Inventory
+from utils import idempotency
+from utils.idempotency import MemoryResponseStore, SQLiteResponseStore
+from utils.token import create_access_token
+from main import app
+
+BODY = {"quantity": 2, "unit_price": 90.0, "pickup": "Library"}
+
+
+@pytest.fixture
+def menu_item(monkeypatch, fake_db, fake_store):
+    monkeypatch.setattr(idempotency, "_store", MemoryResponseStore())
+    monkeypatch.setattr(prices, "PRICES", prices.PriceBook())
+    monkeypatch.setattr(inventory, "INVENTORY", Inventory())
+    vendor_id, menu_id = str(uuid4()), str(uuid4())
+    fake_store.insert(
+        "menu_items", [{"id": menu_id, "vendor_id": vendor_id, "price": 90.0}]
+    )
+    return f"/orders/{vendor_id}/{menu_id}"
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+def headers(user_id, key):
+    token = create_access_token({"user_id": user_id})
+    return {"Authorization": f"Bearer {token}", "Idempotency-Key": key}
+
+
+async def test_retry_replays_the_first_response(menu_item, client, fake_store):
+    student = headers(str(uuid4()), "k1")
+
+    first = await client.post(menu_item, json=BODY, headers=student)
+    retry = await client.post(menu_item, json=BODY, headers=student)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert len(fake_store.tables["orders"]) == 1
+
+
+async def test_concurrent_duplicates_run_once(menu_item, client, fake_store):
+    student = headers(str(uuid4()), "k1")
+
+    responses = await asyncio.gather(
+        *(client.post(menu_item, json=BODY, headers=student) for _ in range(5))
+    )
+
+    assert {r.status_code for r in responses} == {201}
+    assert len({r.json()["order_id"] for r in responses}) == 1
+    assert len(fake_store.tables["orders"]) == 1
+
+
+async def test_keys_are_scoped_to_the_caller(menu_item, client, fake_store):
+    for user_id in (str(uuid4()), str(uuid4())):
+        response = await client.post(
+            menu_item, json=BODY, headers=headers(user_id, "k1")
+        )
+        assert response.status_code == 201
+
+    assert len(fake_store.tables["orders"]) == 2
+
+
+async def test_key_reused_for_another_request_is_refused(menu_item, client):
+    student = headers(str(uuid4()), "k1")
+    await client.post(menu_item, json=BODY, headers=student)
+
+    response = await client.post(
+        menu_item, json={**BODY, "quantity": 3}, headers=student
+    )
+
+    assert response.status_code == 422
+
+
+async def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "idempotency.db")
+    first, second = SQLiteResponseStore(path), SQLiteResponseStore(path)
+
+    assert await first.claim("user:1|k1", "abc") is None
+    running = await second.claim("user:1|k1", "abc")
+    assert (running.fingerprint, running.status) == ("abc", None)
+
+    await first.complete(
+        "user:1|k1", 201, [(b"content-type", b"application/json")], b"{}"
+    )
+    stored = await second.claim("user:1|k1", "abc")
+    assert (stored.status, stored.headers, stored.body) == (
+        201,
+        [(b"content-type", b"application/json")],
+        b"{}",
+    )
+
+    await second.release("user:1|k2")
+    assert await second.claim("user:1|k2", "abc") is None
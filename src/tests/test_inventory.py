@@ -0,0 +1,190 @@
+import asyncio
+import random
+from datetime import date
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app import schemas
+from app.repositories import inventory, order
+from app.repositories.inventory import Inventory
+from app.settings import settings
+from db.fake import FakeAsyncClient, TableStore
+from utils.order_queue import OrderQueue, OrderWriteError
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def special(monkeypatch):
+    monkeypatch.setattr(inventory, "INVENTORY", Inventory())
+    vendor_id, item_id, plain_id = str(uuid4()), str(uuid4()), str(uuid4())
+    store = TableStore(
+        {
+            "menu_items": [
+                {"id": item_id, "vendor_id": vendor_id, "price": 180.0},
+                {"id": plain_id, "vendor_id": vendor_id, "price": 60.0},
+            ],
+            "date_specials": [
+                {
+                    "menu_item_id": item_id,
+                    "available_date": TODAY.isoformat(),
+                    "available_stock": 50,
+                }
+            ],
+        }
+    )
+    store.ids = {"vendor": vendor_id, "item": item_id, "plain": plain_id}
+    return store
+
+
+def stock(store) -> int:
+    return store.tables["date_specials"][0]["available_stock"]
+
+
+async def place(client, store, quantity, item="item"):
+    try:
+        await order.create_order(
+            client,
+            schemas.OrderRequest(quantity=quantity, unit_price=100.0, pickup="Gate"),
+            user_id=uuid4(),
+            vendor_id=store.ids["vendor"],
+            menu_id=store.ids[item],
+        )
+        return quantity
+    except HTTPException as e:
+        assert e.status_code == 409
+        return 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_orders_never_oversell(special):
+    client = FakeAsyncClient(special, latency=0.001)
+    rng = random.Random(7)
+    quantities = [rng.randint(1, 3) for _ in range(300)]
+
+    sold = await asyncio.gather(*(place(client, special, q) for q in quantities))
+
+    assert sum(sold) + stock(special) == 50
+    assert 48 <= sum(sold) <= 50
+    assert len(special.tables["orders"]) == sum(1 for q in sold if q)
+    # One claim RPC per batch window instead of one per order.
+    assert client.calls < 100
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_the_database_never_oversell(special):
+    client = FakeAsyncClient(special, latency=0.001)
+
+    async def claim(worker):
+        try:
+            await worker.reserve(client, special.ids["item"], 1, TODAY)
+            return 1
+        except HTTPException:
+            return 0
+
+    # Three workers, each with its own in-memory layer, share the lunch rush.
+    workers = [Inventory() for _ in range(3)]
+    sold = await asyncio.gather(*(claim(w) for w in workers for _ in range(40)))
+
+    assert sum(sold) == 50
+    assert stock(special) == 0
+
+
+@pytest.mark.asyncio
+async def test_sold_out_items_are_refused_without_a_round_trip(special):
+    client = FakeAsyncClient(special)
+    special.tables["date_specials"][0]["available_stock"] = 1
+    await inventory.INVENTORY.reserve(client, special.ids["item"], 1, TODAY)
+    with pytest.raises(HTTPException):
+        await inventory.INVENTORY.reserve(client, special.ids["item"], 1, TODAY)
+    calls = client.calls
+
+    with pytest.raises(HTTPException) as e:
+        await inventory.INVENTORY.reserve(client, special.ids["item"], 1, TODAY)
+
+    assert e.value.status_code == 409
+    assert client.calls == calls
+
+
+@pytest.mark.asyncio
+async def test_items_without_stock_limit_are_always_granted(special):
+    client = FakeAsyncClient(special)
+
+    sold = await asyncio.gather(
+        *(place(client, special, 5, item="plain") for _ in range(20))
+    )
+
+    assert sum(sold) == 100
+    assert stock(special) == 50
+
+
+@pytest.mark.asyncio
+async def test_released_and_expired_holds_return_stock(special, monkeypatch):
+    client = FakeAsyncClient(special)
+    held = await inventory.INVENTORY.reserve(client, special.ids["item"], 10, TODAY)
+    await inventory.INVENTORY.release(client, held)
+    await asyncio.sleep(settings.INVENTORY_BATCH_WINDOW_SECONDS * 2)
+    assert stock(special) == 50
+
+    monkeypatch.setattr(settings, "INVENTORY_HOLD_SECONDS", 0)
+    await inventory.INVENTORY.reserve(client, special.ids["item"], 20, TODAY)
+    assert stock(special) == 30
+    assert await inventory.INVENTORY.expire(client) == 1
+    await asyncio.sleep(settings.INVENTORY_BATCH_WINDOW_SECONDS * 2)
+    assert stock(special) == 50
+
+
+@pytest.mark.asyncio
+async def test_failed_order_gives_its_stock_back(special):
+    client = FakeAsyncClient(special)
+
+    class FailingOrders(FakeAsyncClient):
+        def table(self, name):
+            if name == "orders":
+                raise RuntimeError("connection reset")
+            return super().table(name)
+
+    with pytest.raises(HTTPException) as e:
+        await order.create_order(
+            FailingOrders(special),
+            schemas.OrderRequest(quantity=5, unit_price=100.0, pickup="Gate"),
+            user_id=uuid4(),
+            vendor_id=special.ids["vendor"],
+            menu_id=special.ids["item"],
+        )
+    await asyncio.sleep(settings.INVENTORY_BATCH_WINDOW_SECONDS * 2)
+
+    assert e.value.status_code == 500
+    assert stock(special) == 50
+    assert await place(client, special, 50) == 50
+
+
+@pytest.mark.asyncio
+async def test_queued_order_that_fails_gives_its_stock_back(special, tmp_path):
+    client = FakeAsyncClient(special)
+
+    async def writer(rows):
+        raise OrderWriteError("violates foreign key", permanent=True)
+
+    queue = OrderQueue(
+        path=str(tmp_path / "intake.db"),
+        writer=writer,
+        release=lambda claims: inventory.INVENTORY.give_back(client, claims),
+    )
+    response = await order.queue_order(
+        client,
+        queue,
+        schemas.OrderRequest(quantity=5, unit_price=100.0, pickup="Gate"),
+        user_id=uuid4(),
+        vendor_id=special.ids["vendor"],
+        menu_id=special.ids["item"],
+    )
+    assert stock(special) == 45
+
+    await queue.run_once()
+    await asyncio.sleep(settings.INVENTORY_BATCH_WINDOW_SECONDS * 2)
+
+    assert queue.status(str(response.order_id))["status"] == "failed"
+    assert stock(special) == 50
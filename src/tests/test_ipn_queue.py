@@ -0,0 +1,195 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import enums
+from app.repositories.payment import (
+    get_sslcommerz,
+    process_ipn_batch,
+    update_payment_status,
+)
+from app.settings import settings
+from main import app
+from utils.ipn_queue import IPNQueue, get_ipn_queue
+
+
+def make_queue(tmp_path, handler, **kwargs) -> IPNQueue:
+    options = {"retry_base_seconds": 0, "poll_interval": 0.05}
+    options.update(kwargs)
+    return IPNQueue(path=str(tmp_path / "ipn.db"), handler=handler, **options)
+
+
+class Gateway:
+    """Answers validation calls slowly, tracking how many run at once."""
+
+    def __init__(self, valid):
+        self.valid = valid
+        self.calls = 0
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def hash_validate_ipn(self, payload):
+        return payload.get("verify_sign") == "ok"
+
+    def validationTransactionOrder(self, val_id):
+        with self._lock:
+            self.calls += 1
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.02)
+        with self._lock:
+            self.running -= 1
+        if val_id not in self.valid:
+            return {"status": "INVALID_TRANSACTION"}
+        return {"status": "VALID", "tran_id": self.valid[val_id]}
+
+
+@pytest.fixture
+def payments(fake_store):
+    fake_store.insert(
+        "payments",
+        [
+            {"transaction_id": f"t{i}", "status": enums.PaymentStatus.PENDING.value}
+            for i in range(6)
+        ],
+    )
+    return fake_store
+
+
+def status_of(store, tran_id):
+    return next(
+        p["status"] for p in store.tables["payments"] if p["transaction_id"] == tran_id
+    )
+
+
+@pytest.mark.asyncio
+async def test_gateway_retries_are_dropped_on_arrival(tmp_path):
+    batches = []
+
+    async def handler(batch):
+        batches.append(batch)
+        return ["success"] * len(batch)
+
+    queue = make_queue(tmp_path, handler)
+    ipn = {"tran_id": "t1", "val_id": "v1", "status": "VALID"}
+    added = [await queue.submit(ipn) for _ in range(3)]
+    await queue.run_once()
+
+    assert added == [True, False, False]
+    assert [len(b) for b in batches] == [1]
+    assert await queue.submit(ipn) is False
+    assert queue.outcome("t1", "v1") == "success"
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_retried(tmp_path):
+    calls = []
+
+    async def handler(batch):
+        calls.append(len(batch))
+        if len(calls) < 3:
+            raise RuntimeError("gateway timeout")
+        return ["success"]
+
+    queue = make_queue(tmp_path, handler)
+    await queue.submit({"tran_id": "t1", "val_id": "v1"})
+    for _ in range(3):
+        await queue.run_once()
+
+    assert calls == [1, 1, 1]
+    assert queue.pending_count() == 0
+    assert queue.outcome("t1", "v1") == "success"
+
+
+@pytest.mark.asyncio
+async def test_batch_is_validated_with_bounded_concurrency(
+    monkeypatch, fake_db, payments
+):
+    monkeypatch.setattr(settings, "IPN_VALIDATION_CONCURRENCY", 2)
+    gateway = Gateway(valid={f"v{i}": f"t{i}" for i in range(5)})
+    notifications = [{"tran_id": f"t{i}", "val_id": f"v{i}"} for i in range(6)]
+    # A notification for another transaction's val_id is not trusted.
+    notifications[5]["val_id"] = "v0"
+
+    results = await process_ipn_batch(fake_db, gateway, notifications)
+
+    assert results == ["success"] * 5 + ["failed"]
+    assert gateway.calls == 6
+    assert gateway.peak == 2
+    # One update per resulting status.
+    assert fake_db.calls == 2
+    assert status_of(payments, "t0") == "success"
+    assert status_of(payments, "t5") == "failed"
+
+
+@pytest.mark.asyncio
+async def test_payment_is_settled_once(fake_db, payments):
+    assert await update_payment_status(fake_db, "t1", enums.PaymentStatus.SUCCESS)
+    assert (
+        await update_payment_status(fake_db, "t1", enums.PaymentStatus.FAILED) is None
+    )
+    assert status_of(payments, "t1") == "success"
+
+    # A validated success still wins over an earlier cancel.
+    await update_payment_status(fake_db, "t2", enums.PaymentStatus.CANCELLED)
+    await update_payment_status(fake_db, "t2", enums.PaymentStatus.SUCCESS)
+    assert status_of(payments, "t2") == "success"
+
+
+@pytest.mark.asyncio
+async def test_ipn_is_acknowledged_before_validation(tmp_path, fake_db, payments):
+    gateway = Gateway(valid={"v1": "t1"})
+    queue = make_queue(
+        tmp_path, lambda batch: process_ipn_batch(fake_db, gateway, batch)
+    )
+    app.dependency_overrides[get_sslcommerz] = lambda: gateway
+    app.dependency_overrides[get_ipn_queue] = lambda: queue
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            ipn = {"tran_id": "t1", "val_id": "v1", "verify_sign": "ok"}
+            accepted = await client.post("/payment/ipn", json=ipn)
+            forged = await client.post(
+                "/payment/ipn", json={**ipn, "tran_id": "t2", "verify_sign": "x"}
+            )
+    finally:
+        app.dependency_overrides.pop(get_sslcommerz, None)
+        app.dependency_overrides.pop(get_ipn_queue, None)
+
+    assert accepted.json() == {"message": "IPN received"}
+    assert forged.json() == {"message": "IPN validation failed"}
+    assert gateway.calls == 0
+    assert queue.pending_count() == 1
+
+    await queue.run_once()
+    assert status_of(payments, "t1") == "success"
+    assert status_of(payments, "t2") == "pending"
+
+
+@pytest.mark.asyncio
+async def test_failed_settle_does_not_wedge_the_queue(tmp_path):
+    async def handler(batch):
+        return ["success"] * len(batch)
+
+    queue = make_queue(tmp_path, handler)
+    queue._conn.execute(
+        "CREATE TRIGGER no_settling BEFORE UPDATE OF status ON payment_ipn "
+        "BEGIN SELECT RAISE(ABORT, 'disk full'); END"
+    )
+    await queue.submit({"tran_id": "t1", "val_id": "v1"})
+    with pytest.raises(sqlite3.IntegrityError):
+        await queue.run_once()
+    queue._conn.execute("DROP TRIGGER no_settling")
+
+    assert not queue._conn.in_transaction
+    assert await queue.submit({"tran_id": "t2", "val_id": "v2"})
+    # The failed batch is claimed again once its lease runs out.
+    queue._conn.execute("UPDATE payment_ipn SET next_attempt_at = 0")
+    assert await queue.run_once() == 2
+    assert queue.outcome("t1", "v1") == "success"
+    assert queue.outcome("t2", "v2") == "success"
@@ -0,0 +1,69 @@
+import json
+import logging
+
+from utils import logger as app_logging
+from utils.logger import JSONFormatter, RotatingFileHandler
+
+
+def make_record(msg, *args, **extra) -> logging.LogRecord:
+    record = logging.LogRecord(
+        "app_logger.tests", logging.INFO, __file__, 1, msg, args, None
+    )
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_merges_args_and_extra_fields():
+    line = JSONFormatter().format(
+        make_record("Order %s delivered", "abc", vendor_id="v1")
+    )
+
+    payload = json.loads(line)
+    assert payload["message"] == "Order abc delivered"
+    assert payload["level"] == "INFO"
+    assert payload["logger"] == "app_logger.tests"
+    assert payload["vendor_id"] == "v1"
+
+
+def test_file_handler_rotates_on_size(tmp_path):
+    path = tmp_path / "app.log"
+    handler = RotatingFileHandler(
+        str(path), max_bytes=200, backup_count=2, interval_seconds=0
+    )
+    handler.setFormatter(JSONFormatter())
+
+    for i in range(20):
+        handler.emit(make_record("message number %s", i))
+    handler.close()
+
+    assert (tmp_path / "app.log.1").exists()
+    assert path.stat().st_size <= 200
+
+
+def test_file_handler_rotates_on_interval(tmp_path):
+    path = tmp_path / "app.log"
+    handler = RotatingFileHandler(
+        str(path), max_bytes=0, backup_count=2, interval_seconds=3600
+    )
+    handler.setFormatter(JSONFormatter())
+
+    handler.emit(make_record("before"))
+    handler.rollover_at = 0
+    handler.emit(make_record("after"))
+    handler.close()
+
+    assert "before" in (tmp_path / "app.log.1").read_text()
+    assert "after" in path.read_text()
+
+
+def test_logging_restarts_after_shutdown():
+    app_logging.shutdown_logging()
+    app_logging.shutdown_logging()
+    assert app_logging._listener is None
+
+    app_logging.setup_logging()
+    listener = app_logging._listener
+    app_logging.setup_logging()
+
+    assert listener is not None
+    assert app_logging._listener is listener
@@ -0,0 +1,76 @@
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+from httpx import ASGITransport, AsyncClient
+
+from db.instrumented import InstrumentedClient
+from db.supabase import get_db
+from main import app
+from utils.metrics import DB_CALL_LATENCY, REQUEST_LATENCY, Histogram
+from utils.token import API_KEY
+
+
+@pytest.fixture
+def raw_client():
+    builder = MagicMock()
+    for method in ("select", "eq", "order"):
+        getattr(builder, method).return_value = builder
+    response = MagicMock()
+    response.data = []
+    builder.execute = AsyncMock(return_value=response)
+
+    client = MagicMock()
+    client.table.return_value = builder
+    return client
+
+
+@pytest.fixture(autouse=True)
+def override_dependencies(raw_client):
+    app.dependency_overrides[get_db] = lambda: InstrumentedClient(raw_client)
+    yield
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_request_reports_db_calls_in_server_timing():
+    route = "/orders/vendor/{vendor_id}"
+    before = REQUEST_LATENCY.count(method="GET", route=route, status=200)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get(f"/orders/vendor/{uuid4()}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert 'db;dur=' in response.headers["server-timing"]
+    assert 'desc="1 calls"' in response.headers["server-timing"]
+    assert REQUEST_LATENCY.count(method="GET", route=route, status=200) == before + 1
+    assert DB_CALL_LATENCY.count(kind="table", target="orders", operation="select")
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_requires_admin_key():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        denied = await client.get("/metrics")
+        allowed = await client.get(
+            "/metrics", headers={"Authorization": f"Bearer {API_KEY}"}
+        )
+
+    assert denied.status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+    assert allowed.status_code == status.HTTP_200_OK
+    assert "# TYPE http_request_duration_seconds histogram" in allowed.text
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency", "test", buckets=(0.1, 1.0), labelnames=("route",))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5.0, route="/a")
+
+    lines = histogram.samples()
+    assert 'latency_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_count{route="/a"} 3' in lines
@@ -0,0 +1,102 @@
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+from httpx import ASGITransport, AsyncClient
+
+from app import enums, schemas
+from db.supabase import get_db
+from main import app
+from utils.auth import get_vendor
+from utils.email import FakeEmailProvider
+from utils.email_queue import EmailQueue, get_email_queue
+
+VENDOR_ID = uuid4()
+USER_ID = str(uuid4())
+DELIVERED = [str(uuid4()), str(uuid4())]
+MISSING = str(uuid4())
+
+
+def make_builder(data):
+    builder = MagicMock()
+    for method in ("select", "update", "in_", "eq"):
+        getattr(builder, method).return_value = builder
+    response = MagicMock()
+    response.data = data
+    builder.execute = AsyncMock(return_value=response)
+    return builder
+
+
+@pytest.fixture
+def builders():
+    return {
+        "orders": make_builder(
+            [
+                {
+                    "order_id": oid,
+                    "user_id": USER_ID,
+                    "vendor_id": str(VENDOR_ID),
+                    "pickup": "Main Campus Cafeteria",
+                    "total_price": 100.0,
+                }
+                for oid in DELIVERED
+            ]
+        ),
+        "users": make_builder(
+            [{"id": USER_ID, "email": "student@example.com", "name": "Student"}]
+        ),
+    }
+
+
+@pytest.fixture
+def email_queue(tmp_path):
+    return EmailQueue(path=str(tmp_path / "outbox.db"), provider=FakeEmailProvider())
+
+
+@pytest.fixture(autouse=True)
+def override_dependencies(builders, email_queue):
+    db = MagicMock()
+    db.table.side_effect = lambda name: builders[name]
+
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_email_queue] = lambda: email_queue
+    app.dependency_overrides[get_vendor] = lambda: schemas.UserBase(
+        id=VENDOR_ID, role=enums.Role.VENDOR
+    )
+    yield
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_bulk_status_uses_one_query_per_table(builders, email_queue):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.patch(
+            "/orders/status",
+            json={"order_ids": DELIVERED + [MISSING], "is_delivered": True},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    results = {r["order_id"]: r for r in response.json()["results"]}
+    assert all(results[oid]["updated"] and results[oid]["notified"] for oid in DELIVERED)
+    assert results[MISSING]["updated"] is False
+
+    builders["orders"].execute.assert_awaited_once()
+    builders["orders"].in_.assert_called_once_with("order_id", DELIVERED + [MISSING])
+    builders["orders"].eq.assert_called_once_with("vendor_id", str(VENDOR_ID))
+    builders["users"].execute.assert_awaited_once()
+    assert email_queue.pending_count() == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_status_pending_sends_no_email(builders, email_queue):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.patch(
+            "/orders/status", json={"order_ids": DELIVERED, "is_delivered": False}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    builders["users"].execute.assert_not_awaited()
+    assert email_queue.pending_count() == 0
@@ -0,0 +1,197 @@
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.repositories import order
+from main import app
+from utils.auth import get_current_user
+from utils.order_queue import OrderQueue, OrderWriteError, get_order_queue
+
+
+def make_queue(tmp_path, writer, **kwargs) -> OrderQueue:
+    options = {"retry_base_seconds": 0, "poll_interval": 0.05}
+    options.update(kwargs)
+    return OrderQueue(path=str(tmp_path / "intake.db"), writer=writer, **options)
+
+
+async def submit(queue, n, user_id="u1"):
+    ids = [str(uuid4()) for _ in range(n)]
+    for order_id in ids:
+        await queue.submit(order_id, user_id, {"order_id": order_id})
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_orders_are_written_in_batches(tmp_path):
+    batches = []
+
+    async def writer(rows):
+        batches.append([r["order_id"] for r in rows])
+
+    queue = make_queue(tmp_path, writer, batch_size=100)
+    ids = await submit(queue, 250)
+    while await queue.run_once():
+        pass
+
+    assert [len(b) for b in batches] == [100, 100, 50]
+    assert sum(batches, []) == ids
+    assert queue.pending_count() == 0
+    assert queue.status(ids[0])["status"] == "confirmed"
+
+
+@pytest.mark.asyncio
+async def test_bad_order_does_not_hold_back_the_batch(tmp_path):
+    ids = []
+
+    async def writer(rows):
+        if any(r["order_id"] == ids[1] for r in rows):
+            raise OrderWriteError("violates foreign key", permanent=True)
+
+    queue = make_queue(tmp_path, writer)
+    ids.extend(await submit(queue, 3))
+    await queue.run_once()
+
+    assert [queue.status(i)["status"] for i in ids] == [
+        "confirmed",
+        "failed",
+        "confirmed",
+    ]
+    assert queue.status(ids[1])["last_error"] == "violates foreign key"
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried(tmp_path):
+    calls = []
+
+    async def writer(rows):
+        calls.append(len(rows))
+        if len(calls) < 3:
+            raise OrderWriteError("timeout")
+
+    queue = make_queue(tmp_path, writer, max_attempts=5)
+    (order_id,) = await submit(queue, 1)
+    for _ in range(3):
+        await queue.run_once()
+
+    assert calls == [1, 1, 1]
+    assert queue.status(order_id)["status"] == "confirmed"
+
+
+@pytest.mark.asyncio
+async def test_wait_returns_when_the_batch_is_written(tmp_path):
+    async def writer(rows):
+        pass
+
+    queue = make_queue(tmp_path, writer, linger_seconds=0)
+    (order_id,) = await submit(queue, 1)
+    await queue.start()
+    try:
+        record = await asyncio.wait_for(queue.wait(order_id, 5), 2)
+    finally:
+        await queue.stop()
+
+    assert record["status"] == "confirmed"
+
+
+@pytest.mark.asyncio
+async def test_write_order_batch_is_idempotent(fake_db, fake_store):
+    rows = [
+        {"order_id": str(uuid4()), "vendor_id": str(uuid4()), "quantity": 1},
+        {"order_id": str(uuid4()), "vendor_id": str(uuid4()), "quantity": 2},
+    ]
+
+    await order.write_order_batch(fake_db, rows)
+    await order.write_order_batch(fake_db, rows)
+
+    assert len(fake_store.tables["orders"]) == 2
+    assert fake_db.calls == 2
+
+
+@pytest.fixture
+def intake(tmp_path, fake_db, fake_store):
+    vendor_id, menu_id, user_id = uuid4(), uuid4(), uuid4()
+    fake_store.insert(
+        "menu_items",
+        [{"id": str(menu_id), "vendor_id": str(vendor_id), "price": 90.0}],
+    )
+    queue = make_queue(tmp_path, lambda rows: order.write_order_batch(fake_db, rows))
+    app.dependency_overrides[get_order_queue] = lambda: queue
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=user_id)
+    yield SimpleNamespace(
+        queue=queue, vendor_id=vendor_id, menu_id=menu_id, user_id=user_id
+    )
+    app.dependency_overrides.pop(get_order_queue, None)
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.mark.asyncio
+async def test_queued_intake_accepts_then_confirms(intake, fake_store):
+    body = {"quantity": 2, "unit_price": 90.0, "pickup": "Library"}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            f"/orders/{intake.vendor_id}/{intake.menu_id}", json=body
+        )
+        order_id = response.json()["order_id"]
+        queued = await client.get(f"/orders/intake/{order_id}")
+
+        assert fake_store.tables.get("orders", []) == []
+        await intake.queue.run_once()
+        confirmed = await client.get(f"/orders/intake/{order_id}")
+
+        missing = await client.post(f"/orders/{intake.vendor_id}/{uuid4()}", json=body)
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    assert queued.json()["status"] == "queued"
+    assert confirmed.json()["status"] == "confirmed"
+    assert fake_store.tables["orders"][0]["order_id"] == order_id
+    assert fake_store.tables["orders"][0]["total_price"] == 180.0
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_intake_status_falls_back_to_the_orders_table(intake, fake_store):
+    order_id = str(uuid4())
+    fake_store.insert(
+        "orders", [{"order_id": order_id, "user_id": str(intake.user_id)}]
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        found = await client.get(f"/orders/intake/{order_id}")
+        unknown = await client.get(f"/orders/intake/{uuid4()}")
+
+    assert found.json()["status"] == "confirmed"
+    assert unknown.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_failed_settle_does_not_wedge_the_queue(tmp_path):
+    async def writer(rows):
+        pass
+
+    queue = make_queue(tmp_path, writer)
+    queue._conn.execute(
+        "CREATE TRIGGER no_settling BEFORE UPDATE OF status ON order_intake "
+        "BEGIN SELECT RAISE(ABORT, 'disk full'); END"
+    )
+    [first] = await submit(queue, 1)
+    with pytest.raises(sqlite3.IntegrityError):
+        await queue.run_once()
+    queue._conn.execute("DROP TRIGGER no_settling")
+
+    assert not queue._conn.in_transaction
+    [second] = await submit(queue, 1)
+    # The failed batch is claimed again once its lease runs out.
+    queue._conn.execute("UPDATE order_intake SET next_attempt_at = 0")
+    assert await queue.run_once() == 2
+    assert queue.status(first)["status"] == "confirmed"
+    assert queue.status(second)["status"] == "confirmed"
@@ -50,9 +50,11 @@ def mock_db_client():
 def override_dependencies(mock_sslcommerz, mock_db_client):
     from app.repositories.payment import get_sslcommerz
     from db.supabase import get_db
+    from utils.ipn_queue import get_ipn_queue
 
     app.dependency_overrides[get_sslcommerz] = lambda: mock_sslcommerz
     app.dependency_overrides[get_db] = lambda: mock_db_client
+    app.dependency_overrides[get_ipn_queue] = lambda: MagicMock()
     yield
     app.dependency_overrides = {}
 
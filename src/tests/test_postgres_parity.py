@@ -0,0 +1,241 @@
+"""
+The direct asyncpg path must return exactly what the PostgREST path does.
+
+The parity tests seed the same rows into the in-memory store and a local
+Postgres, then call each repository function once through the fake client
+and once through a DirectClient. They run when asyncpg is installed and
+TEST_DATABASE_URL points at a scratch database (tables are dropped first):
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost/lunchbox_test pytest
+"""
+
+import os
+from datetime import date, datetime, time, timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app import schemas
+from app.repositories import auth, menu, order, ratings, reviews
+from benchmarks.query_plans import insert_rows, prepare_schema
+from db import postgres
+from db.fake import FakeAsyncClient, TableStore
+from db.postgres import DirectClient, direct_pool
+from db.replica import ReplicaClient
+from utils.auth import get_student_by_id, get_vendor_by_id
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+SCHEMA = "postgres_parity"
+
+TABLES = [
+    "vendors",
+    "users",
+    "menu_items",
+    "date_specials",
+    "weekly_availability",
+    "orders",
+    "review",
+    "rating",
+]
+
+
+def test_fake_and_supabase_clients_have_no_direct_pool():
+    assert direct_pool(FakeAsyncClient(TableStore())) is None
+
+
+def test_direct_client_delegates_to_supabase_client():
+    client = FakeAsyncClient(TableStore())
+    direct = DirectClient(client, pool="pool")
+
+    assert direct_pool(direct) == "pool"
+    assert direct_pool(ReplicaClient(FakeAsyncClient(TableStore()), direct)) == "pool"
+    assert direct.store is client.store
+
+
+async def test_postgrest_is_the_default_backend():
+    assert await postgres.create_pg_pool() is None
+
+
+def seed_rows():
+    today = date.today()
+    vendors = [
+        {
+            "id": str(uuid4()),
+            "name": f"Kitchen {c}",
+            "email": f"{c}@k.bd",
+            "password_hash": "x",
+        }
+        for c in "AB"
+    ]
+    users = [
+        {
+            "id": str(uuid4()),
+            "name": n,
+            "email": f"{n[0]}@uni.edu",
+            "password_hash": "x",
+        }
+        for n in ("Nusrat", "Rafi")
+    ]
+    items = [
+        {
+            "id": str(uuid4()),
+            "vendor_id": vendors[i % 2]["id"],
+            "name": f"Item {i}",
+            "price": 100.0 + i,
+            "category": "Rice",
+            "preparation_time": 10,
+            "img_bucket": "menus" if i == 0 else None,
+            "img_path": "0.jpg" if i == 0 else None,
+        }
+        for i in range(4)
+    ]
+    return {
+        "vendors": vendors,
+        "users": users,
+        "menu_items": items,
+        "date_specials": [
+            {
+                "id": str(uuid4()),
+                "menu_item_id": items[0]["id"],
+                "available_date": today.isoformat(),
+                "special_price": 80.0,
+                "available_stock": 5,
+            }
+        ],
+        "weekly_availability": [
+            {
+                "id": str(uuid4()),
+                "menu_item_id": item["id"],
+                "day_of_week": (today.weekday() + 1) % 7,
+                "is_available": True,
+            }
+            for item in items[:3]
+        ],
+        "orders": [
+            {
+                "order_id": str(uuid4()),
+                "user_id": users[0]["id"],
+                "vendor_id": vendors[0]["id"],
+                "menu": items[0]["id"],
+                "order_date": (
+                    datetime.combine(today, time(9)) + timedelta(minutes=i)
+                ).isoformat(),
+                "quantity": 1 + i,
+                "unit_price": 100.0,
+                "total_price": 100.0 * (1 + i),
+                "pickup": "Library",
+                "is_delivered": i % 2 == 0,
+            }
+            for i in range(5)
+        ],
+        "review": [
+            {
+                "review_id": i + 1,
+                "user_id": users[i % 2]["id"],
+                "vendor_id": vendors[0]["id"],
+                "food_quality": "Good",
+                "delivery_experience": "Fast",
+                "comment": None,
+                "is_replied": False,
+            }
+            for i in range(3)
+        ],
+        "rating": [
+            {"user_id": u["id"], "vendor_id": vendors[0]["id"], "rating_val": v}
+            for u, v in zip(users, (4.5, 3.0))
+        ],
+    }
+
+
+@pytest.fixture
+async def backends():
+    asyncpg = pytest.importorskip("asyncpg")
+    if not DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    rows = seed_rows()
+    store = TableStore(rows)
+    store.put_object("menus", "0.jpg")
+    conn = await asyncpg.connect(DATABASE_URL)
+    await prepare_schema(conn, SCHEMA)
+    for table in TABLES:
+        await insert_rows(conn, table, rows[table])
+    pool = await asyncpg.create_pool(
+        DATABASE_URL,
+        min_size=1,
+        max_size=4,
+        server_settings={"search_path": f"{SCHEMA}, public"},
+    )
+    rest = FakeAsyncClient(store)
+    yield rows, rest, DirectClient(rest, pool)
+    await pool.close()
+    await conn.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    await conn.close()
+
+
+def dump(models):
+    return [m.model_dump() for m in models]
+
+
+async def test_menus_match(backends):
+    _, rest, direct = backends
+
+    def unsigned(menus):
+        # Signed image URLs carry a fresh token per call.
+        for m in menus:
+            m["img_url"] = m["img_url"] and m["img_url"].split("?")[0]
+        return sorted(menus, key=lambda m: m["id"])
+
+    expected = unsigned(dump(await menu.get_all_menus(rest)))
+    actual = unsigned(dump(await menu.get_all_menus(direct)))
+
+    assert actual == expected
+    assert len(actual) == 3
+
+
+async def test_vendor_orders_match(backends):
+    rows, rest, direct = backends
+    vendor_id = rows["vendors"][0]["id"]
+
+    for delivered in (None, True, False):
+        expected = await order.get_vendor_orders(rest, vendor_id, delivered)
+        actual = await order.get_vendor_orders(direct, vendor_id, delivered)
+        assert dump(actual) == dump(expected)
+
+
+async def test_vendor_stats_and_reviews_match(backends):
+    rows, rest, direct = backends
+
+    for vendor in rows["vendors"]:
+        assert await ratings.get_vendor_stats(
+            direct, vendor["id"]
+        ) == await ratings.get_vendor_stats(rest, vendor["id"])
+        assert dump(await reviews.get_reviews_by_vendor(direct, vendor["id"])) == dump(
+            await reviews.get_reviews_by_vendor(rest, vendor["id"])
+        )
+
+
+async def test_auth_lookups_match(backends):
+    rows, rest, direct = backends
+    user, vendor = rows["users"][0], rows["vendors"][0]
+
+    assert await get_student_by_id(user["id"], direct) == await get_student_by_id(
+        user["id"], rest
+    )
+    assert await get_vendor_by_id(vendor["id"], direct) == await get_vendor_by_id(
+        vendor["id"], rest
+    )
+    request = schemas.RegistrationRequest(
+        name="Dup",
+        email=user["email"],
+        password="x",
+        confirm_password="x",
+        phone_number="01700000000",
+        role="student",
+    )
+    for client in (rest, direct):
+        with pytest.raises(HTTPException) as exc:
+            await auth.register(request, client)
+        assert exc.value.detail == "Email already registered"
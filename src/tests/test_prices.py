@@ -0,0 +1,203 @@
+from datetime import date
+from decimal import Decimal
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app import schemas
+from app.repositories import date_specials, inventory, menu, order, prices
+from app.repositories.inventory import Inventory
+from db.fake import FakeAsyncClient, TableStore
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def kitchen(monkeypatch):
+    monkeypatch.setattr(prices, "PRICES", prices.PriceBook())
+    monkeypatch.setattr(inventory, "INVENTORY", Inventory())
+    vendor_id, rice, lassi = str(uuid4()), str(uuid4()), str(uuid4())
+    special_id = str(uuid4())
+    store = TableStore(
+        {
+            "vendors": [{"id": vendor_id, "name": "Kitchen A"}],
+            "menu_items": [
+                {
+                    "id": rice,
+                    "vendor_id": vendor_id,
+                    "name": "Biryani",
+                    "price": 180.0,
+                    "category": "Rice",
+                    "preparation_time": 20,
+                },
+                {
+                    "id": lassi,
+                    "vendor_id": vendor_id,
+                    "name": "Lassi",
+                    "price": 60.0,
+                    "category": "Drinks",
+                    "preparation_time": 5,
+                },
+            ],
+            "date_specials": [
+                {
+                    "id": special_id,
+                    "menu_item_id": rice,
+                    "available_date": TODAY.isoformat(),
+                    "special_price": 150.0,
+                }
+            ],
+            "weekly_availability": [
+                {
+                    "menu_item_id": lassi,
+                    "day_of_week": (TODAY.weekday() + 1) % 7,
+                    "is_available": True,
+                }
+            ],
+        }
+    )
+    store.ids = {
+        "vendor": vendor_id,
+        "rice": rice,
+        "lassi": lassi,
+        "special": special_id,
+    }
+    return store
+
+
+async def place(client, store, item, quoted=1.0):
+    await order.create_order(
+        client,
+        schemas.OrderRequest(quantity=2, unit_price=quoted, pickup="Library"),
+        user_id=uuid4(),
+        vendor_id=store.ids["vendor"],
+        menu_id=store.ids[item],
+    )
+    return store.tables["orders"][-1]
+
+
+async def test_orders_are_priced_from_the_menu_feed(kitchen):
+    client = FakeAsyncClient(kitchen)
+    await menu.get_all_menus(client)
+    calls = client.calls
+
+    rice = await place(client, kitchen, "rice")
+    lassi = await place(client, kitchen, "lassi")
+
+    assert (rice["unit_price"], rice["total_price"]) == (150.0, 300.0)
+    assert (lassi["unit_price"], lassi["total_price"]) == (60.0, 120.0)
+    # Stock claim and insert only: no price lookups.
+    assert client.calls - calls == 4
+
+
+async def test_direct_postgres_feed_fills_the_book(kitchen, monkeypatch):
+    client = FakeAsyncClient(kitchen)
+    ids = kitchen.ids
+
+    async def fetch_today_rows(pool, today, weekday):
+        # As asyncpg returns them: UUIDs and Decimals
+        item = {
+            "id": UUID(ids["rice"]),
+            "vendor_id": UUID(ids["vendor"]),
+            "name": "Biryani",
+            "price": Decimal("180.00"),
+            "category": "Rice",
+            "preparation_time": 20,
+            "vendors": {"name": "Kitchen A"},
+        }
+        special = {
+            "menu_item_id": item["id"],
+            "available_date": today,
+            "special_price": Decimal("150.00"),
+            "menu_items": item,
+        }
+        return [special], []
+
+    monkeypatch.setattr(menu, "direct_pool", lambda _: object())
+    monkeypatch.setattr(menu, "_fetch_today_rows", fetch_today_rows)
+    await menu.get_all_menus(client)
+    calls = client.calls
+
+    price = await prices.get_unit_price(
+        client, UUID(ids["rice"]), UUID(ids["vendor"]), TODAY
+    )
+
+    assert price == 150.0 and isinstance(price, float)
+    assert client.calls == calls
+
+
+async def test_item_with_a_bad_price_is_skipped_not_the_feed(kitchen):
+    client = FakeAsyncClient(kitchen)
+    kitchen.tables["menu_items"][1]["price"] = None
+
+    feed = await menu.get_all_menus(client)
+
+    assert [str(m.id) for m in feed] == [kitchen.ids["rice"]]
+    assert prices.PRICES.get(kitchen.ids["rice"], TODAY.isoformat()) is not None
+
+
+async def test_decimal_prices_are_read_as_floats(kitchen):
+    client = FakeAsyncClient(kitchen)
+    kitchen.tables["date_specials"][0]["special_price"] = Decimal("150.00")
+
+    price = await prices.get_unit_price(
+        client, kitchen.ids["rice"], kitchen.ids["vendor"], TODAY
+    )
+
+    assert price == 150.0 and isinstance(price, float)
+
+
+async def test_miss_is_read_once_then_served_from_the_book(kitchen):
+    client = FakeAsyncClient(kitchen)
+
+    first = await prices.get_unit_price(
+        client, kitchen.ids["rice"], kitchen.ids["vendor"], TODAY
+    )
+    second = await prices.get_unit_price(
+        client, kitchen.ids["rice"], kitchen.ids["vendor"], TODAY
+    )
+    other_day = await prices.get_unit_price(
+        client, kitchen.ids["rice"], kitchen.ids["vendor"], date(2001, 1, 1)
+    )
+
+    assert (first, second, other_day) == (150.0, 150.0, 180.0)
+    assert client.calls == 2
+
+
+async def test_special_update_changes_the_price(kitchen):
+    client = FakeAsyncClient(kitchen)
+    await menu.get_all_menus(client)
+
+    await date_specials.update_special(
+        kitchen.ids["special"],
+        kitchen.ids["vendor"],
+        schemas.DateSpecialUpdateRequest(special_price=120.0),
+        client,
+    )
+
+    assert (await place(client, kitchen, "rice"))["unit_price"] == 120.0
+
+
+async def test_feed_racing_a_write_is_not_stored(kitchen):
+    generation = prices.PRICES.generation()
+    prices.invalidate(kitchen.ids["rice"])
+
+    prices.PRICES.put_many(
+        TODAY.isoformat(),
+        {kitchen.ids["rice"]: (1.0, kitchen.ids["vendor"])},
+        generation,
+    )
+
+    assert prices.PRICES.get(kitchen.ids["rice"], TODAY.isoformat()) is None
+
+
+async def test_item_of_another_vendor_is_not_found(kitchen):
+    client = FakeAsyncClient(kitchen)
+
+    with pytest.raises(HTTPException) as e:
+        await prices.get_unit_price(client, kitchen.ids["rice"], uuid4(), TODAY)
+    assert e.value.status_code == 404
+    with pytest.raises(HTTPException) as e:
+        await prices.get_unit_price(client, uuid4(), kitchen.ids["vendor"], TODAY)
+    assert e.value.status_code == 404
@@ -0,0 +1,77 @@
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+from httpx import ASGITransport, AsyncClient
+
+from app.settings import settings
+from db.instrumented import InstrumentedClient
+from db.supabase import get_db
+from main import app
+from utils.query_budget import QueryBudgetExceeded
+from utils.token import API_KEY
+
+ADMIN = {"Authorization": f"Bearer {API_KEY}"}
+
+
+def make_vendor() -> dict:
+    return {
+        "id": str(uuid4()),
+        "name": "Vendor",
+        "description": None,
+        "img_bucket": "vendors",
+        "img_path": f"{uuid4()}.jpg",
+    }
+
+
+@pytest.fixture(autouse=True)
+def override_dependencies():
+    builder = MagicMock()
+    builder.select.return_value = builder
+    response = MagicMock()
+    response.data = [make_vendor() for _ in range(5)]
+    builder.execute = AsyncMock(return_value=response)
+
+    bucket = MagicMock()
+    bucket.create_signed_url = AsyncMock(return_value={"signedURL": "http://img"})
+
+    raw = MagicMock()
+    raw.table.return_value = builder
+    raw.storage.from_.return_value = bucket
+
+    app.dependency_overrides[get_db] = lambda: InstrumentedClient(raw)
+    yield
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_fixture_flags_per_row_storage_calls(query_budget):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with pytest.raises(QueryBudgetExceeded, match="create_signed_url"):
+            with query_budget(max_calls=10, max_repeats=2):
+                await client.get("/vendors/", headers=ADMIN)
+
+
+@pytest.mark.asyncio
+async def test_fixture_passes_within_budget(query_budget):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with query_budget(max_calls=6, max_repeats=5) as recorded:
+            await client.get("/vendors/", headers=ADMIN)
+
+    assert len(recorded) == 1
+
+
+@pytest.mark.asyncio
+async def test_raise_mode_replaces_response(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_MODE", "raise")
+    monkeypatch.setattr(settings, "QUERY_BUDGET_MAX_REPEATS", 2)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/vendors/", headers=ADMIN)
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    assert response.json()["detail"] == "Query budget exceeded"
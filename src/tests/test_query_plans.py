@@ -0,0 +1,83 @@
+"""
+Migrations and the EXPLAIN regression check (benchmarks/query_plans.py).
+
+The plan check needs asyncpg and a scratch database in TEST_DATABASE_URL;
+it seeds the "medium" dataset, so it takes a few seconds.
+"""
+
+import os
+
+import pytest
+
+from benchmarks.datagen import PRESETS, generate
+from benchmarks.query_plans import (
+    SCHEMA,
+    check_plans,
+    insert_rows,
+    prepare_schema,
+    seed,
+)
+from db.migrate import discover
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+def test_migrations_are_numbered_in_order():
+    migrations = discover()
+
+    versions = [m.version for m in migrations]
+    assert versions == sorted(set(versions))
+    assert versions[0] == "000"
+    assert all(m.sql.strip() for m in migrations)
+
+
+def test_discover_rejects_bad_names(tmp_path):
+    (tmp_path / "001_ok.sql").write_text("SELECT 1;")
+    (tmp_path / "001_again.sql").write_text("SELECT 1;")
+
+    with pytest.raises(ValueError):
+        discover(tmp_path)
+
+    (tmp_path / "001_again.sql").rename(tmp_path / "fix-up.sql")
+    with pytest.raises(ValueError):
+        discover(tmp_path)
+
+
+@pytest.fixture
+async def conn():
+    asyncpg = pytest.importorskip("asyncpg")
+    if not DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    conn = await asyncpg.connect(DATABASE_URL)
+    await prepare_schema(conn)
+    yield conn
+    await conn.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    await conn.close()
+
+
+async def test_migrations_are_idempotent(conn):
+    from db.migrate import apply_migrations
+
+    assert await apply_migrations(conn) == []
+    applied = await conn.fetchval("SELECT count(*) FROM schema_migrations")
+    assert applied == len(discover())
+
+
+async def test_insert_rows_keeps_column_defaults(conn):
+    await insert_rows(
+        conn,
+        "vendors",
+        [{"name": "Kitchen A", "email": "a@k.bd", "password_hash": "x"}],
+    )
+
+    row = await conn.fetchrow('SELECT id, "isOpen", created_at FROM vendors')
+    assert row["id"] is not None and row["created_at"] is not None
+    assert row["isOpen"] is True
+
+
+async def test_repository_queries_use_indexes(conn):
+    dataset = generate(PRESETS["medium"])
+    await seed(conn, dataset)
+
+    assert await check_plans(conn, dataset) == {}
@@ -0,0 +1,124 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.settings import settings
+from utils import rate_limit
+from utils.rate_limit import MemoryBucketStore, Rule, SQLiteBucketStore, parse_rule
+from utils.token import create_access_token
+from main import app
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Fresh buckets with a tight limit on the public reviews route."""
+    monkeypatch.setattr(rate_limit, "_store", MemoryBucketStore())
+    monkeypatch.setattr(
+        settings, "RATE_LIMITS", {"GET /reviews/{vendor_id}": "2/minute"}
+    )
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+def bearer(**claims):
+    return {"Authorization": f"Bearer {create_access_token(claims)}"}
+
+
+def test_parse_rule():
+    assert parse_rule("10/minute") == Rule(capacity=10, rate=10 / 60)
+    with pytest.raises(ValueError):
+        parse_rule("10 per minute")
+
+
+async def test_bucket_refills_over_time(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    store, rule = MemoryBucketStore(), parse_rule("2/second")
+
+    assert await store.take("k", rule) == 0
+    assert await store.take("k", rule) == 0
+    assert await store.take("k", rule) == pytest.approx(0.5)
+
+    now[0] += 0.5
+    assert await store.take("k", rule) == 0
+
+
+async def test_sqlite_buckets_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "rate_limit.db")
+    first, second = SQLiteBucketStore(path), SQLiteBucketStore(path)
+    rule = parse_rule("2/hour")
+
+    results = await asyncio.gather(*(s.take("k", rule) for s in (first, second)))
+    assert results == [0, 0]
+    assert await first.take("k", rule) > 0
+    assert await second.take("other", rule) == 0
+
+
+async def test_route_limit_returns_429_per_caller(limits, fake_db, client):
+    url = f"/reviews/{uuid4()}"
+    student = bearer(user_id=str(uuid4()))
+
+    statuses = [(await client.get(url, headers=student)).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+
+    response = await client.get(url, headers=student)
+    assert 0 < int(response.headers["retry-after"]) <= 30
+    assert response.json() == {"detail": "Too many requests"}
+
+    # Another user, and anonymous callers keyed by IP, have their own buckets.
+    assert (
+        await client.get(url, headers=bearer(user_id=str(uuid4())))
+    ).status_code == 200
+    assert (await client.get(url)).status_code == 200
+    # Routes without a rule and no default are not limited.
+    assert (await client.get("/")).status_code == 200
+
+
+async def test_rejections_carry_cors_headers_and_preflights_are_free(
+    limits, fake_db, client
+):
+    url = f"/reviews/{uuid4()}"
+    origin = {"Origin": settings.CLIENT_ORIGIN_URL}
+    preflight = {**origin, "Access-Control-Request-Method": "GET"}
+
+    for _ in range(3):
+        assert (await client.options(url, headers=preflight)).status_code == 200
+    statuses = [(await client.get(url, headers=origin)).status_code for _ in range(3)]
+    rejected = await client.get(url, headers=origin)
+
+    assert statuses == [200, 200, 429]
+    assert rejected.headers["access-control-allow-origin"] == origin["Origin"]
+    assert "retry-after" in rejected.headers["access-control-expose-headers"].lower()
+
+
+async def test_overload_is_shed_with_503(limits, monkeypatch, fake_db, client):
+    monkeypatch.setattr(settings, "SHED_MAX_IN_FLIGHT", 1)
+    monkeypatch.setattr(rate_limit.LOAD, "in_flight", 1)
+
+    response = await client.get(f"/reviews/{uuid4()}")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert (await client.get("/")).status_code == 200
+
+    monkeypatch.setattr(rate_limit.LOAD, "in_flight", 0)
+    monkeypatch.setattr(rate_limit.LOAD, "loop_lag", 1.0)
+    assert (await client.get(f"/reviews/{uuid4()}")).status_code == 503
+
+
+async def test_load_monitor_measures_loop_lag():
+    monitor = rate_limit.LoadMonitor(interval=0.01)
+    await monitor.start()
+    await asyncio.sleep(0.005)
+    rate_limit.time.sleep(0.05)  # block the loop
+    await asyncio.sleep(0.02)
+    await monitor.stop()
+
+    assert monitor.loop_lag >= 0.01
@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from db import replica as replica_module
+from db.fake import FakeAsyncClient, TableStore
+from db.replica import RecentWrites, ReplicaClient
+from main import app
+from utils.auth import get_current_user
+
+AUTH = {"Authorization": "Bearer student-token"}
+
+
+@pytest.fixture
+def routed(fake_db, fake_store, monkeypatch):
+    """Primary served by `fake_db`, plus an empty (lagging) replica."""
+    monkeypatch.setattr(replica_module, "RECENT_WRITES", RecentWrites(60))
+    replica = FakeAsyncClient(TableStore())
+    app.state.read_client = ReplicaClient(replica, fake_db)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=uuid4())
+    yield fake_db, replica
+    del app.state.read_client
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+async def stats(client, vendor_id, headers=None):
+    response = await client.get(f"/ratings/{vendor_id}/stats", headers=headers)
+    assert response.status_code == 200
+    return response.json()["total_ratings"]
+
+
+async def test_reads_follow_the_callers_writes(routed):
+    primary, replica = routed
+    vendor_id = str(uuid4())
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        assert await stats(client, vendor_id, AUTH) == 0
+        assert (primary.calls, replica.calls) == (0, 1)
+
+        response = await client.post(
+            "/ratings/", json={"vendor_id": vendor_id, "rating_val": 4}, headers=AUTH
+        )
+        assert response.status_code == 201
+
+        # The writer now reads from the primary; everyone else stays on the
+        # replica, which has not seen the rating yet.
+        assert await stats(client, vendor_id, AUTH) == 1
+        assert await stats(client, vendor_id) == 0
+
+
+async def test_failed_writes_do_not_pin_the_caller(routed):
+    primary, replica = routed
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post("/ratings/", json={}, headers=AUTH)
+        assert response.status_code == 422
+        await stats(client, uuid4(), AUTH)
+
+    assert replica.calls == 1
+
+
+async def test_reads_use_primary_without_replica(fake_db):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        await stats(client, uuid4())
+
+    assert fake_db.calls == 1
+
+
+def test_recent_writes_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(replica_module.time, "monotonic", lambda: now[0])
+    writes = RecentWrites(window=5)
+
+    writes.mark("auth:a")
+    assert writes.wrote_recently("auth:a")
+    assert not writes.wrote_recently("auth:b")
+
+    now[0] += 5
+    assert not writes.wrote_recently("auth:a")
+
+
+def test_replica_client_keeps_storage_on_primary():
+    primary, replica = FakeAsyncClient(), FakeAsyncClient()
+    client = ReplicaClient(replica, primary)
+
+    assert client.table("menu_items")._client is replica
+    assert client.storage._client is primary
@@ -0,0 +1,152 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app import enums
+from app.repositories import payment
+from app.repositories.payment import FakeSSLCommerz, get_sslcommerz, process_ipn_batch
+from app.repositories.reconciliation import PaymentReconciler
+from app.settings import settings
+
+NOW = datetime.now(timezone.utc)
+
+
+def ago(**delta) -> str:
+    return (NOW - timedelta(**delta)).isoformat()
+
+
+def add_payment(store, gateway, tran_id, created_at, outcome=None):
+    payment_id = str(uuid4())
+    store.insert(
+        "payments",
+        [
+            {
+                "id": payment_id,
+                "transaction_id": tran_id,
+                "amount": 100.0,
+                "status": enums.PaymentStatus.PENDING.value,
+                "created_at": created_at,
+            }
+        ],
+    )
+    if outcome is not None:
+        gateway.createSession({"tran_id": tran_id, "total_amount": 100.0})
+        if outcome != "PENDING":
+            gateway.complete(tran_id, outcome)
+    return payment_id
+
+
+def status_of(store, tran_id):
+    return next(
+        p["status"] for p in store.tables["payments"] if p["transaction_id"] == tran_id
+    )
+
+
+class SlowGateway(FakeSSLCommerz):
+    """Takes a while to answer, tracking how many queries run at once."""
+
+    def __init__(self):
+        super().__init__()
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def transaction_query_tranid(self, tran_id):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.01)
+        with self._lock:
+            self.running -= 1
+        return super().transaction_query_tranid(tran_id)
+
+
+@pytest.mark.asyncio
+async def test_stale_payments_are_settled_and_linked(fake_db, fake_store):
+    gateway = FakeSSLCommerz()
+    paid = add_payment(fake_store, gateway, "paid", ago(hours=1), "VALID")
+    failed = add_payment(fake_store, gateway, "failed", ago(hours=1), "FAILED")
+    add_payment(fake_store, gateway, "open", ago(hours=1), "PENDING")
+    add_payment(fake_store, gateway, "abandoned", ago(days=2))
+    add_payment(fake_store, gateway, "fresh", ago(minutes=1), "VALID")
+    fake_store.insert(
+        "orders",
+        [{"order_id": str(uuid4()), "payment_id": paid} for _ in range(2)],
+    )
+    fake_store.insert("subscription", [{"id": str(uuid4()), "payment_id": failed}])
+
+    summary = await PaymentReconciler().run(fake_db, gateway)
+
+    assert [
+        status_of(fake_store, t)
+        for t in ("paid", "failed", "open", "abandoned", "fresh")
+    ] == ["success", "failed", "pending", "failed", "pending"]
+    assert summary == {
+        "success": 1,
+        "failed": 2,
+        "pending": 1,
+        "orders_success": 2,
+        "subscriptions_success": 0,
+        "orders_failed": 0,
+        "subscriptions_failed": 1,
+    }
+    assert gateway.calls["transaction_query_tranid"] == 4
+
+
+@pytest.mark.asyncio
+async def test_pages_are_queried_with_bounded_concurrency(
+    monkeypatch, fake_db, fake_store
+):
+    monkeypatch.setattr(settings, "PAYMENT_RECONCILE_PAGE_SIZE", 10)
+    monkeypatch.setattr(settings, "PAYMENT_RECONCILE_CONCURRENCY", 3)
+    gateway = SlowGateway()
+    for i in range(25):
+        # Several payments share each timestamp, across page boundaries.
+        add_payment(fake_store, gateway, f"t{i}", ago(hours=1, minutes=i // 3), "VALID")
+
+    summary = await PaymentReconciler().run(fake_db, gateway)
+
+    assert summary["success"] == 25
+    assert gateway.calls["transaction_query_tranid"] == 25
+    assert gateway.peak == 3
+    # Per page of 10, 10 and 5: the page query, one settle, two link counts.
+    assert fake_db.calls == 3 * 4
+
+
+@pytest.mark.asyncio
+async def test_open_payments_are_not_requeried_every_run(fake_db, fake_store):
+    gateway = FakeSSLCommerz()
+    add_payment(fake_store, gateway, "open", ago(hours=1), "PENDING")
+    reconciler = PaymentReconciler()
+
+    await reconciler.run(fake_db, gateway)
+    summary = await reconciler.run(fake_db, gateway)
+
+    assert summary == {"skipped": 1}
+    assert gateway.calls["transaction_query_tranid"] == 1
+
+    # The customer finished after all and the IPN settled it.
+    await payment.update_payment_status(fake_db, "open", enums.PaymentStatus.SUCCESS)
+    assert await reconciler.run(fake_db, gateway) == {}
+    assert reconciler._recheck == {}
+
+
+@pytest.mark.asyncio
+async def test_fake_gateway_runs_the_checkout_locally(monkeypatch, fake_db, fake_store):
+    monkeypatch.setattr(settings, "PAYMENT_GATEWAY", "fake")
+    monkeypatch.setattr(payment, "FAKE_SSLCOMMERZ", FakeSSLCommerz())
+    gateway = get_sslcommerz()
+    add_payment(fake_store, gateway, "t1", ago(minutes=1), "PENDING")
+
+    ipn = gateway.complete("t1", "VALID")
+
+    assert gateway.hash_validate_ipn(ipn)
+    assert not gateway.hash_validate_ipn({**ipn, "verify_sign": "forged"})
+    assert await process_ipn_batch(fake_db, gateway, [ipn, ipn]) == [
+        "success",
+        "success",
+    ]
+    assert status_of(fake_store, "t1") == "success"
@@ -0,0 +1,75 @@
+from uuid import uuid4
+
+from httpx import ASGITransport, AsyncClient
+
+from app import schemas
+from benchmarks.serialization import run
+from main import app
+from utils.serialization import FastJSONResponse, validate_list
+
+
+async def test_fast_path_matches_fastapi_output():
+    # run() compares the standard and fast responses and raises on mismatch.
+    results = await run(rows=50, iterations=1, seed=1)
+
+    assert set(results) == {"orders", "menu"}
+
+
+def test_validate_list_and_response():
+    vendor_id = uuid4()
+    items = validate_list(
+        schemas.OrderResponse,
+        [
+            {
+                "id": uuid4(),
+                "user_id": uuid4(),
+                "vendor_id": vendor_id,
+                "menu_id": uuid4(),
+                "order_date": "2025-01-01T12:00:00",
+                "quantity": 1,
+                "unit_price": 10.0,
+                "total_price": 10.0,
+                "pickup": "Library",
+                "is_delivered": False,
+            }
+        ],
+    )
+
+    assert items[0].vendor_id == vendor_id
+    assert FastJSONResponse({"a": [1, None]}).body == b'{"a":[1,null]}'
+    assert FastJSONResponse(b"[]").body == b"[]"
+
+
+async def test_vendor_orders_route_uses_fast_path(fake_db, fake_store):
+    vendor_id = str(uuid4())
+    fake_store.insert(
+        "orders",
+        [
+            {
+                "order_id": str(uuid4()),
+                "user_id": str(uuid4()),
+                "vendor_id": vendor_id,
+                "menu": str(uuid4()),
+                "order_date": f"2025-01-0{day}T12:00:00",
+                "quantity": 2,
+                "unit_price": 50.0,
+                "total_price": 100.0,
+                "pickup": "Library",
+                "is_delivered": False,
+            }
+            for day in (1, 2)
+        ],
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(f"/orders/vendor/{vendor_id}")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [o["order_date"] for o in body] == [
+        "2025-01-02T12:00:00",
+        "2025-01-01T12:00:00",
+    ]
+    assert body[0]["menu_id"] and body[0]["total_price"] == 100.0
@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from app import enums, schemas
+from app.repositories import subscription
+from db.fake import FakeAsyncClient, TableStore
+from main import app
+from utils.auth import get_current_user
+from utils.periodic import PeriodicTask
+
+NOW = datetime.now(timezone.utc)
+
+
+def sub(vendor_id, user_id, ends_in: timedelta, **extra):
+    return {
+        "id": str(uuid4()),
+        "user_id": user_id,
+        "vendor_id": vendor_id,
+        "starts_from": (NOW + ends_in - timedelta(days=30)).isoformat(),
+        "ends_at": (NOW + ends_in).isoformat(),
+        **extra,
+    }
+
+
+@pytest.fixture
+def seeded(fake_store):
+    vendor_id, user_id = str(uuid4()), str(uuid4())
+    fake_store.insert("vendors", [{"id": vendor_id, "name": "Kitchen A"}])
+    fake_store.insert("users", [{"id": user_id, "name": "Nusrat"}])
+    return fake_store, vendor_id, user_id
+
+
+async def test_subscribe_checks_existence_with_counts(seeded):
+    store, vendor_id, user_id = seeded
+    client = FakeAsyncClient(store)
+    request = schemas.SubscriptionRequest(type=enums.SubscriptionType.WEEKLY)
+
+    created = await subscription.subscribe(request, user_id, client, vendor_id)
+
+    assert client.calls == 3
+    (row,) = store.tables["subscription"]
+    assert row["id"] == str(created.id)
+    assert row["vendor_id"] == vendor_id
+
+    for user, vendor in ((uuid4(), vendor_id), (user_id, uuid4())):
+        with pytest.raises(HTTPException) as exc:
+            await subscription.subscribe(request, user, client, vendor)
+        assert exc.value.status_code == 404
+
+
+async def test_vendor_list_pages_active_subscriptions(seeded, fake_db):
+    store, vendor_id, user_id = seeded
+    store.insert(
+        "subscription",
+        [sub(vendor_id, user_id, timedelta(days=d)) for d in (3, 1, 2)]
+        + [
+            sub(vendor_id, user_id, timedelta(days=-1)),
+            sub(str(uuid4()), user_id, timedelta(days=5)),
+        ],
+    )
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=vendor_id)
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            first = await client.get("/subscribe/token/", params={"limit": 2})
+            second = await client.get(
+                "/subscribe/token/", params={"limit": 2, "offset": 2}
+            )
+            invalid = await client.get("/subscribe/token/", params={"limit": 0})
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+    assert first.status_code == 200
+    ends = [row["end_date"] for row in first.json() + second.json()]
+    expected = [(NOW + timedelta(days=d)).date().isoformat() for d in (1, 2, 3)]
+    assert ends == expected
+    assert first.json()[0]["name"] == "Nusrat"
+    assert invalid.status_code == 422
+
+
+async def test_archive_moves_expired_rows_in_batches(seeded):
+    store, vendor_id, user_id = seeded
+    expired = [sub(vendor_id, user_id, timedelta(days=-40 - i)) for i in range(5)]
+    recent = sub(vendor_id, user_id, timedelta(days=-2))
+    active = sub(vendor_id, user_id, timedelta(days=2))
+    store.insert("subscription", expired + [recent, active])
+    client = FakeAsyncClient(store)
+
+    archived = await subscription.archive_expired_subscriptions(
+        client, timedelta(days=30), batch_size=2
+    )
+
+    assert archived == 5
+    assert {r["id"] for r in store.tables["subscription"]} == {
+        recent["id"],
+        active["id"],
+    }
+    archive = store.tables["subscription_archive"]
+    assert {r["id"] for r in archive} == {r["id"] for r in expired}
+    assert all(r["archived_at"] for r in archive)
+    assert (
+        await subscription.archive_expired_subscriptions(client, timedelta(days=30))
+        == 0
+    )
+
+
+async def test_periodic_task_survives_failures():
+    runs = []
+
+    async def job():
+        runs.append(1)
+        raise RuntimeError("boom")
+
+    task = PeriodicTask("test", 0.01, job, run_at_start=True)
+    await task.start()
+    while len(runs) < 2:
+        await asyncio.sleep(0.01)
+    await task.stop()
+    assert len(runs) >= 2
+
+
+def test_fake_applies_select_casts():
+    store = TableStore(
+        {"subscription": [{"id": "a", "ends_at": "2025-03-01T10:00:00+00:00"}]}
+    )
+    rows, _ = store.select("subscription", "id, end:ends_at::date")
+    assert rows == [{"id": "a", "end": "2025-03-01"}]
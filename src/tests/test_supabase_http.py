@@ -0,0 +1,81 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.settings import settings
+from db import http
+from db.supabase import close_supabase, create_supabase
+from utils.metrics import REGISTRY
+
+
+@pytest.fixture
+def pool():
+    """A PoolTransport over a mock backend that holds each request until released."""
+    release = asyncio.Event()
+
+    async def handler(request):
+        await release.wait()
+        return httpx.Response(200, json=[])
+
+    transport = http.PoolTransport("test", httpx.MockTransport(handler), 4)
+    http._transports["test"] = transport
+    yield transport, release
+    http._transports.pop("test", None)
+
+
+async def test_in_flight_requests_are_exported(pool):
+    transport, release = pool
+    client = httpx.AsyncClient(transport=transport)
+
+    tasks = [asyncio.create_task(client.get("http://db/rest/v1/x")) for _ in range(3)]
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    rendered = REGISTRY.render()
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert 'supabase_pool_in_flight_requests{client="test"} 3' in rendered
+    assert 'supabase_pool_max_connections{client="test"} 4' in rendered
+    assert transport.in_flight == 0
+    await client.aclose()
+
+
+async def test_pool_timeouts_are_counted():
+    async def handler(request):
+        raise httpx.PoolTimeout("no connection available", request=request)
+
+    transport = http.PoolTransport("test", httpx.MockTransport(handler), 1)
+    async with httpx.AsyncClient(transport=transport) as client:
+        with pytest.raises(httpx.PoolTimeout):
+            await client.get("http://db/rest/v1/x")
+
+    assert transport.pool_timeouts == 1 and transport.in_flight == 0
+
+
+async def test_storage_requests_get_the_storage_timeout():
+    storage = httpx.Request("POST", "http://db/storage/v1/object/sign/menus/a.jpg")
+    rest = httpx.Request("GET", "http://db/rest/v1/menu_items")
+    rest.extensions["timeout"] = {"read": 1.0}
+
+    await http._apply_operation_timeout(storage)
+    await http._apply_operation_timeout(rest)
+
+    assert storage.extensions["timeout"]["read"] == settings.SUPABASE_STORAGE_TIMEOUT
+    assert storage.extensions["timeout"]["pool"] == settings.SUPABASE_POOL_TIMEOUT
+    assert rest.extensions["timeout"] == {"read": 1.0}
+
+
+async def test_client_shares_one_pool_and_closes_it():
+    client = await create_supabase()
+    shared = client.options.httpx_client
+
+    assert client.postgrest.session is shared
+    assert client.storage.session is shared
+    assert shared.timeout.read == settings.SUPABASE_QUERY_TIMEOUT
+    assert "primary" in http._transports
+
+    await close_supabase(client)
+
+    assert shared.is_closed
+    assert "primary" not in http._transports
@@ -0,0 +1,116 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import enums
+from app.repositories import transaction_status
+from app.repositories.payment import (
+    FakeSSLCommerz,
+    get_sslcommerz,
+    update_payment_status,
+)
+from app.repositories.transaction_status import (
+    TransactionStatusCache,
+    get_status_by_tranid,
+)
+from app.settings import settings
+from main import app
+
+
+@pytest.fixture
+def checkout(monkeypatch, fake_store):
+    """A pending payment with an open gateway session."""
+    monkeypatch.setattr(
+        transaction_status, "TRANSACTION_STATUS", TransactionStatusCache()
+    )
+    gateway = FakeSSLCommerz()
+    session = gateway.createSession({"tran_id": "t1", "total_amount": 250.0})
+    fake_store.insert(
+        "payments",
+        [
+            {
+                "id": str(uuid4()),
+                "transaction_id": "t1",
+                "amount": 250.0,
+                "status": enums.PaymentStatus.PENDING.value,
+            }
+        ],
+    )
+    gateway.sessionkey = session["sessionkey"]
+    return gateway
+
+
+def element_status(answer):
+    return answer["element"][0]["status"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_polls_share_one_gateway_call(fake_db, checkout):
+    answers = await asyncio.gather(
+        *(get_status_by_tranid(fake_db, checkout, "t1") for _ in range(20))
+    )
+    again = await get_status_by_tranid(fake_db, checkout, "t1")
+
+    assert {element_status(a) for a in answers + [again]} == {"PENDING"}
+    assert checkout.calls["transaction_query_tranid"] == 1
+
+
+@pytest.mark.asyncio
+async def test_open_answers_expire_and_final_ones_stay(monkeypatch, fake_db, checkout):
+    monkeypatch.setattr(settings, "PAYMENT_STATUS_CACHE_SECONDS", 0)
+
+    await get_status_by_tranid(fake_db, checkout, "t1")
+    checkout.complete("t1", "VALID")
+    paid = await get_status_by_tranid(fake_db, checkout, "t1")
+    for _ in range(5):
+        assert await get_status_by_tranid(fake_db, checkout, "t1") == paid
+
+    assert element_status(paid) == "VALID"
+    assert checkout.calls["transaction_query_tranid"] == 2
+
+
+@pytest.mark.asyncio
+async def test_settled_payment_is_answered_locally(fake_db, fake_store, checkout):
+    fake_store.tables["payments"][0]["status"] = enums.PaymentStatus.SUCCESS.value
+
+    answer = await get_status_by_tranid(fake_db, checkout, "t1")
+    calls = fake_db.calls
+    await get_status_by_tranid(fake_db, checkout, "t1")
+
+    assert element_status(answer) == "VALID"
+    assert answer["element"][0]["amount"] == "250.0"
+    assert checkout.calls["transaction_query_tranid"] == 0
+    # Final answers are then served without reading the payment again.
+    assert fake_db.calls == calls
+
+
+@pytest.mark.asyncio
+async def test_failed_payment_can_still_succeed(fake_db, fake_store, checkout):
+    fake_store.tables["payments"][0]["status"] = enums.PaymentStatus.FAILED.value
+
+    failed = await get_status_by_tranid(fake_db, checkout, "t1")
+    # A validated IPN overrides the earlier fail callback.
+    await update_payment_status(fake_db, "t1", enums.PaymentStatus.SUCCESS)
+    paid = await get_status_by_tranid(fake_db, checkout, "t1")
+
+    assert element_status(failed) == "FAILED"
+    assert element_status(paid) == "VALID"
+    assert checkout.calls["transaction_query_tranid"] == 0
+
+
+@pytest.mark.asyncio
+async def test_session_polls_through_the_route(fake_db, checkout):
+    app.dependency_overrides[get_sslcommerz] = lambda: checkout
+    url = f"/payment/transaction-status-session/{checkout.sessionkey}"
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            polls = [(await client.get(url)).json() for _ in range(3)]
+    finally:
+        app.dependency_overrides.pop(get_sslcommerz, None)
+
+    assert [p["status"] for p in polls] == ["PENDING"] * 3
+    assert checkout.calls["transaction_query_session"] == 1
@@ -6,10 +6,14 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from supabase import AsyncClient
 
 from app import enums, schemas
+from app.repositories.sessions import REVOKED_SESSIONS
+from db.postgres import direct_pool, fetch
 from db.supabase import get_db
-from utils.logger import logger
+from utils.logger import get_logger
 from utils.token import API_KEY, verify_access_token
 
+logger = get_logger(__name__)
+
 security = HTTPBearer()
 
 
@@ -35,6 +39,10 @@ async def get_payload_from_token(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token"
         )
+    if payload.get("sid") in REVOKED_SESSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Session has been revoked"
+        )
     return payload
 
 
@@ -42,6 +50,20 @@ async def get_payload_from_token(
 # These functions do the actual database query. They are called by
 # the dependencies and are passed the 'db' client.
 
+_ID_LOOKUP_SQL = {
+    "users": "SELECT id FROM users WHERE id = $1",
+    "vendors": "SELECT id FROM vendors WHERE id = $1",
+}
+
+
+async def _find_by_id(db: AsyncClient, table: str, id: uuid.UUID) -> list:
+    """Runs on every authenticated request; uses the direct pool when configured."""
+    pool = direct_pool(db)
+    if pool is not None:
+        return await fetch(pool, table, _ID_LOOKUP_SQL[table], str(id))
+    response = await db.table(table).select("id").eq("id", str(id)).execute()
+    return response.data
+
 
 async def get_student_by_id(id: uuid.UUID, db: AsyncClient) -> schemas.UserBase:
     """
@@ -50,8 +72,7 @@ async def get_student_by_id(id: uuid.UUID, db: AsyncClient) -> schemas.UserBase:
     try:
         # 1. Use the passed-in 'db' client
         # 2. Filter by ID using .eq()
-        response = await db.table("users").select("id").eq("id", str(id)).execute()
-        result_data = response.data
+        result_data = await _find_by_id(db, "users", id)
 
         # 3. Check if list is empty
         if not result_data:
@@ -66,7 +87,7 @@ async def get_student_by_id(id: uuid.UUID, db: AsyncClient) -> schemas.UserBase:
         return schemas.UserBase(id=user.get("id"), role=enums.Role.STUDENT)
 
     except Exception as e:
-        logger.error(f"Error fetching student by ID {id}: {e}")
+        logger.error("Error fetching student by ID %s: %s", id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="A database error occurred while fetching the user.",
@@ -80,8 +101,7 @@ async def get_vendor_by_id(id: uuid.UUID, db: AsyncClient) -> schemas.UserBase:
     try:
         # 1. Use the passed-in 'db' client
         # 2. Filter by ID using .eq()
-        response = await db.table("vendors").select("id").eq("id", str(id)).execute()
-        result_data = response.data
+        result_data = await _find_by_id(db, "vendors", id)
 
         # 3. Check if list is empty
         if not result_data:
@@ -96,7 +116,7 @@ async def get_vendor_by_id(id: uuid.UUID, db: AsyncClient) -> schemas.UserBase:
         return schemas.UserBase(id=vendor.get("id"), role=enums.Role.VENDOR)
 
     except Exception as e:
-        logger.error(f"Error fetching vendor by ID {id}: {e}")
+        logger.error("Error fetching vendor by ID %s: %s", id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="A database error occurred while fetching the vendor.",
@@ -0,0 +1,186 @@
+import asyncio
+import gzip
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.settings import settings
+from utils.metrics import REGISTRY
+
+try:  # Optional; only gzip is offered without it.
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    b"application/json",
+    b"text/",
+    b"application/javascript",
+    b"image/svg+xml",
+)
+
+COMPRESSED_CACHE = REGISTRY.counter(
+    "http_compressed_cache_total",
+    "Compressed bodies of ETagged responses, by whether they were reused.",
+    labelnames=("encoding", "result"),
+)
+
+
+def supported_encodings() -> List[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate(accept_encoding: Optional[bytes]) -> Optional[str]:
+    """Picks br or gzip from Accept-Encoding by q-value; br wins ties."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.decode("latin-1").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    best, best_q = None, 0.0
+    for coding in supported_encodings():
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical bodies.
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressedBodies:
+    """
+    Compressed bytes of responses that carry a strong ETag, keyed by
+    (ETag, encoding), so a response whose ETag is stable across requests
+    (reviews, ratings) is compressed once per change. Menu responses embed
+    freshly signed image URLs and get a new ETag each time, so they miss.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+    def get(self, etag: str, encoding: str) -> Optional[bytes]:
+        key = (etag, encoding)
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, etag: str, encoding: str, body: bytes) -> None:
+        self._entries[(etag, encoding)] = body
+        self._entries.move_to_end((etag, encoding))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+BODIES = CompressedBodies()
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli compression of complete text and JSON responses of at least
+    COMPRESSION_MIN_SIZE bytes, negotiated from Accept-Encoding. Streaming
+    responses and already encoded bodies are passed through. Bodies of at
+    least COMPRESSION_THREAD_MIN_SIZE bytes are compressed in a worker thread
+    so large feeds do not stall the event loop.
+
+    A compressed response's ETag is made weak, since the bytes differ from
+    the identity representation; If-None-Match compares weakly, so
+    conditional GETs keep matching.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept = None
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept = value
+                break
+        encoding = negotiate(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                if message.get("more_body", False):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                await self._send_complete(
+                    send, start_message, message.get("body", b""), encoding
+                )
+            else:
+                await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_complete(self, send, start, body, encoding):
+        headers = list(start.get("headers", []))
+        names = {name.lower(): value for name, value in headers}
+        content_type = names.get(b"content-type", b"")
+        if (
+            len(body) < settings.COMPRESSION_MIN_SIZE
+            or b"content-encoding" in names
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+        ):
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = names.get(b"etag", b"").decode("latin-1")
+        cacheable = bool(etag) and not etag.startswith("W/")
+        compressed = BODIES.get(etag, encoding) if cacheable else None
+        if compressed is None:
+            if len(body) >= settings.COMPRESSION_THREAD_MIN_SIZE:
+                compressed = await asyncio.to_thread(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            if cacheable:
+                BODIES.put(etag, encoding, compressed)
+                COMPRESSED_CACHE.inc(encoding=encoding, result="stored")
+        else:
+            COMPRESSED_CACHE.inc(encoding=encoding, result="reused")
+
+        headers = [
+            (name, value)
+            for name, value in headers
+            if name.lower() not in (b"content-length", b"etag", b"vary")
+        ]
+        vary = names.get(b"vary")
+        headers += [
+            (b"content-encoding", encoding.encode()),
+            (b"content-length", str(len(compressed)).encode()),
+            (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"),
+        ]
+        if etag:
+            weak = etag if etag.startswith("W/") else f"W/{etag}"
+            headers.append((b"etag", weak.encode()))
+        await send({**start, "headers": headers})
+        await send({"type": "http.response.body", "body": compressed})
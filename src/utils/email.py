@@ -1,10 +1,11 @@
-import os
+from typing import Any, Dict, List
 
-import resend
+import httpx
 
 from app.settings import settings
 
-resend.api_key = settings.RESEND_API_KEY
+RESEND_BATCH_URL = "https://api.resend.com/emails/batch"
+SENDER = "TiffinTime <orders@resend.dev>"
 
 html_template = """
 <!DOCTYPE html>
@@ -23,24 +24,107 @@ html_template = """
 """
 
 
-def send_delivery_email_resend(
-    email_to: str, user_name: str, order_id: str, pickup: str, total_price: float
-):
+class EmailDeliveryError(Exception):
+    """
+    Raised when a provider rejects a batch. Retryable unless `permanent`.
+    `halt` means the provider refuses every send (e.g. a revoked API key):
+    the messages are not at fault and should wait without using attempts.
+    """
+
+    def __init__(self, message: str, permanent: bool = False, halt: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+        self.halt = halt
+
 
+def build_delivery_email(
+    email_to: str, user_name: str, order_id: str, pickup: str, total_price: float
+) -> Dict[str, Any]:
     message_body = html_template.format(
         name=user_name, order_id=order_id[:8].upper(), pickup=pickup, total=total_price
     )
 
-    try:
-        r = resend.Emails.send(
-            {
-                "from": "TiffinTime <orders@resend.dev>",
-                "to": email_to,
-                "subject": "Your Order is Ready!",
-                "html": message_body,
-            }
+    return {
+        "from": SENDER,
+        "to": [email_to],
+        "subject": "Your Order is Ready!",
+        "html": message_body,
+    }
+
+
+class ResendProvider:
+    """
+    Sends emails through Resend's batch endpoint (up to 100 per call)
+    with a non-blocking HTTP client.
+    """
+
+    max_batch_size = 100
+
+    def __init__(self, api_key: str, timeout: float = 10.0):
+        self._client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {api_key}"}, timeout=timeout
         )
-        print(f"Email sent successfully: {r}")
-        return r
-    except Exception as e:
-        print(f"Failed to send email: {e}")
+
+    async def send_batch(self, messages: List[Dict[str, Any]]) -> None:
+        try:
+            response = await self._client.post(RESEND_BATCH_URL, json=messages)
+        except httpx.HTTPError as e:
+            raise EmailDeliveryError(f"Resend request failed: {e}")
+
+        if response.status_code in (401, 403):
+            raise EmailDeliveryError(
+                f"Resend refused the API key ({response.status_code}): {response.text}",
+                halt=True,
+            )
+        if response.status_code in (400, 422):
+            # Validation errors. For a batch the queue resends the messages
+            # one at a time, so only those rejected alone are dead-lettered.
+            raise EmailDeliveryError(
+                f"Resend rejected batch ({response.status_code}): {response.text}",
+                permanent=True,
+            )
+        if response.status_code >= 400:
+            raise EmailDeliveryError(
+                f"Resend returned {response.status_code}: {response.text}"
+            )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class FakeEmailProvider:
+    """
+    Local stand-in for Resend. Records every batch instead of sending it and
+    can be told to fail the next `fail_times` calls to exercise retries.
+    """
+
+    max_batch_size = 100
+
+    def __init__(
+        self, fail_times: int = 0, permanent: bool = False, halt: bool = False
+    ):
+        self.batches: List[List[Dict[str, Any]]] = []
+        self.fail_times = fail_times
+        self.permanent = permanent
+        self.halt = halt
+
+    @property
+    def sent(self) -> List[Dict[str, Any]]:
+        return [message for batch in self.batches for message in batch]
+
+    async def send_batch(self, messages: List[Dict[str, Any]]) -> None:
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise EmailDeliveryError(
+                "Fake provider failure", permanent=self.permanent, halt=self.halt
+            )
+        self.batches.append(list(messages))
+
+    async def aclose(self) -> None:
+        return None
+
+
+def create_email_provider():
+    if settings.EMAIL_PROVIDER == "fake":
+        return FakeEmailProvider()
+    return ResendProvider(api_key=settings.RESEND_API_KEY)
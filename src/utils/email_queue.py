@@ -0,0 +1,322 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request
+
+from app.settings import settings
+from utils.email import EmailDeliveryError, create_email_provider
+from utils.logger import get_logger
+from utils.sqlite import connect
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS email_outbox_due ON email_outbox (next_attempt_at);
+CREATE TABLE IF NOT EXISTS email_dead_letter (
+    id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    failed_at REAL NOT NULL
+);
+"""
+
+# A claimed batch is hidden from other workers for this long. If the
+# process dies mid-send the rows become due again after the lease expires.
+CLAIM_LEASE_SECONDS = 60.0
+MAX_BACKOFF_SECONDS = 300.0
+# Messages wait this long, keeping their attempts, while the provider
+# refuses all sends (see EmailDeliveryError.halt).
+HALT_SECONDS = 300.0
+
+
+class EmailQueue:
+    """
+    Durable outbound email queue.
+
+    Messages are written to a local SQLite outbox and drained by a single
+    async sender task that batches them through the provider, throttles to
+    `rate_per_second` provider calls, retries failures with exponential
+    backoff and moves messages that exhaust `max_attempts` to a dead-letter
+    table. A batch rejected as a whole (permanent error) is sent again one
+    message at a time, so only the messages failing alone are dead-lettered.
+    When the provider refuses every send (bad credentials) the batch is put
+    back for HALT_SECONDS without using an attempt.
+    Several workers can share the same file; batches are claimed with a lease
+    so each message is sent by one worker only.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        provider,
+        batch_size: int = 100,
+        rate_per_second: float = 2.0,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 2.0,
+        poll_interval: float = 1.0,
+    ):
+        self.provider = provider
+        self.batch_size = min(batch_size, provider.max_batch_size)
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_interval = poll_interval
+
+        self._min_interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_send_at = 0.0
+        self._conn = connect(path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # --- Producer side ---
+
+    async def enqueue(self, message: Dict[str, Any]) -> None:
+        await self.enqueue_many([message])
+
+    async def enqueue_many(self, messages: List[Dict[str, Any]]) -> None:
+        """Stores all messages in one transaction and wakes the sender."""
+        if not messages:
+            return
+        await asyncio.to_thread(self._insert, messages)
+        self._wakeup.set()
+
+    def _insert(self, messages: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        rows = [(json.dumps(m), now, now) for m in messages]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO email_outbox (payload, next_attempt_at, created_at) "
+                    "VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # --- Consumer side ---
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.provider.aclose()
+        self._conn.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sent = await self.run_once()
+            except Exception as e:
+                logger.error("Email sender loop failed: %s", e)
+                sent = 0
+
+            if sent:
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self) -> int:
+        """Claims and sends one batch. Returns the number of messages handled."""
+        batch = await asyncio.to_thread(self._claim)
+        if not batch:
+            return 0
+
+        await self._throttle()
+
+        try:
+            await self.provider.send_batch([json.loads(r["payload"]) for r in batch])
+        except EmailDeliveryError as e:
+            if e.halt:
+                logger.error("Email provider refuses to send, pausing: %s", e)
+                await asyncio.to_thread(self._release, batch, str(e))
+                return len(batch)
+            logger.warning("Email batch of %s failed: %s", len(batch), e)
+            if e.permanent and len(batch) > 1:
+                # One bad message rejects the batch: find it by sending
+                # the rest alone, so only the bad ones are dead-lettered.
+                await self._send_singly(batch)
+            else:
+                await asyncio.to_thread(self._fail, batch, str(e), e.permanent)
+        except Exception as e:
+            logger.warning("Email batch of %s failed: %s", len(batch), e)
+            await asyncio.to_thread(self._fail, batch, str(e), False)
+        else:
+            await asyncio.to_thread(self._ack, batch)
+
+        return len(batch)
+
+    async def _send_singly(self, batch: List[Any]) -> None:
+        """
+        Sends and settles each message on its own. Throttled, a full batch
+        takes most of the claim lease, so the lease of the messages still
+        to send is renewed once half of it has passed.
+        """
+        renew_at = time.monotonic() + CLAIM_LEASE_SECONDS / 2
+        for i, r in enumerate(batch):
+            if time.monotonic() >= renew_at:
+                await asyncio.to_thread(self._renew, batch[i:])
+                renew_at = time.monotonic() + CLAIM_LEASE_SECONDS / 2
+            await self._throttle()
+            try:
+                await self.provider.send_batch([json.loads(r["payload"])])
+            except EmailDeliveryError as e:
+                if e.halt:
+                    logger.error("Email provider refuses to send, pausing: %s", e)
+                    await asyncio.to_thread(self._release, batch[i:], str(e))
+                    return
+                await asyncio.to_thread(self._fail, [r], str(e), e.permanent)
+            except Exception as e:
+                await asyncio.to_thread(self._fail, [r], str(e), False)
+            else:
+                await asyncio.to_thread(self._ack, [r])
+
+    async def _throttle(self) -> None:
+        now = time.monotonic()
+        if self._next_send_at > now:
+            await asyncio.sleep(self._next_send_at - now)
+        self._next_send_at = max(now, self._next_send_at) + self._min_interval
+
+    def _claim(self) -> List[Any]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, payload, attempts FROM email_outbox "
+                    "WHERE next_attempt_at <= ? ORDER BY id LIMIT ?",
+                    (now, self.batch_size),
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE email_outbox SET next_attempt_at = ? WHERE id = ?",
+                        [(now + CLAIM_LEASE_SECONDS, r["id"]) for r in rows],
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _ack(self, batch: List[Any]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM email_outbox WHERE id = ?", [(r["id"],) for r in batch]
+            )
+
+    def _renew(self, batch: List[Any]) -> None:
+        lease_until = time.time() + CLAIM_LEASE_SECONDS
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE email_outbox SET next_attempt_at = ? WHERE id = ?",
+                [(lease_until, r["id"]) for r in batch],
+            )
+
+    def _release(self, batch: List[Any], error: str) -> None:
+        retry_at = time.time() + HALT_SECONDS
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE email_outbox SET next_attempt_at = ?, last_error = ? "
+                "WHERE id = ?",
+                [(retry_at, error, r["id"]) for r in batch],
+            )
+
+    def _fail(self, batch: List[Any], error: str, permanent: bool) -> None:
+        now = time.time()
+        retry, dead = [], []
+        for r in batch:
+            attempts = r["attempts"] + 1
+            if permanent or attempts >= self.max_attempts:
+                dead.append((attempts, r))
+            else:
+                delay = min(
+                    self.retry_base_seconds * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS
+                )
+                delay += random.uniform(0, self.retry_base_seconds)
+                retry.append((attempts, now + delay, error, r["id"]))
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE email_outbox SET attempts = ?, next_attempt_at = ?, "
+                    "last_error = ? WHERE id = ?",
+                    retry,
+                )
+                for attempts, r in dead:
+                    self._conn.execute(
+                        "INSERT INTO email_dead_letter "
+                        "(id, payload, attempts, last_error, created_at, failed_at) "
+                        "SELECT id, payload, ?, ?, created_at, ? "
+                        "FROM email_outbox WHERE id = ?",
+                        (attempts, error, now, r["id"]),
+                    )
+                    self._conn.execute(
+                        "DELETE FROM email_outbox WHERE id = ?", (r["id"],)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if dead:
+            logger.error(
+                "Moved %s emails to the dead-letter table: %s", len(dead), error
+            )
+
+    # --- Introspection ---
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM email_outbox").fetchone()[0]
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts, last_error FROM email_dead_letter "
+                "ORDER BY id"
+            ).fetchall()
+        return [{**dict(r), "payload": json.loads(r["payload"])} for r in rows]
+
+
+def create_email_queue() -> EmailQueue:
+    return EmailQueue(
+        path=settings.EMAIL_QUEUE_PATH,
+        provider=create_email_provider(),
+        batch_size=settings.EMAIL_BATCH_SIZE,
+        rate_per_second=settings.EMAIL_RATE_PER_SECOND,
+        max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+        retry_base_seconds=settings.EMAIL_RETRY_BASE_SECONDS,
+    )
+
+
+def get_email_queue(request: Request) -> EmailQueue:
+    return request.app.state.email_queue
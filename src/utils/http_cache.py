@@ -0,0 +1,271 @@
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from starlette.responses import Response
+from starlette.routing import compile_path
+
+from utils.metrics import REGISTRY
+
+# For responses that can never change, e.g. specials for a date in the past.
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+NOT_MODIFIED = REGISTRY.counter(
+    "http_cache_not_modified_total",
+    "304 responses, by route and whether the route had to run to produce them.",
+    labelnames=("route", "source"),
+)
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    Cache-Control for a public GET route, and the data it depends on. Writes
+    under a prefix in WRITE_TAGS bump the matching tags, which invalidates
+    the ETags remembered for the route.
+    """
+
+    template: str
+    max_age: int
+    stale_while_revalidate: int
+    tags: Tuple[str, ...]
+
+    @property
+    def cache_control(self) -> str:
+        return (
+            f"public, max-age={self.max_age}, "
+            f"stale-while-revalidate={self.stale_while_revalidate}"
+        )
+
+
+# Menu responses embed signed image URLs valid for an hour, so their
+# max-age plus stale-while-revalidate must stay well below that.
+POLICIES = [
+    CachePolicy("/menu/", 30, 300, ("menu",)),
+    CachePolicy("/menu/{item_id}", 60, 300, ("menu",)),
+    CachePolicy("/menu/vendor/{vendor_id}", 60, 300, ("menu",)),
+    CachePolicy("/menu/vendor/{vendor_id}/with-availability", 30, 120, ("menu",)),
+    CachePolicy("/specials/today", 30, 120, ("menu",)),
+    CachePolicy("/specials/by-date/{query_date}", 60, 300, ("menu",)),
+    CachePolicy("/reviews/{vendor_id}", 60, 300, ("reviews",)),
+    CachePolicy("/ratings/{vendor_id}/stats", 60, 300, ("ratings",)),
+]
+
+WRITE_TAGS = {
+    "/menu": ("menu",),
+    "/specials": ("menu",),
+    "/weekly-menu": ("menu",),
+    "/upload": ("menu",),
+    "/reviews": ("reviews",),
+    "/ratings": ("ratings",),
+}
+
+_COMPILED: List[Tuple[Pattern, CachePolicy]] = [
+    (compile_path(p.template)[0], p) for p in POLICIES
+]
+
+
+def match_policy(path: str) -> Optional[CachePolicy]:
+    for regex, policy in _COMPILED:
+        if regex.match(path):
+            return policy
+    return None
+
+
+class CacheVersions:
+    """
+    Version counter per tag, bumped by writes handled in this process.
+    Writes through another worker (or straight to Supabase) are not seen,
+    so remembered ETags are only trusted for the policy's max-age plus
+    stale-while-revalidate, the staleness clients already accept.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+
+    def snapshot(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(tag, 0) for tag in tags)
+
+    def bump(self, *tags: str) -> None:
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+
+VERSIONS = CacheVersions()
+
+
+def invalidate(*tags: str) -> None:
+    """Drops remembered ETags for data changed outside a tagged write route."""
+    VERSIONS.bump(*tags)
+
+
+@dataclass
+class _Entry:
+    etag: str
+    cache_control: str
+    versions: Tuple[int, ...]
+    stored_at: float
+
+
+class ETagIndex:
+    """The last ETag served per URL, with the tag versions it was built from."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: Dict[str, _Entry] = {}
+
+    def get(self, key: str) -> Optional[_Entry]:
+        return self._entries.get(key)
+
+    def put(self, key: str, entry: _Entry) -> None:
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            # Drop the oldest entry; dicts keep insertion order.
+            del self._entries[next(iter(self._entries))]
+        self._entries.pop(key, None)
+        self._entries[key] = entry
+
+
+INDEX = ETagIndex()
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value
+    return None
+
+
+def etag_matches(if_none_match: Optional[bytes], etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for If-None-Match."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.decode("latin-1").split(",")]
+    return "*" in candidates or etag in (c.removeprefix("W/") for c in candidates)
+
+
+def _not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": cache_control}
+    )
+
+
+class HTTPCacheMiddleware:
+    """
+    Adds strong ETags (a hash of the body) and per-route Cache-Control to the
+    public GET routes in POLICIES, and answers If-None-Match with 304.
+
+    A request whose ETag is still current in the ETagIndex gets its 304
+    before the route runs, with no Supabase call or serialisation; otherwise
+    the body is rendered, hashed and compared. Routes may set their own
+    Cache-Control (see IMMUTABLE), which is kept as is.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] != "GET":
+            await self._track_writes(scope, receive, send)
+            return
+        policy = match_policy(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = scope["path"] + "?" + scope.get("query_string", b"").decode("latin-1")
+        versions = VERSIONS.snapshot(policy.tags)
+        if_none_match = _header(scope, b"if-none-match")
+
+        entry = INDEX.get(key)
+        if (
+            entry is not None
+            and entry.versions == versions
+            and time.monotonic() - entry.stored_at
+            < policy.max_age + policy.stale_while_revalidate
+            and etag_matches(if_none_match, entry.etag)
+        ):
+            NOT_MODIFIED.inc(route=policy.template, source="index")
+            response = _not_modified(entry.etag, entry.cache_control)
+            await response(scope, receive, send)
+            return
+
+        start_message = None
+        body = []
+
+        async def buffer(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self._finish(
+                        scope,
+                        receive,
+                        send,
+                        start_message,
+                        b"".join(body),
+                        policy,
+                        key,
+                        versions,
+                        if_none_match,
+                    )
+            else:
+                await send(message)
+
+        await self.app(scope, receive, buffer)
+
+    async def _finish(
+        self, scope, receive, send, start, body, policy, key, versions, if_none_match
+    ):
+        if start["status"] != 200:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = list(start.get("headers", []))
+        existing = {name.lower(): value.decode("latin-1") for name, value in headers}
+        cache_control = existing.get(b"cache-control")
+        if cache_control is None:
+            cache_control = policy.cache_control
+            headers.append((b"cache-control", cache_control.encode()))
+        etag = existing.get(b"etag")
+        if etag is None:
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            headers.append((b"etag", etag.encode()))
+        INDEX.put(key, _Entry(etag, cache_control, versions, time.monotonic()))
+
+        if etag_matches(if_none_match, etag):
+            NOT_MODIFIED.inc(route=policy.template, source="hash")
+            await _not_modified(etag, cache_control)(scope, receive, send)
+            return
+        await send({**start, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _track_writes(self, scope, receive, send):
+        path = scope["path"]
+        tags = ()
+        if scope["method"] not in ("HEAD", "OPTIONS"):
+            for prefix, prefix_tags in WRITE_TAGS.items():
+                if path == prefix or path.startswith(prefix + "/"):
+                    tags = prefix_tags
+                    break
+        if not tags:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            # Bump whatever the status: a failed write may still have landed.
+            if message["type"] == "http.response.start":
+                VERSIONS.bump(*tags)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            VERSIONS.bump(*tags)
+            raise
@@ -0,0 +1,341 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+
+from app.settings import settings
+from utils.metrics import REGISTRY
+from utils.rate_limit import client_identity
+from utils.sqlite import connect
+
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+# A key still marked in progress after this long belongs to a request that
+# died with its worker; the next retry may run it again.
+LOCK_SECONDS = 60.0
+
+IDEMPOTENT_REQUESTS = REGISTRY.counter(
+    "idempotent_requests_total",
+    "Requests carrying an Idempotency-Key, by route and outcome.",
+    labelnames=("route", "outcome"),
+)
+
+
+@dataclass
+class StoredResponse:
+    """The first response for a key; `status` is None while it is running."""
+
+    fingerprint: str
+    status: Optional[int]
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    created_at: float
+
+
+class MemoryResponseStore:
+    """Responses in process memory; retries must reach the same worker."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._responses: Dict[str, StoredResponse] = {}
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """
+        Marks the key in progress and returns None, or returns what is
+        already stored for it (finished, or still running elsewhere).
+        """
+        now = time.time()
+        stored = self._responses.get(key)
+        if stored is not None and _live(stored, now):
+            return stored
+        if len(self._responses) >= self.max_keys:
+            self._responses = {
+                k: r for k, r in self._responses.items() if _live(r, now)
+            }
+        self._responses[key] = StoredResponse(fingerprint, None, [], b"", now)
+        return None
+
+    async def complete(
+        self, key: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes
+    ) -> None:
+        stored = self._responses.get(key)
+        if stored is not None:
+            stored.status, stored.headers, stored.body = status, headers, body
+
+    async def release(self, key: str) -> None:
+        self._responses.pop(key, None)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status INTEGER,
+    headers TEXT NOT NULL DEFAULT '[]',
+    body BLOB NOT NULL DEFAULT x'',
+    created_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteResponseStore:
+    """
+    Responses in a local SQLite file, so a retry landing on another worker
+    of the host is answered too. Each claim is one IMMEDIATE transaction.
+    """
+
+    def __init__(self, path: str, prune_every: int = 1000):
+        self.prune_every = prune_every
+        self._claims = 0
+        self._conn = connect(path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        return await asyncio.to_thread(self._claim, key, fingerprint)
+
+    def _claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT fingerprint, status, headers, body, created_at "
+                    "FROM idempotency_keys WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                stored = _from_row(row) if row else None
+                if stored is not None and _live(stored, now):
+                    self._conn.execute("COMMIT")
+                    return stored
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO idempotency_keys "
+                    "(key, fingerprint, created_at) VALUES (?, ?, ?)",
+                    (key, fingerprint, now),
+                )
+                self._claims += 1
+                if self._claims % self.prune_every == 0:
+                    self._conn.execute(
+                        "DELETE FROM idempotency_keys WHERE created_at < ?",
+                        (now - settings.IDEMPOTENCY_TTL_SECONDS,),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return None
+
+    async def complete(
+        self, key: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes
+    ) -> None:
+        encoded = json.dumps(
+            [[n.decode("latin-1"), v.decode("latin-1")] for n, v in headers]
+        )
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE idempotency_keys SET status = ?, headers = ?, body = ? "
+            "WHERE key = ?",
+            (status, encoded, body, key),
+        )
+
+    async def release(self, key: str) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "DELETE FROM idempotency_keys WHERE key = ? AND status IS NULL",
+            (key,),
+        )
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        with self._lock:
+            self._conn.execute(sql, params)
+
+
+def _from_row(row) -> StoredResponse:
+    headers = [
+        (n.encode("latin-1"), v.encode("latin-1"))
+        for n, v in json.loads(row["headers"])
+    ]
+    return StoredResponse(
+        row["fingerprint"], row["status"], headers, row["body"], row["created_at"]
+    )
+
+
+def _live(stored: StoredResponse, now: float) -> bool:
+    age = now - stored.created_at
+    if stored.status is None:
+        return age < LOCK_SECONDS
+    return age < settings.IDEMPOTENCY_TTL_SECONDS
+
+
+_store = None
+
+
+def get_response_store():
+    global _store
+    if _store is None:
+        if settings.IDEMPOTENCY_BACKEND == "sqlite":
+            _store = SQLiteResponseStore(settings.IDEMPOTENCY_SQLITE_PATH)
+        else:
+            _store = MemoryResponseStore()
+    return _store
+
+
+@lru_cache(maxsize=8)
+def compile_routes(routes: Tuple[str, ...]) -> List[Tuple[str, str, Pattern]]:
+    compiled = []
+    for name in routes:
+        method, _, template = name.partition(" ")
+        compiled.append((name, method.upper(), compile_path(template)[0]))
+    return compiled
+
+
+def match_route(scope) -> Optional[str]:
+    """The IDEMPOTENCY_ROUTES entry matching the request, if any."""
+    for name, method, regex in compile_routes(tuple(settings.IDEMPOTENCY_ROUTES)):
+        if method == scope["method"] and regex.match(scope["path"]):
+            return name
+    return None
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value
+    return None
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+class IdempotencyMiddleware:
+    """
+    Honours an Idempotency-Key header on the IDEMPOTENCY_ROUTES. The first
+    response (below 500) per caller and key is stored, and retries get it
+    replayed with an Idempotent-Replayed header, without the route running
+    again. A retry arriving while the first request is still running on this
+    worker waits for it; on another worker it gets 409. Reusing a key for a
+    different request is refused with 422.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._running: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        route = match_route(scope) if scope["type"] == "http" else None
+        idempotency_key = _header(scope, HEADER) if route else None
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"},
+                status_code=400,
+            )
+            await response(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        fingerprint = hashlib.sha256(
+            b"%s %s\n%s" % (scope["method"].encode(), scope["path"].encode(), body)
+        ).hexdigest()
+        key = f"{client_identity(scope)}|{idempotency_key.decode('latin-1')}"
+
+        # Duplicates on this worker wait for the request ahead of them.
+        while (running := self._running.get(key)) is not None:
+            IDEMPOTENT_REQUESTS.inc(route=route, outcome="coalesced")
+            await asyncio.shield(running)
+        done = asyncio.get_running_loop().create_future()
+        self._running[key] = done
+        try:
+            store = get_response_store()
+            stored = await store.claim(key, fingerprint)
+            if stored is None:
+                await self._run(scope, receive, send, body, store, key, route)
+            else:
+                await self._answer(scope, receive, send, stored, fingerprint, route)
+        finally:
+            del self._running[key]
+            done.set_result(None)
+
+    async def _run(self, scope, receive, send, body, store, key, route):
+        sent = False
+
+        async def replay_body():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        start = None
+        chunks = []
+
+        async def record(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        stored = False
+        try:
+            await self.app(scope, replay_body, record)
+            if start is not None and start["status"] < 500:
+                await store.complete(
+                    key,
+                    start["status"],
+                    list(start.get("headers", [])),
+                    b"".join(chunks),
+                )
+                stored = True
+                IDEMPOTENT_REQUESTS.inc(route=route, outcome="stored")
+        finally:
+            if not stored:
+                # Failed requests may be retried under the same key.
+                await store.release(key)
+
+    async def _answer(self, scope, receive, send, stored, fingerprint, route):
+        if stored.fingerprint != fingerprint:
+            IDEMPOTENT_REQUESTS.inc(route=route, outcome="mismatch")
+            response = JSONResponse(
+                {"detail": "Idempotency-Key was already used for a different request"},
+                status_code=422,
+            )
+        elif stored.status is None:
+            IDEMPOTENT_REQUESTS.inc(route=route, outcome="in_progress")
+            response = JSONResponse(
+                {"detail": "A request with this Idempotency-Key is in progress"},
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )
+        else:
+            IDEMPOTENT_REQUESTS.inc(route=route, outcome="replayed")
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": stored.status,
+                    "headers": stored.headers + [(b"idempotent-replayed", b"true")],
+                }
+            )
+            await send({"type": "http.response.body", "body": stored.body})
+            return
+        await response(scope, receive, send)
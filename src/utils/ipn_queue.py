@@ -0,0 +1,273 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from fastapi import Request
+
+from app.settings import settings
+from utils.logger import get_logger
+from utils.metrics import REGISTRY
+from utils.sqlite import connect
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payment_ipn (
+    tran_id TEXT NOT NULL,
+    val_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    outcome TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (tran_id, val_id)
+);
+CREATE INDEX IF NOT EXISTS payment_ipn_due ON payment_ipn (status, next_attempt_at);
+"""
+
+QUEUED, DONE, FAILED = "queued", "done", "failed"
+
+# Same lease as the other local queues: a batch claimed by a worker that
+# dies mid-validation becomes due again after this long.
+CLAIM_LEASE_SECONDS = 60.0
+MAX_BACKOFF_SECONDS = 300.0
+
+IPN_NOTIFICATIONS = REGISTRY.counter(
+    "payment_ipn_total",
+    "Payment notifications from the gateway, by outcome.",
+    labelnames=("outcome",),
+)
+
+# Takes a batch of notifications and returns, per notification, the payment
+# status it settled on or the exception to retry it for.
+IPNHandler = Callable[[List[Dict[str, Any]]], Awaitable[List[Union[str, Exception]]]]
+
+
+class IPNQueue:
+    """
+    Durable queue of gateway payment notifications (IPNs).
+
+    The IPN route only checks the notification's hash, stores it here and
+    answers; a single validator task claims up to `batch_size` due
+    notifications and hands them to `handler`, which validates them with
+    the gateway and settles the payments. Notifications are keyed by
+    (tran_id, val_id), so the gateway's retries of one we already have are
+    dropped on arrival, and each is settled at most once. Handler failures
+    are retried with backoff up to `max_attempts`; settled notifications
+    are kept for `retention_seconds` to keep recognising retries.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        handler: IPNHandler,
+        batch_size: int = 50,
+        max_attempts: int = 8,
+        retry_base_seconds: float = 5.0,
+        retention_seconds: float = 7 * 24 * 3600.0,
+        poll_interval: float = 1.0,
+    ):
+        self.handler = handler
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+
+        self._conn = connect(path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # --- Producer side ---
+
+    async def submit(self, notification: Dict[str, Any]) -> bool:
+        """Stores the notification and wakes the validator; False for a duplicate."""
+        added = await asyncio.to_thread(self._insert, notification)
+        IPN_NOTIFICATIONS.inc(outcome=QUEUED if added else "duplicate")
+        if added:
+            self._wakeup.set()
+        return added
+
+    def _insert(self, notification: Dict[str, Any]) -> bool:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO payment_ipn (tran_id, val_id, payload, "
+                "status, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(notification.get("tran_id") or ""),
+                    str(notification.get("val_id") or ""),
+                    json.dumps(notification),
+                    QUEUED,
+                    now,
+                    now,
+                    now,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    # --- Consumer side ---
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Notifications still queued are validated by the next start.
+        self._conn.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                handled = await self.run_once()
+            except Exception as e:
+                logger.error("IPN validator loop failed: %s", e)
+                handled = 0
+
+            if handled:
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self) -> int:
+        """Claims and handles one batch. Returns the number of notifications handled."""
+        batch = await asyncio.to_thread(self._claim)
+        if not batch:
+            return 0
+
+        try:
+            results = await self.handler([json.loads(r["payload"]) for r in batch])
+        except Exception as e:
+            logger.warning("IPN batch of %s failed: %s", len(batch), e)
+            results = [e] * len(batch)
+
+        await asyncio.to_thread(self._settle, batch, results)
+        return len(batch)
+
+    def _claim(self) -> List[Any]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT tran_id, val_id, payload, attempts FROM payment_ipn "
+                    "WHERE status = ? AND next_attempt_at <= ? "
+                    "ORDER BY created_at LIMIT ?",
+                    (QUEUED, now, self.batch_size),
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE payment_ipn SET next_attempt_at = ? "
+                        "WHERE tran_id = ? AND val_id = ?",
+                        [
+                            (now + CLAIM_LEASE_SECONDS, r["tran_id"], r["val_id"])
+                            for r in rows
+                        ],
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _settle(self, batch: List[Any], results: List[Union[str, Exception]]) -> None:
+        now = time.time()
+        done, retry, dead = [], [], []
+        for record, result in zip(batch, results):
+            key = (record["tran_id"], record["val_id"])
+            if not isinstance(result, Exception):
+                done.append((DONE, str(result), now, *key))
+                continue
+            attempts = record["attempts"] + 1
+            if attempts >= self.max_attempts:
+                dead.append((FAILED, attempts, str(result), now, *key))
+            else:
+                delay = min(
+                    self.retry_base_seconds * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS
+                )
+                delay += random.uniform(0, self.retry_base_seconds)
+                retry.append((attempts, now + delay, str(result), now, *key))
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE payment_ipn SET status = ?, outcome = ?, updated_at = ? "
+                    "WHERE tran_id = ? AND val_id = ?",
+                    done,
+                )
+                self._conn.executemany(
+                    "UPDATE payment_ipn SET attempts = ?, next_attempt_at = ?, "
+                    "last_error = ?, updated_at = ? WHERE tran_id = ? AND val_id = ?",
+                    retry,
+                )
+                self._conn.executemany(
+                    "UPDATE payment_ipn SET status = ?, attempts = ?, "
+                    "last_error = ?, updated_at = ? WHERE tran_id = ? AND val_id = ?",
+                    dead,
+                )
+                self._conn.execute(
+                    "DELETE FROM payment_ipn WHERE status != ? AND updated_at < ?",
+                    (QUEUED, now - self.retention_seconds),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        IPN_NOTIFICATIONS.inc(len(done), outcome=DONE)
+        if dead:
+            IPN_NOTIFICATIONS.inc(len(dead), outcome=FAILED)
+            logger.error(
+                "Gave up on %s payment notifications: %s", len(dead), dead[0][2]
+            )
+
+    # --- Introspection ---
+
+    def outcome(self, tran_id: str, val_id: str) -> Optional[str]:
+        """The payment status a notification settled on, if it has been handled."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT outcome FROM payment_ipn "
+                "WHERE tran_id = ? AND val_id = ? AND status = ?",
+                (tran_id, val_id, DONE),
+            ).fetchone()
+        return row["outcome"] if row else None
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM payment_ipn WHERE status = ?", (QUEUED,)
+            ).fetchone()[0]
+
+
+def create_ipn_queue(handler: IPNHandler) -> IPNQueue:
+    return IPNQueue(
+        path=settings.IPN_QUEUE_PATH,
+        handler=handler,
+        batch_size=settings.IPN_BATCH_SIZE,
+        max_attempts=settings.IPN_MAX_ATTEMPTS,
+    )
+
+
+def get_ipn_queue(request: Request) -> IPNQueue:
+    return request.app.state.ipn_queue
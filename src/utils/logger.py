@@ -1,24 +1,146 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import time
+from typing import Optional
 
 import colorlog
 
-logger = logging.getLogger("app_logger")
-logger.setLevel(logging.INFO)
+from app.settings import settings
 
-console_handler = colorlog.StreamHandler()
+ROOT_LOGGER = "app_logger"
 
-console_formatter = colorlog.ColoredFormatter(
-    "%(log_color)s%(levelname)s: %(message)s", datefmt="%Y-%m-%d %H:%M;%S", reset=True
-)
-console_handler.setFormatter(console_formatter)
+# Attributes every LogRecord has; anything else was passed through `extra=`
+# and is emitted as a structured field.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
 
-file_handler = logging.FileHandler("app.log")
-file_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(file_formatter)
 
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+class JSONFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
 
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class RotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotates when the file grows past `max_bytes` or when `interval_seconds`
+    have passed since the last rotation, whichever comes first.
+    """
+
+    def __init__(
+        self, filename: str, max_bytes: int, backup_count: int, interval_seconds: int
+    ):
+        super().__init__(
+            filename,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        self.interval_seconds = interval_seconds
+        self.rollover_at = time.time() + interval_seconds
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if (
+            self.interval_seconds > 0
+            and time.time() >= self.rollover_at
+            and os.path.exists(self.baseFilename)
+            and os.path.getsize(self.baseFilename) > 0
+        ):
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval_seconds
+
+
+def _console_handler() -> logging.Handler:
+    if settings.LOG_FORMAT == "json":
+        handler = logging.StreamHandler()
+        handler.setFormatter(JSONFormatter())
+        return handler
+
+    handler = colorlog.StreamHandler()
+    handler.setFormatter(
+        colorlog.ColoredFormatter(
+            "%(log_color)s%(levelname)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M;%S",
+            reset=True,
+        )
+    )
+    return handler
+
+
+def _file_handler() -> logging.Handler:
+    handler = RotatingFileHandler(
+        settings.LOG_FILE,
+        max_bytes=settings.LOG_MAX_BYTES,
+        backup_count=settings.LOG_BACKUP_COUNT,
+        interval_seconds=settings.LOG_ROTATE_INTERVAL_SECONDS,
+    )
+    handler.setFormatter(JSONFormatter())
+    return handler
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Returns a child of the application logger for a module, e.g.
+    `get_logger(__name__)`. Its level can be overridden through LOG_LEVELS.
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def setup_logging() -> None:
+    """Starts the writer thread, unless it is already running."""
+    global _listener
+    if _listener is None:
+        _listener = logging.handlers.QueueListener(
+            _log_queue, *_handlers, respect_handler_level=True
+        )
+        _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flushes queued records and stops the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# Request handlers only put records on an in-memory queue; a background
+# thread owned by the listener does the console and file I/O.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_handlers = [_console_handler()]
+if settings.LOG_FILE:
+    _handlers.append(_file_handler())
+_listener: Optional[logging.handlers.QueueListener] = None
+
+logger = logging.getLogger(ROOT_LOGGER)
+logger.setLevel(settings.LOG_LEVEL.upper())
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
 logger.propagate = False
 
+for _module, _level in settings.LOG_LEVELS.items():
+    get_logger(_module).setLevel(_level.upper())
+
+setup_logging()
+atexit.register(shutdown_logging)
+
 logger.info("Logger initialized successfully")
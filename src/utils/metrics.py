@@ -0,0 +1,313 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not labelnames:
+        return ""
+    pairs = []
+    for name, value in zip(labelnames, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in items
+        ]
+
+
+class Gauge:
+    """A gauge whose value is read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        labelnames: Iterable[str] = (),
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in self.callback().items()
+        ]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+        labelnames: Iterable[str] = (),
+    ):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # label values -> (per-bucket counts, sum, count)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels[n]) for n in self.labelnames))
+        return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._series.items()]
+        names = self.labelnames + ("le",)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(names, key + (f"{bound:g}",))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(names, key + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+        labelnames: Iterable[str] = (),
+    ) -> Histogram:
+        return self.register(Histogram(name, help, buckets, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        labelnames: Iterable[str] = (),
+    ) -> Gauge:
+        return self.register(Gauge(name, help, callback, labelnames))
+
+    def render(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Metrics are kept per process; with several workers, scrape each one.
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Time spent handling a request.",
+    labelnames=("method", "route", "status"),
+)
+RESPONSE_SIZE = REGISTRY.histogram(
+    "http_response_size_bytes",
+    "Size of the response body.",
+    buckets=SIZE_BUCKETS,
+    labelnames=("method", "route"),
+)
+DB_CALL_LATENCY = REGISTRY.histogram(
+    "db_call_duration_seconds",
+    "Time spent in a single Supabase table, rpc or storage call.",
+    labelnames=("kind", "target", "operation"),
+)
+DB_CALLS_PER_REQUEST = REGISTRY.histogram(
+    "db_calls_per_request",
+    "Number of Supabase calls issued while handling one request.",
+    buckets=COUNT_BUCKETS,
+    labelnames=("method", "route"),
+)
+
+
+# --- Per-request call tracking ---
+
+
+@dataclass
+class DBCall:
+    kind: str  # "table", "rpc" or "storage"
+    target: str  # table, function or bucket name
+    operation: str  # select / insert / update / ... / create_signed_url
+    shape: str  # operation plus filtered columns; identical for N+1 loops
+    duration: float
+
+
+@dataclass
+class RequestStats:
+    method: str = ""
+    path: str = ""
+    calls: List[DBCall] = field(default_factory=list)
+
+    def record(self, call: DBCall) -> None:
+        self.calls.append(call)
+
+    def total(self, kind: Optional[str] = None) -> Tuple[int, float]:
+        calls = [c for c in self.calls if kind is None or c.kind == kind]
+        return len(calls), sum(c.duration for c in calls)
+
+
+current_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_stats", default=None
+)
+
+# Callbacks invoked with (route, stats) after every request; used by the
+# query budget checks in tests.
+_observers: List[Callable[[str, RequestStats], None]] = []
+
+
+@contextmanager
+def record_requests() -> Iterator[List[Tuple[str, RequestStats]]]:
+    """Collects (route, stats) for every request completed inside the block."""
+    recorded: List[Tuple[str, RequestStats]] = []
+    observer = lambda route, stats: recorded.append((route, stats))  # noqa: E731
+    _observers.append(observer)
+    try:
+        yield recorded
+    finally:
+        _observers.remove(observer)
+
+
+def record_db_call(
+    kind: str, target: str, operation: str, shape: str, duration: float
+) -> None:
+    DB_CALL_LATENCY.observe(duration, kind=kind, target=target, operation=operation)
+    stats = current_stats.get()
+    if stats is not None:
+        stats.record(DBCall(kind, target, operation, shape, duration))
+
+
+def route_name(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _server_timing(stats: RequestStats, elapsed: float) -> str:
+    parts = []
+    for kind in ("table", "rpc", "storage", "postgres"):
+        count, duration = stats.total(kind)
+        if count:
+            name = {"table": "db", "postgres": "pg"}.get(kind, kind)
+            parts.append(f'{name};dur={duration * 1000:.1f};desc="{count} calls"')
+    parts.append(f"app;dur={elapsed * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """
+    Records per-route latency, response size and Supabase calls per request,
+    and reports the request's time breakdown in a Server-Timing header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stats = RequestStats(method=scope["method"], path=scope["path"])
+        token = current_stats.set(stats)
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                timing = _server_timing(stats, time.perf_counter() - start)
+                headers.append((b"server-timing", timing.encode()))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_stats.reset(token)
+            route = route_name(scope)
+            method = scope["method"]
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                method=method,
+                route=route,
+                status=status_code,
+            )
+            RESPONSE_SIZE.observe(size, method=method, route=route)
+            DB_CALLS_PER_REQUEST.observe(len(stats.calls), method=method, route=route)
+            for observer in list(_observers):
+                observer(route, stats)
@@ -0,0 +1,368 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+
+from app.settings import settings
+from utils.logger import get_logger
+from utils.metrics import REGISTRY
+from utils.sqlite import connect
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS order_intake (
+    order_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    claim TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS order_intake_due
+    ON order_intake (status, next_attempt_at);
+"""
+
+QUEUED, CONFIRMED, FAILED = "queued", "confirmed", "failed"
+
+# Same lease as the email outbox: a batch claimed by a worker that dies
+# mid-insert becomes due again after this long.
+CLAIM_LEASE_SECONDS = 60.0
+MAX_BACKOFF_SECONDS = 60.0
+
+ORDER_INTAKE = REGISTRY.counter(
+    "order_intake_total",
+    "Orders through the intake queue, by outcome.",
+    labelnames=("outcome",),
+)
+
+OrderWriter = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+# Gets the stock claims (as passed to `submit`) of orders marked failed
+ClaimReleaser = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+class OrderWriteError(Exception):
+    """Raised by the writer when orders cannot be inserted. Retryable unless `permanent`."""
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+class OrderQueue:
+    """
+    Durable intake queue for new orders.
+
+    Requests store the validated order row in a local SQLite file and return
+    at once; a single writer task claims up to `batch_size` queued orders and
+    hands them to `writer` as one multi-row insert. The writer must be
+    idempotent on order_id, since a batch whose ack is lost is written again.
+    When a batch fails, its orders are retried one by one so a bad row does
+    not hold back the others; failures back off and are marked failed after
+    `max_attempts`. The stock claim stored with a failed order is handed to
+    `release`. Settled orders stay queryable for `retention_seconds`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        writer: OrderWriter,
+        batch_size: int = 200,
+        linger_seconds: float = 0.05,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 1.0,
+        retention_seconds: float = 3600.0,
+        poll_interval: float = 1.0,
+        release: Optional[ClaimReleaser] = None,
+    ):
+        self.writer = writer
+        self.release = release
+        self.batch_size = batch_size
+        self.linger_seconds = linger_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+
+        self._conn = connect(path)
+        self._conn.executescript(SCHEMA)
+        columns = {
+            r["name"] for r in self._conn.execute("PRAGMA table_info(order_intake)")
+        }
+        if "claim" not in columns:
+            # Queue files created before claims were stored
+            self._conn.execute("ALTER TABLE order_intake ADD COLUMN claim TEXT")
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        # Replaced after every settled batch; waiters hold the previous one.
+        self._settled = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # --- Producer side ---
+
+    async def submit(
+        self,
+        order_id: str,
+        user_id: str,
+        row: Dict[str, Any],
+        claim: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Stores the order row, and the stock it claimed if any, and wakes the
+        writer.
+        """
+        await asyncio.to_thread(self._insert, order_id, user_id, row, claim)
+        ORDER_INTAKE.inc(outcome=QUEUED)
+        self._wakeup.set()
+
+    def _insert(
+        self,
+        order_id: str,
+        user_id: str,
+        row: Dict[str, Any],
+        claim: Optional[Dict[str, Any]],
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO order_intake (order_id, user_id, payload, claim, "
+                "status, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    order_id,
+                    user_id,
+                    json.dumps(row),
+                    json.dumps(claim) if claim is not None else None,
+                    QUEUED,
+                    now,
+                    now,
+                    now,
+                ),
+            )
+
+    # --- Consumer side ---
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Orders still queued are written by the next start.
+        self._conn.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                written = await self.run_once()
+            except Exception as e:
+                logger.error("Order writer loop failed: %s", e)
+                written = 0
+
+            if written:
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                continue
+            # Let the rest of a burst arrive so it is written as one batch.
+            await asyncio.sleep(self.linger_seconds)
+
+    async def run_once(self) -> int:
+        """Claims and writes one batch. Returns the number of orders handled."""
+        batch = await asyncio.to_thread(self._claim)
+        if not batch:
+            return 0
+
+        rows = [json.loads(r["payload"]) for r in batch]
+        try:
+            await self.writer(rows)
+            done, failed = batch, []
+        except Exception as e:
+            if len(batch) == 1:
+                done, failed = [], [(batch[0], e)]
+            else:
+                logger.warning(
+                    "Order batch of %s failed, retrying one by one: %s", len(batch), e
+                )
+                done, failed = await self._write_singly(batch, rows)
+
+        dead = await asyncio.to_thread(self._settle, done, failed)
+        ORDER_INTAKE.inc(len(done), outcome=CONFIRMED)
+        await self._release_claims(dead)
+        self._settled.set()
+        self._settled = asyncio.Event()
+        return len(batch)
+
+    async def _write_singly(
+        self, batch: List[Any], rows: List[Dict[str, Any]]
+    ) -> Tuple[List[Any], List[Tuple[Any, Exception]]]:
+        done, failed = [], []
+        for record, row in zip(batch, rows):
+            try:
+                await self.writer([row])
+                done.append(record)
+            except Exception as e:
+                failed.append((record, e))
+        return done, failed
+
+    def _claim(self) -> List[Any]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT order_id, payload, claim, attempts FROM order_intake "
+                    "WHERE status = ? AND next_attempt_at <= ? "
+                    "ORDER BY created_at LIMIT ?",
+                    (QUEUED, now, self.batch_size),
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE order_intake SET next_attempt_at = ? "
+                        "WHERE order_id = ?",
+                        [(now + CLAIM_LEASE_SECONDS, r["order_id"]) for r in rows],
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _settle(
+        self, done: List[Any], failed: List[Tuple[Any, Exception]]
+    ) -> List[Any]:
+        """Records the batch's outcome; returns the orders marked failed."""
+        now = time.time()
+        retry, dead, dead_records = [], [], []
+        for record, error in failed:
+            attempts = record["attempts"] + 1
+            permanent = isinstance(error, OrderWriteError) and error.permanent
+            if permanent or attempts >= self.max_attempts:
+                dead.append((FAILED, attempts, str(error), now, record["order_id"]))
+                dead_records.append(record)
+            else:
+                delay = min(
+                    self.retry_base_seconds * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS
+                )
+                delay += random.uniform(0, self.retry_base_seconds)
+                retry.append(
+                    (attempts, now + delay, str(error), now, record["order_id"])
+                )
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE order_intake SET status = ?, updated_at = ? "
+                    "WHERE order_id = ?",
+                    [(CONFIRMED, now, r["order_id"]) for r in done],
+                )
+                self._conn.executemany(
+                    "UPDATE order_intake SET attempts = ?, next_attempt_at = ?, "
+                    "last_error = ?, updated_at = ? WHERE order_id = ?",
+                    retry,
+                )
+                self._conn.executemany(
+                    "UPDATE order_intake SET status = ?, attempts = ?, "
+                    "last_error = ?, updated_at = ? WHERE order_id = ?",
+                    dead,
+                )
+                self._conn.execute(
+                    "DELETE FROM order_intake WHERE status != ? AND updated_at < ?",
+                    (QUEUED, now - self.retention_seconds),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if dead:
+            ORDER_INTAKE.inc(len(dead), outcome=FAILED)
+            logger.error("Could not write %s queued orders: %s", len(dead), dead[0][2])
+        return dead_records
+
+    async def _release_claims(self, dead: List[Any]) -> None:
+        """Gives back the stock claimed by orders that will never be written."""
+        claims = [json.loads(r["claim"]) for r in dead if r["claim"]]
+        if not claims or self.release is None:
+            return
+        try:
+            await self.release(claims)
+        except Exception as e:
+            logger.error(
+                "Failed to release stock of %s failed orders: %s", len(claims), e
+            )
+
+    # --- Introspection ---
+
+    def status(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """The order's intake record, or None once it has been pruned (or never queued)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT order_id, user_id, status, last_error FROM order_intake "
+                "WHERE order_id = ?",
+                (order_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    async def wait(self, order_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Returns the order's status once it is no longer queued, or when
+        `timeout` runs out. Batches written by another worker sharing the
+        file are noticed within `poll_interval`.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            settled = self._settled
+            record = await asyncio.to_thread(self.status, order_id)
+            remaining = deadline - time.monotonic()
+            if record is None or record["status"] != QUEUED or remaining <= 0:
+                return record
+            try:
+                await asyncio.wait_for(
+                    settled.wait(), min(remaining, self.poll_interval)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM order_intake WHERE status = ?", (QUEUED,)
+            ).fetchone()[0]
+
+
+def create_order_queue(
+    writer: OrderWriter, release: Optional[ClaimReleaser] = None
+) -> Optional[OrderQueue]:
+    """The intake queue, or None when ORDER_INTAKE_MODE is "direct"."""
+    if settings.ORDER_INTAKE_MODE != "queued":
+        return None
+    return OrderQueue(
+        path=settings.ORDER_QUEUE_PATH,
+        writer=writer,
+        batch_size=settings.ORDER_QUEUE_BATCH_SIZE,
+        linger_seconds=settings.ORDER_QUEUE_LINGER_SECONDS,
+        max_attempts=settings.ORDER_QUEUE_MAX_ATTEMPTS,
+        release=release,
+    )
+
+
+def get_order_queue(request: Request) -> Optional[OrderQueue]:
+    return getattr(request.app.state, "order_queue", None)
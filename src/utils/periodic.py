@@ -0,0 +1,60 @@
+import asyncio
+import random
+from typing import Awaitable, Callable, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PeriodicTask:
+    """
+    Runs `func` every `interval` seconds on the event loop until stopped.
+
+    Each wait is stretched by up to `jitter` (a fraction of the interval) so
+    several workers started together do not all run the job at once. A
+    failing run is logged and retried on the next tick. Jobs must be
+    idempotent: every worker runs its own copy.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        func: Callable[[], Awaitable[object]],
+        jitter: float = 0.1,
+        run_at_start: bool = False,
+    ):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.jitter = jitter
+        self.run_at_start = run_at_start
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> object:
+        try:
+            return await self.func()
+        except Exception:
+            logger.exception("Periodic task %s failed", self.name)
+            return None
+
+    async def _run(self) -> None:
+        if self.run_at_start:
+            await self.run_once()
+        while True:
+            await asyncio.sleep(self.interval * (1 + random.uniform(0, self.jitter)))
+            await self.run_once()
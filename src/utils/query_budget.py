@@ -0,0 +1,124 @@
+import json
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List
+
+from app.settings import settings
+from utils.logger import get_logger
+from utils.metrics import RequestStats, current_stats, record_requests, route_name
+
+logger = get_logger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@dataclass
+class QueryBudget:
+    """
+    Per-request limits on Supabase calls. `max_repeats` bounds how often the
+    same query shape (table, operation and filtered columns) may run in one
+    request; going over it almost always means a per-row loop (N+1).
+    """
+
+    max_calls: int
+    max_repeats: int
+
+    def check(self, stats: RequestStats) -> List[str]:
+        violations = []
+        if len(stats.calls) > self.max_calls:
+            violations.append(
+                f"{len(stats.calls)} Supabase calls (budget {self.max_calls})"
+            )
+        shapes = Counter(call.shape for call in stats.calls)
+        for shape, count in shapes.most_common():
+            if count <= self.max_repeats:
+                break
+            violations.append(
+                f"'{shape}' ran {count} times (max {self.max_repeats}, likely N+1)"
+            )
+        return violations
+
+
+class QueryBudgetMiddleware:
+    """
+    Development aid that checks each request against the configured query
+    budget. QUERY_BUDGET_MODE=log logs violations; =raise replaces the
+    response with a 500 describing them. Must run inside MetricsMiddleware,
+    which collects the calls.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        mode = settings.QUERY_BUDGET_MODE
+        if scope["type"] != "http" or mode == "off":
+            await self.app(scope, receive, send)
+            return
+
+        budget = QueryBudget(
+            max_calls=settings.QUERY_BUDGET_MAX_CALLS,
+            max_repeats=settings.QUERY_BUDGET_MAX_REPEATS,
+        )
+        replaced = False
+
+        async def send_wrapper(message):
+            nonlocal replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start":
+                stats = current_stats.get()
+                violations = budget.check(stats) if stats else []
+                if violations:
+                    route = route_name(scope)
+                    logger.warning(
+                        "Query budget exceeded on %s %s: %s",
+                        scope["method"],
+                        route,
+                        "; ".join(violations),
+                        extra={"route": route, "violations": violations},
+                    )
+                    if mode == "raise":
+                        replaced = True
+                        body = json.dumps(
+                            {"detail": "Query budget exceeded", "violations": violations}
+                        ).encode()
+                        await send(
+                            {
+                                "type": "http.response.start",
+                                "status": 500,
+                                "headers": [
+                                    (b"content-type", b"application/json"),
+                                    (b"content-length", str(len(body)).encode()),
+                                ],
+                            }
+                        )
+                        await send({"type": "http.response.body", "body": body})
+                        return
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+@contextmanager
+def assert_query_budget(max_calls: int, max_repeats: int = 1) -> Iterator[list]:
+    """
+    Fails if any request completed inside the block goes over the budget:
+
+        with assert_query_budget(max_calls=3):
+            await client.get("/menu/")
+    """
+    budget = QueryBudget(max_calls=max_calls, max_repeats=max_repeats)
+    with record_requests() as recorded:
+        yield recorded
+
+    failures = []
+    for route, stats in recorded:
+        violations = budget.check(stats)
+        if violations:
+            failures.append(f"{stats.method} {route}: {'; '.join(violations)}")
+    if failures:
+        raise QueryBudgetExceeded("\n".join(failures))
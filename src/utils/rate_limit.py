@@ -0,0 +1,302 @@
+import asyncio
+import math
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from jose import JWTError, jwt
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+
+from app.settings import settings
+from utils.logger import get_logger
+from utils.metrics import REGISTRY
+from utils.sqlite import connect
+from utils.token import ALGORITHM, SECRET_KEY
+
+logger = get_logger(__name__)
+
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+# Health check and scrapes must keep working while the API is overloaded.
+EXEMPT_PATHS = {"/", "/metrics"}
+# Buckets untouched for this long are full again and can be forgotten.
+IDLE_SECONDS = 3600.0
+
+REJECTED = REGISTRY.counter(
+    "http_requests_rejected_total",
+    "Requests refused before reaching a route, by reason.",
+    labelnames=("reason", "route"),
+)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A bucket of `capacity` tokens refilled at `rate` tokens per second."""
+
+    capacity: float
+    rate: float
+
+
+@lru_cache(maxsize=None)
+def parse_rule(value: str) -> Rule:
+    """Parses "<requests>/<second|minute|hour>", e.g. "10/minute"."""
+    count, _, period = value.partition("/")
+    if period not in PERIODS or not count.strip().isdigit() or int(count) < 1:
+        raise ValueError(f"Invalid rate limit {value!r}, expected e.g. '10/minute'")
+    return Rule(capacity=float(count), rate=int(count) / PERIODS[period])
+
+
+def _refill(tokens: float, updated: float, rule: Rule, now: float) -> float:
+    return min(rule.capacity, tokens + max(0.0, now - updated) * rule.rate)
+
+
+class MemoryBucketStore:
+    """Buckets in process memory; each worker enforces its own limits."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def take(self, key: str, rule: Rule) -> float:
+        """Takes one token; returns 0, or the seconds until one is available."""
+        now = time.monotonic()
+        if len(self._buckets) >= self.max_keys:
+            self._buckets = {
+                k: b for k, b in self._buckets.items() if now - b[1] < IDLE_SECONDS
+            }
+        tokens, updated = self._buckets.get(key, (rule.capacity, now))
+        tokens = _refill(tokens, updated, rule, now)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / rule.rate
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteBucketStore:
+    """
+    Buckets in a local SQLite file, so every worker on the host draws from
+    the same buckets. Each take is one short IMMEDIATE transaction.
+    """
+
+    def __init__(self, path: str, prune_every: int = 1000):
+        self.prune_every = prune_every
+        self._takes = 0
+        self._conn = connect(path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, rule: Rule) -> float:
+        return await asyncio.to_thread(self._take, key, rule)
+
+    def _take(self, key: str, rule: Rule) -> float:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                tokens = (
+                    _refill(row["tokens"], row["updated_at"], rule, now)
+                    if row
+                    else rule.capacity
+                )
+                allowed = tokens >= 1
+                self._conn.execute(
+                    "INSERT INTO rate_limit_buckets (key, tokens, updated_at) "
+                    "VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "tokens = excluded.tokens, updated_at = excluded.updated_at",
+                    (key, tokens - 1 if allowed else tokens, now),
+                )
+                self._takes += 1
+                if self._takes % self.prune_every == 0:
+                    self._conn.execute(
+                        "DELETE FROM rate_limit_buckets WHERE updated_at < ?",
+                        (now - IDLE_SECONDS,),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return 0.0 if allowed else (1 - tokens) / rule.rate
+
+
+_store = None
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        if settings.RATE_LIMIT_BACKEND == "sqlite":
+            _store = SQLiteBucketStore(settings.RATE_LIMIT_SQLITE_PATH)
+        else:
+            _store = MemoryBucketStore()
+    return _store
+
+
+class LoadMonitor:
+    """
+    Tracks requests in flight and event-loop lag, sampled by a background
+    task as the overshoot of a short sleep. A lagging loop means every
+    request is already waiting on CPU; admitting more only raises p99.
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.in_flight = 0
+        self.loop_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            # Jump to spikes, decay slowly, so one quick sample cannot hide them.
+            self.loop_lag = max(lag, self.loop_lag * 0.5)
+
+    def overloaded(self) -> Optional[str]:
+        if 0 < settings.SHED_MAX_IN_FLIGHT <= self.in_flight:
+            return "in_flight"
+        if 0 < settings.SHED_MAX_LOOP_LAG_MS <= self.loop_lag * 1000:
+            return "loop_lag"
+        return None
+
+
+LOAD = LoadMonitor()
+
+REGISTRY.gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled by this worker.",
+    lambda: {(): LOAD.in_flight},
+)
+REGISTRY.gauge(
+    "event_loop_lag_seconds",
+    "Recent peak event-loop lag of this worker.",
+    lambda: {(): LOAD.loop_lag},
+)
+
+
+def client_identity(scope) -> str:
+    """The caller's user or vendor id from a valid bearer token, else its IP."""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                break
+            try:
+                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            except JWTError:
+                break
+            if payload.get("vendor_id"):
+                return f"vendor:{payload['vendor_id']}"
+            if payload.get("user_id"):
+                return f"user:{payload['user_id']}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+@lru_cache(maxsize=8)
+def compile_rules(
+    limits: Tuple[Tuple[str, str], ...],
+) -> List[Tuple[str, str, Pattern, Rule]]:
+    """(name, method, path regex, rule) for every route-specific limit."""
+    compiled = []
+    for name, limit in limits:
+        if name == "default":
+            continue
+        method, _, template = name.partition(" ")
+        regex, _, _ = compile_path(template)
+        compiled.append((name, method.upper(), regex, parse_rule(limit)))
+    return compiled
+
+
+def match_rule(scope) -> Optional[Tuple[str, Rule]]:
+    """The first configured limit whose method and path template match."""
+    limits = settings.RATE_LIMITS
+    for name, method, regex, rule in compile_rules(tuple(limits.items())):
+        if method == scope["method"] and regex.match(scope["path"]):
+            return name, rule
+    if limits.get("default"):
+        return "default", parse_rule(limits["default"])
+    return None
+
+
+def _rejection(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class RateLimitMiddleware:
+    """
+    Sheds load with a 503 while the worker is overloaded, then applies the
+    first RATE_LIMITS entry matching the request (falling back to "default")
+    to the calling user, vendor or IP, answering 429 when its bucket is empty.
+    CORS preflights (OPTIONS) do not take a token. CORSMiddleware must wrap
+    this middleware so browsers can read the 429/503 and their Retry-After.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        reason = LOAD.overloaded()
+        if reason is not None:
+            REJECTED.inc(reason=reason, route="*")
+            logger.warning("Shedding %s %s: %s", scope["method"], scope["path"], reason)
+            response = _rejection(503, "Server is busy, please retry shortly", 1)
+            await response(scope, receive, send)
+            return
+
+        matched = match_rule(scope) if settings.RATE_LIMIT_ENABLED else None
+        # CORS preflights are not charged, or every cross-origin write would
+        # cost two tokens.
+        if matched is not None and scope["method"] != "OPTIONS":
+            name, rule = matched
+            key = f"{name}|{client_identity(scope)}"
+            retry_after = await get_bucket_store().take(key, rule)
+            if retry_after > 0:
+                REJECTED.inc(reason="rate_limited", route=name)
+                response = _rejection(429, "Too many requests", retry_after)
+                await response(scope, receive, send)
+                return
+
+        LOAD.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            LOAD.in_flight -= 1
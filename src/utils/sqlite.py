@@ -0,0 +1,18 @@
+import sqlite3
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Opens a SQLite connection tuned for a small local queue store.
+
+    WAL mode lets several workers read while one writes, and the busy
+    timeout makes concurrent writers wait instead of failing immediately.
+    """
+    conn = sqlite3.connect(
+        path, timeout=30, isolation_level=None, check_same_thread=False
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn